@@ -0,0 +1,62 @@
+"""API routes for analytics over the scraped review/post archive."""
+
+from fastapi import APIRouter, Depends, HTTPException
+from typing import Literal, Optional
+from datetime import date
+import asyncio
+import logging
+
+from services.auth import get_current_user_id
+from services.review_archive import rating_histogram, volume_over_time, top_terms
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+def _check_range(since: Optional[date], until: Optional[date]) -> None:
+    if since and until and since > until:
+        raise HTTPException(status_code=400, detail="'since' must be on or before 'until'")
+
+
+@router.get("/ratings")
+async def get_rating_histogram(
+    source: Optional[str] = None,
+    app_id: Optional[str] = None,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    user_id: str = Depends(get_current_user_id),
+):
+    """Star-rating histogram of archived store reviews."""
+    _check_range(since, until)
+    histogram = await asyncio.to_thread(rating_histogram, source, since, until, app_ids=[app_id] if app_id else None)
+    return {"histogram": histogram, "total": sum(histogram.values())}
+
+
+@router.get("/volume")
+async def get_volume(
+    kind: Optional[Literal["review", "post"]] = None,
+    source: Optional[str] = None,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    user_id: str = Depends(get_current_user_id),
+):
+    """Archived reviews/posts per scrape date and source."""
+    _check_range(since, until)
+    return {"volume": await asyncio.to_thread(volume_over_time, kind, source, since, until)}
+
+
+@router.get("/terms")
+async def get_top_terms(
+    kind: Optional[Literal["review", "post"]] = None,
+    source: Optional[str] = None,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    limit: int = 20,
+    user_id: str = Depends(get_current_user_id),
+):
+    """Most frequent terms across archived content."""
+    _check_range(since, until)
+    if not 1 <= limit <= 200:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 200")
+    return {"terms": await asyncio.to_thread(top_terms, kind, source, since, until, limit)}
@@ -3,7 +3,6 @@
 from fastapi import APIRouter, Depends, HTTPException, Header
 from pydantic import BaseModel, field_validator
 from typing import List, Literal, Optional
-from concurrent.futures import ThreadPoolExecutor
 import asyncio
 import json
 import logging
@@ -25,32 +24,51 @@ from services.research_db import (
     get_latest_job_for_topic,
     list_jobs_for_topic,
 )
-from services.research_pipeline import run_research_pipeline
+from services.research_pipeline import run_research_pipeline_async
 from services.auth import get_current_user_id
-from services.research_scheduler import schedule_topic, unschedule_topic
+from services.research_scheduler import schedule_topic, unschedule_topic, RESEARCH_BATCH_MODE
+from services.gemini_batch import get_gemini_batcher
+from services.llm_scheduler import Priority, llm_priority
+from services.job_checkpoints import resume_orphaned_jobs
 from services.research_db import get_research_report as _get_report_db
 
 logger = logging.getLogger(__name__)
 
-_executor = ThreadPoolExecutor(max_workers=2)
+# Strong references to running pipelines; the loop only keeps weak ones.
+_background_tasks: set[asyncio.Task] = set()
 
 router = APIRouter()
 
 
-def _run_pipeline_safe(domain: str, keywords: list, interests: list, topic_id: str, user_id: str = "") -> None:
-    """Wrapper that catches and logs pipeline errors (for fire-and-forget calls)."""
+async def _run_pipeline_safe(
+    domain: str, keywords: list, interests: list, topic_id: str, user_id: str = "", scheduled_run: bool = False,
+) -> None:
+    """Wrapper that catches and logs pipeline errors (for fire-and-forget calls).
+
+    A *scheduled_run* yields Gemini capacity to interactive requests and, in
+    RESEARCH_BATCH_MODE, runs its agents through Gemini batch jobs.
+    """
     try:
-        run_research_pipeline(
-            domain=domain,
-            keywords=keywords,
-            interests=interests,
-            topic_id=topic_id,
-            user_id=user_id,
-        )
+        with llm_priority(Priority.SCHEDULED if scheduled_run else Priority.INTERACTIVE):
+            await run_research_pipeline_async(
+                domain=domain,
+                keywords=keywords,
+                interests=interests,
+                topic_id=topic_id,
+                user_id=user_id,
+                batcher=get_gemini_batcher() if scheduled_run and RESEARCH_BATCH_MODE else None,
+            )
     except Exception as e:
         logger.error(f"Background research pipeline failed for topic {topic_id}: {e}", exc_info=True)
 
 
+def _start_pipeline(**kwargs) -> None:
+    """Run the research pipeline in the background on the server's event loop."""
+    task = asyncio.get_running_loop().create_task(_run_pipeline_safe(**kwargs))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
 _VALID_DOMAINS = Literal["apps", "saas", "hardware", "fintech", "general"]
 
 # Regex patterns for valid schedule_cron strings
@@ -144,16 +162,12 @@ async def create_topic(request: CreateTopicRequest, user_id: str = Depends(get_c
         schedule_topic(saved_topic)
 
     if request.start_immediately and topic_id:
-        loop = asyncio.get_running_loop()
-        loop.run_in_executor(
-            _executor,
-            lambda: _run_pipeline_safe(
-                domain=request.domain,
-                keywords=list(request.keywords),
-                interests=list(request.interests),
-                topic_id=topic_id,
-                user_id=user_id,
-            ),
+        _start_pipeline(
+            domain=request.domain,
+            keywords=list(request.keywords),
+            interests=list(request.interests),
+            topic_id=topic_id,
+            user_id=user_id,
         )
 
     return {"topic": saved_topic, "research_started": request.start_immediately}
@@ -248,6 +262,9 @@ async def cron_trigger(
     user's configured timezone, then run them. A cooldown check prevents
     double-runs (23h for daily, 6 days for weekly).
 
+    Also resumes validation and research jobs orphaned by a dead
+    instance (the in-process scheduler does that on its own).
+
     Requires X-Cron-Secret header matching CRON_TRIGGER_SECRET env var
     when the env var is set.
     """
@@ -332,16 +349,13 @@ async def cron_trigger(
             continue
 
         # --- Trigger the topic ---
-        loop = asyncio.get_running_loop()
-        loop.run_in_executor(
-            _executor,
-            lambda tid=topic_id, t=topic: _run_pipeline_safe(
-                domain=t.get("domain", "general"),
-                keywords=list(t.get("keywords", [])),
-                interests=list(t.get("interests", [])),
-                topic_id=tid,
-                user_id=t.get("user_id", ""),
-            ),
+        _start_pipeline(
+            domain=topic.get("domain", "general"),
+            keywords=list(topic.get("keywords", [])),
+            interests=list(topic.get("interests", [])),
+            topic_id=topic_id,
+            user_id=topic.get("user_id", ""),
+            scheduled_run=True,
         )
         started.append(topic_id)
         details.append({
@@ -360,7 +374,9 @@ async def cron_trigger(
         "details": details,
     }))
 
-    return {"triggered": len(started), "topic_ids": started}
+    resumed = await resume_orphaned_jobs()
+
+    return {"triggered": len(started), "topic_ids": started, "resumed_job_ids": resumed}
 
 
 @router.post("/start")
@@ -369,16 +385,12 @@ async def start_research(request: StartResearchRequest, user_id: str = Depends(g
     if not topic:
         raise HTTPException(status_code=404, detail="Topic not found")
 
-    loop = asyncio.get_running_loop()
-    loop.run_in_executor(
-        _executor,
-        lambda: _run_pipeline_safe(
-            domain=topic.get("domain", "general"),
-            keywords=list(topic.get("keywords", [])),
-            interests=list(topic.get("interests", [])),
-            topic_id=request.topic_id,
-            user_id=user_id,
-        ),
+    _start_pipeline(
+        domain=topic.get("domain", "general"),
+        keywords=list(topic.get("keywords", [])),
+        interests=list(topic.get("interests", [])),
+        topic_id=request.topic_id,
+        user_id=user_id,
     )
 
     return {"message": "Research started", "topic_id": request.topic_id}
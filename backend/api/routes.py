@@ -1,44 +1,61 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, Header, HTTPException, UploadFile, File
+from pydantic import BaseModel, field_validator
 from typing import List, Optional, AsyncGenerator
 from sse_starlette.sse import EventSourceResponse
-from services.scraper import scrape_play_store_reviews, scrape_app_store_reviews
+from services.scraper import scrape_reviews_across_locales, locale_languages, validate_locales
 from services.ai_analyzer import (
     analyze_reviews_multi_agent,
-    run_researcher_agent,
-    run_pm_agent,
-    run_market_intelligence_agent,
-    detect_category,
+    validation_agent_dag,
+    merge_market_intelligence,
+    detect_category_async,
     IdeaValidationResult,
-    OpportunityScoreBreakdown,
+    VALIDATION_AGENT_OUTPUTS,
 )
-from services.discovery import discover_competitors_and_scrape
-from services.community_scraper import CommunityScraperService
+from services.discovery import (
+    discover_competitors_and_scrape, SpeculativeDiscovery,
+    DISCOVERY_SPECULATIVE, DISCOVERY_SPECULATIVE_CATEGORY,
+)
+from services.review_preprocessor import REVIEW_PROMPT_SAMPLE_SIZE, preprocess_reviews
+from services.review_batch import ReviewBatch
+from services.prompt_budget import compact_line
+from services.community_scraper import CommunityScraperService, SCRAPING_PIPELINED
 from services.audio_processor import transcribe_audio
+from services.gemini_client import get_async_gemini_client
+from services.context_cache import JobContext
+from services.scoring import get_scoring_engine, rescore_validations
+from services.llm_scheduler import Priority, llm_priority
+from services.model_router import current_llm_provider, get_model_router, llm_provider
+from services.job_checkpoints import JobCheckpoints, dump_output, restore_outputs, register_resumer
+from services.validation_cache import (
+    CachedValidation, find_cached_validation, get_cached_validation, remember_validation,
+    VALIDATION_CACHE_BACKGROUND_REFRESH, VALIDATION_CACHE_REFRESH_HOURS,
+)
 from services.auth import get_current_user_id
 from services.db import (
     save_validation_result,
     send_notification,
     create_validation_job,
     update_validation_job,
+    get_validation_job,
     upsert_push_token,
     delete_push_token,
 )
+import os
 import asyncio
 import json as _json
-import os
-import queue as _queue
 import threading
-from concurrent.futures import ThreadPoolExecutor
 import logging
 import uuid
 import datetime
 
-from google import genai as _genai
 
 logger = logging.getLogger(__name__)
 
-_executor = ThreadPoolExecutor(max_workers=8)
+# Strong references to running pipelines; the loop only keeps weak ones.
+_background_tasks: set[asyncio.Task] = set()
+
+# Validation cache entries being refreshed in the background, by entry id
+_refreshing: set[int] = set()
 
 # Cancellation registry: job_id → threading.Event (set = cancelled)
 _cancel_events: dict[str, threading.Event] = {}
@@ -71,6 +88,14 @@ _RESEARCHER_MESSAGES = {
     "saas_web": "Analyzing G2 reviews, churn patterns, SaaS communities...",
 }
 
+# Validation agent → (SSE agent label, pipeline step) for streamed partial results
+_AGENT_STEPS = {
+    "researcher": ("Researcher Agent", 4),
+    "pm": ("PM Agent", 5),
+    "market_sizing": ("Market Intelligence", 6),
+    "market_strategy": ("Market Intelligence", 6),
+}
+
 router = APIRouter()
 
 class ValidationRequest(BaseModel):
@@ -78,9 +103,16 @@ class ValidationRequest(BaseModel):
     play_store_id: Optional[str] = None
     app_store_id: Optional[int] = None
     app_store_name: Optional[str] = None
-    model_provider: str = "gemini"
+    model_provider: Optional[str] = None  # Pin the agents to one provider, e.g. "local" (offline stand-in)
     category: Optional[str] = None
     metadata_only: bool = False  # Return category + competitors without running AI agents
+    locales: Optional[List[str]] = None  # Target markets, e.g. ["en-US", "de-DE"]; default en-US
+    use_cache: bool = True  # False forces a fresh run even if a near-identical idea was validated recently
+
+    @field_validator("locales")
+    @classmethod
+    def check_locales(cls, v: Optional[List[str]]) -> Optional[List[str]]:
+        return validate_locales(v)
 
 
 class PushTokenRequest(BaseModel):
@@ -123,32 +155,137 @@ async def unregister_push_token(request: PushTokenDeleteRequest, user_id: str =
     delete_push_token(request.token)
     return {"status": "ok"}
 
+async def _refresh_cached_validation(hit: CachedValidation, category: str, locales: List[str] | None) -> None:
+    """Re-run the pipeline for a stale cache entry and store the new result (no user history)."""
+    try:
+        # The refresh is shared by everyone, so it never inherits the requester's provider
+        with llm_priority(Priority.SCHEDULED), llm_provider(None):
+            reviews, competitors_meta = await asyncio.to_thread(
+                discover_competitors_and_scrape, hit.idea, category, locales,
+            )
+            if not reviews and not competitors_meta:
+                return
+            community_result = await asyncio.to_thread(
+                CommunityScraperService(category).scrape_all,
+                competitor_names=[c.get("title", "") for c in competitors_meta],
+                idea_keywords=hit.idea,
+            )
+            result = await asyncio.to_thread(
+                analyze_reviews_multi_agent, hit.idea, reviews, competitors_meta, None, category,
+                community_data="\n".join(community_result.to_prompt_lines()), locales=locales,
+            )
+            if get_model_router().uses_stand_ins():
+                return
+        await asyncio.to_thread(remember_validation, hit.idea, category, locales, result.model_dump(), hit.user_id)
+        logger.info(f"Refreshed cached validation for '{hit.idea[:50]}'")
+    except Exception as e:
+        logger.warning(f"Background refresh of cached validation '{hit.idea[:50]}' failed: {e}")
+    finally:
+        _refreshing.discard(hit.entry_id)
+
+
+def _refresh_if_stale(hit: CachedValidation, category: str, locales: List[str] | None) -> None:
+    """Serve-then-refresh: a hit older than VALIDATION_CACHE_REFRESH_HOURS is re-validated in the background."""
+    if not VALIDATION_CACHE_BACKGROUND_REFRESH or hit.age_hours < VALIDATION_CACHE_REFRESH_HOURS:
+        return
+    if hit.entry_id in _refreshing:
+        return
+    _refreshing.add(hit.entry_id)
+    task = asyncio.create_task(_refresh_cached_validation(hit, category, locales))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+def _checked_provider(provider: Optional[str]) -> Optional[str]:
+    try:
+        get_model_router().check_provider(provider)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return provider
+
+
 @router.post("/validate")
 async def validate_idea(request: ValidationRequest, user_id: str = Depends(get_current_user_id)):
-    reviews = []
+    with llm_provider(_checked_provider(request.model_provider)):
+        return await _validate_idea(request, user_id)
+
+
+async def _validate_idea(request: ValidationRequest, user_id: str):
+    reviews = ReviewBatch()
     competitors_meta = []
 
     # ── Step 1: Category detection ─────────────────────────────────
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key:
+    try:
+        aclient = get_async_gemini_client()
+    except ValueError:
         raise HTTPException(status_code=500, detail="GEMINI_API_KEY not set.")
-    client = _genai.Client(api_key=api_key)
-    cat_result = detect_category(client, request.idea, request.category)
-    category = cat_result.category
 
-    # ── Step 2: Discovery ──────────────────────────────────────────
+    # Explicit store IDs don't depend on the category: scrape while it's detected.
+    # Otherwise, optionally start discovery for the likely category.
+    explicit_scrape = speculative = None
     if request.play_store_id or (request.app_store_id and request.app_store_name):
         logger.info("Using explicitly provided App Store IDs...")
-        if request.play_store_id:
-            play_reviews = scrape_play_store_reviews(request.play_store_id, count=200)
-            reviews.extend(play_reviews)
+        explicit_scrape = asyncio.create_task(asyncio.to_thread(
+            scrape_reviews_across_locales,
+            [request.play_store_id] if request.play_store_id else [],
+            [(request.app_store_name, request.app_store_id)] if request.app_store_id and request.app_store_name else [],
+            request.locales,
+            count_per_locale=200,
+        ))
+    elif DISCOVERY_SPECULATIVE and not request.category:
+        speculative = SpeculativeDiscovery(request.idea, DISCOVERY_SPECULATIVE_CATEGORY, request.locales)
+
+    try:
+        cat_result = await detect_category_async(aclient, request.idea, request.category)
+    except Exception:
+        if speculative:
+            speculative.cancel()
+        if explicit_scrape:
+            explicit_scrape.cancel()
+        raise
+    category = cat_result.category
+
+    # ── The same idea validated recently is answered from the cache ──
+    # (explicit store IDs ask for those apps specifically, so they always run fresh;
+    # a merely similar idea can't be offered here, so it runs fresh too)
+    if request.use_cache and not explicit_scrape and not request.metadata_only:
+        hit = await asyncio.to_thread(find_cached_validation, request.idea, category, request.locales, user_id)
+        if hit and hit.exact:
+            if speculative:
+                speculative.cancel()
+            result = IdeaValidationResult(**hit.result)
+            # Scored under the current weights, which may have changed since
+            result.opportunity_score = get_scoring_engine().score(result.score_breakdown, category)
+            _refresh_if_stale(hit, category, request.locales)
+            save_resp = await asyncio.to_thread(save_validation_result, user_id, request.idea, result.model_dump())
+            result_id = None
+            if save_resp.get("status") == "success" and save_resp.get("data"):
+                rows = save_resp["data"]
+                if isinstance(rows, list) and rows:
+                    result_id = rows[0].get("id")
+            await asyncio.to_thread(
+                send_notification,
+                user_id,
+                type="validation_complete",
+                title="Validation Complete",
+                body=f"'{request.idea[:50]}' scored {result.opportunity_score}/100",
+                metadata={"score": result.opportunity_score, "result_id": result_id},
+            )
+            return result
 
-        if request.app_store_id and request.app_store_name:
-            ios_reviews = scrape_app_store_reviews(request.app_store_name, request.app_store_id, count=200)
-            reviews.extend(ios_reviews)
+    # ── Step 2: Discovery ──────────────────────────────────────────
+    if explicit_scrape:
+        reviews = await explicit_scrape
+    elif speculative and speculative.matches(category):
+        logger.info("Using speculative discovery results...")
+        reviews, competitors_meta = await asyncio.to_thread(speculative.result)
     else:
+        if speculative:
+            speculative.cancel()
         logger.info("No App IDs provided. Firing up Discovery Agent...")
-        reviews, competitors_meta = discover_competitors_and_scrape(request.idea, category)
+        reviews, competitors_meta = await asyncio.to_thread(
+            discover_competitors_and_scrape, request.idea, category, request.locales,
+        )
 
     if not reviews and not competitors_meta:
         raise HTTPException(status_code=404, detail="No competitors found or failed to scrape reviews. Try providing specific App IDs.")
@@ -163,26 +300,34 @@ async def validate_idea(request: ValidationRequest, user_id: str = Depends(get_c
         }
 
     # ── Step 3: Community scraping ─────────────────────────────────
-    community_result = CommunityScraperService(category).scrape_all(
+    community_result = await asyncio.to_thread(
+        CommunityScraperService(category).scrape_all,
         competitor_names=[c.get("title", "") for c in competitors_meta],
         idea_keywords=request.idea,
     )
-    community_text = _json.dumps([p.model_dump() for p in community_result.posts[:50]])
+    community_text = "\n".join(community_result.to_prompt_lines())
     logger.info(f"Community scraping: {community_result.total_posts} posts from {community_result.sources_succeeded}")
 
     try:
         # Pass the concatenated reviews to the Multi-Agent validation engine
         logger.info(f"Starting Multi-Agent analysis for idea: {request.idea[:50]}...")
-        result = analyze_reviews_multi_agent(request.idea, reviews, competitors_meta, request.model_provider, category, community_data=community_text)
+        result = await asyncio.to_thread(
+            analyze_reviews_multi_agent, request.idea, reviews, competitors_meta, request.model_provider, category,
+            community_data=community_text, locales=request.locales,
+        )
+        # Stand-in results are placeholders: never served to anyone else
+        if not explicit_scrape and not get_model_router().uses_stand_ins():
+            await asyncio.to_thread(remember_validation, request.idea, category, request.locales, result.model_dump(), user_id)
 
         # Save to database (will mock if Supabase credentials are not set)
-        save_resp = save_validation_result(user_id, request.idea, result.model_dump())
+        save_resp = await asyncio.to_thread(save_validation_result, user_id, request.idea, result.model_dump())
         result_id = None
         if save_resp.get("status") == "success" and save_resp.get("data"):
             rows = save_resp["data"]
             if isinstance(rows, list) and rows:
                 result_id = rows[0].get("id")
-        send_notification(
+        await asyncio.to_thread(
+            send_notification,
             user_id,
             type="validation_complete",
             title="Validation Complete",
@@ -209,29 +354,79 @@ def _check_cancelled(job_id: str) -> None:
         raise _Cancelled(f"Job {job_id} was cancelled")
 
 
-def _run_validation_pipeline(q: _queue.Queue, idea: str, user_category: str | None, user_id: str) -> None:
-    """Run the full validation pipeline in a background thread.
+async def _run_validation_pipeline(
+    q: asyncio.Queue, idea: str, user_category: str | None, user_id: str,
+    locales: List[str] | None = None, use_cache: bool = True, resume_job_id: str | None = None,
+) -> None:
+    """Run the full validation pipeline as a task on the server's event loop.
 
     Puts SSE-style dicts into *q*.  Runs independently of the SSE connection
     so the pipeline completes and saves even if the client disconnects.
     Checks for cancellation before each expensive step.
+
+    Agents await Gemini on ``client.aio``, so a job holds no thread while
+    it waits on the API. Discovery, review scraping, community scraping and
+    Supabase use blocking libraries and run in worker threads.
+
+    The analysis agents run as a graph (``validation_agent_dag``) started
+    right after category detection: Market Sizing only needs the idea and
+    category, so it overlaps discovery, community scraping, the Researcher
+    and the PM; the Researcher starts once the evidence is in. Agents stream
+    their responses: each list item (a pain point, an MVP feature) is sent
+    as a ``partial`` event as soon as it is generated, ahead of the final
+    ``result``.
+
+    With *use_cache*, the same idea validated recently (see
+    ``services.validation_cache``) is answered right after category
+    detection with that result, announced by a ``cached`` event. A merely
+    similar one is announced by a ``similar`` event while the job runs on;
+    the user may take that result instead (``POST /validate/cached/{id}``).
+
+    Each completed step — category, discovery, community scraping, each
+    agent — is checkpointed (``services.job_checkpoints``). With
+    *resume_job_id*, the job is an orphaned one being resumed: steps with
+    a checkpoint aren't run again.
+
+    Agents are routed to models by ``services.model_router``, within the
+    provider pinned (``llm_provider``) where the task was created.
     """
     total_steps = 6
     job_id = None
+    speculative = None
+    agents = None
+    job_context = None
+    checkpoints = None
+    heartbeat = None
+    interrupted = False
+    loop = asyncio.get_running_loop()
 
     def _put(event: str, data):
-        q.put({"event": event, "data": _json.dumps(data) if isinstance(data, dict) else data})
+        # Thread-safe: discovery reports competitors from its worker threads
+        loop.call_soon_threadsafe(q.put_nowait, {"event": event, "data": _json.dumps(data) if isinstance(data, dict) else data})
 
     try:
-        job_id = str(uuid.uuid4())
+        job_id = resume_job_id or str(uuid.uuid4())
         # Register a cancel event for this job
         _cancel_events[job_id] = threading.Event()
-        create_validation_job(user_id, job_id, idea, user_category)
+        checkpoints = JobCheckpoints("validation", job_id)
+        if resume_job_id:
+            saved = await asyncio.to_thread(checkpoints.load)
+            await asyncio.to_thread(update_validation_job, job_id, {
+                "status": "running", "step_message": "Resuming after an interruption...",
+            })
+        else:
+            saved = {}
+            await asyncio.to_thread(create_validation_job, user_id, job_id, idea, user_category)
+            await asyncio.to_thread(checkpoints.begin, {
+                "idea": idea, "user_category": user_category, "user_id": user_id, "locales": locales,
+                "model_provider": current_llm_provider(),
+            })
+        heartbeat = asyncio.create_task(checkpoints.heartbeat())
         _put("job", {"job_id": job_id})
 
         def _update_job(step_number: int, agent: str, message: str, status: str = "running"):
             pct = round((step_number / total_steps) * 100) if total_steps else 0
-            update_validation_job(job_id, {
+            return asyncio.to_thread(update_validation_job, job_id, {
                 "status": status,
                 "current_step": agent,
                 "step_number": step_number,
@@ -239,10 +434,7 @@ def _run_validation_pipeline(q: _queue.Queue, idea: str, user_category: str | No
                 "progress_pct": min(pct, 99),
             })
 
-        api_key = os.getenv("GEMINI_API_KEY")
-        if not api_key:
-            raise ValueError("GEMINI_API_KEY not set.")
-        client = _genai.Client(api_key=api_key)
+        aclient = get_async_gemini_client()
 
         # ── Step 1: Category Detection ────────────────────────────────
         _check_cancelled(job_id)
@@ -250,15 +442,115 @@ def _run_validation_pipeline(q: _queue.Queue, idea: str, user_category: str | No
              "message": "Classifying your idea..." if not user_category else f"Category set to {user_category}",
              "step": 1, "total": total_steps})
 
-        cat_result = detect_category(client, idea, user_category)
-        category = cat_result.category
-        subcategory = cat_result.subcategory
+        if "category" in saved:
+            category, subcategory = saved["category"]["category"], saved["category"]["subcategory"]
+        else:
+            if DISCOVERY_SPECULATIVE and not user_category and "discovery" not in saved:
+                speculative = SpeculativeDiscovery(idea, DISCOVERY_SPECULATIVE_CATEGORY, locales)
+            cat_result = await detect_category_async(aclient, idea, user_category)
+            category = cat_result.category
+            subcategory = cat_result.subcategory
+            await asyncio.to_thread(checkpoints.save, "category", {"category": category, "subcategory": subcategory})
         _put("category", {"category": category, "subcategory": subcategory,
              "label": _CATEGORY_LABELS.get(category, "Software")})
         _put("status", {"agent": "Category Detector",
              "message": f"Identified: {_CATEGORY_LABELS.get(category, category)} · {subcategory}",
              "step": 1, "total": total_steps})
-        _update_job(1, "Category Detector", f"Identified: {_CATEGORY_LABELS.get(category, category)} · {subcategory}")
+        await _update_job(1, "Category Detector", f"Identified: {_CATEGORY_LABELS.get(category, category)} · {subcategory}")
+
+        hit = await asyncio.to_thread(find_cached_validation, idea, category, locales, user_id) if use_cache and not resume_job_id else None
+        if hit and not hit.exact:
+            _put("similar", {
+                "entry_id": hit.entry_id,
+                "idea": hit.idea,
+                "similarity": round(hit.similarity, 3),
+                "opportunity_score": get_scoring_engine().score(hit.result.get("score_breakdown"), category),
+                "validated_at": datetime.datetime.fromtimestamp(hit.created_at, datetime.timezone.utc).isoformat(),
+            })
+        elif hit:
+            cached_result = IdeaValidationResult(**hit.result)
+            cached_result.opportunity_score = get_scoring_engine().score(cached_result.score_breakdown, category)
+            _put("cached", {
+                "idea": hit.idea if hit.user_id == user_id else idea,
+                "similarity": round(hit.similarity, 3),
+                "validated_at": datetime.datetime.fromtimestamp(hit.created_at, datetime.timezone.utc).isoformat(),
+            })
+            _refresh_if_stale(hit, category, locales)
+            result_id = None
+            try:
+                save_resp = await asyncio.to_thread(save_validation_result, user_id, idea, cached_result.model_dump())
+                if save_resp.get("status") == "success" and save_resp.get("data"):
+                    rows = save_resp["data"]
+                    if isinstance(rows, list) and rows:
+                        result_id = rows[0].get("id")
+                await asyncio.to_thread(
+                    send_notification,
+                    user_id,
+                    type="validation_complete",
+                    title="Validation Complete",
+                    body=f"'{idea[:50]}' scored {cached_result.opportunity_score}/100",
+                    metadata={"score": cached_result.opportunity_score, "result_id": result_id},
+                )
+            except Exception as db_err:
+                logger.warning(f"Failed to save validation result: {db_err}")
+            await asyncio.to_thread(update_validation_job, job_id, {
+                "status": "completed",
+                "progress_pct": 100,
+                "result_id": result_id,
+                "completed_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            })
+            _put("result", cached_result.model_dump_json())
+            return
+
+        def _agent_started(name: str):
+            _check_cancelled(job_id)
+            if name == "researcher":
+                _put("status", {"agent": "Researcher Agent",
+                     "message": _RESEARCHER_MESSAGES.get(category, "Researching market..."),
+                     "step": 4, "total": total_steps})
+            elif name == "pm":
+                _put("status", {"agent": "PM Agent",
+                     "message": "Building Day-1 MVP roadmap from pain points...",
+                     "step": 5, "total": total_steps})
+            elif name == "market_strategy":
+                _put("status", {"agent": "Market Intelligence",
+                     "message": "Scoring the opportunity, pricing and GTM strategy...",
+                     "step": 6, "total": total_steps})
+            else:
+                logger.info(f"Agent {name} started for job {job_id}")
+
+        async def _agent_finished(name: str, value):
+            if name in VALIDATION_AGENT_OUTPUTS:
+                await asyncio.to_thread(checkpoints.save, name, dump_output(value))
+            if name == "researcher":
+                msg = f"Found {len(value.what_users_hate)} pain points, {len(value.community_signals)} community signals."
+                _put("status", {"agent": "Researcher Agent", "message": msg, "step": 4, "total": total_steps})
+                await _update_job(4, "Researcher Agent", msg)
+            elif name == "pm":
+                msg = f"MVP roadmap ready — {len(value.mvp_roadmap)} features."
+                _put("status", {"agent": "PM Agent", "message": msg, "step": 5, "total": total_steps})
+                await _update_job(5, "PM Agent", msg)
+
+        def _agent_partial(name: str, field: str, item):
+            agent, step = _AGENT_STEPS.get(name, (name, 0))
+            _put("partial", {"agent": agent, "field": field, "item": item, "step": step, "total": total_steps})
+
+        job_context = JobContext(job_id)
+        completed = restore_outputs(saved, VALIDATION_AGENT_OUTPUTS)
+        if "researcher" in completed and "market_strategy" in completed:
+            completed["job_context"] = None  # nothing left to run on the shared context
+        elif current_llm_provider() in get_model_router().providers:
+            completed["job_context"] = None  # stand-in agents have no use for a Gemini cache
+        agents = validation_agent_dag(
+            aclient, asynchronous=True, on_partial=_agent_partial, context=job_context,
+        ).start_async(
+            {"idea": idea, "category": category}, before=_agent_started, after=_agent_finished, completed=completed,
+        )
+
+        # Idea-keyword community queries don't need competitor names: start them now
+        community_scrape = None
+        if SCRAPING_PIPELINED and "community" not in saved:
+            community_scrape = CommunityScraperService(category).start_pipelined(idea)
 
         # ── Step 2: Discovery ─────────────────────────────────────────
         _check_cancelled(job_id)
@@ -266,17 +558,54 @@ def _run_validation_pipeline(q: _queue.Queue, idea: str, user_category: str | No
              "message": _DISCOVERY_MESSAGES.get(category, "Finding competitors..."),
              "step": 2, "total": total_steps})
 
-        reviews, competitors_meta = discover_competitors_and_scrape(idea, category)
+        if "discovery" in saved:
+            competitors_meta = saved["discovery"]["competitors"]
+            reviews_text = saved["discovery"]["reviews_text"]
+            discovery_msg = saved["discovery"]["message"]
+        else:
+            if speculative and speculative.matches(category):
+                reviews, competitors_meta = await asyncio.to_thread(speculative.result)
+                # Ran without a callback: send the competitors the live path would have streamed
+                for meta in competitors_meta:
+                    _put("competitor", meta)
+            else:
+                if speculative:
+                    speculative.cancel()
+                reviews, competitors_meta = await asyncio.to_thread(
+                    discover_competitors_and_scrape,
+                    idea, category, locales, on_competitor=lambda meta: _put("competitor", meta),
+                )
+            reviews, prep_stats = await asyncio.to_thread(preprocess_reviews, reviews, languages=locale_languages(locales))
+
+            discovery_msg = f"Found {len(competitors_meta)} competitors."
+            if prep_stats.dropped_count:
+                discovery_msg += f" Filtered {prep_stats.dropped_count} duplicate/low-quality reviews."
+
+            if not reviews and not competitors_meta:
+                if community_scrape:
+                    community_scrape.discard()
+                agents.cancel()
+                _put("error", {"message": "No competitors found. Try adding more detail about your idea."})
+                await asyncio.to_thread(update_validation_job, job_id, {"status": "failed", "error": "No competitors found."})
+                return
+
+            # Only this sample of the reviews reaches the agents
+            reviews_sample = reviews.sample(REVIEW_PROMPT_SAMPLE_SIZE, stratify_by_score=True)
+            if not reviews_sample and competitors_meta:
+                reviews_text = "\n".join(
+                    compact_line(f"{c.get('title', '')} — {c.get('description', '')}")
+                    for c in competitors_meta[:20]
+                )
+            else:
+                reviews_text = "\n".join(reviews_sample.to_prompt_lines())
+            await asyncio.to_thread(checkpoints.save, "discovery", {
+                "competitors": competitors_meta, "reviews_text": reviews_text, "message": discovery_msg,
+            })
 
         _put("status", {"agent": "Discovery Agent",
-             "message": f"Found {len(competitors_meta)} competitors.",
+             "message": discovery_msg,
              "step": 2, "total": total_steps})
-        _update_job(2, "Discovery Agent", f"Found {len(competitors_meta)} competitors.")
-
-        if not reviews and not competitors_meta:
-            _put("error", {"message": "No competitors found. Try adding more detail about your idea."})
-            update_validation_job(job_id, {"status": "failed", "error": "No competitors found."})
-            return
+        await _update_job(2, "Discovery Agent", discovery_msg)
 
         # ── Step 3: Community Scraping ─────────────────────────────────
         _check_cancelled(job_id)
@@ -284,72 +613,37 @@ def _run_validation_pipeline(q: _queue.Queue, idea: str, user_category: str | No
              "message": _COMMUNITY_MESSAGES.get(category, "Scraping community forums for real user signals..."),
              "step": 3, "total": total_steps})
 
-        community_result = CommunityScraperService(category).scrape_all(
-            competitor_names=[c.get("title", "") for c in competitors_meta],
-            idea_keywords=idea,
-        )
-        community_text = _json.dumps([p.model_dump() for p in community_result.posts[:50]])
+        if "community" in saved:
+            community_text, community_msg = saved["community"]["text"], saved["community"]["message"]
+        else:
+            competitor_names = [c.get("title", "") for c in competitors_meta]
+            if community_scrape:
+                community_result = await asyncio.to_thread(community_scrape.finish, competitor_names)
+            else:
+                community_result = await asyncio.to_thread(
+                    CommunityScraperService(category).scrape_all,
+                    competitor_names=competitor_names,
+                    idea_keywords=idea,
+                )
+            community_text = "\n".join(community_result.to_prompt_lines())
+            community_msg = f"Scraped {community_result.total_posts} posts from {len(community_result.sources_succeeded)} sources."
+            await asyncio.to_thread(checkpoints.save, "community", {"text": community_text, "message": community_msg})
 
         _put("status", {"agent": "Community Scanner",
-             "message": f"Scraped {community_result.total_posts} posts from {len(community_result.sources_succeeded)} sources.",
+             "message": community_msg,
              "step": 3, "total": total_steps})
-        _update_job(3, "Community Scanner", f"Scraped {community_result.total_posts} posts from {len(community_result.sources_succeeded)} sources.")
-
-        # ── Step 4: Researcher Agent ──────────────────────────────────
-        _check_cancelled(job_id)
-        _put("status", {"agent": "Researcher Agent",
-             "message": _RESEARCHER_MESSAGES.get(category, "Researching market..."),
-             "step": 4, "total": total_steps})
-
-        reviews_sample = reviews[:200]
-        if not reviews_sample and competitors_meta:
-            reviews_text = _json.dumps([
-                {"title": c.get("title", ""), "description": c.get("description", "")}
-                for c in competitors_meta[:20]
-            ])
-        else:
-            reviews_text = _json.dumps([
-                {"rating": r["score"], "review": r["content"]} for r in reviews_sample
-            ])
+        await _update_job(3, "Community Scanner", community_msg)
 
-        researcher_result = run_researcher_agent(client, idea, reviews_text, category, community_text)
-
-        _put("status", {"agent": "Researcher Agent",
-             "message": f"Found {len(researcher_result.what_users_hate)} pain points, {len(researcher_result.community_signals)} community signals.",
-             "step": 4, "total": total_steps})
-        _update_job(4, "Researcher Agent", f"Found {len(researcher_result.what_users_hate)} pain points, {len(researcher_result.community_signals)} community signals.")
-
-        # ── Step 5: PM Agent ──────────────────────────────────────────
-        _check_cancelled(job_id)
-        _put("status", {"agent": "PM Agent",
-             "message": "Building Day-1 MVP roadmap from pain points...",
-             "step": 5, "total": total_steps})
-
-        pm_result = run_pm_agent(client, idea, researcher_result)
-
-        _put("status", {"agent": "PM Agent",
-             "message": f"MVP roadmap ready — {len(pm_result.mvp_roadmap)} features.",
-             "step": 5, "total": total_steps})
-        _update_job(5, "PM Agent", f"MVP roadmap ready — {len(pm_result.mvp_roadmap)} features.")
-
-        # ── Step 6: Market Intelligence ───────────────────────────────
+        # ── Steps 4-6: Researcher → PM → Market Intelligence ─────────
         _check_cancelled(job_id)
-        _put("status", {"agent": "Market Intelligence",
-             "message": "Researching TAM/SAM/SOM, funded competitors, GTM strategy...",
-             "step": 6, "total": total_steps})
-
-        market_result = run_market_intelligence_agent(client, idea, researcher_result, pm_result, category)
+        agents.provide_many({"reviews_text": reviews_text, "community_data": community_text})
+        values = await agents.result()
+        researcher_result, pm_result = values["researcher"], values["pm"]
+        market_result = merge_market_intelligence(values["market_sizing"], values["market_strategy"])
 
         # Compute weighted score
         breakdown = market_result.score_breakdown
-        weights = {
-            "pain_severity": 0.25, "market_gap": 0.20, "mvp_feasibility": 0.15,
-            "competition_density": 0.15, "monetization_potential": 0.10,
-            "community_demand": 0.10, "startup_saturation": 0.05,
-        }
-        opportunity_score = max(0, min(100, round(sum(
-            getattr(breakdown, k) * v for k, v in weights.items()
-        ))))
+        opportunity_score = get_scoring_engine().score(breakdown, category)
 
         funded_competitors_dicts = [fc.model_dump() for fc in market_result.top_funded_competitors]
 
@@ -378,17 +672,20 @@ def _run_validation_pipeline(q: _queue.Queue, idea: str, user_category: str | No
         _put("status", {"agent": "Market Intelligence",
              "message": f"Score: {opportunity_score}/100 · TAM: {(market_result.tam or '')[:50]}",
              "step": 6, "total": total_steps})
-        _update_job(6, "Market Intelligence", f"Score: {opportunity_score}/100 · TAM: {(market_result.tam or '')[:50]}")
+        if not get_model_router().uses_stand_ins():
+            await asyncio.to_thread(remember_validation, idea, category, locales, final_result.model_dump(), user_id)
+        await _update_job(6, "Market Intelligence", f"Score: {opportunity_score}/100 · TAM: {(market_result.tam or '')[:50]}")
 
         # Save to DB — runs regardless of whether SSE client is still connected
         result_id = None
         try:
-            save_resp = save_validation_result(user_id, idea, final_result.model_dump())
+            save_resp = await asyncio.to_thread(save_validation_result, user_id, idea, final_result.model_dump())
             if save_resp.get("status") == "success" and save_resp.get("data"):
                 rows = save_resp["data"]
                 if isinstance(rows, list) and rows:
                     result_id = rows[0].get("id")
-            send_notification(
+            await asyncio.to_thread(
+                send_notification,
                 user_id,
                 type="validation_complete",
                 title="Validation Complete",
@@ -398,7 +695,7 @@ def _run_validation_pipeline(q: _queue.Queue, idea: str, user_category: str | No
         except Exception as db_err:
             logger.warning(f"Failed to save validation result: {db_err}")
 
-        update_validation_job(job_id, {
+        await asyncio.to_thread(update_validation_job, job_id, {
             "status": "completed",
             "progress_pct": 100,
             "result_id": result_id,
@@ -407,34 +704,80 @@ def _run_validation_pipeline(q: _queue.Queue, idea: str, user_category: str | No
 
         _put("result", final_result.model_dump_json())
 
+    except asyncio.CancelledError:
+        # The server is shutting down: keep the checkpoints so the job can resume
+        interrupted = True
+        raise
     except _Cancelled:
         logger.info(f"Pipeline cancelled for job {job_id}")
         _put("error", {"message": "Validation cancelled."})
         if job_id:
-            update_validation_job(job_id, {"status": "cancelled"})
+            await asyncio.to_thread(update_validation_job, job_id, {"status": "cancelled"})
     except Exception as e:
         logger.error(f"Pipeline error: {e}", exc_info=True)
         _put("error", {"message": str(e)})
         if job_id:
-            update_validation_job(job_id, {"status": "failed", "error": str(e)})
+            await asyncio.to_thread(update_validation_job, job_id, {"status": "failed", "error": str(e)})
     finally:
+        # A speculative discovery nobody consumed (cancel/error) is discarded
+        if speculative:
+            speculative.cancel()
+        # Don't start agents for a failed or cancelled job
+        if agents:
+            agents.cancel()
+        # The shared evidence cache lives only as long as the job
+        if job_context:
+            await job_context.close()
+        if heartbeat:
+            heartbeat.cancel()
+        if checkpoints and not interrupted:
+            await asyncio.to_thread(checkpoints.finish)
         # Clean up cancel event and send sentinel
         if job_id:
             _cancel_events.pop(job_id, None)
-        q.put(None)
+        loop.call_soon_threadsafe(q.put_nowait, None)
+
+
+async def _resume_validation_job(job_id: str, params: dict) -> None:
+    """Restart an orphaned validation job from its checkpoints, as a background task."""
+    job = await asyncio.to_thread(get_validation_job, job_id)
+    if job and job.get("status") not in ("pending", "running"):
+        await asyncio.to_thread(JobCheckpoints("validation", job_id).finish)  # cancelled meanwhile
+        return
+    with llm_provider(params.get("model_provider")):
+        task = asyncio.create_task(_run_validation_pipeline(
+            asyncio.Queue(), params["idea"], params.get("user_category"), params["user_id"], params.get("locales"),
+            use_cache=False, resume_job_id=job_id,
+        ))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+register_resumer(
+    "validation", _resume_validation_job,
+    abandon=lambda job_id, error: update_validation_job(job_id, {"status": "failed", "error": error}),
+)
 
 
 @router.post("/validate/stream")
 async def validate_idea_stream(request: ValidationRequest, user_id: str = Depends(get_current_user_id)):
     """Streams SSE events for the full validation pipeline.
 
-    The pipeline runs in a background thread so it completes and saves
+    The pipeline runs as a background task so it completes and saves
     even if the SSE client disconnects (e.g. phone locked).
     """
-    progress_q: _queue.Queue = _queue.Queue()
-
-    # Fire-and-forget: pipeline runs independently of the SSE connection
-    _executor.submit(_run_validation_pipeline, progress_q, request.idea, request.category, user_id)
+    progress_q: asyncio.Queue = asyncio.Queue()
+
+    # Fire-and-forget: pipeline runs independently of the SSE connection.
+    # The task inherits the provider pin with the rest of this context.
+    with llm_provider(_checked_provider(request.model_provider)):
+        task = asyncio.create_task(
+            _run_validation_pipeline(
+                progress_q, request.idea, request.category, user_id, request.locales, use_cache=request.use_cache,
+            )
+        )
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
 
     async def event_generator() -> AsyncGenerator[dict, None]:
         import time
@@ -444,13 +787,9 @@ async def validate_idea_stream(request: ValidationRequest, user_id: str = Depend
             if time.monotonic() - start > timeout:
                 yield {"event": "error", "data": _json.dumps({"message": "Pipeline timed out after 5 minutes."})}
                 return
-            # Use asyncio.to_thread to avoid blocking the event loop
             try:
-                event = await asyncio.wait_for(
-                    asyncio.to_thread(progress_q.get, True, 1),
-                    timeout=2,
-                )
-            except (asyncio.TimeoutError, _queue.Empty):
+                event = await asyncio.wait_for(progress_q.get(), timeout=1)
+            except asyncio.TimeoutError:
                 continue
             if event is None:
                 # Pipeline finished (sentinel)
@@ -462,6 +801,21 @@ async def validate_idea_stream(request: ValidationRequest, user_id: str = Depend
     return EventSourceResponse(event_generator())
 
 
+@router.post("/validate/cached/{entry_id}")
+async def use_cached_validation(entry_id: int, user_id: str = Depends(get_current_user_id)):
+    """Take the earlier result a ``similar`` event offered, saved to history under the idea it was run for.
+
+    Only the user who ran that validation can take it.
+    """
+    hit = await asyncio.to_thread(get_cached_validation, entry_id, user_id)
+    if not hit:
+        raise HTTPException(status_code=404, detail="That validation is no longer cached.")
+    result = IdeaValidationResult(**hit.result)
+    result.opportunity_score = get_scoring_engine().score(result.score_breakdown, result.category)
+    await asyncio.to_thread(save_validation_result, user_id, hit.idea, result.model_dump())
+    return result
+
+
 @router.get("/validation-jobs")
 async def list_validation_jobs(user_id: str = Depends(get_current_user_id)):
     """List all active (pending/running) validation jobs."""
@@ -501,3 +855,21 @@ async def clear_all_history(user_id: str = Depends(get_current_user_id)):
     from services.db import delete_all_validations
     deleted = delete_all_validations(user_id)
     return {"deleted": deleted}
+
+
+@router.post("/rescore")
+async def rescore_history(
+    dry_run: bool = False,
+    x_cron_secret: Optional[str] = Header(None, alias="X-Cron-Secret"),
+):
+    """Recompute every stored opportunity score under the current weights.
+
+    For deployments without the in-process scheduler, which does this at
+    startup after a weight change. Requires X-Cron-Secret matching
+    CRON_TRIGGER_SECRET when that is set.
+    """
+    expected_secret = os.getenv("CRON_TRIGGER_SECRET")
+    if expected_secret and x_cron_secret != expected_secret:
+        raise HTTPException(status_code=403, detail="Invalid or missing X-Cron-Secret header")
+    report = await asyncio.to_thread(rescore_validations, dry_run=dry_run)
+    return report._asdict()
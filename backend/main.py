@@ -9,11 +9,14 @@ load_dotenv()
 
 @asynccontextmanager
 async def lifespan(app):
+    from services.gemini_client import init_gemini_client, reset_gemini_client
+    init_gemini_client()
     from services.research_scheduler import start_scheduler
     start_scheduler()
     yield
     from services.research_scheduler import shutdown_scheduler
     shutdown_scheduler()
+    reset_gemini_client()
 
 
 app = FastAPI(
@@ -37,6 +40,9 @@ app.include_router(validation_router, prefix="/api/v1")
 from api.research_routes import router as research_router
 app.include_router(research_router, prefix="/api/v1/research")
 
+from api.analytics_routes import router as analytics_router
+app.include_router(analytics_router, prefix="/api/v1/analytics")
+
 @app.get("/")
 def read_root():
     return {"message": "Validatyr API is running"}
@@ -44,3 +50,15 @@ def read_root():
 @app.get("/health")
 def health_check():
     return {"status": "ok"}
+
+@app.get("/health/llm")
+def llm_health():
+    """Gemini queue times, retries and 429s per model and priority class."""
+    from services.llm_scheduler import get_llm_scheduler
+    return get_llm_scheduler().stats()
+
+@app.get("/health/models")
+def model_health():
+    """Per-model latency percentiles, error rates and degradation, and each agent's tier."""
+    from services.model_router import get_model_router
+    return get_model_router().stats()
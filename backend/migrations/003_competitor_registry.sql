@@ -0,0 +1,37 @@
+-- 003_competitor_registry.sql
+-- Run in Supabase SQL Editor (Dashboard -> SQL Editor -> New Query)
+--
+-- Canonical competitor registry used by discovery to resolve the same
+-- product across Play Store, App Store and web listings. Shared across
+-- users (competitors are public market data), written by the backend with
+-- the service_role key.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS public.competitors (
+  id              text PRIMARY KEY,
+  name            text NOT NULL,
+  name_key        text NOT NULL DEFAULT '',
+  aliases         text[] NOT NULL DEFAULT '{}',          -- other normalized names
+  domains         text[] NOT NULL DEFAULT '{}',
+  bundle_ids      text[] NOT NULL DEFAULT '{}',
+  android_ids     text[] NOT NULL DEFAULT '{}',
+  ios_apps        jsonb NOT NULL DEFAULT '{}'::jsonb,   -- track ID -> bundle ID
+  links           jsonb NOT NULL DEFAULT '{}'::jsonb,   -- source -> URL
+  icon            text NOT NULL DEFAULT '',
+  score           double precision NOT NULL DEFAULT 0,
+  description     text NOT NULL DEFAULT '',
+  reviews_fetched jsonb NOT NULL DEFAULT '{}'::jsonb,   -- locale -> last live scrape (ISO)
+  last_seen       timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_competitors_name_key ON public.competitors (name_key);
+CREATE INDEX IF NOT EXISTS idx_competitors_domains ON public.competitors USING gin (domains);
+CREATE INDEX IF NOT EXISTS idx_competitors_bundle_ids ON public.competitors USING gin (bundle_ids);
+CREATE INDEX IF NOT EXISTS idx_competitors_android_ids ON public.competitors USING gin (android_ids);
+CREATE INDEX IF NOT EXISTS idx_competitors_last_seen ON public.competitors (last_seen DESC);
+
+-- Backend-only table: no policies for anon/authenticated.
+ALTER TABLE public.competitors ENABLE ROW LEVEL SECURITY;
+
+COMMIT;
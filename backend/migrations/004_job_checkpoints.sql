@@ -0,0 +1,37 @@
+-- 004_job_checkpoints.sql
+-- Run in Supabase SQL Editor (Dashboard -> SQL Editor -> New Query)
+--
+-- Step checkpoints of running validation and research jobs, so a job
+-- orphaned by a dead instance can be resumed from its last completed step
+-- (see services/job_checkpoints.py). Rows exist only while a job runs.
+-- Written by the backend with the service_role key.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS public.job_runs (
+  kind          text NOT NULL,                         -- validation | research
+  job_id        text NOT NULL,
+  params        jsonb NOT NULL DEFAULT '{}'::jsonb,    -- what's needed to run the job again
+  owner         text NOT NULL DEFAULT '',              -- instance executing it
+  attempts      int NOT NULL DEFAULT 0,                -- times it was resumed
+  heartbeat_at  double precision NOT NULL,             -- epoch seconds
+  created_at    timestamptz NOT NULL DEFAULT now(),
+  PRIMARY KEY (kind, job_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_job_runs_heartbeat ON public.job_runs (kind, heartbeat_at);
+
+CREATE TABLE IF NOT EXISTS public.job_checkpoints (
+  kind        text NOT NULL,
+  job_id      text NOT NULL,
+  step        text NOT NULL,
+  data        jsonb NOT NULL,
+  created_at  timestamptz NOT NULL DEFAULT now(),
+  PRIMARY KEY (kind, job_id, step)
+);
+
+-- Backend-only tables: no policies for anon/authenticated.
+ALTER TABLE public.job_runs ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.job_checkpoints ENABLE ROW LEVEL SECURITY;
+
+COMMIT;
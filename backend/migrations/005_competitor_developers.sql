@@ -0,0 +1,12 @@
+-- 005_competitor_developers.sql
+-- Run in Supabase SQL Editor (Dashboard -> SQL Editor -> New Query)
+--
+-- Store developer names per competitor entity. Entity resolution only
+-- merges two store apps on a shared name when their developers match.
+
+BEGIN;
+
+ALTER TABLE public.competitors
+  ADD COLUMN IF NOT EXISTS developers text[] NOT NULL DEFAULT '{}';  -- normalized developer names
+
+COMMIT;
@@ -0,0 +1,37 @@
+-- 006_scoring_state.sql
+-- Run in Supabase SQL Editor (Dashboard -> SQL Editor -> New Query)
+--
+-- Weights version that stored opportunity scores were last computed under,
+-- so a new instance doesn't re-score history it already re-scored, and a
+-- bulk score update that rewrites one page of validations per call (see
+-- services/scoring.py). Used by the backend with the service_role key.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS public.scoring_state (
+  id               text PRIMARY KEY DEFAULT 'current',
+  weights_version  text NOT NULL,
+  updated_at       timestamptz NOT NULL DEFAULT now()
+);
+
+-- Backend-only table: no policies for anon/authenticated.
+ALTER TABLE public.scoring_state ENABLE ROW LEVEL SECURITY;
+
+-- scores: [{"id": <validation id>, "score": <0-100>}, ...]; returns rows updated
+CREATE OR REPLACE FUNCTION public.set_opportunity_scores(scores jsonb)
+RETURNS integer
+LANGUAGE sql
+AS $$
+  WITH updated AS (
+    UPDATE public.validations v
+       SET opportunity_score = (s->>'score')::int
+      FROM jsonb_array_elements(scores) AS s
+     WHERE v.id = (s->>'id')::bigint
+    RETURNING 1
+  )
+  SELECT count(*)::int FROM updated;
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.set_opportunity_scores(jsonb) FROM PUBLIC, anon, authenticated;
+
+COMMIT;
@@ -0,0 +1,268 @@
+"""One structured Gemini request, runnable from sync or async code.
+
+Every agent asks Gemini for JSON matching a pydantic schema, optionally
+with Google Search grounding. ``AgentCall`` captures that request — agent
+name, prompt, schema, temperature and the grounding subject — so the
+prompt is built once and the same call can be made on the shared sync
+client (``run``) or on ``client.aio`` from an event loop (``arun``), both
+through the grounding and response caches.
+
+``arun(..., on_partial=...)`` streams the response instead
+(``generate_content_stream``) and reports each item of the schema's
+top-level list fields — a pain point, an MVP feature — as soon as it has
+been generated, so the validation stream can show insights while the
+agent is still writing. The assembled response is cached like any other;
+a cache hit skips straight to the final result.
+
+``arun(..., generate=...)`` sends the request through another
+``generate_content``-compatible callable instead, such as
+``GeminiBatcher.generate`` for scheduled research runs.
+
+A call built with an active ``JobContext`` (services.context_cache) is
+made on that job's cached context instead of carrying the shared
+evidence in its own prompt.
+
+Unless built with a *model*, the model is picked per call by
+``services.model_router`` for the agent's tier, with fallback to the
+next candidate if it fails. A job context pins the call to the model its
+cache was created on.
+"""
+
+import json
+import logging
+import typing
+from typing import Any, Awaitable, Callable, Dict, Generic, Iterator, List, Optional, Tuple, Type, TypeVar
+
+from pydantic import BaseModel
+from google.genai import types
+
+from services.grounding_cache import generate_grounded, generate_grounded_async
+from services.llm_cache import generate_cached, generate_cached_async
+from services.llm_scheduler import scheduled, scheduled_async
+from services.model_router import Route, get_model_router
+from services.context_cache import JobContext
+from services.prompt_budget import get_token_estimator
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T", bound=BaseModel)
+
+
+class AgentCall(Generic[T]):
+    """A JSON-schema Gemini request for *agent*; grounded when *grounded_subject* is set.
+
+    *model* pins the request to one model; by default it is routed.
+    *finish*, if given, turns the parsed schema object into the agent's
+    result (e.g. merging it with upstream data).
+    """
+
+    def __init__(
+        self,
+        agent: str,
+        contents: str,
+        schema: Type[T],
+        temperature: float,
+        grounded_subject: Optional[str] = None,
+        model: Optional[str] = None,
+        finish: Optional[Callable[[T], Any]] = None,
+        context: Optional[JobContext] = None,
+    ):
+        self.agent = agent
+        self.contents = contents
+        self.schema = schema
+        self.temperature = temperature
+        self.grounded_subject = grounded_subject
+        self.model = model
+        self.finish = finish
+        # Only a cache for a model this call may use can be referenced; otherwise the prompt must be self-contained
+        self.context = None
+        if context is not None and context.active and (
+            context.model == model if model else any(m.name == context.model for m in get_model_router().candidates(agent))
+        ):
+            self.context = context
+            self.model = context.model
+
+    @property
+    def config(self) -> types.GenerateContentConfig:
+        return types.GenerateContentConfig(
+            temperature=self.temperature,
+            response_mime_type="application/json",
+            response_schema=self.schema,
+            tools=[types.Tool(google_search=types.GoogleSearch())] if self.grounded_subject is not None else None,
+        )
+
+    def parse(self, response: Any) -> Any:
+        out = self.schema.model_validate_json(response.text)
+        return self.finish(out) if self.finish else out
+
+    def _route(self) -> Route:
+        route = get_model_router().route(self.agent, self.model)
+        if route.provider == "gemini":
+            get_token_estimator().sample(self.contents, route.model)
+        return route
+
+    def run(self, client: Any) -> Any:
+        route = self._route()
+        call = route.call(scheduled(client.models.generate_content))
+        if self.grounded_subject is not None:
+            response = generate_grounded(
+                client, agent=self.agent, subject=self.grounded_subject,
+                contents=self.contents, config=self.config, model=route.model, call=call,
+            )
+        else:
+            response = generate_cached(
+                client, agent=self.agent, contents=self.contents, config=self.config, model=route.model, call=call,
+            )
+        return self.parse(response)
+
+    async def arun(
+        self,
+        aclient: Any,
+        on_partial: Optional[Callable[[str, Any], None]] = None,
+        generate: Optional[Callable[..., Awaitable[Any]]] = None,
+    ) -> Any:
+        """Same as ``run`` on an async client (``client.aio``).
+
+        With *on_partial*, the response is streamed and ``on_partial(field,
+        item)`` is called for each list item as soon as it is complete.
+        With *generate*, a cache miss is sent through it rather than
+        ``aclient.models.generate_content`` (and is not streamed).
+        """
+        route = self._route()
+        call = generate or (self._streaming_call(aclient, on_partial) if on_partial else None)
+        call = call or scheduled_async(aclient.models.generate_content)
+        config = self.config
+        if self.context is not None:
+            # Response-cache keys name the context by content; the request itself uses the job's cache
+            config = config.model_copy(update={"cached_content": self.context.key})
+            call = self.context.bind(call)
+        call = route.acall(call)
+        if self.grounded_subject is not None:
+            response = await generate_grounded_async(
+                aclient, agent=self.agent, subject=self.grounded_subject,
+                contents=self.contents, config=config, model=route.model, call=call,
+            )
+        else:
+            response = await generate_cached_async(
+                aclient, agent=self.agent, contents=self.contents, config=config, model=route.model, call=call,
+            )
+        return self.parse(response)
+
+    def _streaming_call(self, aclient: Any, on_partial: Callable[[str, Any], None]):
+        async def _call(**kwargs):
+            items = PartialListItems(_list_fields(self.schema))
+            chunks, text = [], []
+            async for chunk in await aclient.models.generate_content_stream(**kwargs):
+                chunks.append(chunk)
+                piece = _chunk_text(chunk)
+                if not piece:
+                    continue
+                text.append(piece)
+                for field, item in items.feed(piece):
+                    try:
+                        on_partial(field, item)
+                    except Exception as e:
+                        logger.warning(f"{self.agent}: partial result callback failed: {e}")
+            return _assemble(chunks, "".join(text))
+
+        return scheduled_async(_call)
+
+
+def _list_fields(schema: Type[BaseModel]) -> List[str]:
+    return [name for name, f in schema.model_fields.items() if typing.get_origin(f.annotation) in (list, List)]
+
+
+def _chunk_text(chunk: Any) -> str:
+    candidates = chunk.candidates or []
+    parts = (candidates[0].content.parts or []) if candidates and candidates[0].content else []
+    return "".join(p.text for p in parts if p.text and not p.thought)
+
+
+def _assemble(chunks: List[Any], text: str) -> types.GenerateContentResponse:
+    """One response equivalent to the streamed chunks: the full text plus the last chunk's metadata."""
+    last = chunks[-1] if chunks else types.GenerateContentResponse()
+    grounding = next(
+        (c.candidates[0].grounding_metadata for c in reversed(chunks)
+         if c.candidates and c.candidates[0].grounding_metadata),
+        None,
+    )
+    finish = last.candidates[0].finish_reason if last.candidates else None
+    return types.GenerateContentResponse(
+        candidates=[types.Candidate(
+            content=types.Content(role="model", parts=[types.Part(text=text)]),
+            grounding_metadata=grounding,
+            finish_reason=finish,
+        )],
+        usage_metadata=last.usage_metadata,
+        model_version=last.model_version,
+    )
+
+
+class PartialListItems:
+    """Incremental scanner for a JSON object arriving in pieces.
+
+    ``feed`` returns ``(field, item)`` for every element of the watched
+    top-level array fields completed by the new text. Elements may be
+    strings or objects; anything else is skipped.
+    """
+
+    def __init__(self, fields: List[str]):
+        self._fields = set(fields)
+        self._buf = ""
+        self._pos = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escaped = False
+        self._string_start = 0
+        self._expect_key = False
+        self._key: Optional[str] = None
+        self._element_start = 0
+
+    def _watching(self) -> bool:
+        """Inside a watched top-level array (depth 2)."""
+        return len(self._stack) >= 2 and self._stack[1] == "[" and self._key in self._fields
+
+    def feed(self, text: str) -> List[Tuple[str, Any]]:
+        self._buf += text
+        return list(self._scan())
+
+    def _scan(self) -> Iterator[Tuple[str, Any]]:
+        buf = self._buf
+        for i in range(self._pos, len(buf)):
+            c = buf[i]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif c == "\\":
+                    self._escaped = True
+                elif c == '"':
+                    self._in_string = False
+                    depth = len(self._stack)
+                    if depth == 1 and self._expect_key:
+                        self._key = json.loads(buf[self._string_start:i + 1])
+                    elif depth == 2 and self._watching():
+                        yield self._key, json.loads(buf[self._string_start:i + 1])
+                continue
+            if c == '"':
+                self._in_string = True
+                self._string_start = i
+            elif c in "{[":
+                self._stack.append(c)
+                if len(self._stack) == 1:
+                    self._expect_key = True
+                elif len(self._stack) == 3 and self._watching():
+                    self._element_start = i
+            elif c in "}]":
+                if len(self._stack) == 3 and self._watching():
+                    try:
+                        yield self._key, json.loads(buf[self._element_start:i + 1])
+                    except ValueError:
+                        pass
+                if self._stack:
+                    self._stack.pop()
+            elif len(self._stack) == 1:
+                if c == ":":
+                    self._expect_key = False
+                elif c == ",":
+                    self._expect_key = True
+        self._pos = len(buf)
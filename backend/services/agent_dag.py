@@ -0,0 +1,373 @@
+"""Run pipeline agents as a dependency graph instead of a fixed sequence.
+
+Each agent is registered with the names of the values it reads; it runs
+as soon as all of them exist, concurrently with any other agent that is
+ready at the same time, and its return value is stored under its own
+name for the agents downstream:
+
+    dag = AgentDAG()
+    dag.add("market_sizing", size_market, inputs=("idea", "category"))
+    dag.add("researcher", research, inputs=("idea", "evidence"))
+    dag.add("pm", plan_mvp, inputs=("idea", "researcher"))
+    run = dag.start({"idea": idea, "category": category})
+    ...                                  # market_sizing is already running
+    run.provide("evidence", evidence)    # researcher starts now
+    values = run.result()
+
+Inputs may be given up front or later with ``provide``, so a pipeline can
+start the agents that only need the idea while it is still gathering
+evidence for the others. The first agent error stops new agents from
+starting and is raised by ``result()``; agents already running finish in
+the background.
+
+A run can also be given agents that already ran (``completed=``, e.g.
+outputs restored from a job checkpoint): they aren't run again, and
+their values feed the agents downstream as if they had just finished.
+
+``start`` runs plain functions on a thread pool. ``start_async`` runs
+coroutine functions as tasks on the current event loop instead; there a
+failure or ``cancel()`` also cancels the agents still running.
+"""
+
+import os
+import asyncio
+import inspect
+import contextvars
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# Configuration via env vars
+# ---------------------------------------------------------------------------
+AGENT_DAG_WORKERS = int(os.getenv("AGENT_DAG_WORKERS", "16"))
+
+# Separate from the pipeline pools: a pipeline thread waiting on its agents
+# must never wait behind itself for a worker.
+_pool = ThreadPoolExecutor(max_workers=AGENT_DAG_WORKERS, thread_name_prefix="agent-dag")
+
+
+class _Node:
+    def __init__(self, name: str, fn: Callable[..., Any], inputs: Tuple[str, ...]):
+        self.name = name
+        self.fn = fn
+        self.inputs = inputs
+
+
+class AgentDAG:
+    """A set of agents and the values each one reads."""
+
+    def __init__(self):
+        self._nodes: Dict[str, _Node] = {}
+
+    def add(self, name: str, fn: Callable[..., Any], inputs: Iterable[str] = ()) -> "AgentDAG":
+        """Register *fn*, called with keyword arguments named after *inputs*."""
+        if name in self._nodes:
+            raise ValueError(f"Agent '{name}' is already registered.")
+        self._nodes[name] = _Node(name, fn, tuple(inputs))
+        return self
+
+    @property
+    def nodes(self) -> List[str]:
+        return list(self._nodes)
+
+    def start(
+        self,
+        values: Optional[Dict[str, Any]] = None,
+        before: Optional[Callable[[str], None]] = None,
+        after: Optional[Callable[[str, Any], None]] = None,
+        completed: Optional[Dict[str, Any]] = None,
+    ) -> "DAGRun":
+        """Start every agent whose inputs are in *values*.
+
+        *before(name)* runs on the agent's thread just before it starts and
+        may raise to abort the run (e.g. on cancellation); *after(name,
+        value)* runs when it finishes, for progress reporting. Agents in
+        *completed* are taken as already run, with those values.
+        """
+        run = DAGRun(self._nodes, before, after)
+        run._complete(completed or {})
+        run._provide_many(values or {})
+        return run
+
+    def run(self, values: Dict[str, Any], **hooks) -> Dict[str, Any]:
+        """Start with every external input given and wait for all agents."""
+        return self.start(values, **hooks).result()
+
+    def start_async(
+        self,
+        values: Optional[Dict[str, Any]] = None,
+        before: Optional[Callable[[str], Any]] = None,
+        after: Optional[Callable[[str, Any], Any]] = None,
+        completed: Optional[Dict[str, Any]] = None,
+    ) -> "AsyncDAGRun":
+        """``start`` for coroutine agents, as tasks on the running loop; hooks may be coroutines."""
+        run = AsyncDAGRun(self._nodes, before, after)
+        run._complete(completed or {})
+        run.provide_many(values or {})
+        return run
+
+    async def arun(self, values: Dict[str, Any], **hooks) -> Dict[str, Any]:
+        return await self.start_async(values, **hooks).result()
+
+
+class DAGRun:
+    """One execution of an ``AgentDAG``."""
+
+    def __init__(self, nodes: Dict[str, _Node], before, after):
+        self._nodes = nodes
+        self._before = before
+        self._after = after
+        self._lock = threading.Lock()
+        self._values: Dict[str, Any] = {}
+        self._started: Dict[str, Future] = {}
+        self._error: Optional[BaseException] = None
+        self._stopped = False
+        self._done = threading.Event()
+        if not nodes:
+            self._done.set()
+
+    # -- inputs -----------------------------------------------------------
+
+    def provide(self, name: str, value: Any) -> None:
+        """Supply an external input; agents waiting only on it start now."""
+        self._provide_many({name: value})
+
+    def _provide_many(self, values: Dict[str, Any]) -> None:
+        with self._lock:
+            for name in values:
+                if name in self._nodes:
+                    raise ValueError(f"'{name}' is produced by an agent and can't be provided.")
+            self._values.update(values)
+            ready = self._ready()
+        for node in ready:
+            self._launch(node)
+
+    def _complete(self, values: Dict[str, Any]) -> None:
+        """Record agents that already ran (before anything starts)."""
+        for name, value in values.items():
+            if name not in self._nodes:
+                raise ValueError(f"Unknown agent '{name}'.")
+            future = Future()
+            future.set_result(value)
+            self._started[name] = future
+            self._values[name] = value
+        if values and len(self._started) == len(self._nodes):
+            self._done.set()
+
+    def _ready(self) -> List[_Node]:
+        """Nodes whose inputs are all available and that haven't started (caller holds the lock)."""
+        if self._stopped:
+            return []
+        ready = [
+            n for n in self._nodes.values()
+            if n.name not in self._started and all(i in self._values for i in n.inputs)
+        ]
+        for n in ready:
+            self._started[n.name] = Future()
+        return ready
+
+    # -- execution --------------------------------------------------------
+
+    def _launch(self, node: _Node) -> None:
+        future = self._started[node.name]
+        try:
+            # Agents run in the caller's context (e.g. its LLM priority class)
+            _pool.submit(contextvars.copy_context().run, self._execute, node, future)
+        except RuntimeError as e:  # pool shut down (interpreter exit)
+            self._fail(node.name, e, future)
+
+    def _execute(self, node: _Node, future: Future) -> None:
+        if not future.set_running_or_notify_cancel():
+            self._check_done()
+            return
+        try:
+            if self._stopped:
+                raise _Stopped()
+            if self._before:
+                self._before(node.name)
+            with self._lock:
+                kwargs = {i: self._values[i] for i in node.inputs}
+            value = node.fn(**kwargs)
+        except _Stopped as e:
+            future.set_exception(e)
+            self._check_done()
+            return
+        except BaseException as e:
+            self._fail(node.name, e, future)
+            return
+
+        # Store the value before marking the agent done, so a finished run has every value
+        with self._lock:
+            self._values[node.name] = value
+        if self._after:
+            try:
+                self._after(node.name, value)
+            except Exception as e:
+                logger.warning(f"Agent '{node.name}' completion hook failed: {e}")
+        with self._lock:
+            ready = self._ready()
+        for n in ready:
+            self._launch(n)
+        future.set_result(value)
+        self._check_done()
+
+    def _fail(self, name: str, error: BaseException, future: Future) -> None:
+        with self._lock:
+            if self._error is None:
+                self._error = error
+                logger.warning(f"Agent '{name}' failed: {error}")
+            self._stopped = True
+        future.set_exception(error)
+        self._done.set()
+
+    def _check_done(self) -> None:
+        with self._lock:
+            finished = all(f.done() for f in self._started.values())
+            if (finished and len(self._started) == len(self._nodes)) or (self._stopped and finished):
+                self._done.set()
+
+    # -- results ----------------------------------------------------------
+
+    def cancel(self) -> None:
+        """Start no further agents; running ones finish and are discarded."""
+        with self._lock:
+            self._stopped = True
+            for future in self._started.values():
+                future.cancel()  # no-op for agents already running
+        self._check_done()
+
+    def result(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Wait for every agent; return all values (inputs and agent outputs) by name.
+
+        Raises the first agent error, or ``RuntimeError`` if the run was
+        cancelled or some agent's inputs were never provided.
+        """
+        with self._lock:
+            missing = {
+                i for n in self._nodes.values() if n.name not in self._started
+                for i in n.inputs if i not in self._values and i not in self._nodes
+            }
+        if missing and not self._stopped:
+            raise RuntimeError(f"Inputs never provided: {', '.join(sorted(missing))}")
+        if not self._done.wait(timeout):
+            raise TimeoutError("Agent graph did not finish in time.")
+        if self._error is not None:
+            raise self._error
+        if self._stopped:
+            raise RuntimeError("Agent graph was cancelled.")
+        with self._lock:
+            return dict(self._values)
+
+
+class _Stopped(Exception):
+    pass
+
+
+class AsyncDAGRun:
+    """One execution of an ``AgentDAG`` on an event loop."""
+
+    def __init__(self, nodes: Dict[str, _Node], before, after):
+        self._nodes = nodes
+        self._before = before
+        self._after = after
+        self._values: Dict[str, Any] = {}
+        self._tasks: Dict[str, asyncio.Future] = {}  # agent tasks, or done futures for completed agents
+        self._error: Optional[BaseException] = None
+        self._stopped = False
+        self._done = asyncio.Event()
+        if not nodes:
+            self._done.set()
+
+    def provide(self, name: str, value: Any) -> None:
+        self.provide_many({name: value})
+
+    def _complete(self, values: Dict[str, Any]) -> None:
+        for name, value in values.items():
+            if name not in self._nodes:
+                raise ValueError(f"Unknown agent '{name}'.")
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(value)
+            self._tasks[name] = future
+            self._values[name] = value
+        if values and len(self._tasks) == len(self._nodes):
+            self._done.set()
+
+    def provide_many(self, values: Dict[str, Any]) -> None:
+        for name in values:
+            if name in self._nodes:
+                raise ValueError(f"'{name}' is produced by an agent and can't be provided.")
+        self._values.update(values)
+        self._launch_ready()
+
+    def _launch_ready(self) -> None:
+        if self._stopped:
+            return
+        for n in self._nodes.values():
+            if n.name not in self._tasks and all(i in self._values for i in n.inputs):
+                self._tasks[n.name] = asyncio.create_task(self._execute(n), name=f"agent:{n.name}")
+
+    @staticmethod
+    async def _call_hook(hook, *args) -> None:
+        if hook:
+            out = hook(*args)
+            if inspect.isawaitable(out):
+                await out
+
+    async def _execute(self, node: _Node) -> None:
+        try:
+            await self._call_hook(self._before, node.name)
+            value = await node.fn(**{i: self._values[i] for i in node.inputs})
+        except asyncio.CancelledError:
+            self._check_done()
+            raise
+        except BaseException as e:
+            if self._error is None:
+                self._error = e
+                logger.warning(f"Agent '{node.name}' failed: {e}")
+            self.cancel()
+            self._done.set()
+            return
+        self._values[node.name] = value
+        try:
+            await self._call_hook(self._after, node.name, value)
+        except Exception as e:
+            logger.warning(f"Agent '{node.name}' completion hook failed: {e}")
+        self._launch_ready()
+        self._check_done()
+
+    def _check_done(self) -> None:
+        current = asyncio.current_task()
+        finished = [n for n, t in self._tasks.items() if t.done() or t is current or n in self._values]
+        if len(finished) == len(self._tasks) and (self._stopped or len(self._tasks) == len(self._nodes)):
+            self._done.set()
+
+    def cancel(self) -> None:
+        """Start no further agents and cancel the running ones."""
+        self._stopped = True
+        current = asyncio.current_task()
+        for task in self._tasks.values():
+            if task is not current and not task.done():
+                task.cancel()
+        self._check_done()
+
+    async def result(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Wait for every agent; same values and errors as ``DAGRun.result``."""
+        missing = {
+            i for n in self._nodes.values() if n.name not in self._tasks
+            for i in n.inputs if i not in self._values and i not in self._nodes
+        }
+        if missing and not self._stopped:
+            raise RuntimeError(f"Inputs never provided: {', '.join(sorted(missing))}")
+        try:
+            await asyncio.wait_for(self._done.wait(), timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError("Agent graph did not finish in time.")
+        if self._error is not None:
+            raise self._error
+        if self._stopped:
+            raise RuntimeError("Agent graph was cancelled.")
+        return dict(self._values)
@@ -1,20 +1,31 @@
-import os
 import json
 import logging
-from typing import List, Dict, Any, Literal
+from typing import List, Dict, Any, Callable, Literal, Optional, Union
 from google import genai
-from google.genai import types
 from pydantic import BaseModel, Field, computed_field
 
+from services.review_batch import ReviewBatch
+from services.agent_calls import AgentCall
+from services.agent_dag import AgentDAG
+from services.category_classifier import classify_locally
+from services.prompt_budget import Evidence, bullets, fit_evidence, fit_prompt
+from services.context_cache import JobContext
+from services.model_router import llm_provider
+from services.gemini_client import get_gemini_client
+from services.review_preprocessor import REVIEW_PROMPT_SAMPLE_SIZE, preprocess_reviews
+from services.scraper import locale_languages
+from services.scoring import get_scoring_engine
+
 logger = logging.getLogger(__name__)
 
+PartialCallback = Optional[Callable[[str, Any], None]]
+
 class CategoryDetectionOutput(BaseModel):
     category: Literal["mobile_app", "hardware", "fintech", "saas_web"]
     subcategory: str  # e.g. "ios_only", "cross_platform", "payments", "B2B SaaS", "wearables"
     rationale: str
 
-def detect_category(client: genai.Client, idea: str, user_category: str | None = None) -> CategoryDetectionOutput:
-    """If user_category is valid, skip LLM and return it directly."""
+def _user_category(user_category: str | None) -> CategoryDetectionOutput | None:
     valid = ("mobile_app", "hardware", "fintech", "saas_web")
     if user_category and user_category in valid:
         defaults = {"mobile_app": "cross_platform", "hardware": "consumer hardware",
@@ -22,6 +33,23 @@ def detect_category(client: genai.Client, idea: str, user_category: str | None =
         return CategoryDetectionOutput(
             category=user_category, subcategory=defaults[user_category], rationale="User-selected"
         )
+    return None
+
+
+def detect_category(client: genai.Client, idea: str, user_category: str | None = None) -> CategoryDetectionOutput:
+    """If user_category is valid, skip LLM and return it directly.
+
+    Otherwise the local classifier answers when it is confident; only the
+    remaining ideas cost a Gemini call.
+    """
+    return _user_category(user_category) or classify_locally(idea) or _category_call(idea).run(client)
+
+
+async def detect_category_async(aclient, idea: str, user_category: str | None = None) -> CategoryDetectionOutput:
+    return _user_category(user_category) or classify_locally(idea) or await _category_call(idea).arun(aclient)
+
+
+def _category_call(idea: str) -> AgentCall[CategoryDetectionOutput]:
     prompt = f"""Classify this startup idea into exactly ONE category:
 Idea: "{idea}"
 Categories:
@@ -32,16 +60,7 @@ Categories:
 
 Also provide a short subcategory (e.g. "ios_only", "cross_platform", "payments", "wearables", "B2B SaaS").
 Output JSON: {{"category": "...", "subcategory": "...", "rationale": "..."}}"""
-    response = client.models.generate_content(
-        model="gemini-3-flash-preview",
-        contents=prompt,
-        config=types.GenerateContentConfig(
-            temperature=0.1,
-            response_mime_type="application/json",
-            response_schema=CategoryDetectionOutput,
-        ),
-    )
-    return CategoryDetectionOutput.model_validate_json(response.text)
+    return AgentCall("category_detector", prompt, CategoryDetectionOutput, temperature=0.1)
 
 # --- Agent Output Schemas ---
 
@@ -74,6 +93,21 @@ class FundedCompetitor(BaseModel):
     stage: str = ""
     investors: str = ""
 
+class MarketSizingOutput(BaseModel):
+    tam: str                              # e.g. "$4.2B global market for X by 2026"
+    sam: str                              # serviceable addressable segment
+    som: str                              # realistically obtainable year 1-2
+    revenue_model_options: List[str]      # 2-4 options with pricing benchmarks
+    top_funded_competitors: List[FundedCompetitor] = []
+    funding_landscape: str               # 2-3 sentence VC narrative
+
+class MarketStrategyOutput(BaseModel):
+    score_breakdown: OpportunityScoreBreakdown
+    pricing_suggestion: str
+    target_platform_recommendation: str
+    market_breakdown: str
+    go_to_market_strategy: str           # 2-3 top GTM channels for this category
+
 class MarketIntelligenceOutput(BaseModel):
     score_breakdown: OpportunityScoreBreakdown
     pricing_suggestion: str
@@ -125,53 +159,39 @@ class IdeaValidationResult(BaseModel):
 
 # --- Multi-Agent Orchestrator ---
 
-def analyze_reviews_multi_agent(app_idea: str, reviews: List[Dict[str, Any]], competitors_meta: List[Dict[str, Any]] = None, model_provider: str = "gemini", category: str = "mobile_app", community_data: str = "") -> IdeaValidationResult:
-    """Orchestrates the Multi-Agent pipeline to validate the app idea."""
+def analyze_reviews_multi_agent(app_idea: str, reviews: Union[ReviewBatch, List[Dict[str, Any]]], competitors_meta: List[Dict[str, Any]] = None, model_provider: Optional[str] = None, category: str = "mobile_app", community_data: str = "", locales: List[str] | None = None) -> IdeaValidationResult:
+    """Orchestrates the Multi-Agent pipeline to validate the app idea.
+
+    *model_provider* pins the agents' calls to one provider (see
+    ``services.model_router``); None routes across the enabled ones.
+    """
     if not reviews:
         raise ValueError("No reviews provided for analysis.")
 
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key:
-        raise ValueError("GEMINI_API_KEY environment variable not set. Please add it to your .env file.")
-
-    client = genai.Client(api_key=api_key)
+    client = get_gemini_client()
 
-    # Take a sample of reviews to manage context limits
-    reviews_sample = reviews[:200]
-    reviews_text = json.dumps([{"rating": r["score"], "review": r["content"]} for r in reviews_sample])
+    # Drop duplicates, spam and off-language reviews before they reach a prompt
+    reviews, prep_stats = preprocess_reviews(reviews, languages=locale_languages(locales))
+    logger.info(f"Review preprocessing dropped {prep_stats.dropped_count} of {prep_stats.input_count} reviews.")
 
-    logger.info("Agent 1 (Researcher) is spinning up...")
-    researcher_result = run_researcher_agent(client, app_idea, reviews_text, category, community_data)
-    
-    logger.info("Agent 2 (Product Manager) is spinning up...")
-    pm_result = run_pm_agent(client, app_idea, researcher_result)
+    # Take a sample of reviews to manage context limits (a head slice would
+    # over-represent the first competitor and locale)
+    reviews_sample = reviews.sample(REVIEW_PROMPT_SAMPLE_SIZE, stratify_by_score=True)
+    reviews_text = "\n".join(reviews_sample.to_prompt_lines())
 
-    logger.info("Agent 3 (Market Intelligence) is spinning up...")
-    market_result = run_market_intelligence_agent(client, app_idea, researcher_result, pm_result, category)
+    logger.info("Agents (Researcher → PM → Market Strategy, with Market Sizing alongside) are spinning up...")
+    with llm_provider(model_provider):
+        values = validation_agent_dag(client).run({
+            "idea": app_idea, "category": category, "reviews_text": reviews_text, "community_data": community_data,
+        })
+    researcher_result, pm_result = values["researcher"], values["pm"]
+    market_result = merge_market_intelligence(values["market_sizing"], values["market_strategy"])
 
     logger.info("Multi-Agent pipeline completed successfully.")
 
     # Weighted opportunity score from individual dimensions
     breakdown = market_result.score_breakdown
-    weights = {
-        "pain_severity": 0.25,
-        "market_gap": 0.20,
-        "mvp_feasibility": 0.15,
-        "competition_density": 0.15,
-        "monetization_potential": 0.10,
-        "community_demand": 0.10,
-        "startup_saturation": 0.05,
-    }
-    opportunity_score = round(
-        breakdown.pain_severity * weights["pain_severity"]
-        + breakdown.market_gap * weights["market_gap"]
-        + breakdown.mvp_feasibility * weights["mvp_feasibility"]
-        + breakdown.competition_density * weights["competition_density"]
-        + breakdown.monetization_potential * weights["monetization_potential"]
-        + breakdown.community_demand * weights["community_demand"]
-        + breakdown.startup_saturation * weights["startup_saturation"]
-    )
-    opportunity_score = max(0, min(100, opportunity_score))
+    opportunity_score = get_scoring_engine().score(breakdown, category)
 
     logger.info(
         f"Opportunity score: {opportunity_score} "
@@ -207,8 +227,20 @@ def analyze_reviews_multi_agent(app_idea: str, reviews: List[Dict[str, Any]], co
 def _researcher_prompt(idea: str, reviews_text: str, category: str, community_data: str = "") -> str:
     """Build a category-specific researcher prompt for the Gemini researcher agent.
 
-    Routes to hardware, fintech, saas_web, or mobile_app (default) prompt templates.
+    *reviews_text* and *community_data* hold one review / post per line;
+    community posts are kept first when the prompt has to be trimmed to
+    the researcher's token budget.
     """
+    return fit_prompt(
+        "researcher",
+        lambda reviews, community: _researcher_template(idea, reviews, category, community),
+        community=Evidence(community_data, priority=0),
+        reviews=Evidence(reviews_text, priority=1),
+    )
+
+
+def _researcher_template(idea: str, reviews_text: str, category: str, community_data: str = "") -> str:
+    """Routes to hardware, fintech, saas_web, or mobile_app (default) prompt templates."""
     base = f'Startup idea: "{idea}"\n\n'
 
     # When real scraped community data is available, inject it as a priority section
@@ -218,8 +250,9 @@ def _researcher_prompt(idea: str, reviews_text: str, category: str, community_da
 
 ── REAL SCRAPED COMMUNITY DATA ──
 The following posts, comments, and reviews were scraped directly from Reddit,
-HackerNews, Twitter/X, Product Hunt, and review sites. Use these as PRIMARY
-evidence for community_signals. Include direct quotes with [source] attribution.
+HackerNews, Twitter/X, Product Hunt, and review sites, one per line as
+[source subreddit ▲score] text. Use these as PRIMARY evidence for
+community_signals. Include direct quotes with [source] attribution.
 
 {community_data}
 
@@ -273,7 +306,7 @@ Return JSON: {{"what_users_love": [5 positives], "what_users_hate": [5 pain poin
 
 Task — gather signal from ALL of the following sources:
 
-1. SCRAPED APP STORE REVIEWS (provided below) — extract pain points and loves directly.
+1. SCRAPED APP STORE REVIEWS (provided below, one per line as "rating★ text") — extract pain points and loves directly.
 2. REDDIT — Search Reddit for threads in r/apps, r/startups, r/entrepreneur, r/SideProject, and any niche subreddits relevant to this idea. Look for complaints about existing tools, feature requests, and "is there an app that does X?" posts.
 3. HACKERNEWS — Search HackerNews for "Ask HN" posts, Show HN launches, and comment threads discussing this problem space.
 4. PRODUCT HUNT — Search Product Hunt for upvoted products in this category. Read the comments and reviews on those products.
@@ -290,39 +323,55 @@ SCRAPED APP STORE REVIEWS:
 {reviews_text}"""
 
 
+def _researcher_call(
+    idea: str, reviews_text: str, category: str, community_data: str = "", context: Optional[JobContext] = None,
+) -> AgentCall[ResearcherOutput]:
+    if context is not None and context.active:
+        # The evidence is in the job's cached context; the prompt only points at it
+        prompt = _researcher_template(
+            idea, context.reference(_REVIEWS_SECTION), category,
+            context.reference(_COMMUNITY_SECTION) if context.has(_COMMUNITY_SECTION) else "",
+        )
+    else:
+        prompt = _researcher_prompt(idea, reviews_text, category, community_data)
+    return AgentCall("researcher", prompt, ResearcherOutput, temperature=0.2, grounded_subject=idea, context=context)
+
 def run_researcher_agent(client: genai.Client, idea: str, reviews_text: str, category: Literal["mobile_app", "hardware", "fintech", "saas_web"] = "mobile_app", community_data: str = "") -> ResearcherOutput:
-    prompt = _researcher_prompt(idea, reviews_text, category, community_data)
-    response = client.models.generate_content(
-        model='gemini-3-flash-preview',
-        contents=prompt,
-        config=types.GenerateContentConfig(
-            response_mime_type="application/json",
-            response_schema=ResearcherOutput,
-            temperature=0.2,
-            tools=[types.Tool(google_search=types.GoogleSearch())]
-        ),
-    )
-    return ResearcherOutput(**json.loads(response.text))
+    return _researcher_call(idea, reviews_text, category, community_data).run(client)
+
+async def run_researcher_agent_async(aclient, idea: str, reviews_text: str, category: Literal["mobile_app", "hardware", "fintech", "saas_web"] = "mobile_app", community_data: str = "", on_partial: PartialCallback = None, context: Optional[JobContext] = None) -> ResearcherOutput:
+    return await _researcher_call(idea, reviews_text, category, community_data, context).arun(aclient, on_partial)
 
 def run_pm_agent(client: genai.Client, idea: str, researcher_data: ResearcherOutput) -> PMOutput:
-    prompt = f"""
+    return _pm_call(idea, researcher_data).run(client)
+
+async def run_pm_agent_async(aclient, idea: str, researcher_data: ResearcherOutput, on_partial: PartialCallback = None) -> PMOutput:
+    return await _pm_call(idea, researcher_data).arun(aclient, on_partial)
+
+def _pm_call(idea: str, researcher_data: ResearcherOutput) -> AgentCall[PMOutput]:
+    prompt = fit_prompt(
+        "pm_agent",
+        lambda hate, love: f"""
     You are an expert Product Manager.
     The user is building this app: "{idea}"
-    
+
     The Market Researcher has provided the following data about our competitors:
-    What users hate: {json.dumps(researcher_data.what_users_hate)}
-    What users love: {json.dumps(researcher_data.what_users_love)}
-    
+    What users hate:
+{hate}
+    What users love:
+{love}
+
     Formulate a strict, actionable Day-1 MVP (Minimum Viable Product) feature roadmap that directly addresses the pain points (what users hate) while ensuring we cover table stakes (what they love). Do not include fluff.
-    """
-    response = client.models.generate_content(
-        model='gemini-3-flash-preview',
-        contents=prompt,
-        config={"response_mime_type": "application/json", "response_schema": PMOutput, "temperature": 0.4},
+    """,
+        hate=Evidence(bullets(researcher_data.what_users_hate), priority=0),
+        love=Evidence(bullets(researcher_data.what_users_love), priority=1),
     )
-    return PMOutput(**json.loads(response.text))
+    return AgentCall("pm_agent", prompt, PMOutput, temperature=0.4)
 
 def run_analyst_agent(client: genai.Client, idea: str, researcher_data: ResearcherOutput, pm_data: PMOutput) -> AnalystOutput:
+    return _analyst_call(idea, researcher_data, pm_data).run(client)
+
+def _analyst_call(idea: str, researcher_data: ResearcherOutput, pm_data: PMOutput) -> AgentCall[AnalystOutput]:
     prompt = f"""
     You are an expert Business Analyst & Strategist.
     App Idea: "{idea}"
@@ -348,43 +397,42 @@ def run_analyst_agent(client: genai.Client, idea: str, researcher_data: Research
     Task 3: Provide a 'market_breakdown' comparing typical iOS vs Android user behaviors for this specific app category.
     Task 4: Give a definite 'target_os_recommendation' for which platform to target first for MVP launch and why.
     """
-    response = client.models.generate_content(
-        model='gemini-3-flash-preview',
-        contents=prompt,
-        config=types.GenerateContentConfig(
-            response_mime_type="application/json",
-            response_schema=AnalystOutput,
-            temperature=0.2,
-            tools=[types.Tool(google_search=types.GoogleSearch())]
-        ),
-    )
-    return AnalystOutput(**json.loads(response.text))
+    return AgentCall("analyst_agent", prompt, AnalystOutput, temperature=0.2, grounded_subject=idea)
 
 
-def run_market_intelligence_agent(
+_CATEGORY_CONTEXT = {
+    "mobile_app": "consumer mobile app (App Store / Play Store)",
+    "hardware": "physical hardware product or IoT device",
+    "fintech": "financial technology product or service",
+    "saas_web": "web-based SaaS or developer tool",
+}
+
+
+def run_market_sizing_agent(
     client: genai.Client,
     idea: str,
-    researcher_result: ResearcherOutput,
-    pm_result: PMOutput,
     category: Literal["mobile_app", "hardware", "fintech", "saas_web"] = "mobile_app",
-) -> MarketIntelligenceOutput:
-    """Produce a Founder Intelligence Report with TAM/SAM/SOM, funded competitors, GTM strategy."""
+) -> MarketSizingOutput:
+    """Market size, revenue benchmarks and funding research — needs only the idea and category."""
+    return _market_sizing_call(idea, category).run(client)
+
+
+async def run_market_sizing_agent_async(
+    aclient,
+    idea: str,
+    category: Literal["mobile_app", "hardware", "fintech", "saas_web"] = "mobile_app",
+    on_partial: PartialCallback = None,
+) -> MarketSizingOutput:
+    return await _market_sizing_call(idea, category).arun(aclient, on_partial)
 
-    category_context = {
-        "mobile_app": "consumer mobile app (App Store / Play Store)",
-        "hardware": "physical hardware product or IoT device",
-        "fintech": "financial technology product or service",
-        "saas_web": "web-based SaaS or developer tool",
-    }.get(category, "software product")
 
-    prompt = f"""You are producing a Founder Intelligence Report for a startup.
+def _market_sizing_call(idea: str, category: str) -> AgentCall[MarketSizingOutput]:
+    category_context = _CATEGORY_CONTEXT.get(category, "software product")
+
+    prompt = f"""You are sizing the market for a startup.
 
 Idea: "{idea}"
 Category: {category_context}
-Pain points found: {researcher_result.what_users_hate}
-What users love: {researcher_result.what_users_love}
-Community signals: {researcher_result.community_signals}
-Proposed MVP: {pm_result.mvp_roadmap}
 
 Use Google Search to research ALL of the following:
 
@@ -393,15 +441,6 @@ MARKET SIZING — search "{idea} market size TAM 2024 2025 billion":
   sam: "Serviceable segment your product can realistically address"
   som: "Obtainable market in year 1-2 as a % of SAM with rationale"
 
-OPPORTUNITY SCORE (0-100, higher = better opportunity):
-  pain_severity (25%): intensity of user pain
-  market_gap (20%): how underserved the market is
-  mvp_feasibility (15%): how buildable in <3 months
-  competition_density (15%): 100=wide open, 0=monopoly
-  monetization_potential (10%): clarity of revenue path
-  community_demand (10%): vocal community need signal
-  startup_saturation (5%): 100=no VC players yet
-
 REVENUE MODELS — search "{idea} pricing model benchmark SaaS/app/hardware":
   2-4 specific options with pricing benchmarks from comparable products
   Format: "Freemium + Pro at $9.99/mo — standard in this category"
@@ -410,23 +449,228 @@ FUNDED COMPETITORS — search "{idea} startup funding Crunchbase 2023 2024":
   Up to 5: [{{"name": "...", "funding": "$5M Series A", "stage": "Series A", "investors": "a16z, YC"}}]
 
 FUNDING LANDSCAPE — search "{idea} VC investment trend 2024 2025":
-  2-3 sentences: Is space hot or cooling? Notable deals?
+  2-3 sentences: Is space hot or cooling? Notable deals?"""
 
-GO-TO-MARKET — based on what works for competitors in {category_context}:
+    return AgentCall("market_sizing", prompt, MarketSizingOutput, temperature=0.2, grounded_subject=idea)
+
+
+def run_market_strategy_agent(
+    client: genai.Client,
+    idea: str,
+    researcher_result: ResearcherOutput,
+    pm_result: PMOutput,
+    sizing_result: MarketSizingOutput,
+    category: Literal["mobile_app", "hardware", "fintech", "saas_web"] = "mobile_app",
+) -> MarketStrategyOutput:
+    """Opportunity scores, pricing, platform and GTM from the research, the MVP and the market sizing."""
+    return _market_strategy_call(idea, researcher_result, pm_result, sizing_result, category).run(client)
+
+
+async def run_market_strategy_agent_async(
+    aclient,
+    idea: str,
+    researcher_result: ResearcherOutput,
+    pm_result: PMOutput,
+    sizing_result: MarketSizingOutput,
+    category: Literal["mobile_app", "hardware", "fintech", "saas_web"] = "mobile_app",
+    on_partial: PartialCallback = None,
+    context: Optional[JobContext] = None,
+) -> MarketStrategyOutput:
+    call = _market_strategy_call(idea, researcher_result, pm_result, sizing_result, category, context)
+    return await call.arun(aclient, on_partial)
+
+
+def _market_strategy_call(
+    idea: str,
+    researcher_result: ResearcherOutput,
+    pm_result: PMOutput,
+    sizing_result: MarketSizingOutput,
+    category: str,
+    context: Optional[JobContext] = None,
+) -> AgentCall[MarketStrategyOutput]:
+    category_context = _CATEGORY_CONTEXT.get(category, "software product")
+    funded = [" · ".join(v for v in (c.name, c.funding, c.stage, c.investors) if v)
+              for c in sizing_result.top_funded_competitors]
+    # With the job's cached context, the raw reviews and posts replace the Researcher's restatement of them
+    love = bullets(researcher_result.what_users_love)
+    signals = bullets(researcher_result.community_signals)
+    if context is not None and context.has(_REVIEWS_SECTION):
+        love = [context.reference(_REVIEWS_SECTION)]
+    if context is not None and context.has(_COMMUNITY_SECTION):
+        signals = [context.reference(_COMMUNITY_SECTION)]
+
+    prompt = fit_prompt("market_strategy", lambda hate, love, signals, mvp, competitors: f"""You are producing the strategy section of a Founder Intelligence Report for a startup.
+
+Idea: "{idea}"
+Category: {category_context}
+Pain points found:
+{hate}
+What users love:
+{love}
+Community signals:
+{signals}
+Proposed MVP:
+{mvp}
+Market size: TAM {sizing_result.tam} · SAM {sizing_result.sam} · SOM {sizing_result.som}
+Funded competitors (name · funding · stage · investors):
+{competitors}
+Funding landscape: {sizing_result.funding_landscape}
+
+OPPORTUNITY SCORE (0-100, higher = better opportunity):
+  pain_severity (25%): intensity of user pain
+  market_gap (20%): how underserved the market is
+  mvp_feasibility (15%): how buildable in <3 months
+  competition_density (15%): 100=wide open, 0=monopoly
+  monetization_potential (10%): clarity of revenue path
+  community_demand (10%): vocal community need signal
+  startup_saturation (5%): 100=no VC players yet
+
+GO-TO-MARKET — use Google Search for what works for competitors in {category_context}:
   Top 2-3 GTM channels with brief rationale
 
 PRICING SUGGESTION: Specific recommendation with rationale
 PLATFORM RECOMMENDATION: iOS first vs Android vs cross-platform (or distribution channel for non-mobile)
-MARKET BREAKDOWN: 2-3 sentences on geography, customer type, B2B vs B2C segmentation"""
-
-    response = client.models.generate_content(
-        model="gemini-3-flash-preview",
-        contents=prompt,
-        config=types.GenerateContentConfig(
-            temperature=0.2,
-            response_mime_type="application/json",
-            response_schema=MarketIntelligenceOutput,
-            tools=[types.Tool(google_search=types.GoogleSearch())],
-        ),
+MARKET BREAKDOWN: 2-3 sentences on geography, customer type, B2B vs B2C segmentation""",
+        hate=Evidence(bullets(researcher_result.what_users_hate), priority=0),
+        competitors=Evidence(bullets(funded), priority=1),
+        love=Evidence(love, priority=2),
+        signals=Evidence(signals, priority=2),
+        mvp=Evidence(bullets(pm_result.mvp_roadmap), priority=3),
+    )
+
+    return AgentCall(
+        "market_strategy", prompt, MarketStrategyOutput, temperature=0.2, grounded_subject=idea, context=context,
+    )
+
+
+def merge_market_intelligence(sizing: MarketSizingOutput, strategy: MarketStrategyOutput) -> MarketIntelligenceOutput:
+    return MarketIntelligenceOutput(**sizing.model_dump(), **strategy.model_dump())
+
+
+def run_market_intelligence_agent(
+    client: genai.Client,
+    idea: str,
+    researcher_result: ResearcherOutput,
+    pm_result: PMOutput,
+    category: Literal["mobile_app", "hardware", "fintech", "saas_web"] = "mobile_app",
+) -> MarketIntelligenceOutput:
+    """Produce a Founder Intelligence Report with TAM/SAM/SOM, funded competitors, GTM strategy.
+
+    Runs market sizing then strategy in sequence; pipelines use
+    ``validation_agent_dag`` to overlap sizing with the other agents.
+    """
+    sizing = run_market_sizing_agent(client, idea, category)
+    strategy = run_market_strategy_agent(client, idea, researcher_result, pm_result, sizing, category)
+    return merge_market_intelligence(sizing, strategy)
+
+
+_REVIEWS_SECTION = "COMPETITOR DATA"
+_COMMUNITY_SECTION = "COMMUNITY POSTS"
+
+_VALIDATION_CONTEXT_INSTRUCTION = """You are one of a team of agents validating a startup idea: "{idea}" ({category_context}).
+The shared job context holds the evidence scraped for it:
+  {reviews} — competitor app reviews, one per line as "rating★ text" (or competitor descriptions when no reviews were found)
+  {community} — posts from Reddit, HackerNews, Twitter/X, Product Hunt and review sites, one per line as [source subreddit ▲score] text
+Treat it as primary evidence and quote it with [source] attribution; use Google Search to supplement it."""
+
+
+async def open_validation_context(
+    aclient, context: JobContext, idea: str, category: str, reviews_text: str, community_data: str,
+) -> JobContext:
+    """Cache a validation job's evidence for the Researcher and Market Strategy agents.
+
+    The evidence is trimmed to the Researcher's budget exactly as its
+    inline prompt would be.
+    """
+    fitted = fit_evidence(
+        "researcher",
+        lambda reviews, community: _researcher_template(idea, reviews, category, community),
+        community=Evidence(community_data, priority=0),
+        reviews=Evidence(reviews_text, priority=1),
+    )
+    instruction = _VALIDATION_CONTEXT_INSTRUCTION.format(
+        idea=idea, category_context=_CATEGORY_CONTEXT.get(category, "software product"),
+        reviews=_REVIEWS_SECTION, community=_COMMUNITY_SECTION,
+    )
+    return await context.open(
+        aclient, instruction, {_REVIEWS_SECTION: fitted["reviews"], _COMMUNITY_SECTION: fitted["community"]},
+    )
+
+
+# Output model of each validation agent, for restoring them from job checkpoints
+VALIDATION_AGENT_OUTPUTS = {
+    "market_sizing": MarketSizingOutput,
+    "researcher": ResearcherOutput,
+    "pm": PMOutput,
+    "market_strategy": MarketStrategyOutput,
+}
+
+
+def validation_agent_dag(
+    client,
+    asynchronous: bool = False,
+    on_partial: Optional[Callable[[str, str, Any], None]] = None,
+    context: Optional[JobContext] = None,
+) -> AgentDAG:
+    """The validation agents as a graph.
+
+    External inputs: ``idea``, ``category``, ``reviews_text`` and
+    ``community_data``. Market sizing needs only the idea and category, so
+    it runs alongside Researcher → PM; Market Strategy waits for all three.
+    With *asynchronous*, *client* is ``client.aio`` and the agents are
+    coroutines for ``AgentDAG.start_async``; *on_partial(agent, field,
+    item)* then streams the agents and receives list items as they arrive.
+    A *context* (asynchronous only) is opened with the evidence by the
+    ``job_context`` node, and the Researcher and Market Strategy run on it;
+    the caller closes it when the job ends.
+    """
+    if asynchronous:
+        sizing, researcher, pm, strategy = (
+            run_market_sizing_agent_async, run_researcher_agent_async, run_pm_agent_async, run_market_strategy_agent_async)
+    else:
+        sizing, researcher, pm, strategy = (
+            run_market_sizing_agent, run_researcher_agent, run_pm_agent, run_market_strategy_agent)
+
+    def streaming(name: str) -> Dict[str, Any]:
+        if not asynchronous or on_partial is None:
+            return {}
+        return {"on_partial": lambda field, item: on_partial(name, field, item)}
+
+    def shared(job_context: Optional[JobContext]) -> Dict[str, Any]:
+        return {"context": job_context} if job_context is not None else {}
+
+    if asynchronous and context is not None:
+        async def open_context(idea, category, reviews_text, community_data):
+            return await open_validation_context(client, context, idea, category, reviews_text, community_data)
+    elif asynchronous:
+        async def open_context(**_):
+            return None
+    else:
+        open_context = lambda **_: None  # noqa: E731
+
+    dag = AgentDAG()
+    dag.add("job_context", open_context, inputs=("idea", "category", "reviews_text", "community_data"))
+    dag.add(
+        "market_sizing",
+        lambda idea, category: sizing(client, idea, category, **streaming("market_sizing")),
+        inputs=("idea", "category"),
+    )
+    dag.add(
+        "researcher",
+        lambda idea, category, reviews_text, community_data, job_context: researcher(
+            client, idea, reviews_text, category, community_data, **streaming("researcher"), **shared(job_context)),
+        inputs=("idea", "category", "reviews_text", "community_data", "job_context"),
+    )
+    dag.add(
+        "pm",
+        lambda idea, researcher: pm(client, idea, researcher, **streaming("pm")),
+        inputs=("idea", "researcher"),
+    )
+    dag.add(
+        "market_strategy",
+        lambda idea, category, researcher, pm, market_sizing, job_context: strategy(
+            client, idea, researcher, pm, market_sizing, category,
+            **streaming("market_strategy"), **shared(job_context)),
+        inputs=("idea", "category", "researcher", "pm", "market_sizing", "job_context"),
     )
-    return MarketIntelligenceOutput.model_validate_json(response.text)
+    return dag
@@ -0,0 +1,212 @@
+"""Cached store search and app metadata lookups.
+
+Discovery asks the Play Store and the iTunes Search API for competitors on
+every validation, although the generated search queries repeat a lot
+across similar ideas. This module keeps two in-process caches:
+
+- **search results**, keyed by (store, normalized query, lang, country,
+  hits): the ranked list of app IDs a query returned. Empty results are
+  cached too (negative caching), for a shorter time, so a dead query isn't
+  retried on every job.
+- **app metadata**, keyed by (store, app ID, country): title, rating,
+  icon and — for iOS — the bundle ID the review scraper needs.
+
+Search results outlive app metadata: which apps a query finds changes
+slowly, their ratings less so. When a cached iTunes search is still valid
+but some of its apps' metadata has expired, those apps are refreshed with
+one batched ``lookup?id=a,b,c`` call instead of repeating the search.
+
+Network errors are never cached; the caller sees an empty result and the
+next job tries again.
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import requests
+from google_play_scraper import search as play_search
+
+from services.scraper import host_slot
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# Configuration via env vars
+# ---------------------------------------------------------------------------
+APP_SEARCH_CACHE_TTL = float(os.getenv("APP_SEARCH_CACHE_TTL_HOURS", "72")) * 3600
+APP_SEARCH_NEGATIVE_TTL = float(os.getenv("APP_SEARCH_NEGATIVE_TTL_MINUTES", "30")) * 60
+APP_METADATA_TTL = float(os.getenv("APP_METADATA_TTL_HOURS", "24")) * 3600
+APP_METADATA_CACHE_MAX = int(os.getenv("APP_METADATA_CACHE_MAX", "5000"))
+
+ITUNES_SEARCH_URL = "https://itunes.apple.com/search"
+ITUNES_LOOKUP_URL = "https://itunes.apple.com/lookup"
+_ITUNES_LOOKUP_BATCH = 100
+
+_lock = threading.Lock()
+# key -> (expires_at, [app_id, ...])
+_searches: Dict[Tuple, Tuple[float, List[str]]] = {}
+# (store, app_id, country) -> (expires_at, metadata dict)
+_apps: Dict[Tuple[str, str, str], Tuple[float, Dict[str, Any]]] = {}
+
+
+def _normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def _evict(cache: Dict, now: float, incoming: int = 1) -> None:
+    """Make room for *incoming* new entries: drop expired ones, then the soonest-expiring."""
+    if len(cache) + incoming <= APP_METADATA_CACHE_MAX:
+        return
+    for key in [k for k, (exp, _) in cache.items() if exp <= now]:
+        del cache[key]
+    overflow = len(cache) + incoming - APP_METADATA_CACHE_MAX
+    if overflow > 0:
+        for key in sorted(cache, key=lambda k: cache[k][0])[:overflow]:
+            del cache[key]
+
+
+def _store_apps(store: str, country: str, apps: Iterable[Dict[str, Any]], now: float) -> None:
+    entries = {(store, app["app_id"], country): (now + APP_METADATA_TTL, app) for app in apps}
+    with _lock:
+        _evict(_apps, now, incoming=sum(1 for key in entries if key not in _apps))
+        _apps.update(entries)
+
+
+def _store_search(key: Tuple, app_ids: List[str], now: float) -> None:
+    ttl = APP_SEARCH_CACHE_TTL if app_ids else APP_SEARCH_NEGATIVE_TTL
+    with _lock:
+        _evict(_searches, now, incoming=0 if key in _searches else 1)
+        _searches[key] = (now + ttl, app_ids)
+
+
+def _cached_search(key: Tuple, now: float) -> Optional[List[str]]:
+    with _lock:
+        entry = _searches.get(key)
+    if entry and entry[0] > now:
+        return entry[1]
+    return None
+
+
+def _cached_apps(store: str, country: str, app_ids: List[str], now: float) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+    """Split *app_ids* into (fresh cached metadata, IDs needing a refresh)."""
+    fresh, stale = {}, []
+    with _lock:
+        for app_id in app_ids:
+            entry = _apps.get((store, app_id, country))
+            if entry and entry[0] > now:
+                fresh[app_id] = entry[1]
+            else:
+                stale.append(app_id)
+    return fresh, stale
+
+
+def clear_cache() -> None:
+    """Forget every cached search and app (tests, manual refresh)."""
+    with _lock:
+        _searches.clear()
+        _apps.clear()
+
+
+# ---------------------------------------------------------------------------
+# Google Play
+# ---------------------------------------------------------------------------
+
+def _play_meta(app: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "app_id": app["appId"],
+        "title": app.get("title") or "Unknown App",
+        "score": float(app.get("score") or 0.0),
+        "icon": app.get("icon") or "",
+        "developer": app.get("developer") or "",
+    }
+
+
+def search_play_store(query: str, n_hits: int = 3, lang: str = "en", country: str = "us") -> List[Dict[str, Any]]:
+    """Top Play Store apps for *query* as ``{app_id, title, score, icon, developer}`` dicts."""
+    now = time.time()
+    key = ("play", _normalize_query(query), lang, country, n_hits)
+    app_ids = _cached_search(key, now)
+    if app_ids is not None:
+        fresh, stale = _cached_apps("play", country, app_ids, now)
+        if not stale:
+            logger.info(f"Play Store search cache hit for '{query}' ({len(app_ids)} apps).")
+            return [fresh[a] for a in app_ids]
+
+    try:
+        with host_slot("play.google.com"):
+            results = play_search(query, n_hits=n_hits, lang=lang, country=country) or []
+    except Exception as e:
+        logger.error(f"Error searching Play Store for '{query}': {e}")
+        return []
+
+    apps = [_play_meta(a) for a in results if a.get("appId")]
+    _store_apps("play", country, apps, now)
+    _store_search(key, [a["app_id"] for a in apps], now)
+    return apps
+
+
+# ---------------------------------------------------------------------------
+# Apple App Store (iTunes Search API)
+# ---------------------------------------------------------------------------
+
+def _itunes_meta(app: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "app_id": str(app["trackId"]),
+        "bundle_id": app["bundleId"],
+        "title": app.get("trackName") or "Unknown App",
+        "score": float(app.get("averageUserRating") or 0.0),
+        "icon": app.get("artworkUrl512") or "",
+        "developer": app.get("artistName") or "",
+    }
+
+
+def _itunes_results(url: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    with host_slot("itunes.apple.com"):
+        res = requests.get(url, params=params, timeout=10)
+    res.raise_for_status()
+    return [_itunes_meta(a) for a in res.json().get("results", []) if a.get("trackId") and a.get("bundleId")]
+
+
+def lookup_app_store(track_ids: Iterable[Any], country: str = "us") -> Dict[str, Dict[str, Any]]:
+    """Metadata for iOS apps by track ID, keyed by ``str(track_id)``.
+
+    Cached apps are served from memory; the rest are fetched with batched
+    ``lookup?id=a,b,c`` calls. Apps the store no longer lists are omitted.
+    """
+    now = time.time()
+    wanted = list(dict.fromkeys(str(t) for t in track_ids))
+    found, stale = _cached_apps("ios", country, wanted, now)
+    for start in range(0, len(stale), _ITUNES_LOOKUP_BATCH):
+        chunk = stale[start:start + _ITUNES_LOOKUP_BATCH]
+        try:
+            apps = _itunes_results(ITUNES_LOOKUP_URL, {"id": ",".join(chunk), "entity": "software", "country": country})
+        except Exception as e:
+            logger.error(f"Error looking up {len(chunk)} iOS apps: {e}")
+            continue
+        _store_apps("ios", country, apps, now)
+        found.update((a["app_id"], a) for a in apps)
+    return found
+
+
+def search_app_store(query: str, limit: int = 3, country: str = "us") -> List[Dict[str, Any]]:
+    """Top App Store apps for *query* as ``{app_id, bundle_id, title, score, icon, developer}`` dicts."""
+    now = time.time()
+    key = ("ios", _normalize_query(query), "", country, limit)
+    app_ids = _cached_search(key, now)
+    if app_ids is not None:
+        apps = lookup_app_store(app_ids, country)
+        logger.info(f"App Store search cache hit for '{query}' ({len(app_ids)} apps).")
+        return [apps[a] for a in app_ids if a in apps]
+
+    try:
+        apps = _itunes_results(ITUNES_SEARCH_URL, {"term": query, "entity": "software", "limit": limit, "country": country})
+    except Exception as e:
+        logger.error(f"Error searching iTunes API for '{query}': {e}")
+        return []
+
+    _store_apps("ios", country, apps, now)
+    _store_search(key, [a["app_id"] for a in apps], now)
+    return apps
@@ -1,7 +1,9 @@
 import os
 import tempfile
 import logging
-from google import genai
+
+from services.gemini_client import get_gemini_client
+from services.llm_scheduler import scheduled
 
 logger = logging.getLogger(__name__)
 
@@ -10,11 +12,7 @@ def transcribe_audio(file_bytes: bytes) -> str:
     Uses Gemini 3 Flash's native multimodal audio understanding to transcribe 
     an uploaded audio file back into text for the idea validation pipeline.
     """
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key:
-        raise ValueError("GEMINI_API_KEY environment variable not set.")
-        
-    client = genai.Client(api_key=api_key)
+    client = get_gemini_client()
     
     # Write the raw bytes to a temporary .m4a file so the SDK can upload it
     with tempfile.NamedTemporaryFile(delete=False, suffix=".m4a") as temp_audio:
@@ -34,7 +32,7 @@ def transcribe_audio(file_bytes: bytes) -> str:
         )
 
         logger.info("Transcribing audio with gemini-3-flash-preview...")
-        response = client.models.generate_content(
+        response = scheduled(client.models.generate_content)(
             model='gemini-3-flash-preview',
             contents=[audio_file, prompt]
         )
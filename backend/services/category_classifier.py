@@ -0,0 +1,448 @@
+"""Local category classifier in front of the Gemini category detector.
+
+``detect_category`` used to spend a full Gemini call on a four-way
+classification whenever the user didn't pick a category. Most ideas are
+easy to place ("budgeting app for couples" is fintech), and every past
+validation is a labelled example, so a small model trained on that history
+answers them locally in well under a millisecond:
+
+- features: TF-IDF over word unigrams and bigrams of the idea
+- model: multinomial logistic regression (numpy), one head for the
+  category and one for the subcategory
+
+``classify`` returns a result only when the model's probability for its
+best category reaches ``CATEGORY_CLASSIFIER_THRESHOLD``; anything less
+confident — and every idea while no model has been trained — goes to the
+LLM as before.
+
+Retrain from the stored validation history and compare with the LLM:
+
+    python -m services.category_classifier train
+    python -m services.category_classifier report --llm-sample 50
+"""
+
+import os
+import re
+import json
+import math
+import time
+import random
+import logging
+import argparse
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# Configuration via env vars
+# ---------------------------------------------------------------------------
+CATEGORY_CLASSIFIER_ENABLED = os.getenv("CATEGORY_CLASSIFIER_ENABLED", "true").lower() == "true"
+CATEGORY_CLASSIFIER_PATH = os.getenv("CATEGORY_CLASSIFIER_PATH", os.path.join("data", "category_classifier.json"))
+CATEGORY_CLASSIFIER_THRESHOLD = float(os.getenv("CATEGORY_CLASSIFIER_THRESHOLD", "0.85"))
+CATEGORY_CLASSIFIER_MIN_EXAMPLES = int(os.getenv("CATEGORY_CLASSIFIER_MIN_EXAMPLES", "200"))
+CATEGORY_CLASSIFIER_MAX_FEATURES = int(os.getenv("CATEGORY_CLASSIFIER_MAX_FEATURES", "20000"))
+
+CATEGORIES = ("mobile_app", "hardware", "fintech", "saas_web")
+# Subcategories seen fewer times than this are not learned
+_MIN_SUBCATEGORY_EXAMPLES = 3
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def _terms(text: str) -> List[str]:
+    words = _TOKEN.findall(text.lower())
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def _tfidf(text: str, vocabulary: Dict[str, int], idf: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Sparse L2-normalized sublinear TF-IDF vector of *text*: (feature indices, values)."""
+    counts = Counter(t for t in _terms(text) if t in vocabulary)
+    if not counts:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+    indices = np.fromiter((vocabulary[t] for t in counts), dtype=np.int64, count=len(counts))
+    values = np.fromiter((1.0 + math.log(c) for c in counts.values()), dtype=np.float32, count=len(counts))
+    values *= idf[indices]
+    values /= np.linalg.norm(values)
+    return indices, values
+
+
+class _Head:
+    """Softmax regression weights over the shared TF-IDF features."""
+
+    def __init__(self, labels: List[str], weights: np.ndarray, bias: np.ndarray):
+        self.labels = labels
+        self.weights = weights  # (n_features, n_labels)
+        self.bias = bias
+
+    def probabilities(self, indices: np.ndarray, values: np.ndarray) -> np.ndarray:
+        logits = self.bias + values @ self.weights[indices]
+        logits = np.exp(logits - logits.max())
+        return logits / logits.sum()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"labels": self.labels, "weights": self.weights.round(5).tolist(), "bias": self.bias.round(5).tolist()}
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "_Head":
+        return cls(d["labels"], np.asarray(d["weights"], dtype=np.float32), np.asarray(d["bias"], dtype=np.float32))
+
+
+class CategoryClassifier:
+    """TF-IDF + logistic regression over past validations."""
+
+    def __init__(
+        self,
+        vocabulary: Dict[str, int],
+        idf: np.ndarray,
+        category: _Head,
+        subcategory: Optional[_Head],
+        subcategories_by_category: Dict[str, List[str]],
+        threshold: float = CATEGORY_CLASSIFIER_THRESHOLD,
+        trained_at: str = "",
+        examples: int = 0,
+    ):
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.category = category
+        self.subcategory = subcategory
+        self.subcategories_by_category = subcategories_by_category
+        self.threshold = threshold
+        self.trained_at = trained_at
+        self.examples = examples
+
+    # -- prediction -------------------------------------------------------
+
+    def predict(self, idea: str) -> Tuple[str, float, str]:
+        """Best category, its probability, and the best subcategory seen with it."""
+        indices, values = _tfidf(idea, self.vocabulary, self.idf)
+        probs = self.category.probabilities(indices, values)
+        best = int(probs.argmax())
+        category = self.category.labels[best]
+        subcategory = ""
+        allowed = self.subcategories_by_category.get(category)
+        if self.subcategory is not None and allowed:
+            sub_probs = self.subcategory.probabilities(indices, values)
+            ranked = sorted(zip(sub_probs.tolist(), self.subcategory.labels), reverse=True)
+            subcategory = next((label for _, label in ranked if label in allowed), allowed[0])
+        elif allowed:
+            subcategory = allowed[0]
+        return category, float(probs[best]), subcategory
+
+    def classify(self, idea: str):
+        """``CategoryDetectionOutput`` when confident enough, else ``None`` (ask the LLM)."""
+        from services.ai_analyzer import CategoryDetectionOutput
+
+        category, confidence, subcategory = self.predict(idea)
+        if confidence < self.threshold:
+            return None
+        return CategoryDetectionOutput(
+            category=category,
+            subcategory=subcategory or category,
+            rationale=f"Local classifier ({confidence:.0%} confident)",
+        )
+
+    # -- persistence ------------------------------------------------------
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "vocabulary": self.vocabulary,
+            "idf": self.idf.round(5).tolist(),
+            "category": self.category.to_dict(),
+            "subcategory": self.subcategory.to_dict() if self.subcategory else None,
+            "subcategories_by_category": self.subcategories_by_category,
+            "threshold": self.threshold,
+            "trained_at": self.trained_at,
+            "examples": self.examples,
+        }
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "CategoryClassifier":
+        return cls(
+            vocabulary=d["vocabulary"],
+            idf=np.asarray(d["idf"], dtype=np.float32),
+            category=_Head.from_dict(d["category"]),
+            subcategory=_Head.from_dict(d["subcategory"]) if d.get("subcategory") else None,
+            subcategories_by_category=d.get("subcategories_by_category", {}),
+            threshold=CATEGORY_CLASSIFIER_THRESHOLD,
+            trained_at=d.get("trained_at", ""),
+            examples=d.get("examples", 0),
+        )
+
+    def save(self, path: str = CATEGORY_CLASSIFIER_PATH) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str = CATEGORY_CLASSIFIER_PATH) -> Optional["CategoryClassifier"]:
+        try:
+            with open(path) as f:
+                return cls.from_dict(json.load(f))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Could not load category classifier from {path}: {e}")
+            return None
+
+
+# ---------------------------------------------------------------------------
+# Training
+# ---------------------------------------------------------------------------
+
+def _normalize_subcategory(value: str) -> str:
+    return " ".join((value or "").lower().split())
+
+
+def _fit_head(
+    rows: np.ndarray, indices: np.ndarray, values: np.ndarray, n_docs: int, n_features: int,
+    y: np.ndarray, labels: List[str], epochs: int = 300, lr: float = 2.0, l2: float = 1e-4,
+) -> _Head:
+    """Full-batch gradient descent on the softmax cross-entropy; X is given as COO triples."""
+    k = len(labels)
+    weights = np.zeros((n_features, k), dtype=np.float32)
+    bias = np.zeros(k, dtype=np.float32)
+    targets = np.eye(k, dtype=np.float32)[y]
+    for _ in range(epochs):
+        logits = np.zeros((n_docs, k), dtype=np.float32)
+        np.add.at(logits, rows, values[:, None] * weights[indices])
+        logits += bias
+        logits -= logits.max(axis=1, keepdims=True)
+        probs = np.exp(logits)
+        probs /= probs.sum(axis=1, keepdims=True)
+        error = (probs - targets) / n_docs
+        grad = np.zeros_like(weights)
+        np.add.at(grad, indices, values[:, None] * error[rows])
+        weights -= lr * (grad + l2 * weights)
+        bias -= lr * error.sum(axis=0)
+    return _Head(labels, weights, bias)
+
+
+def train(
+    examples: Sequence[Dict[str, Any]],
+    threshold: float = CATEGORY_CLASSIFIER_THRESHOLD,
+    max_features: int = CATEGORY_CLASSIFIER_MAX_FEATURES,
+) -> CategoryClassifier:
+    """Fit a classifier on ``{"idea", "category", "subcategory"}`` rows."""
+    rows_in = [e for e in examples if e.get("idea") and e.get("category") in CATEGORIES]
+    if not rows_in:
+        raise ValueError("No labelled validations to train on.")
+
+    docs = [_terms(e["idea"]) for e in rows_in]
+    df = Counter(t for terms in docs for t in set(terms))
+    vocab_terms = [t for t, c in df.most_common(max_features) if c >= 2] or [t for t, _ in df.most_common(max_features)]
+    vocabulary = {t: i for i, t in enumerate(vocab_terms)}
+    n = len(docs)
+    idf = np.asarray([math.log((1 + n) / (1 + df[t])) + 1.0 for t in vocab_terms], dtype=np.float32)
+
+    coo_rows, coo_idx, coo_val = [], [], []
+    for r, e in enumerate(rows_in):
+        idx, val = _tfidf(e["idea"], vocabulary, idf)
+        coo_rows.append(np.full(len(idx), r, dtype=np.int64))
+        coo_idx.append(idx)
+        coo_val.append(val)
+    rows = np.concatenate(coo_rows)
+    indices = np.concatenate(coo_idx)
+    values = np.concatenate(coo_val)
+
+    labels = [c for c in CATEGORIES if any(e["category"] == c for e in rows_in)]
+    y = np.asarray([labels.index(e["category"]) for e in rows_in])
+    category_head = _fit_head(rows, indices, values, n, len(vocabulary), y, labels)
+
+    subs = [_normalize_subcategory(e.get("subcategory", "")) for e in rows_in]
+    sub_counts = Counter(s for s in subs if s)
+    sub_labels = sorted(s for s, c in sub_counts.items() if c >= _MIN_SUBCATEGORY_EXAMPLES)
+    subcategory_head = None
+    by_category: Dict[str, Counter] = {}
+    for e, s in zip(rows_in, subs):
+        if s in sub_labels:
+            by_category.setdefault(e["category"], Counter())[s] += 1
+    if len(sub_labels) >= 2:
+        keep = np.asarray([s in sub_labels for s in subs])
+        doc_map = np.cumsum(keep) - 1  # old doc index → new doc index
+        mask = keep[rows]
+        sub_y = np.asarray([sub_labels.index(s) for s in subs if s in sub_labels])
+        subcategory_head = _fit_head(
+            doc_map[rows[mask]], indices[mask], values[mask], int(keep.sum()), len(vocabulary), sub_y, sub_labels,
+        )
+
+    return CategoryClassifier(
+        vocabulary, idf, category_head, subcategory_head,
+        {c: [s for s, _ in counts.most_common()] for c, counts in by_category.items()},
+        threshold=threshold,
+        trained_at=datetime.now(timezone.utc).isoformat(),
+        examples=n,
+    )
+
+
+def _history() -> List[Dict[str, Any]]:
+    from services.db import list_validation_history
+
+    return list_validation_history()
+
+
+def retrain(path: str = CATEGORY_CLASSIFIER_PATH) -> Optional[CategoryClassifier]:
+    """Train on the stored validation history, save, and serve the new model."""
+    examples = _history()
+    usable = [e for e in examples if e.get("idea") and e.get("category") in CATEGORIES]
+    if len(usable) < CATEGORY_CLASSIFIER_MIN_EXAMPLES:
+        logger.warning(
+            f"Category classifier not trained: {len(usable)} labelled validations, "
+            f"need {CATEGORY_CLASSIFIER_MIN_EXAMPLES}."
+        )
+        return None
+    model = train(usable)
+    model.save(path)
+    set_category_classifier(model)
+    logger.info(f"Category classifier trained on {model.examples} validations ({len(model.vocabulary)} features).")
+    return model
+
+
+# ---------------------------------------------------------------------------
+# Process-wide model
+# ---------------------------------------------------------------------------
+
+_lock = threading.Lock()
+_model: Optional[CategoryClassifier] = None
+_loaded = False
+
+
+def get_category_classifier() -> Optional[CategoryClassifier]:
+    """The trained model, loaded from ``CATEGORY_CLASSIFIER_PATH`` on first use; ``None`` if untrained."""
+    global _model, _loaded
+    with _lock:
+        if not _loaded:
+            _model = CategoryClassifier.load(CATEGORY_CLASSIFIER_PATH)
+            _loaded = True
+        return _model
+
+
+def set_category_classifier(model: Optional[CategoryClassifier]) -> None:
+    global _model, _loaded
+    with _lock:
+        _model, _loaded = model, True
+
+
+def classify_locally(idea: str):
+    """Confident local ``CategoryDetectionOutput``, or ``None`` to fall back to the LLM."""
+    if not CATEGORY_CLASSIFIER_ENABLED:
+        return None
+    model = get_category_classifier()
+    if model is None:
+        return None
+    try:
+        return model.classify(idea)
+    except Exception as e:
+        logger.warning(f"Local category classifier failed (using LLM): {e}")
+        return None
+
+
+# ---------------------------------------------------------------------------
+# Evaluation
+# ---------------------------------------------------------------------------
+
+def _percentile(samples: List[float], q: float) -> float:
+    return float(np.percentile(samples, q)) if samples else 0.0
+
+
+def evaluate(
+    examples: Sequence[Dict[str, Any]],
+    holdout: float = 0.2,
+    llm_sample: int = 0,
+    thresholds: Sequence[float] = (0.5, 0.7, 0.8, 0.85, 0.9, 0.95),
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """Train on part of *examples*, then measure accuracy and latency on the rest.
+
+    With *llm_sample*, that many held-out ideas are also sent to the Gemini
+    detector, for a side-by-side accuracy and latency comparison. History
+    labels mostly came from that detector, so its accuracy is agreement
+    with its past answers.
+    """
+    usable = [e for e in examples if e.get("idea") and e.get("category") in CATEGORIES]
+    shuffled = usable[:]
+    random.Random(seed).shuffle(shuffled)
+    cut = max(1, int(len(shuffled) * (1 - holdout)))
+    train_set, test_set = shuffled[:cut], shuffled[cut:]
+    if not test_set:
+        raise ValueError("Not enough validations for a held-out set.")
+    model = train(train_set)
+
+    predictions, latencies_ms = [], []
+    for e in test_set:
+        start = time.perf_counter()
+        category, confidence, _ = model.predict(e["idea"])
+        latencies_ms.append((time.perf_counter() - start) * 1000)
+        predictions.append((category, confidence, e["category"]))
+
+    by_threshold = []
+    for t in thresholds:
+        answered = [(p, truth) for p, c, truth in predictions if c >= t]
+        by_threshold.append({
+            "threshold": t,
+            "coverage": round(len(answered) / len(predictions), 3),
+            "accuracy": round(sum(p == truth for p, truth in answered) / len(answered), 3) if answered else None,
+        })
+
+    report: Dict[str, Any] = {
+        "train_examples": len(train_set),
+        "test_examples": len(test_set),
+        "local": {
+            "accuracy": round(sum(p == truth for p, _, truth in predictions) / len(predictions), 3),
+            "latency_ms_p50": round(_percentile(latencies_ms, 50), 3),
+            "latency_ms_p95": round(_percentile(latencies_ms, 95), 3),
+            "by_threshold": by_threshold,
+        },
+    }
+
+    if llm_sample > 0:
+        from services.ai_analyzer import _category_call
+        from services.gemini_client import get_gemini_client
+
+        client = get_gemini_client()
+        correct, llm_latencies = 0, []
+        sample = test_set[:llm_sample]
+        for e in sample:
+            start = time.perf_counter()
+            out = _category_call(e["idea"]).run(client)
+            llm_latencies.append((time.perf_counter() - start) * 1000)
+            correct += out.category == e["category"]
+        report["llm"] = {
+            "examples": len(sample),
+            "accuracy": round(correct / len(sample), 3),
+            "latency_ms_p50": round(_percentile(llm_latencies, 50), 1),
+            "latency_ms_p95": round(_percentile(llm_latencies, 95), 1),
+        }
+    return report
+
+
+# ---------------------------------------------------------------------------
+# Offline CLI
+# ---------------------------------------------------------------------------
+
+def _main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Train or evaluate the local category classifier.")
+    parser.add_argument("command", choices=["train", "report"])
+    parser.add_argument("--path", default=CATEGORY_CLASSIFIER_PATH)
+    parser.add_argument("--holdout", type=float, default=0.2, help="Held-out fraction for report")
+    parser.add_argument("--llm-sample", type=int, default=0, help="Held-out ideas to also run through Gemini")
+    args = parser.parse_args(argv)
+
+    if args.command == "train":
+        model = retrain(args.path)
+        out: Any = {"trained": model is not None}
+        if model is not None:
+            out.update({"examples": model.examples, "features": len(model.vocabulary), "path": args.path})
+    else:
+        out = evaluate(_history(), holdout=args.holdout, llm_sample=args.llm_sample)
+    print(json.dumps(out, indent=2))
+
+
+if __name__ == "__main__":
+    _main()
@@ -10,11 +10,15 @@ import json
 import time
 import logging
 import urllib.parse
+from concurrent.futures import Future, ThreadPoolExecutor
 from enum import Enum
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from pydantic import BaseModel
 
+from services.review_archive import archive_posts
+from services.prompt_budget import compact_line
+
 logger = logging.getLogger(__name__)
 
 # ---------------------------------------------------------------------------
@@ -25,6 +29,10 @@ SCRAPING_TWITTER_ENABLED = os.getenv("SCRAPING_TWITTER_ENABLED", "true").lower()
 SCRAPING_STEALTHY_ENABLED = os.getenv("SCRAPING_STEALTHY_ENABLED", "true").lower() == "true"
 SCRAPING_REQUEST_DELAY = float(os.getenv("SCRAPING_REQUEST_DELAY", "1.5"))
 SCRAPING_MAX_PER_SOURCE = int(os.getenv("SCRAPING_MAX_PER_SOURCE", "20"))
+# Start idea-keyword scrapes while competitor discovery is still running
+SCRAPING_PIPELINED = os.getenv("SCRAPING_PIPELINED", "true").lower() == "true"
+
+_speculative_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="community-speculative")
 
 # ---------------------------------------------------------------------------
 # Data models
@@ -61,6 +69,20 @@ class CommunityScrapingResult(BaseModel):
     def total_posts(self) -> int:
         return len(self.posts)
 
+    def to_prompt_lines(self, limit: int = 50) -> List[str]:
+        """Encode the first *limit* posts as prompt evidence, one line each:
+        ``[reddit r/apps ▲42] Title — content``."""
+        lines = []
+        for p in self.posts[:limit]:
+            tag = p.source.value
+            if p.subreddit:
+                tag += f" r/{p.subreddit}"
+            if p.score is not None:
+                tag += f" ▲{p.score}"
+            text = f"{p.title} — {p.content}" if p.title and p.title not in p.content else p.content
+            lines.append(f"[{tag}] {compact_line(text)}")
+        return lines
+
 
 # ---------------------------------------------------------------------------
 # Category → source mapping
@@ -103,6 +125,21 @@ LEMMY_COMMUNITIES = {
     "fintech": ["technology@lemmy.world", "personalfinance@lemmy.world"],
 }
 
+# How many of the built queries each source searches (idea query first,
+# then competitor names). Applied once in ``_scrape_sources``; each
+# ``_scrape_*`` searches every query it is given. G2 searches competitor
+# names directly.
+SOURCE_QUERY_LIMITS = {
+    CommunitySource.REDDIT: 2,
+    CommunitySource.HACKERNEWS: 3,
+    CommunitySource.TWITTER: 2,
+    CommunitySource.PRODUCTHUNT: 3,
+    CommunitySource.DEVTO: 3,
+    CommunitySource.LEMMY: 2,
+    CommunitySource.GOOGLENEWS: 3,
+    CommunitySource.LOBSTERS: 2,
+}
+
 
 # ---------------------------------------------------------------------------
 # Service class
@@ -131,24 +168,8 @@ class CommunityScraperService:
             self._stealthy_fetcher = StealthyFetcher(auto_match=False)
         return self._stealthy_fetcher
 
-    def scrape_all(
-        self,
-        competitor_names: List[str],
-        idea_keywords: str,
-    ) -> CommunityScrapingResult:
-        """Entry point: scrapes all relevant sources for the category."""
-        if not SCRAPING_ENABLED:
-            logger.info("Community scraping disabled via SCRAPING_ENABLED=false")
-            return CommunityScrapingResult()
-
-        all_posts: List[ScrapedPost] = []
-        succeeded: List[str] = []
-        failed: List[str] = []
-
-        # Build search queries from competitor names and idea
-        queries = self._build_queries(competitor_names, idea_keywords)
-
-        dispatch = {
+    def _dispatch(self) -> dict:
+        return {
             CommunitySource.REDDIT: self._scrape_reddit,
             CommunitySource.HACKERNEWS: self._scrape_hackernews,
             CommunitySource.TWITTER: self._scrape_twitter,
@@ -160,6 +181,22 @@ class CommunityScraperService:
             CommunitySource.LOBSTERS: self._scrape_lobsters,
         }
 
+    def _scrape_sources(
+        self,
+        queries: List[str],
+        competitor_names: List[str],
+        skip_queries: int = 0,
+    ) -> Dict[CommunitySource, Optional[List[ScrapedPost]]]:
+        """Run every enabled source; returns posts per source (None = source failed).
+
+        Each source searches the first ``SOURCE_QUERY_LIMITS[source]`` of
+        *queries*; *skip_queries* drops that many from the front of each
+        source's share, so a second pass can cover only what a first pass
+        didn't.
+        """
+        dispatch = self._dispatch()
+        results: Dict[CommunitySource, Optional[List[ScrapedPost]]] = {}
+
         for source in self.sources:
             # Skip Twitter if disabled
             if source == CommunitySource.TWITTER and not SCRAPING_TWITTER_ENABLED:
@@ -175,14 +212,51 @@ class CommunityScraperService:
             if not scraper_fn:
                 continue
 
+            source_queries = queries[:SOURCE_QUERY_LIMITS.get(source, len(queries))][skip_queries:]
+            if not source_queries and source != CommunitySource.G2:
+                continue
+
             try:
-                posts = scraper_fn(queries, competitor_names)
-                all_posts.extend(posts[:SCRAPING_MAX_PER_SOURCE])
-                succeeded.append(source.value)
+                posts = scraper_fn(source_queries, competitor_names)
+                results[source] = posts
                 logger.info(f"[{source.value}] Scraped {len(posts)} posts")
             except Exception as e:
                 logger.warning(f"[{source.value}] Scraping failed: {e}")
+                results[source] = None
+
+        return results
+
+    def _merge(self, *passes: Dict[CommunitySource, Optional[List[ScrapedPost]]]) -> CommunityScrapingResult:
+        """Combine per-source results of one or more passes, in pass order.
+
+        A source succeeds if any pass succeeded for it; posts seen by an
+        earlier pass (same URL, or same title+content) are dropped, and
+        each source keeps at most SCRAPING_MAX_PER_SOURCE posts.
+        """
+        all_posts: List[ScrapedPost] = []
+        succeeded: List[str] = []
+        failed: List[str] = []
+
+        for source in self.sources:
+            outcomes = [p[source] for p in passes if source in p]
+            if not outcomes:
+                continue
+            ok = [posts for posts in outcomes if posts is not None]
+            if not ok:
                 failed.append(source.value)
+                continue
+            succeeded.append(source.value)
+            seen = set()
+            kept: List[ScrapedPost] = []
+            for post in (post for posts in ok for post in posts):
+                key = post.url or (post.title, post.content)
+                if key in seen:
+                    continue
+                seen.add(key)
+                kept.append(post)
+            all_posts.extend(kept[:SCRAPING_MAX_PER_SOURCE])
+
+        archive_posts([p.model_dump() for p in all_posts])
 
         return CommunityScrapingResult(
             posts=all_posts,
@@ -190,6 +264,30 @@ class CommunityScraperService:
             sources_failed=failed,
         )
 
+    def scrape_all(
+        self,
+        competitor_names: List[str],
+        idea_keywords: str,
+    ) -> CommunityScrapingResult:
+        """Entry point: scrapes all relevant sources for the category."""
+        if not SCRAPING_ENABLED:
+            logger.info("Community scraping disabled via SCRAPING_ENABLED=false")
+            return CommunityScrapingResult()
+
+        # Build search queries from competitor names and idea
+        queries = self._build_queries(competitor_names, idea_keywords)
+        return self._merge(self._scrape_sources(queries, competitor_names))
+
+    def start_pipelined(self, idea_keywords: str) -> "PipelinedCommunityScrape":
+        """Start scraping the idea-keyword queries now, in the background.
+
+        Call ``finish(competitor_names)`` on the returned handle once
+        discovery is done; it scrapes the competitor-name queries and
+        merges both passes into one result, covering the same queries as
+        ``scrape_all``.
+        """
+        return PipelinedCommunityScrape(self, idea_keywords)
+
     def _build_queries(self, competitor_names: List[str], idea_keywords: str) -> List[str]:
         """Build search queries from competitor names and idea keywords."""
         queries = []
@@ -228,7 +326,7 @@ class CommunityScraperService:
         posts: List[ScrapedPost] = []
 
         for sub in self.subreddits[:4]:
-            for query in queries[:2]:
+            for query in queries:
                 try:
                     url = f"https://www.reddit.com/r/{sub}/search.json"
                     params = {"q": query, "restrict_sr": "1", "sort": "relevance", "limit": "10", "raw_json": "1"}
@@ -302,7 +400,7 @@ class CommunityScraperService:
 
         posts: List[ScrapedPost] = []
 
-        for query in queries[:3]:
+        for query in queries:
             encoded = urllib.parse.quote(query)
 
             # Search stories
@@ -359,7 +457,7 @@ class CommunityScraperService:
 
         nitter_instances = ["nitter.net"]
 
-        for query in queries[:2]:
+        for query in queries:
             scraped = False
 
             # Try Nitter instances first (lightweight, no JS)
@@ -430,7 +528,7 @@ class CommunityScraperService:
         }
         api_url = "https://api.producthunt.com/v2/api/graphql"
 
-        for query in queries[:3]:
+        for query in queries:
             try:
                 gql = {
                     "query": """
@@ -509,7 +607,7 @@ class CommunityScraperService:
 
         posts: List[ScrapedPost] = []
 
-        for query in queries[:3]:
+        for query in queries:
             try:
                 url = "https://dev.to/api/articles"
                 params = {"tag": query.replace(" ", ""), "per_page": 10, "top": 30}
@@ -603,7 +701,7 @@ class CommunityScraperService:
         posts: List[ScrapedPost] = []
         lemmy_instances = ["lemmy.world", "lemmy.ml"]
 
-        for query in queries[:2]:
+        for query in queries:
             for instance in lemmy_instances:
                 try:
                     url = f"https://{instance}/api/v3/search"
@@ -670,7 +768,7 @@ class CommunityScraperService:
 
         posts: List[ScrapedPost] = []
 
-        for query in queries[:3]:
+        for query in queries:
             try:
                 encoded = urllib.parse.quote(query)
                 url = f"https://news.google.com/rss/search?q={encoded}&hl=en-US&gl=US&ceid=US:en"
@@ -722,7 +820,7 @@ class CommunityScraperService:
 
         posts: List[ScrapedPost] = []
 
-        for query in queries[:2]:
+        for query in queries:
             try:
                 encoded = urllib.parse.quote(query)
                 url = f"https://lobste.rs/search?q={encoded}&what=stories&order=relevance&format=json"
@@ -814,3 +912,42 @@ class CommunityScraperService:
                 continue
 
         return posts
+
+
+class PipelinedCommunityScrape:
+    """Handle for a community scrape split around competitor discovery.
+
+    The idea-keyword queries don't depend on discovery, so they run on a
+    background thread from construction; ``finish`` adds the competitor
+    queries once their names are known.
+    """
+
+    def __init__(self, service: CommunityScraperService, idea_keywords: str):
+        self._service = service
+        self._idea_keywords = idea_keywords
+        self._idea_queries = service._build_queries([], idea_keywords) if idea_keywords else []
+        self._idea_pass: Optional[Future] = None
+        if SCRAPING_ENABLED and self._idea_queries:
+            self._idea_pass = _speculative_pool.submit(service._scrape_sources, self._idea_queries, [])
+
+    def finish(self, competitor_names: List[str]) -> CommunityScrapingResult:
+        if not SCRAPING_ENABLED:
+            logger.info("Community scraping disabled via SCRAPING_ENABLED=false")
+            return CommunityScrapingResult()
+
+        passes = []
+        queries = self._service._build_queries(competitor_names, self._idea_keywords)
+        skip = len(self._idea_queries)
+        if len(queries) > skip or any(n and n.strip() for n in competitor_names):
+            passes.append(self._service._scrape_sources(queries, competitor_names, skip_queries=skip))
+        if self._idea_pass is not None:
+            try:
+                passes.insert(0, self._idea_pass.result())
+            except Exception as e:
+                logger.warning(f"Speculative community scrape failed: {e}")
+        return self._service._merge(*passes)
+
+    def discard(self) -> None:
+        """Drop the result (the job ended before discovery produced anything)."""
+        if self._idea_pass is not None:
+            self._idea_pass.cancel()
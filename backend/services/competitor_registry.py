@@ -0,0 +1,424 @@
+"""Canonical competitor registry with entity resolution.
+
+Discovery sees the same product several times — a Play Store app, an iOS
+app, a Product Hunt launch, a YC company page. The registry resolves those
+listings to one ``CompetitorEntity`` using:
+
+- the normalized product name ("Todoist: To-Do List & Planner" → "todoist")
+- the product's own web domain (aggregator URLs such as producthunt.com or
+  g2.com are kept as links instead)
+- store IDs and bundle IDs, including the domain implied by a reverse-DNS
+  bundle ID (``com.acme.todo`` → ``acme.com``)
+
+Store IDs, bundle IDs and a product's own domain identify it. A name or a
+bundle-implied publisher domain doesn't: Google Keep and Google Tasks
+share ``google.com``, and many apps are called "Habit Tracker". Those weak
+keys only merge a listing into an entity when at most one of the two has
+store listings (a web or Product Hunt page for an app), or, for a name,
+when both come from the same developer, and only if exactly one entity
+qualifies. Two distinct store apps are never merged on a publisher domain
+or a title alone.
+
+Every key points into an in-process index, so resolution is a handful of
+dict lookups. Entities persist to the Supabase ``competitors`` table
+(see migrations/003_competitor_registry.sql) and the index is warmed from
+it on first use; without Supabase credentials the registry lives in
+memory for the life of the process, like the other mocked DB operations.
+
+The registry also remembers when each entity's store reviews were last
+scraped per locale, so discovery can serve recently scraped competitors
+from the review archive instead of scraping them again.
+"""
+
+import os
+import re
+import uuid
+import logging
+import threading
+import unicodedata
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+from pydantic import BaseModel
+
+from services.db import get_supabase
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# Configuration via env vars
+# ---------------------------------------------------------------------------
+COMPETITOR_REVIEW_TTL_HOURS = float(os.getenv("COMPETITOR_REVIEW_TTL_HOURS", "24"))
+COMPETITOR_REGISTRY_LOAD_LIMIT = int(os.getenv("COMPETITOR_REGISTRY_LOAD_LIMIT", "5000"))
+
+# Hosts whose URLs point at a listing *about* a product, not the product itself
+_AGGREGATOR_HOSTS = {
+    "producthunt.com": "product_hunt", "ycombinator.com": "ycombinator", "g2.com": "g2",
+    "capterra.com": "capterra", "crunchbase.com": "crunchbase", "kickstarter.com": "kickstarter",
+    "indiegogo.com": "indiegogo", "amazon.com": "amazon", "apps.apple.com": "app_store",
+    "itunes.apple.com": "app_store", "play.google.com": "play_store", "github.com": "github",
+    "alternativeto.net": "alternativeto", "linkedin.com": "linkedin", "twitter.com": "twitter",
+    "x.com": "twitter", "reddit.com": "reddit", "medium.com": "medium", "techcrunch.com": "techcrunch",
+}
+_SECOND_LEVEL = {"co", "com", "org", "net", "ac", "gov"}
+_BUNDLE_TLDS = {"com", "io", "net", "org", "co", "app", "ai", "me", "de", "fr", "uk"}
+_NAME_NOISE = {"app", "apps", "the", "inc", "llc", "ltd", "hq", "official", "mobile"}
+_NAME_SPLIT_RE = re.compile(r"\s*(?::|\s[-–—|]\s)")
+_NON_ALNUM_RE = re.compile(r"[^0-9a-z]+")
+_KEY_PRIORITY = {"android": 0, "ios": 0, "bundle": 1, "domain": 2, "publisher": 3, "name": 4}
+_WEAK_KEYS = {"publisher", "name"}  # shared by distinct products; see _weak_match
+
+
+class CompetitorEntity(BaseModel):
+    id: str
+    name: str
+    name_key: str = ""
+    aliases: List[str] = []                  # other normalized names seen for this product
+    domains: List[str] = []
+    bundle_ids: List[str] = []
+    android_ids: List[str] = []
+    ios_apps: Dict[str, str] = {}            # iOS track ID -> bundle ID
+    developers: List[str] = []               # normalized store developer names
+    links: Dict[str, str] = {}               # source -> URL (product_hunt, ycombinator, ...)
+    icon: str = ""
+    score: float = 0.0
+    description: str = ""
+    reviews_fetched: Dict[str, str] = {}     # locale -> ISO time of the last live review scrape
+    last_seen: str = ""
+
+    def keys(self) -> Set[Tuple[str, str]]:
+        keys = {("domain", d) for d in self.domains}
+        keys |= {("bundle", b) for b in self.bundle_ids}
+        keys |= {("publisher", d) for d in map(bundle_domain, self.bundle_ids) if d}
+        keys |= {("android", a) for a in self.android_ids}
+        keys |= {("ios", t) for t in self.ios_apps}
+        keys |= {("name", n) for n in [self.name_key, *self.aliases] if n}
+        return keys
+
+    def has_store_listing(self) -> bool:
+        return bool(self.android_ids or self.ios_apps)
+
+    def reviews_fresh(self, locales: Iterable[str], now: datetime) -> bool:
+        """True if reviews for every locale were scraped within COMPETITOR_REVIEW_TTL_HOURS."""
+        cutoff = now - timedelta(hours=COMPETITOR_REVIEW_TTL_HOURS)
+        for locale in locales:
+            fetched = self.reviews_fetched.get(locale)
+            if not fetched or datetime.fromisoformat(fetched) < cutoff:
+                return False
+        return True
+
+
+# ---------------------------------------------------------------------------
+# Normalization
+# ---------------------------------------------------------------------------
+
+def normalize_name(name: str) -> str:
+    """Comparable form of a product name: no subtitle, accents, punctuation or filler words."""
+    if not name:
+        return ""
+    base = _NAME_SPLIT_RE.split(name, maxsplit=1)[0]
+    base = unicodedata.normalize("NFKD", base).encode("ascii", "ignore").decode().lower()
+    words = [w for w in _NON_ALNUM_RE.split(base) if w and w not in _NAME_NOISE]
+    return "".join(words)
+
+
+def registrable_domain(host: str) -> str:
+    """'www.app.acme.co.uk' → 'acme.co.uk' (no public-suffix list, common cases only)."""
+    parts = [p for p in host.lower().strip(".").split(".") if p]
+    if len(parts) < 2:
+        return ""
+    if len(parts) >= 3 and len(parts[-1]) == 2 and parts[-2] in _SECOND_LEVEL:
+        return ".".join(parts[-3:])
+    return ".".join(parts[-2:])
+
+
+def url_identity(url: str) -> Tuple[str, str]:
+    """Classify a URL as ("domain", acme.com) or ("link", source_name), or ("", "")."""
+    if not url:
+        return "", ""
+    host = urlparse(url if "://" in url else f"https://{url}").hostname or ""
+    domain = registrable_domain(host)
+    if not domain:
+        return "", ""
+    source = _AGGREGATOR_HOSTS.get(host.removeprefix("www.")) or _AGGREGATOR_HOSTS.get(domain)
+    if source:
+        return "link", source
+    return "domain", domain
+
+
+def bundle_domain(bundle_id: str) -> str:
+    """Domain implied by a reverse-DNS bundle ID ('com.acme.todo' → 'acme.com'), if plausible."""
+    parts = bundle_id.lower().split(".")
+    if len(parts) < 3 or parts[0] not in _BUNDLE_TLDS or len(parts[1]) < 3:
+        return ""
+    return f"{parts[1]}.{parts[0]}"
+
+
+# ---------------------------------------------------------------------------
+# Registry
+# ---------------------------------------------------------------------------
+
+def _key_rank(key: Tuple[str, str]) -> Tuple[int, str]:
+    return _KEY_PRIORITY.get(key[0], 9), key[1]
+
+
+def _probe_keys(listing: CompetitorEntity) -> List[Tuple[str, str]]:
+    """Index keys a listing may match: its own, plus own domain ↔ publisher domain."""
+    keys = listing.keys()
+    keys |= {("publisher", d) for kind, d in list(keys) if kind == "domain"}
+    keys |= {("domain", d) for kind, d in list(keys) if kind == "publisher"}
+    return sorted(keys, key=_key_rank)
+
+
+def _weak_match(a: CompetitorEntity, b: CompetitorEntity, kinds: Set[str]) -> bool:
+    """Whether a shared name or publisher domain (*kinds*) is enough to merge *a* and *b*."""
+    same_developer = bool(set(a.developers) & set(b.developers))
+    if a.developers and b.developers and not same_developer:
+        return False
+    if not (a.has_store_listing() and b.has_store_listing()):
+        return True  # e.g. an app's Product Hunt page or website
+    # Two store apps: distinct store IDs with a shared publisher or title are distinct products
+    return "name" in kinds and same_developer
+
+
+def _listing_entity(meta: Dict[str, Any], now: str) -> CompetitorEntity:
+    """A one-listing entity built from a discovery ``competitors_meta`` entry."""
+    platform = meta.get("platform", "")
+    app_id = str(meta.get("app_id") or "")
+    entity = CompetitorEntity(
+        id="", name=meta.get("title", "") or app_id, name_key=normalize_name(meta.get("title", "")),
+        icon=meta.get("icon", ""), score=float(meta.get("score") or 0.0),
+        description=meta.get("description", ""), last_seen=now,
+    )
+    if meta.get("developer"):
+        entity.developers = [normalize_name(meta["developer"])]
+    if platform == "android" and app_id:
+        entity.android_ids = [app_id]
+        entity.bundle_ids = [app_id]
+    elif platform == "ios" and app_id:
+        bundle = meta.get("bundle_id", "")
+        entity.ios_apps = {app_id: bundle}
+        entity.bundle_ids = [bundle] if bundle else []
+    else:
+        kind, value = url_identity(app_id)
+        if kind == "domain":
+            entity.domains = [value]
+            entity.links = {"website": app_id}
+        elif kind == "link":
+            entity.links = {value: app_id}
+        elif app_id:
+            entity.links = {meta.get("source") or "web": app_id}
+    return entity
+
+
+def _merge_into(target: CompetitorEntity, other: CompetitorEntity) -> None:
+    def union(a: List[str], b: List[str]) -> List[str]:
+        return list(dict.fromkeys(a + b))
+
+    if not target.name_key and other.name_key:
+        target.name, target.name_key = other.name, other.name_key
+    target.aliases = [n for n in union(target.aliases, [other.name_key, *other.aliases])
+                      if n and n != target.name_key]
+    target.domains = union(target.domains, other.domains)
+    target.bundle_ids = union(target.bundle_ids, other.bundle_ids)
+    target.android_ids = union(target.android_ids, other.android_ids)
+    target.ios_apps = {**other.ios_apps, **target.ios_apps}
+    target.developers = [d for d in union(target.developers, other.developers) if d]
+    target.links = {**other.links, **target.links}
+    target.icon = target.icon or other.icon
+    target.score = target.score or other.score
+    target.description = target.description or other.description
+    for locale, ts in other.reviews_fetched.items():
+        if ts > target.reviews_fetched.get(locale, ""):
+            target.reviews_fetched[locale] = ts
+    target.last_seen = max(target.last_seen, other.last_seen)
+
+
+class CompetitorRegistry:
+    """Indexed, persistent set of competitor entities."""
+
+    def __init__(self, persist: bool = True):
+        self._persist_enabled = persist
+        self._lock = threading.RLock()
+        self._entities: Dict[str, CompetitorEntity] = {}
+        self._index: Dict[Tuple[str, str], str] = {}
+        self._weak_index: Dict[Tuple[str, str], List[str]] = {}  # weak keys may name several entities
+        self._loaded = not persist
+
+    # ── Index maintenance ───────────────────────────────────────────
+
+    def _add(self, entity: CompetitorEntity) -> None:
+        self._entities[entity.id] = entity
+        for key in entity.keys():
+            if key[0] in _WEAK_KEYS:
+                ids = self._weak_index.setdefault(key, [])
+                if entity.id not in ids:
+                    ids.append(entity.id)
+            else:
+                self._index[key] = entity.id
+
+    def _remove(self, entity_id: str) -> None:
+        entity = self._entities.pop(entity_id, None)
+        if entity:
+            for key in entity.keys():
+                if self._index.get(key) == entity_id:
+                    del self._index[key]
+                ids = self._weak_index.get(key)
+                if ids and entity_id in ids:
+                    ids.remove(entity_id)
+                    if not ids:
+                        del self._weak_index[key]
+
+    def _matches(self, listing: CompetitorEntity) -> Tuple[List[str], Dict[str, Set[str]]]:
+        """Entities sharing a strong key with *listing*, and those sharing only weak ones (with the key kinds)."""
+        strong: List[str] = []
+        weak: Dict[str, Set[str]] = {}
+        for key in _probe_keys(listing):
+            if key[0] in _WEAK_KEYS or key not in listing.keys():
+                # A weak key, or a cross-kind probe (own domain vs. bundle-implied publisher)
+                for entity_id in self._weak_index.get(key, []) + ([self._index[key]] if key in self._index else []):
+                    weak.setdefault(entity_id, set()).add("publisher" if key[0] != "name" else "name")
+            elif key in self._index and self._index[key] not in strong:
+                strong.append(self._index[key])
+        return strong, {i: kinds for i, kinds in weak.items() if i not in strong}
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        supabase = get_supabase()
+        if not supabase:
+            logger.info("[MOCKED] Competitor registry running in memory only.")
+            return
+        try:
+            resp = (
+                supabase.table("competitors").select("*")
+                .order("last_seen", desc=True).limit(COMPETITOR_REGISTRY_LOAD_LIMIT).execute()
+            )
+            for row in resp.data or []:
+                self._add(CompetitorEntity.model_validate(row))
+            logger.info(f"Loaded {len(self._entities)} competitors into the registry.")
+        except Exception as e:
+            logger.warning(f"Failed to load competitor registry: {e}")
+
+    def _save(self, entities: List[CompetitorEntity], removed: List[str]) -> None:
+        if not self._persist_enabled:
+            return
+        supabase = get_supabase()
+        if not supabase:
+            logger.info(f"[MOCKED] Competitor registry upsert of {len(entities)} entities.")
+            return
+        try:
+            if entities:
+                supabase.table("competitors").upsert([e.model_dump() for e in entities]).execute()
+            if removed:
+                supabase.table("competitors").delete().in_("id", removed).execute()
+        except Exception as e:
+            logger.warning(f"Failed to persist competitor registry: {e}")
+
+    # ── Public API ──────────────────────────────────────────────────
+
+    def get(self, entity_id: str) -> Optional[CompetitorEntity]:
+        with self._lock:
+            self._ensure_loaded()
+            return self._entities.get(entity_id)
+
+    def lookup(self, kind: str, value: str) -> Optional[CompetitorEntity]:
+        """Entity indexed under (*kind*, *value*), e.g. ("domain", "acme.com")."""
+        with self._lock:
+            self._ensure_loaded()
+            entity_id = self._index.get((kind, value)) or next(iter(self._weak_index.get((kind, value), [])), None)
+            return self._entities.get(entity_id) if entity_id else None
+
+    def resolve(self, metas: List[Dict[str, Any]]) -> List[Tuple[CompetitorEntity, List[Dict[str, Any]]]]:
+        """Resolve discovery listings to entities, merging known and new ones.
+
+        Returns ``(entity, listings)`` pairs in order of first appearance;
+        several listings of the same product come back under one entity.
+        A listing sharing a strong key (store ID, bundle ID, own domain)
+        with several entities folds them together. Of the entities it shares
+        only a weak key with, one is merged if ``_weak_match`` allows it and
+        no other qualifies.
+        """
+        now = datetime.now(timezone.utc).isoformat()
+        groups: Dict[str, List[Dict[str, Any]]] = {}
+        with self._lock:
+            self._ensure_loaded()
+            touched: Dict[str, CompetitorEntity] = {}
+            removed: List[str] = []
+            for meta in metas:
+                listing = _listing_entity(meta, now)
+                # Strongest identifiers first, so the merge target is deterministic
+                strong, weak = self._matches(listing)
+                matches = list(strong)
+                probe = listing.model_copy(deep=True)
+                for entity_id in strong:
+                    _merge_into(probe, self._entities[entity_id])
+                # Weak keys merge at most one entity, and only an unambiguous one: a shared
+                # name beats a shared publisher domain (google.com is both Keep's and Tasks')
+                compatible = [i for i, kinds in weak.items() if _weak_match(probe, self._entities[i], kinds)]
+                named = [i for i in compatible if "name" in weak[i]]
+                chosen = named or compatible
+                if len(chosen) == 1:
+                    matches.append(chosen[0])
+                if not matches:
+                    listing.id = str(uuid.uuid4())
+                    self._add(listing)
+                    entity_id = listing.id
+                else:
+                    entity_id = matches[0]
+                    entity = self._entities[entity_id]
+                    self._remove(entity_id)
+                    for other_id in matches[1:]:
+                        # This listing links two known entities: fold them together
+                        other = self._entities.get(other_id)
+                        if other:
+                            self._remove(other_id)
+                            _merge_into(entity, other)
+                            removed.append(other_id)
+                            touched.pop(other_id, None)
+                            if other_id in groups:
+                                groups.setdefault(entity_id, []).extend(groups.pop(other_id))
+                    _merge_into(entity, listing)
+                    self._add(entity)
+                touched[entity_id] = self._entities[entity_id]
+                groups.setdefault(entity_id, []).append(meta)
+            result = [(self._entities[eid], listings) for eid, listings in groups.items()]
+        self._save(list(touched.values()), removed)
+        return result
+
+    def mark_reviews_fetched(self, entities: List[CompetitorEntity], locales: Iterable[str]) -> None:
+        """Record a live review scrape of *entities* for *locales*."""
+        now = datetime.now(timezone.utc).isoformat()
+        locales = list(locales)
+        with self._lock:
+            for entity in entities:
+                for locale in locales:
+                    entity.reviews_fetched[locale] = now
+        self._save(entities, [])
+
+
+_registry: Optional[CompetitorRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> CompetitorRegistry:
+    """Process-wide registry (lazily warmed from Supabase)."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = CompetitorRegistry()
+        return _registry
+
+
+def entity_meta(entity: CompetitorEntity, listings: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """One ``competitors_meta`` entry for an entity: its first listing plus entity fields."""
+    primary = dict(listings[0])
+    primary.update({
+        "entity_id": entity.id,
+        "title": entity.name or primary.get("title", ""),
+        "links": entity.links,
+        "platforms": list(dict.fromkeys(l.get("platform", "") for l in listings)),
+    })
+    return primary
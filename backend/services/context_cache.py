@@ -0,0 +1,121 @@
+"""Per-job Gemini context caching for evidence shared between agents.
+
+A validation job's scraped evidence — competitor reviews and community
+posts — is the largest part of its prompts. ``JobContext`` uploads it once,
+with the job's system instruction, as Gemini cached content; agents built
+with ``context=`` then reference the cache (``cached_content``) and send
+only their own instructions, which cuts their uncached input tokens and
+time to first token. The cache is deleted when the job ends
+(``close``), with a TTL of ``CONTEXT_CACHE_TTL_SECONDS`` in case it
+doesn't.
+
+Gemini only caches contexts above a minimum size, and a cache costs a
+creation round trip, so smaller contexts (``CONTEXT_CACHE_MIN_TOKENS``)
+aren't cached: ``active`` stays false and the agents inline their evidence
+as before. So does a job whose cache couldn't be created.
+
+Requests on a cache may not set tools or a system instruction, so those
+live in the cache: a grounded context carries the Google Search tool for
+the grounded agents that reference it.
+"""
+
+import os
+import hashlib
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from google.genai import types
+
+from services.prompt_budget import get_token_estimator
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# Configuration via env vars
+# ---------------------------------------------------------------------------
+CONTEXT_CACHE_ENABLED = os.getenv("CONTEXT_CACHE_ENABLED", "true").lower() == "true"
+CONTEXT_CACHE_MIN_TOKENS = int(os.getenv("CONTEXT_CACHE_MIN_TOKENS", "2048"))
+CONTEXT_CACHE_TTL_SECONDS = int(os.getenv("CONTEXT_CACHE_TTL_SECONDS", "900"))
+
+
+class JobContext:
+    """Evidence and instructions shared by the agents of one job (async only).
+
+    Open it with the sections once they are known; ``AgentCall`` s built
+    with it reference the cache while it is ``active``.
+    """
+
+    def __init__(self, job_id: str, model: str = "gemini-3-flash-preview", grounded: bool = True):
+        self.job_id = job_id
+        self.model = model
+        self.grounded = grounded
+        self.name: Optional[str] = None
+        self.sections: Dict[str, str] = {}
+        self.digest = ""
+        self._aclient: Any = None
+
+    @property
+    def active(self) -> bool:
+        return self.name is not None
+
+    @property
+    def key(self) -> str:
+        """Stands in for the per-job cache name in response-cache keys."""
+        return f"job-context:{self.digest}"
+
+    def has(self, title: str) -> bool:
+        return self.active and bool(self.sections.get(title))
+
+    @staticmethod
+    def reference(title: str) -> str:
+        """Prompt text pointing at a section of the cached context."""
+        return f"[{title} — in the shared job context]"
+
+    def render(self) -> str:
+        return "\n\n".join(f"── {title} ──\n{text}" for title, text in self.sections.items() if text)
+
+    async def open(self, aclient: Any, system_instruction: str, sections: Dict[str, str]) -> "JobContext":
+        """Cache *sections* under *system_instruction* if they are large enough to be worth it."""
+        self.sections = {title: text for title, text in sections.items() if text}
+        text = self.render()
+        self.digest = hashlib.sha256(f"{self.model}\n{system_instruction}\n{text}".encode("utf-8")).hexdigest()
+        tokens = get_token_estimator().estimate(system_instruction + text)
+        if not CONTEXT_CACHE_ENABLED or tokens < CONTEXT_CACHE_MIN_TOKENS:
+            return self
+        try:
+            cached = await aclient.caches.create(
+                model=self.model,
+                config=types.CreateCachedContentConfig(
+                    display_name=f"job-{self.job_id}",
+                    system_instruction=system_instruction,
+                    contents=[types.Content(role="user", parts=[types.Part(text=text)])],
+                    tools=[types.Tool(google_search=types.GoogleSearch())] if self.grounded else None,
+                    ttl=f"{CONTEXT_CACHE_TTL_SECONDS}s",
+                ),
+            )
+        except Exception as e:
+            logger.warning(f"Job {self.job_id}: context cache not created, agents will inline evidence: {e}")
+            return self
+        self.name, self._aclient = cached.name, aclient
+        logger.info(f"Job {self.job_id}: cached ~{tokens} tokens of shared context as {self.name}")
+        return self
+
+    def bind(self, call: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        """*call* (a ``generate_content``-style coroutine) made on the cached context."""
+        async def _call(*, model: str, contents: Any, config: Any = None):
+            config = (config or types.GenerateContentConfig()).model_copy(
+                update={"cached_content": self.name, "tools": None, "system_instruction": None},
+            )
+            return await call(model=model, contents=contents, config=config)
+
+        return _call
+
+    async def close(self) -> None:
+        """Delete the cache; the job is over."""
+        name, self.name = self.name, None
+        if name is None:
+            return
+        try:
+            await self._aclient.caches.delete(name=name)
+        except Exception as e:
+            logger.warning(f"Job {self.job_id}: could not delete context cache {name} (expires by TTL): {e}")
@@ -1,6 +1,7 @@
 import os
 import logging
 from datetime import datetime, timezone
+from typing import Iterator
 from supabase import create_client, Client
 from dotenv import load_dotenv
 from services.push_service import send_push_notification
@@ -219,3 +220,116 @@ def list_push_tokens(user_id: str, platforms: list[str] | None = None) -> list[d
     except Exception as e:
         logger.warning(f"Failed to list push tokens: {e}")
         return []
+
+
+def list_recent_validations(since: str, limit: int = 5000) -> list[dict]:
+    """Fetch idea/category of validations created since *since* (ISO), across all users."""
+    supabase = get_supabase()
+    if not supabase:
+        logger.info(f"[MOCKED] list_recent_validations since {since}")
+        return []
+    try:
+        resp = (
+            supabase.table("validations")
+            .select("idea, category, created_at")
+            .gte("created_at", since)
+            .order("created_at", desc=True)
+            .limit(limit)
+            .execute()
+        )
+        return resp.data or []
+    except Exception as e:
+        logger.warning(f"Failed to list recent validations: {e}")
+        return []
+
+
+def list_validation_history(limit: int = 20000) -> list[dict]:
+    """Fetch idea/category/subcategory of the most recent validations, across all users."""
+    supabase = get_supabase()
+    if not supabase:
+        logger.info("[MOCKED] list_validation_history")
+        return []
+    try:
+        resp = (
+            supabase.table("validations")
+            .select("idea, category, subcategory")
+            .order("created_at", desc=True)
+            .limit(limit)
+            .execute()
+        )
+        return resp.data or []
+    except Exception as e:
+        logger.warning(f"Failed to list validation history: {e}")
+        return []
+
+
+def iter_validation_scores(page_size: int = 1000) -> Iterator[list[dict]]:
+    """Yield pages of id/category/score_breakdown/opportunity_score of all validations, by id.
+
+    Query errors are raised, not logged: a bulk job must not mistake a
+    failed page for the end of the table.
+    """
+    supabase = get_supabase()
+    if not supabase:
+        logger.info("[MOCKED] iter_validation_scores")
+        return
+    last_id = 0
+    while True:
+        resp = (
+            supabase.table("validations")
+            .select("id, category, score_breakdown, opportunity_score")
+            .gt("id", last_id)
+            .order("id")
+            .limit(page_size)
+            .execute()
+        )
+        rows = resp.data or []
+        if not rows:
+            return
+        yield rows
+        if len(rows) < page_size:
+            return
+        last_id = rows[-1]["id"]
+
+
+def update_validation_scores(scores: list[tuple[int, int]]) -> int:
+    """Set opportunity_score for each (validation id, score) in one call. Returns the number updated."""
+    supabase = get_supabase()
+    if not supabase:
+        logger.info(f"[MOCKED] update_validation_scores for {len(scores)} validations")
+        return 0
+    try:
+        resp = supabase.rpc(
+            "set_opportunity_scores", {"scores": [{"id": vid, "score": score} for vid, score in scores]},
+        ).execute()
+        return int(resp.data or 0)
+    except Exception as e:
+        logger.warning(f"Failed to update scores of {len(scores)} validations: {e}")
+        return 0
+
+
+def get_scoring_weights_version() -> str | None:
+    """Weights version stored scores were last re-scored under, or None if unknown."""
+    supabase = get_supabase()
+    if not supabase:
+        logger.info("[MOCKED] get_scoring_weights_version")
+        return None
+    try:
+        resp = supabase.table("scoring_state").select("weights_version").eq("id", "current").execute()
+        return resp.data[0]["weights_version"] if resp.data else None
+    except Exception as e:
+        logger.warning(f"Failed to read scoring weights version: {e}")
+        return None
+
+
+def set_scoring_weights_version(version: str) -> None:
+    supabase = get_supabase()
+    if not supabase:
+        logger.info(f"[MOCKED] set_scoring_weights_version {version}")
+        return
+    try:
+        supabase.table("scoring_state").upsert({
+            "id": "current", "weights_version": version, "updated_at": datetime.now(timezone.utc).isoformat(),
+        }).execute()
+    except Exception as e:
+        logger.warning(f"Failed to record scoring weights version: {e}")
@@ -1,16 +1,38 @@
 import os
 import json
 import logging
-import re
-from typing import List, Dict, Any, Tuple
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List, Dict, Any, Tuple
 from google import genai
 from pydantic import BaseModel, Field
-from google_play_scraper import search
-import requests
-from services.scraper import scrape_play_store_reviews, scrape_app_store_reviews
+from services.scraper import scrape_reviews_across_locales, parse_locale, DEFAULT_LOCALES
+from services.app_metadata import search_play_store, search_app_store
+from services.review_archive import load_archived_reviews
+from services.review_batch import ReviewBatch
+from services.json_stream import iter_json_objects
+from services.grounding_cache import generate_grounded
+from services.llm_cache import generate_cached
+from services.llm_scheduler import scheduled
+from services.model_router import get_model_router
+from services.gemini_client import get_gemini_client
+from services.niche_snapshots import find_snapshot, snapshot_result
+from services.competitor_registry import get_registry, entity_meta, COMPETITOR_REVIEW_TTL_HOURS
 
 logger = logging.getLogger(__name__)
 
+# Start the likely discovery branch while category detection is still running
+DISCOVERY_SPECULATIVE = os.getenv("DISCOVERY_SPECULATIVE", "false").lower() == "true"
+# Category assumed for the speculative run; its branch also covers fintech
+DISCOVERY_SPECULATIVE_CATEGORY = os.getenv("DISCOVERY_SPECULATIVE_CATEGORY", "mobile_app")
+
+# Resolve listings to canonical competitors and reuse what's known about them
+COMPETITOR_REGISTRY_ENABLED = os.getenv("COMPETITOR_REGISTRY_ENABLED", "true").lower() == "true"
+
+_speculative_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="discovery-speculative")
+
 class SearchQueryOutput(BaseModel):
     query: str = Field(description="A short 3-5 word search query to find competitors.")
 
@@ -42,8 +64,10 @@ def _discover_web_startups(client: genai.Client, idea: str, query: str) -> List[
     Return an empty list if nothing relevant is found.
     """
 
-    response = client.models.generate_content(
-        model='gemini-3-flash-preview',
+    response = generate_grounded(
+        client,
+        agent="web_startups",
+        subject=idea,
         contents=prompt,
         config=types.GenerateContentConfig(
             response_mime_type="application/json",
@@ -67,84 +91,160 @@ def _discover_web_startups(client: genai.Client, idea: str, query: str) -> List[
         for s in result.startups
     ]
 
-def _discover_hardware_competitors(client: genai.Client, idea: str) -> tuple[list, list]:
-    """Hardware ideas: searches Kickstarter, Amazon, YC hardware via Google Search grounding."""
+CompetitorCallback = Callable[[Dict[str, Any]], None]
+
+
+def _stream_competitors(
+    client: genai.Client,
+    prompt: str,
+    to_meta: Callable[[Dict[str, Any]], Dict[str, Any]],
+    label: str,
+    on_competitor: CompetitorCallback | None = None,
+    limit: int = 8,
+) -> List[Dict[str, Any]]:
+    """Run a grounded discovery prompt with streamed output.
+
+    Competitors are parsed from the streamed JSON array one object at a
+    time and passed to *on_competitor* as soon as each closes; a truncated
+    or malformed tail only loses the objects it cuts off.
+    """
     from google.genai import types
+    stream = scheduled(client.models.generate_content_stream)(
+        model="gemini-3-flash-preview", contents=prompt,
+        config=types.GenerateContentConfig(
+            temperature=0.2, tools=[types.Tool(google_search=types.GoogleSearch())],
+        ),
+    )
+    metas: List[Dict[str, Any]] = []
+    for competitor in iter_json_objects(chunk.text or "" for chunk in stream):
+        meta = to_meta(competitor)
+        metas.append(meta)
+        if on_competitor:
+            try:
+                on_competitor(meta)
+            except Exception as e:
+                logger.warning(f"Competitor callback failed: {e}")
+        if len(metas) >= limit:
+            break
+    if not metas:
+        logger.warning(f"No competitors parsed from {label} discovery response.")
+    return metas
+
+
+def _discover_hardware_competitors(
+    client: genai.Client, idea: str, on_competitor: CompetitorCallback | None = None,
+) -> tuple[ReviewBatch, list]:
+    """Hardware ideas: searches Kickstarter, Amazon, YC hardware via Google Search grounding."""
     prompt = f"""You are a hardware startup researcher. For: "{idea}"
 Search for similar products on: Kickstarter/Indiegogo, Amazon, YC Hardware portfolio, funded startups.
 Return up to 8 competitors as JSON array:
 [{{"title": "...", "url": "...", "source": "kickstarter|amazon|ycombinator|web",
   "description": "...", "funding_hint": "..."}}]"""
-    response = client.models.generate_content(
-        model="gemini-3-flash-preview", contents=prompt,
-        config=types.GenerateContentConfig(
-            temperature=0.2, tools=[types.Tool(google_search=types.GoogleSearch())],
-        ),
+    metas = _stream_competitors(
+        client, prompt,
+        lambda c: {"app_id": c.get("url",""), "title": c.get("title",""), "score": 0.0,
+                   "icon": "", "platform": "hardware", "source": c.get("source","web"),
+                   "description": c.get("description",""), "funding_hint": c.get("funding_hint","")},
+        "hardware", on_competitor,
     )
-    match = re.search(r'\[.*\]', response.text, re.DOTALL)
-    if not match:
-        logger.warning("No JSON array found in hardware discovery response. Response text: %s", response.text[:200])
-        return [], []
-    try:
-        competitors = json.loads(match.group())
-    except json.JSONDecodeError as e:
-        logger.warning("Failed to parse JSON from hardware discovery: %s", e)
-        return [], []
-    metas = [{"app_id": c.get("url",""), "title": c.get("title",""), "score": 0.0,
-               "icon": "", "platform": "hardware", "source": c.get("source","web"),
-               "description": c.get("description",""), "funding_hint": c.get("funding_hint","")}
-              for c in competitors[:8]]
-    return [], metas  # no app-store reviews for hardware
-
-
-def _discover_saas_competitors(client: genai.Client, idea: str) -> tuple[list, list]:
+    return ReviewBatch(), metas  # no app-store reviews for hardware
+
+
+def _discover_saas_competitors(
+    client: genai.Client, idea: str, on_competitor: CompetitorCallback | None = None,
+) -> tuple[ReviewBatch, list]:
     """SaaS/web ideas: searches ProductHunt, G2, Capterra, YC via Google Search."""
-    from google.genai import types
     prompt = f"""You are a SaaS market researcher. For: "{idea}"
 Search ProductHunt, G2 alternatives, Capterra, YC SaaS portfolio, Crunchbase funded competitors.
 Return up to 8 competitors as JSON array:
 [{{"title": "...", "url": "...", "source": "product_hunt|g2|ycombinator|web",
   "description": "...", "pricing_hint": "..."}}]"""
-    response = client.models.generate_content(
-        model="gemini-3-flash-preview", contents=prompt,
-        config=types.GenerateContentConfig(
-            temperature=0.2, tools=[types.Tool(google_search=types.GoogleSearch())],
-        ),
+    metas = _stream_competitors(
+        client, prompt,
+        lambda c: {"app_id": c.get("url",""), "title": c.get("title",""), "score": 0.0,
+                   "icon": "", "platform": "web", "source": c.get("source","web"),
+                   "description": c.get("description","")},
+        "saas", on_competitor,
     )
-    match = re.search(r'\[.*\]', response.text, re.DOTALL)
-    if not match:
-        logger.warning("No JSON array found in saas discovery response. Response text: %s", response.text[:200])
-        return [], []
-    try:
-        competitors = json.loads(match.group())
-    except json.JSONDecodeError as e:
-        logger.warning("Failed to parse JSON from saas discovery: %s", e)
-        return [], []
-    metas = [{"app_id": c.get("url",""), "title": c.get("title",""), "score": 0.0,
-               "icon": "", "platform": "web", "source": c.get("source","web"),
-               "description": c.get("description","")}
-              for c in competitors[:8]]
-    return [], metas
-
-
-def discover_competitors_and_scrape(app_idea: str, category: str = "mobile_app") -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    return ReviewBatch(), metas
+
+
+def _scrape_or_archive(
+    play_app_ids: List[str], ios_apps: List[Tuple[str, int]], locales: List[str], reviews_per_locale: int,
+) -> ReviewBatch:
+    """Scrape reviews live; fall back to the archive if the stores return nothing."""
+    reviews = scrape_reviews_across_locales(
+        play_app_ids, ios_apps, locales, count_per_locale=reviews_per_locale,
+    )
+    if not reviews and (play_app_ids or ios_apps):
+        # Stores rate-limited or down: fall back to previously archived reviews
+        reviews = load_archived_reviews(play_app_ids + [str(track_id) for _, track_id in ios_apps])
+        logger.info(f"Live review scraping returned nothing; loaded {len(reviews)} archived reviews.")
+    return reviews
+
+
+def discover_competitors_and_scrape(
+    app_idea: str,
+    category: str = "mobile_app",
+    locales: List[str] | None = None,
+    reviews_per_locale: int = 100,
+    cancel_event: threading.Event | None = None,
+    on_competitor: CompetitorCallback | None = None,
+    use_snapshots: bool = True,
+) -> Tuple[ReviewBatch, List[Dict[str, Any]]]:
     """
     Agent 0: Discovery Agent.
     Uses an LLM to generate a search query, searches the Play Store for the top 3 competitors,
     and scrapes their reviews automatically.
-    Returns: (all_reviews_list, competitor_metadata_list)
+
+    Stores are searched in the first of *locales* (default en-US); reviews
+    for the competitors found are then fetched across all *locales*
+    concurrently and tagged with their locale.
+
+    Listings are resolved through the competitor registry, so one product
+    found on several stores / sites comes back as a single entry (with
+    ``entity_id`` and ``links``); known competitors whose reviews were
+    scraped recently are served from the review archive.
+
+    Hardware and SaaS competitors are passed to *on_competitor* one by one
+    as the streamed response yields them.
+
+    With *use_snapshots*, an idea in a popular niche is served from a
+    fresh precomputed niche snapshot instead (see services.niche_snapshots).
+
+    Setting *cancel_event* (speculative runs) stops the work at the next
+    stage boundary and returns empty results.
+    Returns: (ReviewBatch of all reviews, competitor_metadata_list)
     """
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key:
-        raise ValueError("GEMINI_API_KEY environment variable not set. Please add it to your .env file.")
-        
-    client = genai.Client(api_key=api_key)
+    def cancelled(stage: str) -> bool:
+        if cancel_event is not None and cancel_event.is_set():
+            logger.info(f"Discovery cancelled before {stage}.")
+            return True
+        return False
 
-    if category == "hardware":
-        return _discover_hardware_competitors(client, app_idea)
-    if category == "saas_web":
-        return _discover_saas_competitors(client, app_idea)
+    locales = locales or DEFAULT_LOCALES
+    if use_snapshots:
+        snapshot = find_snapshot(app_idea, category, locales)
+        if snapshot:
+            logger.info(f"Serving discovery from niche snapshot '{snapshot.phrase}' "
+                        f"({snapshot.age_hours():.1f}h old, {len(snapshot.competitors)} competitors).")
+            reviews, metas = snapshot_result(snapshot)
+            if on_competitor:
+                for meta in metas:
+                    on_competitor(meta)
+            return reviews, metas
+
+    client = get_gemini_client()
+
+    if category in ("hardware", "saas_web"):
+        discover = _discover_hardware_competitors if category == "hardware" else _discover_saas_competitors
+        reviews, metas = discover(client, app_idea, on_competitor)
+        if COMPETITOR_REGISTRY_ENABLED and metas:
+            metas = [entity_meta(entity, listings) for entity, listings in get_registry().resolve(metas)]
+        return reviews, metas
     # mobile_app and fintech: run existing app store + web discovery (unchanged)
+    if cancelled("query generation"):
+        return ReviewBatch(), []
 
     # 1. Generate the optimal search query
     logger.info("Agent 0 (Discovery) is analyzing the idea to formulate a search query...")
@@ -156,82 +256,57 @@ def discover_competitors_and_scrape(app_idea: str, category: str = "mobile_app")
     Focus on the core utility or mechanism of the idea.
     """
     
-    response = client.models.generate_content(
-        model='gemini-3-flash-preview',
+    route = get_model_router().route("discovery_query")
+    response = generate_cached(
+        client,
+        agent="discovery_query",
         contents=prompt,
         config={"response_mime_type": "application/json", "response_schema": SearchQueryOutput, "temperature": 0.2},
+        model=route.model,
+        call=route.call(scheduled(client.models.generate_content)),
     )
     
     result = json.loads(response.text)
     query = result.get("query", app_idea[:30]) # Fallback to part of the string if failed
     logger.info(f"Discovery Agent generated query: '{query}'")
     
+    if cancelled("store search"):
+        return ReviewBatch(), []
+
+    search_lang, search_country = parse_locale(locales[0])
+
     # 2. Search Stores for top 3 competitors each
     try:
-        all_reviews = []
         competitors_list = []
+        play_app_ids = []
+        ios_apps = []
         
         # --- PLAY STORE SEARCH ---
         logger.info("Searching Google Play Store...")
-        play_search_results = search(query, n_hits=3, lang='en', country='us')
-        
-        for app in (play_search_results or []):
-            app_id = app.get('appId')
-            if not app_id:
-                continue
-                
-            app_title = app.get('title', 'Unknown App')
-            app_score = float(app.get('score') or 0.0)
-            app_icon = app.get('icon', '')
-            
-            logger.info(f"Discovery Agent found Android competitor: {app_title} ({app_id})")
-            
-            competitors_list.append({
-                "app_id": app_id,
-                "title": app_title,
-                "score": app_score,
-                "icon": app_icon,
-                "platform": "android",
-                "source": "play_store",
-            })
-            
-            reviews = scrape_play_store_reviews(app_id, count=100)
-            all_reviews.extend(reviews)
-            
+        for app in search_play_store(query, n_hits=3, lang=search_lang, country=search_country):
+            logger.info(f"Discovery Agent found Android competitor: {app['title']} ({app['app_id']})")
+            competitors_list.append({**app, "platform": "android", "source": "play_store"})
+            play_app_ids.append(app["app_id"])
+
         # --- APPLE APP STORE SEARCH ---
         logger.info("Searching Apple App Store...")
-        itunes_url = f"https://itunes.apple.com/search?term={query}&entity=software&limit=3&country=us"
-        try:
-            itunes_res = requests.get(itunes_url, timeout=10)
-            itunes_data = itunes_res.json()
-            
-            for app in itunes_data.get('results', []):
-                app_id = app.get('trackId')
-                app_bundle_id = app.get('bundleId')
-                app_title = app.get('trackName', 'Unknown App')
-                
-                if not app_id or not app_bundle_id:
-                    continue
-                    
-                app_score = float(app.get('averageUserRating') or 0.0)
-                app_icon = app.get('artworkUrl512', '')
-                
-                logger.info(f"Discovery Agent found iOS competitor: {app_title} ({app_id})")
-                
-                competitors_list.append({
-                    "app_id": str(app_id),
-                    "title": app_title,
-                    "score": app_score,
-                    "icon": app_icon,
-                    "platform": "ios",
-                    "source": "app_store",
-                })
-                
-                # App Store scraper needs the bundle ID as the app_name string, and numeric trackId
-                reviews = scrape_app_store_reviews(app_name=app_bundle_id, app_id=app_id, count=100)
-                all_reviews.extend(reviews)
-        except Exception as e:
-            logger.error(f"Error searching iTunes API for iOS apps: {e}")
+        for app in search_app_store(query, limit=3, country=search_country):
+            logger.info(f"Discovery Agent found iOS competitor: {app['title']} ({app['app_id']})")
+            competitors_list.append({
+                "app_id": app["app_id"],
+                "title": app["title"],
+                "score": app["score"],
+                "icon": app["icon"],
+                "platform": "ios",
+                "source": "app_store",
+                "bundle_id": app["bundle_id"],
+                "developer": app.get("developer", ""),
+            })
+            # App Store scraper needs the bundle ID as the app_name string, and numeric trackId
+            ios_apps.append((app["bundle_id"], int(app["app_id"])))
+
+        if cancelled("web discovery"):
+            return ReviewBatch(), []
 
         # --- WEB / STARTUP DISCOVERY (Product Hunt, YC, HN) ---
         logger.info("Searching Product Hunt, YCombinator, and HN for startup competitors...")
@@ -242,8 +317,80 @@ def discover_competitors_and_scrape(app_idea: str, category: str = "mobile_app")
         except Exception as e:
             logger.error(f"Error during web startup discovery: {e}")
 
-        return all_reviews, competitors_list
-    
+        if cancelled("review scraping"):
+            return ReviewBatch(), []
+
+        if not COMPETITOR_REGISTRY_ENABLED:
+            all_reviews = _scrape_or_archive(play_app_ids, ios_apps, locales, reviews_per_locale)
+            return all_reviews, competitors_list
+
+        # --- ENTITY RESOLUTION: one entry per product across stores and web ---
+        registry = get_registry()
+        resolved = registry.resolve(competitors_list)
+        logger.info(f"Resolved {len(competitors_list)} listings to {len(resolved)} competitors.")
+
+        # --- REVIEWS: every competitor × every target locale, concurrently ---
+        # Competitors scraped recently for these locales come from the archive.
+        now = datetime.now(timezone.utc)
+        live, cached = [], []
+        for entity, _ in resolved:
+            if entity.android_ids or entity.ios_apps:
+                (cached if entity.reviews_fresh(locales, now) else live).append(entity)
+        live_reviews = _scrape_or_archive(
+            [a for e in live for a in e.android_ids],
+            [(bundle, int(track)) for e in live for track, bundle in e.ios_apps.items() if bundle],
+            locales, reviews_per_locale,
+        )
+        scraped_ids = set(live_reviews.app_ids.tolist())
+        registry.mark_reviews_fetched(
+            [e for e in live if scraped_ids & set(e.android_ids + list(e.ios_apps))], locales,
+        )
+        cached_reviews = load_archived_reviews(
+            [a for e in cached for a in e.android_ids + list(e.ios_apps)],
+            since=(now - timedelta(hours=COMPETITOR_REVIEW_TTL_HOURS)).date(),
+        ) if cached else ReviewBatch()
+        if cached:
+            logger.info(f"Reused {len(cached_reviews)} archived reviews for {len(cached)} known competitors.")
+
+        all_reviews = ReviewBatch.concat([live_reviews, cached_reviews])
+        return all_reviews, [entity_meta(entity, listings) for entity, listings in resolved]
+
     except Exception as e:
         logger.error(f"Error during competitor discovery and scraping: {e}")
-        return [], []
+        return ReviewBatch(), []
+
+
+def discovery_branch(category: str) -> str:
+    """Which discovery path a category takes (mobile_app and fintech share the app-store one)."""
+    return category if category in ("hardware", "saas_web") else "app_store"
+
+
+class SpeculativeDiscovery:
+    """Discovery started for a predicted category before detection confirms it.
+
+    Once the real category is known, call ``result()`` if ``matches()`` it;
+    otherwise call ``cancel()`` and run discovery for the real category.
+    """
+
+    def __init__(self, app_idea: str, predicted_category: str, locales: List[str] | None = None):
+        self.predicted_category = predicted_category
+        self._cancel = threading.Event()
+        # Carry the caller's LLM priority and provider pin into the pool thread
+        self._future = _speculative_pool.submit(
+            contextvars.copy_context().run,
+            discover_competitors_and_scrape, app_idea, predicted_category, locales, cancel_event=self._cancel,
+        )
+
+    def matches(self, category: str) -> bool:
+        return discovery_branch(category) == discovery_branch(self.predicted_category)
+
+    def result(self) -> Tuple[ReviewBatch, List[Dict[str, Any]]]:
+        return self._future.result()
+
+    def cancel(self) -> None:
+        """Stop the speculative run at its next stage boundary; its results are discarded."""
+        if self._future.done():
+            return
+        logger.info(f"Discarding speculative {discovery_branch(self.predicted_category)} discovery.")
+        self._cancel.set()
+        self._future.cancel()
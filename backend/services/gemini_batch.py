@@ -0,0 +1,185 @@
+"""Gemini Batch API execution for non-interactive agent calls.
+
+Scheduled research runs don't need answers in seconds, yet they used the
+same online ``generate_content`` calls — and the same per-minute rate
+limits — as user-facing validation. ``GeminiBatcher.generate`` has the
+signature of ``client.aio.models.generate_content`` but queues the request
+instead; requests arriving within ``GEMINI_BATCH_COLLECT_SECONDS`` of the
+first one (from every research run on the loop) are submitted together as
+one batch job per model. The job is polled every
+``GEMINI_BATCH_POLL_SECONDS`` and each caller gets its own response back
+when it completes, so a research run simply awaits its agents as usual.
+
+Because it is a drop-in ``generate_content``, the response and grounding
+caches still apply: a cached response never reaches a batch.
+
+If a batch job can't be created (quota, API unavailable), its requests
+fall back to online calls rather than failing the run.
+"""
+
+import os
+import asyncio
+import logging
+import weakref
+from typing import Any, Dict, List, Optional
+
+from google.genai import types
+
+from services.gemini_client import get_async_gemini_client
+from services.llm_scheduler import scheduled_async
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# Configuration via env vars
+# ---------------------------------------------------------------------------
+GEMINI_BATCH_COLLECT_SECONDS = float(os.getenv("GEMINI_BATCH_COLLECT_SECONDS", "20"))
+GEMINI_BATCH_MAX_REQUESTS = int(os.getenv("GEMINI_BATCH_MAX_REQUESTS", "500"))
+GEMINI_BATCH_POLL_SECONDS = float(os.getenv("GEMINI_BATCH_POLL_SECONDS", "30"))
+GEMINI_BATCH_MAX_WAIT_HOURS = float(os.getenv("GEMINI_BATCH_MAX_WAIT_HOURS", "24"))
+
+_SUCCEEDED = {types.JobState.JOB_STATE_SUCCEEDED, types.JobState.JOB_STATE_PARTIALLY_SUCCEEDED}
+_FINISHED = _SUCCEEDED | {
+    types.JobState.JOB_STATE_FAILED, types.JobState.JOB_STATE_CANCELLED, types.JobState.JOB_STATE_EXPIRED,
+}
+
+
+class _Request:
+    __slots__ = ("key", "model", "contents", "config", "future")
+
+    def __init__(self, key: str, model: str, contents: Any, config: Any, future: asyncio.Future):
+        self.key = key
+        self.model = model
+        self.contents = contents
+        self.config = config
+        self.future = future
+
+
+class GeminiBatcher:
+    """Collects ``generate_content`` requests into Gemini batch jobs (one event loop)."""
+
+    def __init__(
+        self,
+        collect_seconds: float = GEMINI_BATCH_COLLECT_SECONDS,
+        poll_seconds: float = GEMINI_BATCH_POLL_SECONDS,
+        max_requests: int = GEMINI_BATCH_MAX_REQUESTS,
+        max_wait_seconds: float = GEMINI_BATCH_MAX_WAIT_HOURS * 3600,
+    ):
+        self._collect_seconds = collect_seconds
+        self._poll_seconds = poll_seconds
+        self._max_requests = max_requests
+        self._max_wait_seconds = max_wait_seconds
+        self._pending: List[_Request] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+        self._counter = 0
+
+    async def generate(self, *, model: str, contents: Any, config: Any = None):
+        """Queue one request and wait for its response from the batch job."""
+        loop = asyncio.get_running_loop()
+        self._counter += 1
+        request = _Request(str(self._counter), model, contents, config, loop.create_future())
+        self._pending.append(request)
+        if len(self._pending) >= self._max_requests:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self._collect_seconds, self._flush)
+        return await request.future
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        pending, self._pending = self._pending, []
+        by_model: Dict[str, List[_Request]] = {}
+        for r in pending:
+            if not r.future.cancelled():
+                by_model.setdefault(r.model, []).append(r)
+        for model, requests in by_model.items():
+            task = asyncio.get_running_loop().create_task(self._run(model, requests))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, model: str, requests: List[_Request]) -> None:
+        aclient = get_async_gemini_client()
+        try:
+            job = await aclient.batches.create(
+                model=model,
+                src=[
+                    types.InlinedRequest(contents=r.contents, config=r.config, metadata={"key": r.key})
+                    for r in requests
+                ],
+                config=types.CreateBatchJobConfig(display_name=f"research-{len(requests)}-requests"),
+            )
+        except Exception as e:
+            logger.warning(f"Gemini batch job not created ({e}); sending {len(requests)} requests online.")
+            await asyncio.gather(*(self._online(aclient, r) for r in requests))
+            return
+
+        logger.info(f"Gemini batch job {job.name} submitted with {len(requests)} {model} requests.")
+        try:
+            job = await self._wait(aclient, job)
+        except Exception as e:
+            self._fail(requests, e)
+            return
+
+        if job.state not in _SUCCEEDED:
+            self._fail(requests, RuntimeError(f"Gemini batch job {job.name} ended in state {job.state}"))
+            return
+        responses = (job.dest.inlined_responses if job.dest else None) or []
+        by_key = {(r.metadata or {}).get("key"): r for r in responses}
+        for i, request in enumerate(requests):
+            result = by_key.get(request.key) or (responses[i] if i < len(responses) else None)
+            if request.future.done():
+                continue
+            if result is None or result.response is None:
+                message = result.error.message if result is not None and result.error else "no response"
+                request.future.set_exception(RuntimeError(f"Batch request failed: {message}"))
+            else:
+                request.future.set_result(result.response)
+        logger.info(f"Gemini batch job {job.name} finished ({job.state}).")
+
+    async def _wait(self, aclient: Any, job: Any) -> Any:
+        waited = 0.0
+        while job.state not in _FINISHED:
+            if waited >= self._max_wait_seconds:
+                try:
+                    await aclient.batches.cancel(name=job.name)
+                except Exception as e:
+                    logger.warning(f"Could not cancel Gemini batch job {job.name}: {e}")
+                raise TimeoutError(f"Gemini batch job {job.name} did not finish in {self._max_wait_seconds:.0f}s")
+            await asyncio.sleep(self._poll_seconds)
+            waited += self._poll_seconds
+            job = await aclient.batches.get(name=job.name)
+        return job
+
+    @staticmethod
+    async def _online(aclient: Any, request: _Request) -> None:
+        try:
+            response = await scheduled_async(aclient.models.generate_content)(
+                model=request.model, contents=request.contents, config=request.config,
+            )
+        except Exception as e:
+            if not request.future.done():
+                request.future.set_exception(e)
+        else:
+            if not request.future.done():
+                request.future.set_result(response)
+
+    @staticmethod
+    def _fail(requests: List[_Request], error: BaseException) -> None:
+        logger.warning(f"Gemini batch failed: {error}")
+        for r in requests:
+            if not r.future.done():
+                r.future.set_exception(error)
+
+
+_batchers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, GeminiBatcher]" = weakref.WeakKeyDictionary()
+
+
+def get_gemini_batcher() -> GeminiBatcher:
+    """The batcher shared by every batch-mode caller on the running event loop."""
+    loop = asyncio.get_running_loop()
+    if loop not in _batchers:
+        _batchers[loop] = GeminiBatcher()
+    return _batchers[loop]
@@ -0,0 +1,122 @@
+"""Process-wide Gemini client.
+
+Every validation, discovery, research run and audio transcription used to
+build its own ``genai.Client``, which meant a fresh HTTP connection pool —
+and a fresh TLS handshake to the API — per job. ``get_gemini_client``
+returns one shared client instead, created at startup (``init_gemini_client``
+from the app lifespan) or lazily on first use. Its httpx pools speak
+HTTP/2 and keep idle connections open, so consecutive agent calls reuse a
+warm connection. ``genai.Client`` is safe to share across threads.
+
+Async callers use ``get_async_gemini_client()``. An httpx async pool
+belongs to the event loop that opened its connections, so the shared
+client's ``.aio`` serves the first loop that asks (the server's loop);
+any other loop, e.g. ``asyncio.run`` in a worker thread, gets a client of
+its own that lives as long as that loop.
+
+Tests swap in a fake with ``set_gemini_client`` and restore the real one
+with ``reset_gemini_client``.
+"""
+
+import os
+import asyncio
+import logging
+import threading
+import weakref
+from typing import Any, Optional
+
+import httpx
+from google import genai
+from google.genai import types
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# Configuration via env vars
+# ---------------------------------------------------------------------------
+GEMINI_HTTP2 = os.getenv("GEMINI_HTTP2", "true").lower() == "true"
+GEMINI_MAX_CONNECTIONS = int(os.getenv("GEMINI_MAX_CONNECTIONS", "32"))
+GEMINI_KEEPALIVE_SECONDS = float(os.getenv("GEMINI_KEEPALIVE_SECONDS", "120"))
+
+_lock = threading.Lock()
+_client: Optional[Any] = None
+_owned = False  # whether _client was built here (and should be closed here)
+_aio_loop: Optional[weakref.ref] = None  # loop the shared client's .aio is bound to
+_loop_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, genai.Client]" = weakref.WeakKeyDictionary()
+
+
+def _http_options() -> types.HttpOptions:
+    transport = {
+        "http2": GEMINI_HTTP2,
+        "limits": httpx.Limits(
+            max_connections=GEMINI_MAX_CONNECTIONS,
+            max_keepalive_connections=GEMINI_MAX_CONNECTIONS,
+            keepalive_expiry=GEMINI_KEEPALIVE_SECONDS,
+        ),
+    }
+    return types.HttpOptions(client_args=dict(transport), async_client_args=dict(transport))
+
+
+def _build_client() -> genai.Client:
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        raise ValueError("GEMINI_API_KEY environment variable not set. Please add it to your .env file.")
+    return genai.Client(api_key=api_key, http_options=_http_options())
+
+
+def get_gemini_client() -> genai.Client:
+    """The shared client, built on first use. Raises ValueError without an API key."""
+    global _client, _owned
+    with _lock:
+        if _client is None:
+            _client = _build_client()
+            _owned = True
+            logger.info("Gemini client created.")
+        return _client
+
+
+def get_async_gemini_client():
+    """``client.aio`` usable on the running event loop. Raises ValueError without an API key."""
+    global _aio_loop
+    loop = asyncio.get_running_loop()
+    client = get_gemini_client()
+    with _lock:
+        if not _owned:
+            return client.aio  # test fake
+        bound = _aio_loop() if _aio_loop else None
+        if bound is None or bound is loop:
+            _aio_loop = weakref.ref(loop)
+            return client.aio
+        if loop not in _loop_clients:
+            _loop_clients[loop] = _build_client()
+        return _loop_clients[loop].aio
+
+
+def init_gemini_client() -> None:
+    """Create the shared client at startup; a missing key is logged, not raised."""
+    try:
+        get_gemini_client()
+    except ValueError as e:
+        logger.warning(f"Gemini client not created at startup: {e}")
+
+
+def set_gemini_client(client: Any) -> None:
+    """Use *client* (e.g. a test fake) for every caller until reset."""
+    global _client, _owned
+    with _lock:
+        _client = client
+        _owned = False
+
+
+def reset_gemini_client() -> None:
+    """Close the shared client if this module built it; the next call builds a new one."""
+    global _client, _owned, _aio_loop
+    with _lock:
+        client, owned = _client, _owned
+        _client, _owned, _aio_loop = None, False, None
+        _loop_clients.clear()
+    if client is not None and owned:
+        try:
+            client.close()
+        except Exception as e:
+            logger.warning(f"Error closing Gemini client: {e}")
@@ -0,0 +1,322 @@
+"""Cache of Google Search grounding results for Gemini calls.
+
+Grounded calls (``tools=[GoogleSearch()]``) are the slowest Gemini calls we
+make, and their grounding metadata — the search queries the model ran and
+the web sources it used — used to be thrown away. ``generate_grounded``
+keeps it:
+
+- after a grounded call, the queries, sources (title, URI, domain) and the
+  answer segments each source supported are stored in a small SQLite
+  database, indexed by search query, by the call's full subject (the
+  idea, or the research domain + keywords) and by any niche phrase that
+  makes up most of it (same rule as ``niche_snapshots.find_snapshot``);
+- before a call, if the same agent has fresh cached sources for the same
+  subject or niche, they're added to the prompt as context and the call
+  runs without the search tool. A subject with specifics beyond a shared
+  niche phrase only matches on its full text.
+
+Only the agent that produced the sources reuses them, since each agent's
+searches are shaped by its own prompt. Cache failures never fail a call:
+the call just runs grounded as before.
+"""
+
+import os
+import json
+import asyncio
+import time
+import sqlite3
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from google import genai
+from google.genai import types
+
+from services.niche_snapshots import NICHE_MIN_COVERAGE, niche_coverage, niche_phrases
+from services.llm_cache import generate_cached, generate_cached_async
+from services.llm_scheduler import scheduled, scheduled_async
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# Configuration via env vars
+# ---------------------------------------------------------------------------
+GROUNDING_CACHE_ENABLED = os.getenv("GROUNDING_CACHE_ENABLED", "true").lower() == "true"
+GROUNDING_CACHE_PATH = os.getenv("GROUNDING_CACHE_PATH", os.path.join("data", "grounding_cache.sqlite3"))
+GROUNDING_CACHE_TTL_HOURS = float(os.getenv("GROUNDING_CACHE_TTL_HOURS", "72"))
+GROUNDING_CACHE_MIN_SOURCES = int(os.getenv("GROUNDING_CACHE_MIN_SOURCES", "4"))
+GROUNDING_CACHE_MAX_SOURCES = int(os.getenv("GROUNDING_CACHE_MAX_SOURCES", "20"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS grounded_calls (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    agent      TEXT NOT NULL,
+    subject    TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS grounded_queries (
+    call_id INTEGER NOT NULL REFERENCES grounded_calls(id) ON DELETE CASCADE,
+    query   TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS grounded_niches (
+    call_id INTEGER NOT NULL REFERENCES grounded_calls(id) ON DELETE CASCADE,
+    agent   TEXT NOT NULL,
+    phrase  TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS grounded_sources (
+    call_id  INTEGER NOT NULL REFERENCES grounded_calls(id) ON DELETE CASCADE,
+    uri      TEXT NOT NULL,
+    title    TEXT NOT NULL DEFAULT '',
+    domain   TEXT NOT NULL DEFAULT '',
+    snippets TEXT NOT NULL DEFAULT '[]'
+);
+CREATE INDEX IF NOT EXISTS idx_grounded_queries_query ON grounded_queries(query);
+CREATE INDEX IF NOT EXISTS idx_grounded_niches_lookup ON grounded_niches(agent, phrase);
+CREATE INDEX IF NOT EXISTS idx_grounded_sources_call ON grounded_sources(call_id);
+CREATE INDEX IF NOT EXISTS idx_grounded_calls_created ON grounded_calls(created_at);
+"""
+
+
+class GroundingCache:
+    """SQLite-backed store of grounding sources, indexed by query and niche."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA foreign_keys = ON")
+            self._conn.executescript(_SCHEMA)
+            with self._conn:
+                # Expired rows are never served; drop them once per process
+                self._conn.execute("DELETE FROM grounded_calls WHERE created_at < ?",
+                                   (time.time() - GROUNDING_CACHE_TTL_HOURS * 3600,))
+        return self._conn
+
+    @staticmethod
+    def _niche_keys(subject: str) -> List[str]:
+        phrases = [p for p in niche_phrases(subject) if niche_coverage(p, subject) >= NICHE_MIN_COVERAGE]
+        return phrases + ["=" + " ".join(subject.lower().split())]
+
+    def record(self, agent: str, subject: str, queries: List[str], sources: List[Dict[str, Any]]) -> None:
+        if not sources:
+            return
+        with self._lock:
+            db = self._db()
+            with db:
+                cur = db.execute(
+                    "INSERT INTO grounded_calls (agent, subject, created_at) VALUES (?, ?, ?)",
+                    (agent, subject, time.time()),
+                )
+                call_id = cur.lastrowid
+                db.executemany("INSERT INTO grounded_queries (call_id, query) VALUES (?, ?)",
+                               [(call_id, " ".join(q.lower().split())) for q in queries])
+                db.executemany("INSERT INTO grounded_niches (call_id, agent, phrase) VALUES (?, ?, ?)",
+                               [(call_id, agent, p) for p in self._niche_keys(subject)])
+                db.executemany(
+                    "INSERT INTO grounded_sources (call_id, uri, title, domain, snippets) VALUES (?, ?, ?, ?, ?)",
+                    [(call_id, s["uri"], s.get("title", ""), s.get("domain", ""), json.dumps(s.get("snippets", [])))
+                     for s in sources],
+                )
+
+    def lookup(self, agent: str, subject: str, max_age_hours: float = GROUNDING_CACHE_TTL_HOURS) -> Dict[str, Any]:
+        """Fresh cached queries and sources for *agent* in *subject*'s niche.
+
+        Calls sharing more niche phrases with the subject rank first, then
+        newer ones. Returns ``{"queries": [...], "sources": [...]}``.
+        """
+        cutoff = time.time() - max_age_hours * 3600
+        keys = self._niche_keys(subject)
+        with self._lock:
+            db = self._db()
+            rows = db.execute(
+                f"""SELECT c.id, COUNT(*) AS overlap, c.created_at
+                    FROM grounded_niches n JOIN grounded_calls c ON c.id = n.call_id
+                    WHERE n.agent = ? AND n.phrase IN ({",".join("?" * len(keys))}) AND c.created_at >= ?
+                    GROUP BY c.id ORDER BY overlap DESC, c.created_at DESC LIMIT 3""",
+                (agent, *keys, cutoff),
+            ).fetchall()
+            queries: List[str] = []
+            sources: Dict[str, Dict[str, Any]] = {}
+            for call_id, _, _ in rows:
+                queries += [q for (q,) in db.execute("SELECT query FROM grounded_queries WHERE call_id = ?", (call_id,))]
+                for uri, title, domain, snippets in db.execute(
+                    "SELECT uri, title, domain, snippets FROM grounded_sources WHERE call_id = ?", (call_id,),
+                ):
+                    if uri not in sources and len(sources) < GROUNDING_CACHE_MAX_SOURCES:
+                        sources[uri] = {"uri": uri, "title": title, "domain": domain, "snippets": json.loads(snippets)}
+        return {"queries": list(dict.fromkeys(queries)), "sources": list(sources.values())}
+
+    def prune(self, max_age_hours: float = GROUNDING_CACHE_TTL_HOURS) -> int:
+        """Delete calls older than the TTL; returns how many were removed."""
+        with self._lock:
+            db = self._db()
+            with db:
+                cur = db.execute("DELETE FROM grounded_calls WHERE created_at < ?", (time.time() - max_age_hours * 3600,))
+            return cur.rowcount
+
+
+_cache: Optional[GroundingCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_grounding_cache() -> GroundingCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = GroundingCache(GROUNDING_CACHE_PATH)
+        return _cache
+
+
+# ---------------------------------------------------------------------------
+# Gemini integration
+# ---------------------------------------------------------------------------
+
+def extract_grounding(response: Any) -> Dict[str, Any]:
+    """Search queries and sources (with the answer segments they support) from a response."""
+    try:
+        meta = response.candidates[0].grounding_metadata
+    except (AttributeError, IndexError, TypeError):
+        meta = None
+    if meta is None:
+        return {"queries": [], "sources": []}
+    chunks = getattr(meta, "grounding_chunks", None) or []
+    sources: List[Dict[str, Any]] = []
+    for chunk in chunks:
+        web = getattr(chunk, "web", None)
+        sources.append({
+            "uri": getattr(web, "uri", "") or "",
+            "title": getattr(web, "title", "") or "",
+            "domain": getattr(web, "domain", "") or "",
+            "snippets": [],
+        })
+    for support in getattr(meta, "grounding_supports", None) or []:
+        text = getattr(getattr(support, "segment", None), "text", "") or ""
+        for i in getattr(support, "grounding_chunk_indices", None) or []:
+            if text and 0 <= i < len(sources) and len(sources[i]["snippets"]) < 3:
+                sources[i]["snippets"].append(text[:300])
+    return {
+        "queries": list(getattr(meta, "web_search_queries", None) or []),
+        "sources": [s for s in sources if s["uri"]],
+    }
+
+
+def format_citations(cached: Dict[str, Any]) -> str:
+    lines = [
+        "── RECENT GOOGLE SEARCH RESULTS ──",
+        "Google Search is not available for this request. These results were gathered for",
+        "closely related searches in the last few days; treat them as your search results",
+        "and cite them where you would have cited a search.",
+    ]
+    if cached["queries"]:
+        lines.append("Searches run: " + "; ".join(cached["queries"][:15]))
+    for i, s in enumerate(cached["sources"], 1):
+        lines.append(f"[{i}] {s['title'] or s['domain']} ({s['domain'] or s['uri']})")
+        lines += [f"    - {snippet}" for snippet in s["snippets"]]
+    return "\n".join(lines)
+
+
+def _cached_sources(agent: str, subject: str) -> Optional[Dict[str, Any]]:
+    """Fresh cached search results for the agent's niche, if there are enough to skip grounding."""
+    cache = get_grounding_cache() if GROUNDING_CACHE_ENABLED else None
+    if not cache:
+        return None
+    try:
+        cached = cache.lookup(agent, subject)
+    except Exception as e:
+        logger.warning(f"Grounding cache lookup failed for {agent}: {e}")
+        return None
+    if len(cached["sources"]) < GROUNDING_CACHE_MIN_SOURCES:
+        return None
+    logger.info(f"{agent}: reusing {len(cached['sources'])} cached search sources instead of grounding.")
+    return cached
+
+
+def _record_sources(agent: str, subject: str, response: Any) -> None:
+    if not GROUNDING_CACHE_ENABLED:
+        return
+    try:
+        grounding = extract_grounding(response)
+        get_grounding_cache().record(agent, subject, grounding["queries"], grounding["sources"])
+    except Exception as e:
+        logger.warning(f"Grounding cache write failed for {agent}: {e}")
+
+
+def generate_grounded(
+    client: genai.Client,
+    *,
+    agent: str,
+    subject: str,
+    contents: str,
+    config: types.GenerateContentConfig,
+    model: str = "gemini-3-flash-preview",
+    call: Optional[Callable[..., Any]] = None,
+):
+    """``generate_content`` for a Google Search grounded call, through the citation cache.
+
+    *config* is the grounded config (with the search tool). With fresh
+    cached sources for this agent and niche, the call runs without the
+    tool and the sources are appended to *contents*; otherwise it runs
+    grounded and its sources are cached. Both go through the LLM response
+    cache (``services.llm_cache``) under *agent*'s TTL. *call* replaces
+    ``client.models.generate_content``.
+    """
+    call = call or scheduled(client.models.generate_content)
+    cached = _cached_sources(agent, subject)
+    if cached:
+        return generate_cached(
+            client,
+            agent=agent,
+            model=model,
+            contents=f"{contents}\n\n{format_citations(cached)}",
+            config=config.model_copy(update={"tools": None}),
+            call=call,
+        )
+
+    def _grounded_call(**kwargs):
+        response = call(**kwargs)
+        _record_sources(agent, subject, response)
+        return response
+
+    # Sources are recorded only for fresh calls, not for LLM cache hits
+    return generate_cached(client, agent=agent, model=model, contents=contents, config=config, call=_grounded_call)
+
+
+async def generate_grounded_async(
+    aclient: Any,
+    *,
+    agent: str,
+    subject: str,
+    contents: str,
+    config: types.GenerateContentConfig,
+    model: str = "gemini-3-flash-preview",
+    call: Optional[Callable[..., Awaitable[Any]]] = None,
+):
+    """``generate_grounded`` on the async client (``client.aio``).
+
+    *call* replaces ``aclient.models.generate_content`` (e.g. a streaming
+    call that returns the assembled response).
+    """
+    call = call or scheduled_async(aclient.models.generate_content)
+    cached = await asyncio.to_thread(_cached_sources, agent, subject)
+    if cached:
+        return await generate_cached_async(
+            aclient,
+            agent=agent,
+            model=model,
+            contents=f"{contents}\n\n{format_citations(cached)}",
+            config=config.model_copy(update={"tools": None}),
+            call=call,
+        )
+
+    async def _grounded_call(**kwargs):
+        response = await call(**kwargs)
+        await asyncio.to_thread(_record_sources, agent, subject, response)
+        return response
+
+    return await generate_cached_async(aclient, agent=agent, model=model, contents=contents, config=config, call=_grounded_call)
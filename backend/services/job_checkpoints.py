@@ -0,0 +1,325 @@
+"""Step checkpoints for validation and research jobs, and resuming orphaned jobs.
+
+A job that dies with its process (an instance recycle, a deploy, an OOM)
+used to stay "running" forever, and the user re-ran every Gemini call from
+scratch. Now each pipeline records its run and, as each step completes,
+that step's output:
+
+    checkpoints = JobCheckpoints("validation", job_id)
+    checkpoints.begin({"idea": idea, ...})       # what's needed to run it again
+    checkpoints.save("category", {...})
+    ...
+    checkpoints.finish()                         # done, failed or cancelled
+
+While the job runs, ``heartbeat`` refreshes the run's heartbeat. A run
+whose heartbeat is older than ``JOB_ORPHAN_SECONDS`` belongs to a dead
+process: ``resume_orphaned_jobs`` — called periodically by the scheduler
+and by /cron-trigger — claims it (one instance wins) and hands it to the
+resumer registered for its kind, which restarts the pipeline from its
+checkpoints instead of from zero. A job is resumed at most
+``JOB_RESUME_MAX_ATTEMPTS`` times, so one that keeps killing its process
+doesn't loop.
+
+Checkpoints live in the Supabase ``job_runs`` / ``job_checkpoints``
+tables (see migrations/004_job_checkpoints.sql), which outlive the
+instance; without Supabase credentials they go to a local SQLite file
+(``JOB_CHECKPOINT_PATH``). Checkpoint errors are logged and never fail a
+job — it just can't resume as far.
+"""
+
+import os
+import json
+import time
+import uuid
+import socket
+import asyncio
+import sqlite3
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from pydantic import BaseModel
+
+from services.db import get_supabase
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# Configuration via env vars
+# ---------------------------------------------------------------------------
+JOB_CHECKPOINTS_ENABLED = os.getenv("JOB_CHECKPOINTS_ENABLED", "true").lower() == "true"
+JOB_CHECKPOINT_PATH = os.getenv("JOB_CHECKPOINT_PATH", os.path.join("data", "job_checkpoints.sqlite3"))
+JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", "30"))
+JOB_ORPHAN_SECONDS = float(os.getenv("JOB_ORPHAN_SECONDS", "180"))
+JOB_RESUME_MAX_ATTEMPTS = int(os.getenv("JOB_RESUME_MAX_ATTEMPTS", "2"))
+JOB_RESUME_CHECK_SECONDS = int(os.getenv("JOB_RESUME_CHECK_SECONDS", "60"))
+
+# This process, as the owner of the runs it executes
+INSTANCE_ID = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+# ---------------------------------------------------------------------------
+# Storage
+# ---------------------------------------------------------------------------
+
+class _SupabaseBackend:
+    def __init__(self, client):
+        self.client = client
+
+    def begin(self, kind: str, job_id: str, params: Dict[str, Any], now: float) -> None:
+        self.client.table("job_runs").upsert({
+            "kind": kind, "job_id": job_id, "params": params, "owner": INSTANCE_ID,
+            "attempts": 0, "heartbeat_at": now,
+        }).execute()
+
+    def touch(self, kind: str, job_id: str, now: float) -> None:
+        (self.client.table("job_runs").update({"heartbeat_at": now})
+         .eq("kind", kind).eq("job_id", job_id).eq("owner", INSTANCE_ID).execute())
+
+    def stale(self, kind: str, before: float) -> List[Dict[str, Any]]:
+        resp = (self.client.table("job_runs").select("*")
+                .eq("kind", kind).lt("heartbeat_at", before).execute())
+        return resp.data or []
+
+    def claim(self, run: Dict[str, Any], now: float) -> bool:
+        resp = (self.client.table("job_runs")
+                .update({"owner": INSTANCE_ID, "heartbeat_at": now, "attempts": run["attempts"] + 1})
+                .eq("kind", run["kind"]).eq("job_id", run["job_id"])
+                .eq("heartbeat_at", run["heartbeat_at"]).execute())
+        return bool(resp.data)
+
+    def save(self, kind: str, job_id: str, step: str, data: Any) -> None:
+        self.client.table("job_checkpoints").upsert({"kind": kind, "job_id": job_id, "step": step, "data": data}).execute()
+
+    def load(self, kind: str, job_id: str) -> Dict[str, Any]:
+        resp = (self.client.table("job_checkpoints").select("step, data")
+                .eq("kind", kind).eq("job_id", job_id).execute())
+        return {row["step"]: row["data"] for row in resp.data or []}
+
+    def delete(self, kind: str, job_id: str) -> None:
+        self.client.table("job_checkpoints").delete().eq("kind", kind).eq("job_id", job_id).execute()
+        self.client.table("job_runs").delete().eq("kind", kind).eq("job_id", job_id).execute()
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS job_runs (
+    kind         TEXT NOT NULL,
+    job_id       TEXT NOT NULL,
+    params       TEXT NOT NULL,
+    owner        TEXT NOT NULL,
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    heartbeat_at REAL NOT NULL,
+    PRIMARY KEY (kind, job_id)
+);
+CREATE TABLE IF NOT EXISTS job_checkpoints (
+    kind   TEXT NOT NULL,
+    job_id TEXT NOT NULL,
+    step   TEXT NOT NULL,
+    data   TEXT NOT NULL,
+    PRIMARY KEY (kind, job_id, step)
+);
+"""
+
+
+class _SqliteBackend:
+    def __init__(self, path: str):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def _execute(self, sql: str, args: tuple = ()) -> sqlite3.Cursor:
+        with self._lock, self._conn:
+            return self._conn.execute(sql, args)
+
+    def begin(self, kind: str, job_id: str, params: Dict[str, Any], now: float) -> None:
+        self._execute(
+            "INSERT OR REPLACE INTO job_runs (kind, job_id, params, owner, attempts, heartbeat_at) VALUES (?, ?, ?, ?, 0, ?)",
+            (kind, job_id, json.dumps(params), INSTANCE_ID, now),
+        )
+
+    def touch(self, kind: str, job_id: str, now: float) -> None:
+        self._execute(
+            "UPDATE job_runs SET heartbeat_at = ? WHERE kind = ? AND job_id = ? AND owner = ?",
+            (now, kind, job_id, INSTANCE_ID),
+        )
+
+    def stale(self, kind: str, before: float) -> List[Dict[str, Any]]:
+        rows = self._execute(
+            "SELECT kind, job_id, params, owner, attempts, heartbeat_at FROM job_runs WHERE kind = ? AND heartbeat_at < ?",
+            (kind, before),
+        ).fetchall()
+        return [
+            {"kind": k, "job_id": j, "params": json.loads(p), "owner": o, "attempts": a, "heartbeat_at": h}
+            for k, j, p, o, a, h in rows
+        ]
+
+    def claim(self, run: Dict[str, Any], now: float) -> bool:
+        cursor = self._execute(
+            "UPDATE job_runs SET owner = ?, heartbeat_at = ?, attempts = attempts + 1 "
+            "WHERE kind = ? AND job_id = ? AND heartbeat_at = ?",
+            (INSTANCE_ID, now, run["kind"], run["job_id"], run["heartbeat_at"]),
+        )
+        return cursor.rowcount == 1
+
+    def save(self, kind: str, job_id: str, step: str, data: Any) -> None:
+        self._execute(
+            "INSERT OR REPLACE INTO job_checkpoints (kind, job_id, step, data) VALUES (?, ?, ?, ?)",
+            (kind, job_id, step, json.dumps(data)),
+        )
+
+    def load(self, kind: str, job_id: str) -> Dict[str, Any]:
+        rows = self._execute(
+            "SELECT step, data FROM job_checkpoints WHERE kind = ? AND job_id = ?", (kind, job_id),
+        ).fetchall()
+        return {step: json.loads(data) for step, data in rows}
+
+    def delete(self, kind: str, job_id: str) -> None:
+        self._execute("DELETE FROM job_checkpoints WHERE kind = ? AND job_id = ?", (kind, job_id))
+        self._execute("DELETE FROM job_runs WHERE kind = ? AND job_id = ?", (kind, job_id))
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def _get_backend():
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            client = get_supabase()
+            _backend = _SupabaseBackend(client) if client else _SqliteBackend(JOB_CHECKPOINT_PATH)
+        return _backend
+
+
+def set_checkpoint_backend(backend) -> None:
+    """Use *backend* (e.g. a temporary SQLite one in tests); None picks the default on next use."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+
+# ---------------------------------------------------------------------------
+# Per-job API
+# ---------------------------------------------------------------------------
+
+def dump_output(value: Any) -> Any:
+    """An agent output as checkpoint JSON (models are dumped, tuples become lists)."""
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, tuple):
+        return list(value)
+    return value
+
+
+def restore_outputs(saved: Dict[str, Any], types: Dict[str, type]) -> Dict[str, Any]:
+    """The checkpointed agent outputs among *types* (agent → model class or tuple), rebuilt."""
+    restored = {}
+    for name, cls in types.items():
+        if name not in saved:
+            continue
+        try:
+            restored[name] = cls.model_validate(saved[name]) if issubclass(cls, BaseModel) else cls(saved[name])
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable checkpoint for '{name}': {e}")
+    return restored
+
+
+class JobCheckpoints:
+    """The run record and step checkpoints of one job (blocking; call from a thread)."""
+
+    def __init__(self, kind: str, job_id: str):
+        self.kind = kind
+        self.job_id = job_id
+
+    def _call(self, action: str, fn: Callable[..., Any], *args, default: Any = None) -> Any:
+        if not JOB_CHECKPOINTS_ENABLED:
+            return default
+        try:
+            return fn(*args)
+        except Exception as e:
+            logger.warning(f"Could not {action} for {self.kind} job {self.job_id}: {e}")
+            return default
+
+    def begin(self, params: Dict[str, Any]) -> None:
+        """Record the run with the *params* a resumer needs to run it again."""
+        self._call("record run", lambda: _get_backend().begin(self.kind, self.job_id, params, time.time()))
+
+    def touch(self) -> None:
+        self._call("refresh heartbeat", lambda: _get_backend().touch(self.kind, self.job_id, time.time()))
+
+    def save(self, step: str, data: Any) -> None:
+        """Checkpoint the JSON-serializable output of a completed *step*."""
+        self._call(f"checkpoint '{step}'", lambda: _get_backend().save(self.kind, self.job_id, step, data))
+
+    def load(self) -> Dict[str, Any]:
+        """Checkpointed outputs by step."""
+        return self._call("load checkpoints", lambda: _get_backend().load(self.kind, self.job_id), default={})
+
+    def finish(self) -> None:
+        """The job ended (whatever the outcome): drop its run and checkpoints."""
+        self._call("drop checkpoints", lambda: _get_backend().delete(self.kind, self.job_id))
+
+    async def heartbeat(self) -> None:
+        """Refresh the heartbeat until cancelled; run it as a task alongside the job."""
+        while True:
+            await asyncio.sleep(JOB_HEARTBEAT_SECONDS)
+            await asyncio.to_thread(self.touch)
+
+
+# ---------------------------------------------------------------------------
+# Resuming orphaned jobs
+# ---------------------------------------------------------------------------
+
+# kind → coroutine function(job_id, params) that restarts the job from its checkpoints
+Resumer = Callable[[str, Dict[str, Any]], Awaitable[None]]
+_resumers: Dict[str, Resumer] = {}
+# kind → function(job_id, error) that marks a job failed once it's out of resume attempts
+_abandoners: Dict[str, Callable[[str, str], None]] = {}
+
+
+def register_resumer(kind: str, resumer: Resumer, abandon: Optional[Callable[[str, str], None]] = None) -> None:
+    _resumers[kind] = resumer
+    if abandon:
+        _abandoners[kind] = abandon
+
+
+def _claim_orphans(kind: str) -> List[Dict[str, Any]]:
+    """Claim this kind's orphaned runs; runs out of attempts are dropped and returned flagged."""
+    backend = _get_backend()
+    now = time.time()
+    claimed = []
+    for run in backend.stale(kind, now - JOB_ORPHAN_SECONDS):
+        if run["attempts"] >= JOB_RESUME_MAX_ATTEMPTS:
+            backend.delete(kind, run["job_id"])
+            claimed.append({**run, "exhausted": True})
+        elif backend.claim(run, now):
+            claimed.append(run)
+    return claimed
+
+
+async def resume_orphaned_jobs() -> List[str]:
+    """Restart every orphaned job this instance can claim; returns their ids."""
+    if not JOB_CHECKPOINTS_ENABLED:
+        return []
+    resumed = []
+    for kind, resumer in _resumers.items():
+        try:
+            runs = await asyncio.to_thread(_claim_orphans, kind)
+        except Exception as e:
+            logger.warning(f"Could not look for orphaned {kind} jobs: {e}")
+            continue
+        for run in runs:
+            if run.get("exhausted"):
+                logger.warning(f"Giving up on {kind} job {run['job_id']} after {run['attempts']} resumes.")
+                if kind in _abandoners:
+                    await asyncio.to_thread(_abandoners[kind], run["job_id"], "Job was interrupted and could not be resumed.")
+                continue
+            logger.info(f"Resuming orphaned {kind} job {run['job_id']} (attempt {run['attempts'] + 1}).")
+            try:
+                await resumer(run["job_id"], run["params"])
+                resumed.append(run["job_id"])
+            except Exception as e:
+                logger.error(f"Could not resume {kind} job {run['job_id']}: {e}")
+    return resumed
@@ -0,0 +1,119 @@
+"""Incremental parser for a JSON array of objects arriving in text chunks.
+
+Grounded Gemini calls can't use ``response_schema``, so discovery asks for
+a JSON array in free text. Feeding the streamed chunks through
+``JsonArrayStream`` yields each object as soon as its closing brace
+arrives; prose before the array and anything after it are ignored, and a
+response cut off mid-object still yields every object completed before
+the cut.
+"""
+
+import json
+import logging
+from typing import Any, Dict, Iterable, Iterator, List
+
+logger = logging.getLogger(__name__)
+
+
+class JsonArrayStream:
+    """Feed text chunks, get back the array's objects as they complete."""
+
+    def __init__(self):
+        self._buf: List[str] = []      # characters of the object being read
+        self._started = False          # saw the opening "[" of the array
+        self._done = False             # saw the closing "]"
+        self._depth = 0                # brace/bracket depth inside the current element
+        self._in_string = False
+        self._escape = False
+        self._pending_open = False     # saw "[" — confirm it opens an array of objects
+
+    @property
+    def done(self) -> bool:
+        return self._done
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """Consume *chunk*; return the objects it completed, in order."""
+        out: List[Dict[str, Any]] = []
+        if self._done or not chunk:
+            return out
+        for ch in chunk:
+            if not self._started:
+                # The array starts at the first "[" followed (after whitespace) by "{"
+                # or "]"; citation markers like "[1]" in leading prose don't count.
+                if self._pending_open:
+                    if ch.isspace():
+                        continue
+                    self._pending_open = False
+                    if ch == "{":
+                        self._started = True
+                    elif ch == "]":
+                        self._done = True
+                        return out
+                    elif ch == "[":
+                        self._pending_open = True
+                        continue
+                    else:
+                        continue
+                elif ch == "[":
+                    self._pending_open = True
+                    continue
+                else:
+                    continue
+
+            if self._depth == 0:
+                if ch == "{":
+                    self._depth = 1
+                    self._buf = [ch]
+                elif ch == "]":
+                    self._done = True
+                    return out
+                # commas / whitespace between elements
+                continue
+
+            self._buf.append(ch)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+            if ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    obj = self._decode("".join(self._buf))
+                    self._buf = []
+                    if obj is not None:
+                        out.append(obj)
+        return out
+
+    @staticmethod
+    def _decode(text: str):
+        try:
+            obj = json.loads(text)
+        except json.JSONDecodeError as e:
+            logger.warning(f"Skipping malformed array element: {e}")
+            return None
+        return obj if isinstance(obj, dict) else None
+
+
+def iter_json_objects(chunks: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """Yield the objects of the first JSON array spread across *chunks*.
+
+    Stops at the end of the array. If the chunk source raises (e.g. a
+    dropped stream), the objects already yielded stand and the error is
+    logged rather than raised.
+    """
+    parser = JsonArrayStream()
+    try:
+        for chunk in chunks:
+            yield from parser.feed(chunk)
+            if parser.done:
+                return
+    except Exception as e:
+        logger.warning(f"JSON stream ended early: {e}")
@@ -0,0 +1,464 @@
+"""Content-addressed cache for Gemini ``generate_content`` responses.
+
+The same requests come back again and again: category detection for an
+idea that was validated before, the discovery search-query prompt, a
+research topic re-run with unchanged inputs. ``generate_cached`` wraps
+``client.models.generate_content`` (``generate_cached_async`` the async
+client's) with a cache keyed on the SHA-256 of
+the model, the prompt and the full config (including the response schema's
+JSON schema), in two tiers:
+
+- an in-process LRU of serialized responses, capped in bytes;
+- a SQLite file that survives restarts, capped in entries.
+
+Concurrent identical requests are coalesced: the first caller makes the
+call and the others wait for its response (singleflight).
+
+Each agent has its own TTL (``AGENT_TTL_HOURS``, overridable with
+``LLM_CACHE_TTL_OVERRIDES="researcher=2,pm_agent=0"``); grounded agents get
+short ones because their answers depend on live search results. A TTL of 0
+opts the agent out. Only successful responses with text are cached, and
+cache errors never fail a call.
+"""
+
+import os
+import json
+import asyncio
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from pydantic import BaseModel
+from google.genai import types
+
+from services.llm_scheduler import scheduled, scheduled_async
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# Configuration via env vars
+# ---------------------------------------------------------------------------
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join("data", "llm_cache.sqlite3"))
+LLM_CACHE_MEMORY_MB = float(os.getenv("LLM_CACHE_MEMORY_MB", "64"))
+LLM_CACHE_DISK_MAX_ENTRIES = int(os.getenv("LLM_CACHE_DISK_MAX_ENTRIES", "20000"))
+
+# Hours a response stays reusable, per agent. Grounded agents (live search) are short.
+AGENT_TTL_HOURS: Dict[str, float] = {
+    "category_detector": 24 * 7,
+    "discovery_query": 72,
+    "web_startups": 6,
+    "researcher": 6,
+    "pm_agent": 24,
+    "analyst_agent": 6,
+    "market_sizing": 6,
+    "market_strategy": 6,
+    "trend_scout": 6,
+    "funding_scan": 6,
+    "market_analyst": 6,
+    "idea_generator": 6,
+    "report_summary": 24,
+}
+DEFAULT_TTL_HOURS = float(os.getenv("LLM_CACHE_DEFAULT_TTL_HOURS", "0"))
+
+
+def _parse_overrides(raw: str) -> Dict[str, float]:
+    out = {}
+    for item in raw.split(","):
+        agent, _, hours = item.partition("=")
+        try:
+            out[agent.strip()] = float(hours)
+        except ValueError:
+            if item.strip():
+                logger.warning(f"Ignoring malformed LLM_CACHE_TTL_OVERRIDES entry '{item}'")
+    return out
+
+
+AGENT_TTL_HOURS.update(_parse_overrides(os.getenv("LLM_CACHE_TTL_OVERRIDES", "")))
+
+
+def agent_ttl_hours(agent: str) -> float:
+    return AGENT_TTL_HOURS.get(agent, DEFAULT_TTL_HOURS)
+
+
+# ---------------------------------------------------------------------------
+# Keys
+# ---------------------------------------------------------------------------
+
+class _Uncacheable(Exception):
+    pass
+
+
+def _canonical(value: Any) -> Any:
+    """JSON-able form of a prompt/config value, stable across processes."""
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, type) and issubclass(value, BaseModel):
+        return {"$schema": value.model_json_schema()}
+    if isinstance(value, BaseModel):
+        fields = {k: _canonical(getattr(value, k)) for k in type(value).model_fields}
+        return {"$type": type(value).__name__, **{k: v for k, v in fields.items() if v is not None}}
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in value.items() if v is not None}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if isinstance(value, bytes):
+        return {"$sha256": hashlib.sha256(value).hexdigest()}
+    raise _Uncacheable(type(value).__name__)
+
+
+def cache_key(model: str, contents: Any, config: Any) -> str:
+    if isinstance(config, dict):
+        config = types.GenerateContentConfig(**config)
+    payload = json.dumps(
+        {"model": model, "contents": _canonical(contents), "config": _canonical(config)},
+        sort_keys=True, separators=(",", ":"), ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# Storage
+# ---------------------------------------------------------------------------
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_responses (
+    key        TEXT PRIMARY KEY,
+    agent      TEXT NOT NULL,
+    model      TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    response   TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_llm_responses_expires ON llm_responses(expires_at);
+"""
+
+
+class LLMResponseCache:
+    """Byte-capped in-memory LRU in front of a SQLite store of serialized responses."""
+
+    def __init__(self, path: Optional[str], memory_bytes: int):
+        self.path = path
+        self.memory_bytes = memory_bytes
+        self._lock = threading.Lock()  # memory tier; never held across disk I/O
+        self._disk_lock = threading.Lock()
+        self._memory: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._memory_used = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._inflight: Dict[str, Future] = {}
+        self._async_inflight: Dict[Tuple[int, str], "asyncio.Future"] = {}
+        self._writes = 0
+
+    def _db(self) -> Optional[sqlite3.Connection]:
+        if not self.path:
+            return None
+        if self._conn is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.executescript(_SCHEMA)
+            self._prune_disk()
+        return self._conn
+
+    def _prune_disk(self) -> None:
+        with self._conn:
+            self._conn.execute("DELETE FROM llm_responses WHERE expires_at < ?", (time.time(),))
+            self._conn.execute(
+                """DELETE FROM llm_responses WHERE key IN (
+                       SELECT key FROM llm_responses ORDER BY created_at DESC LIMIT -1 OFFSET ?)""",
+                (LLM_CACHE_DISK_MAX_ENTRIES,),
+            )
+
+    def _remember(self, key: str, expires_at: float, payload: str) -> None:
+        old = self._memory.pop(key, None)
+        if old:
+            self._memory_used -= len(old[1])
+        if len(payload) > self.memory_bytes:
+            return
+        self._memory[key] = (expires_at, payload)
+        self._memory_used += len(payload)
+        while self._memory_used > self.memory_bytes:
+            _, (_, evicted) = self._memory.popitem(last=False)
+            self._memory_used -= len(evicted)
+
+    def get(self, key: str) -> Optional[str]:
+        payload = self.get_memory(key)
+        return payload if payload is not None else self.get_disk(key)
+
+    def get_memory(self, key: str) -> Optional[str]:
+        """The in-memory tier only (no I/O, safe on the event loop)."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry:
+                if entry[0] > time.time():
+                    self._memory.move_to_end(key)
+                    return entry[1]
+                self._memory_used -= len(self._memory.pop(key)[1])
+        return None
+
+    def get_disk(self, key: str) -> Optional[str]:
+        """The SQLite tier; a hit is promoted to memory."""
+        with self._disk_lock:
+            db = self._db()
+            if db is None:
+                return None
+            row = db.execute(
+                "SELECT expires_at, response FROM llm_responses WHERE key = ? AND expires_at > ?", (key, time.time()),
+            ).fetchone()
+        if row is None:
+            return None
+        with self._lock:
+            self._remember(key, row[0], row[1])
+        return row[1]
+
+    def put(self, key: str, agent: str, model: str, payload: str, ttl_hours: float) -> None:
+        self.put_memory(key, payload, ttl_hours)
+        self.put_disk(key, agent, model, payload, ttl_hours)
+
+    def put_memory(self, key: str, payload: str, ttl_hours: float) -> None:
+        with self._lock:
+            self._remember(key, time.time() + ttl_hours * 3600, payload)
+
+    def put_disk(self, key: str, agent: str, model: str, payload: str, ttl_hours: float) -> None:
+        now = time.time()
+        expires_at = now + ttl_hours * 3600
+        with self._disk_lock:
+            db = self._db()
+            if db is None:
+                return
+            with db:
+                db.execute(
+                    "INSERT OR REPLACE INTO llm_responses (key, agent, model, created_at, expires_at, response) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, agent, model, now, expires_at, payload),
+                )
+            self._writes += 1
+            if self._writes % 500 == 0:
+                self._prune_disk()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._memory_used = 0
+        with self._disk_lock:
+            db = self._db()
+            if db is not None:
+                with db:
+                    db.execute("DELETE FROM llm_responses")
+
+    async def singleflight_async(self, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        """``singleflight`` for coroutines; callers coalesce per event loop.
+
+        A cancelled leader does not cancel its followers: they retry, and one of
+        them leads the next call.
+        """
+        flight = (id(asyncio.get_running_loop()), key)
+        while True:
+            with self._lock:
+                future = self._async_inflight.get(flight)
+                leader = future is None
+                if leader:
+                    future = asyncio.get_running_loop().create_future()
+                    self._async_inflight[flight] = future
+            if not leader:
+                result = await asyncio.shield(future)
+                if result is _LEADER_CANCELLED:
+                    continue
+                return result
+            try:
+                result = await call()
+            except asyncio.CancelledError:
+                self._end_async_flight(flight)
+                future.set_result(_LEADER_CANCELLED)
+                raise
+            except BaseException as e:
+                self._end_async_flight(flight)
+                future.set_exception(e)
+                future.exception()  # mark retrieved: no "never retrieved" warning without followers
+                raise
+            self._end_async_flight(flight)
+            future.set_result(result)
+            return result
+
+    def _end_async_flight(self, flight) -> None:
+        with self._lock:
+            self._async_inflight.pop(flight, None)
+
+    def singleflight(self, key: str, call: Callable[[], Any]) -> Any:
+        """Run *call* once for concurrent callers with the same *key*; all get its result."""
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+        if not leader:
+            return future.result()
+        try:
+            result = call()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+
+# Result handed to followers when the leading call was cancelled
+_LEADER_CANCELLED = object()
+
+_cache: Optional[LLMResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMResponseCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMResponseCache(LLM_CACHE_PATH, int(LLM_CACHE_MEMORY_MB * 1024 * 1024))
+        return _cache
+
+
+# ---------------------------------------------------------------------------
+# Gemini integration
+# ---------------------------------------------------------------------------
+
+def _serialize(response: Any) -> Optional[str]:
+    if not isinstance(response, types.GenerateContentResponse) or not response.text:
+        return None
+    return response.model_dump_json(exclude={"parsed"}, exclude_none=True)
+
+
+def _request_key(agent: str, model: str, contents: Any, config: Any, ttl: float) -> Optional[str]:
+    """Cache key for the request, or None when it bypasses the cache."""
+    if not LLM_CACHE_ENABLED or ttl <= 0:
+        return None
+    try:
+        return cache_key(model, contents, config)
+    except _Uncacheable as e:
+        logger.debug(f"{agent}: request not cacheable ({e}).")
+        return None
+
+
+def _lookup(cache: LLMResponseCache, agent: str, key: str):
+    try:
+        payload = cache.get(key)
+    except Exception as e:
+        logger.warning(f"LLM cache read failed for {agent}: {e}")
+        return None
+    return types.GenerateContentResponse.model_validate_json(payload) if payload is not None else None
+
+
+def _store(cache: LLMResponseCache, agent: str, model: str, key: str, response: Any, ttl: float) -> None:
+    try:
+        payload = _serialize(response)
+        if payload is not None:
+            cache.put(key, agent, model, payload, ttl)
+    except Exception as e:
+        logger.warning(f"LLM cache write failed for {agent}: {e}")
+
+
+async def _lookup_async(cache: LLMResponseCache, agent: str, key: str):
+    """``_lookup`` with the SQLite tier on a worker thread."""
+    try:
+        payload = cache.get_memory(key)
+        if payload is None:
+            payload = await asyncio.to_thread(cache.get_disk, key)
+    except Exception as e:
+        logger.warning(f"LLM cache read failed for {agent}: {e}")
+        return None
+    return types.GenerateContentResponse.model_validate_json(payload) if payload is not None else None
+
+
+async def _store_async(cache: LLMResponseCache, agent: str, model: str, key: str, response: Any, ttl: float) -> None:
+    """``_store`` with the SQLite tier on a worker thread."""
+    try:
+        payload = _serialize(response)
+        if payload is not None:
+            cache.put_memory(key, payload, ttl)
+            await asyncio.to_thread(cache.put_disk, key, agent, model, payload, ttl)
+    except Exception as e:
+        logger.warning(f"LLM cache write failed for {agent}: {e}")
+
+
+def generate_cached(
+    client: Any,
+    *,
+    agent: str,
+    contents: Any,
+    config: Any = None,
+    model: str = "gemini-3-flash-preview",
+    ttl_hours: Optional[float] = None,
+    call: Optional[Callable[..., Any]] = None,
+):
+    """``client.models.generate_content`` through the response cache.
+
+    *ttl_hours* defaults to the agent's TTL; 0 bypasses the cache. *call*
+    replaces the underlying request (same keyword arguments as
+    ``generate_content``) for callers that post-process fresh responses —
+    it only runs on a miss.
+    """
+    call = call or scheduled(client.models.generate_content)
+    ttl = agent_ttl_hours(agent) if ttl_hours is None else ttl_hours
+    key = _request_key(agent, model, contents, config, ttl)
+    if key is None:
+        return call(model=model, contents=contents, config=config)
+
+    cache = get_llm_cache()
+
+    def _fetch():
+        # Re-check inside the flight: a previous leader may have just stored it
+        cached = _lookup(cache, agent, key)
+        if cached is not None:
+            return cached
+        response = call(model=model, contents=contents, config=config)
+        _store(cache, agent, model, key, response, ttl)
+        return response
+
+    cached = _lookup(cache, agent, key)
+    if cached is not None:
+        logger.info(f"{agent}: LLM response cache hit.")
+        return cached
+    return cache.singleflight(key, _fetch)
+
+
+async def generate_cached_async(
+    aclient: Any,
+    *,
+    agent: str,
+    contents: Any,
+    config: Any = None,
+    model: str = "gemini-3-flash-preview",
+    ttl_hours: Optional[float] = None,
+    call: Optional[Callable[..., Awaitable[Any]]] = None,
+):
+    """``generate_cached`` for the async client (``client.aio``); *call* is a coroutine function."""
+    call = call or scheduled_async(aclient.models.generate_content)
+    ttl = agent_ttl_hours(agent) if ttl_hours is None else ttl_hours
+    key = _request_key(agent, model, contents, config, ttl)
+    if key is None:
+        return await call(model=model, contents=contents, config=config)
+
+    cache = get_llm_cache()
+
+    async def _fetch():
+        cached = await _lookup_async(cache, agent, key)
+        if cached is not None:
+            return cached
+        response = await call(model=model, contents=contents, config=config)
+        await _store_async(cache, agent, model, key, response, ttl)
+        return response
+
+    cached = await _lookup_async(cache, agent, key)
+    if cached is not None:
+        logger.info(f"{agent}: LLM response cache hit.")
+        return cached
+    return await cache.singleflight_async(key, _fetch)
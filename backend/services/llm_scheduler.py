@@ -0,0 +1,370 @@
+"""Process-wide rate limiting and retry for online Gemini requests.
+
+Validation jobs, research runs and the scheduler all call Gemini from
+their own threads and tasks, with nothing keeping the combined traffic
+under the per-model quotas — bursts came back as 429s and failed jobs.
+Every online ``generate_content`` call now goes through ``LLMScheduler``:
+
+  - per-model token buckets for requests (RPM) and input tokens (TPM),
+    from ``LLM_DEFAULT_RPM`` / ``LLM_DEFAULT_TPM`` or per model via
+    ``LLM_RATE_LIMITS="gemini-3-flash-preview=1000/1000000,..."``. Tokens
+    are estimated before the call and settled against the response's
+    ``usage_metadata`` after it;
+  - priority classes: while an ``INTERACTIVE`` request (the default — a
+    user is waiting) is queued for a model, ``SCHEDULED`` requests for it
+    hold back. Scheduled work marks itself with ``llm_priority``, which is
+    a context variable and so follows tasks and ``asyncio.to_thread``;
+  - 429 and 5xx responses are retried with exponential backoff and full
+    jitter; a 429 also pauses the model's queue for the backoff, since
+    the real quota is evidently below the configured one;
+  - queue-time metrics per model and priority (``stats()``, served at
+    ``/health/llm``), with a warning when a request waits longer than
+    ``LLM_QUEUE_WARN_SECONDS``.
+
+Callers wrap the API function: ``scheduled(client.models.generate_content)``
+or ``scheduled_async(aclient.models.generate_content)``; the wrapper takes
+the same keyword arguments.
+"""
+
+import os
+import time
+import random
+import asyncio
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from google.genai import errors
+
+from services.prompt_budget import get_token_estimator
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# Configuration via env vars
+# ---------------------------------------------------------------------------
+LLM_SCHEDULER_ENABLED = os.getenv("LLM_SCHEDULER_ENABLED", "true").lower() == "true"
+LLM_DEFAULT_RPM = float(os.getenv("LLM_DEFAULT_RPM", "1000"))
+LLM_DEFAULT_TPM = float(os.getenv("LLM_DEFAULT_TPM", "1000000"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))
+LLM_BACKOFF_BASE_SECONDS = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", "1"))
+LLM_BACKOFF_MAX_SECONDS = float(os.getenv("LLM_BACKOFF_MAX_SECONDS", "60"))
+LLM_QUEUE_WARN_SECONDS = float(os.getenv("LLM_QUEUE_WARN_SECONDS", "5"))
+
+_RECHECK_SECONDS = 0.05  # how often a request held back by a higher priority looks again
+_MAX_SLEEP_SECONDS = 1.0  # waits are re-evaluated at least this often
+
+
+def _parse_limits(raw: str) -> Dict[str, Tuple[float, float]]:
+    out = {}
+    for item in raw.split(","):
+        model, _, limits = item.partition("=")
+        rpm, _, tpm = limits.partition("/")
+        try:
+            out[model.strip()] = (float(rpm), float(tpm) if tpm else LLM_DEFAULT_TPM)
+        except ValueError:
+            if item.strip():
+                logger.warning(f"Ignoring malformed LLM_RATE_LIMITS entry '{item}'")
+    return out
+
+
+LLM_RATE_LIMITS: Dict[str, Tuple[float, float]] = _parse_limits(os.getenv("LLM_RATE_LIMITS", ""))
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0
+    SCHEDULED = 1
+
+
+_priority: ContextVar[Priority] = ContextVar("llm_priority", default=Priority.INTERACTIVE)
+
+
+@contextmanager
+def llm_priority(priority: Priority):
+    """Run the enclosed Gemini calls (and tasks/threads started inside) at *priority*."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+# ---------------------------------------------------------------------------
+# Buckets
+# ---------------------------------------------------------------------------
+
+class TokenBucket:
+    """Holds up to one minute's allowance, refilled continuously. Not thread-safe."""
+
+    def __init__(self, per_minute: float, now: Optional[float] = None):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self._updated = time.monotonic() if now is None else now
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until *amount* is available (0 if it is now)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        self.level -= min(amount, self.capacity)
+
+    def adjust(self, extra: float) -> None:
+        """Charge (or refund, if negative) *extra* after the fact; may go into debt."""
+        self.level = min(self.capacity, self.level - extra)
+
+
+class _ModelLimiter:
+    def __init__(self, rpm: float, tpm: float):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.waiting = [0] * len(Priority)
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def try_acquire(self, tokens: int, priority: Priority) -> float:
+        """Take one request and *tokens*; returns 0, or the seconds to wait before trying again."""
+        with self.lock:
+            now = time.monotonic()
+            if self.paused_until > now:
+                return self.paused_until - now
+            if any(self.waiting[:priority]):
+                return _RECHECK_SECONDS
+            wait = max(self.requests.wait_time(1, now), self.tokens.wait_time(tokens, now))
+            if wait > 0:
+                return wait
+            self.requests.take(1)
+            self.tokens.take(tokens)
+            return 0.0
+
+    def queue(self, priority: Priority, delta: int) -> None:
+        with self.lock:
+            self.waiting[priority] += delta
+
+    def pause(self, seconds: float) -> None:
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def settle(self, estimated: int, actual: Optional[int]) -> None:
+        if actual is not None:
+            with self.lock:
+                self.tokens.adjust(actual - estimated)
+
+
+# ---------------------------------------------------------------------------
+# Metrics
+# ---------------------------------------------------------------------------
+
+class _Metrics:
+    def __init__(self, window: int = 500):
+        self._lock = threading.Lock()
+        self._window = window
+        self._stats: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+    def _entry(self, model: str, priority: Priority) -> Dict[str, Any]:
+        key = (model, priority.name.lower())
+        if key not in self._stats:
+            self._stats[key] = {
+                "requests": 0, "queued": 0, "queue_seconds_total": 0.0, "queue_seconds_max": 0.0,
+                "retries": 0, "rate_limited": 0, "failed": 0, "recent": deque(maxlen=self._window),
+            }
+        return self._stats[key]
+
+    def queued(self, model: str, priority: Priority, seconds: float) -> None:
+        with self._lock:
+            e = self._entry(model, priority)
+            e["requests"] += 1
+            e["recent"].append(seconds)
+            if seconds > 0:
+                e["queued"] += 1
+                e["queue_seconds_total"] += seconds
+                e["queue_seconds_max"] = max(e["queue_seconds_max"], seconds)
+
+    def count(self, model: str, priority: Priority, field: str) -> None:
+        with self._lock:
+            self._entry(model, priority)[field] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        out: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            for (model, priority), e in self._stats.items():
+                recent = sorted(e["recent"])
+                row = {k: v for k, v in e.items() if k != "recent"}
+                row["queue_seconds_total"] = round(row["queue_seconds_total"], 3)
+                row["queue_seconds_max"] = round(row["queue_seconds_max"], 3)
+                row["queue_seconds_p50"] = round(recent[len(recent) // 2], 3) if recent else 0.0
+                row["queue_seconds_p95"] = round(recent[int(len(recent) * 0.95)], 3) if recent else 0.0
+                out.setdefault(model, {})[priority] = row
+        return out
+
+
+# ---------------------------------------------------------------------------
+# Scheduler
+# ---------------------------------------------------------------------------
+
+def _retryable(error: BaseException) -> bool:
+    code = getattr(error, "code", None)
+    return isinstance(error, errors.APIError) and isinstance(code, int) and (code == 429 or 500 <= code < 600)
+
+
+def _prompt_tokens(response: Any) -> Optional[int]:
+    usage = getattr(response, "usage_metadata", None)
+    count = getattr(usage, "prompt_token_count", None)
+    return count if isinstance(count, int) else None
+
+
+class LLMScheduler:
+    """Per-model admission control and retry for online Gemini calls (thread- and loop-safe)."""
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, Tuple[float, float]]] = None,
+        default_rpm: float = LLM_DEFAULT_RPM,
+        default_tpm: float = LLM_DEFAULT_TPM,
+        max_retries: int = LLM_MAX_RETRIES,
+        backoff_base: float = LLM_BACKOFF_BASE_SECONDS,
+        backoff_max: float = LLM_BACKOFF_MAX_SECONDS,
+    ):
+        self._limits = dict(LLM_RATE_LIMITS if limits is None else limits)
+        self._default = (default_rpm, default_tpm)
+        self._max_retries = max_retries
+        self._backoff_base = backoff_base
+        self._backoff_max = backoff_max
+        self._limiters: Dict[str, _ModelLimiter] = {}
+        self._lock = threading.Lock()
+        self._metrics = _Metrics()
+
+    def _limiter(self, model: str) -> _ModelLimiter:
+        with self._lock:
+            if model not in self._limiters:
+                self._limiters[model] = _ModelLimiter(*self._limits.get(model, self._default))
+            return self._limiters[model]
+
+    @staticmethod
+    def _estimate(contents: Any) -> int:
+        return get_token_estimator().estimate(contents) if isinstance(contents, str) else 0
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self._backoff_max, self._backoff_base * 2 ** attempt))
+
+    def _after_queue(self, model: str, priority: Priority, waited: float) -> None:
+        self._metrics.queued(model, priority, waited)
+        if waited >= LLM_QUEUE_WARN_SECONDS:
+            logger.warning(f"{model}: {priority.name.lower()} request throttled for {waited:.1f}s")
+
+    def _on_error(self, model: str, priority: Priority, limiter: _ModelLimiter, error: BaseException, attempt: int):
+        """Backoff before the next attempt, or None to give up."""
+        if not _retryable(error) or attempt >= self._max_retries:
+            self._metrics.count(model, priority, "failed")
+            return None
+        delay = self._backoff(attempt)
+        self._metrics.count(model, priority, "retries")
+        if error.code == 429:
+            self._metrics.count(model, priority, "rate_limited")
+            limiter.pause(delay)
+        logger.warning(f"{model}: Gemini returned {error.code}; retry {attempt + 1}/{self._max_retries} in {delay:.1f}s")
+        return delay
+
+    def _acquire(self, limiter: _ModelLimiter, tokens: int, priority: Priority) -> float:
+        start = time.monotonic()
+        wait = limiter.try_acquire(tokens, priority)
+        if wait <= 0:
+            return 0.0
+        limiter.queue(priority, 1)
+        try:
+            while wait > 0:
+                time.sleep(min(wait, _MAX_SLEEP_SECONDS))
+                wait = limiter.try_acquire(tokens, priority)
+        finally:
+            limiter.queue(priority, -1)
+        return time.monotonic() - start
+
+    async def _acquire_async(self, limiter: _ModelLimiter, tokens: int, priority: Priority) -> float:
+        start = time.monotonic()
+        wait = limiter.try_acquire(tokens, priority)
+        if wait <= 0:
+            return 0.0
+        limiter.queue(priority, 1)
+        try:
+            while wait > 0:
+                await asyncio.sleep(min(wait, _MAX_SLEEP_SECONDS))
+                wait = limiter.try_acquire(tokens, priority)
+        finally:
+            limiter.queue(priority, -1)
+        return time.monotonic() - start
+
+    def run(self, call: Callable[..., Any], **kwargs) -> Any:
+        """``call(**kwargs)`` once the model's buckets allow it, retrying 429/5xx."""
+        if not LLM_SCHEDULER_ENABLED:
+            return call(**kwargs)
+        model, priority = kwargs.get("model", ""), _priority.get()
+        limiter, tokens = self._limiter(model), self._estimate(kwargs.get("contents"))
+        attempt = 0
+        while True:
+            self._after_queue(model, priority, self._acquire(limiter, tokens, priority))
+            try:
+                response = call(**kwargs)
+            except Exception as e:
+                delay = self._on_error(model, priority, limiter, e, attempt)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                attempt += 1
+                continue
+            limiter.settle(tokens, _prompt_tokens(response))
+            return response
+
+    async def arun(self, call: Callable[..., Awaitable[Any]], **kwargs) -> Any:
+        """``run`` for a coroutine function."""
+        if not LLM_SCHEDULER_ENABLED:
+            return await call(**kwargs)
+        model, priority = kwargs.get("model", ""), _priority.get()
+        limiter, tokens = self._limiter(model), self._estimate(kwargs.get("contents"))
+        attempt = 0
+        while True:
+            self._after_queue(model, priority, await self._acquire_async(limiter, tokens, priority))
+            try:
+                response = await call(**kwargs)
+            except Exception as e:
+                delay = self._on_error(model, priority, limiter, e, attempt)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            limiter.settle(tokens, _prompt_tokens(response))
+            return response
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Queue-time and retry counters, by model and priority."""
+        return self._metrics.snapshot()
+
+
+_scheduler = LLMScheduler()
+
+
+def get_llm_scheduler() -> LLMScheduler:
+    return _scheduler
+
+
+def scheduled(call: Callable[..., Any]) -> Callable[..., Any]:
+    """*call* (a ``generate_content``-style function) through the shared scheduler."""
+    return lambda **kwargs: get_llm_scheduler().run(call, **kwargs)
+
+
+def scheduled_async(call: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+    """*call* (a coroutine function) through the shared scheduler."""
+    async def _call(**kwargs):
+        return await get_llm_scheduler().arun(call, **kwargs)
+
+    return _call
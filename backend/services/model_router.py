@@ -0,0 +1,467 @@
+"""Per-agent model tiers, routed on live latency and error stats.
+
+Agents don't all need the same model. Turning an idea into a store
+search query or compiling a report summary is formatting work a lite
+model does as well as a frontier one, faster and cheaper; the Market
+Strategy scorecard is not. Each agent declares the ``Tier`` it needs
+(``AGENT_TIERS``, overridable with ``MODEL_ROUTER_AGENT_TIERS``) and the
+router picks a model from ``MODEL_ROUTER_MODELS`` at that tier or above.
+
+Eligible models are ordered healthy first, then closest tier, then
+lowest p95 latency over their last ``MODEL_ROUTER_WINDOW`` calls (a model
+without enough samples yet counts as fastest, so it gets tried). Latency
+is measured as the caller sees it, rate-limit queueing included, so a
+model at its quota looks slow and traffic shifts away from it. A model
+whose error rate or p95 crosses ``MODEL_ROUTER_MAX_ERROR_RATE`` /
+``MODEL_ROUTER_MAX_P95_SECONDS`` is degraded: it goes to the back of the
+line for ``MODEL_ROUTER_COOLDOWN_SECONDS``, then starts over with a fresh
+window. A call that fails on its model (after the scheduler's own
+retries) is retried on the next candidate, so one model's outage falls
+back to another instead of failing the job.
+
+Every model belongs to a provider. ``gemini`` is the API itself; the
+router only swaps the ``model`` argument of the caller's request.
+``local`` is an offline stand-in (``LocalProvider``) that answers any
+request with placeholder JSON matching its response schema — for tests
+and for exercising the pipelines without spending API calls. Requests route across
+the providers in ``MODEL_ROUTER_PROVIDERS``; ``llm_provider`` pins the
+enclosed calls to one of them (``ValidationRequest.model_provider``).
+
+With ``MODEL_ROUTER_ENABLED=false`` every agent uses the first
+standard-tier model, without fallback.
+"""
+
+import os
+import json
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional
+
+import numpy as np
+from google.genai import errors, types
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# Configuration via env vars
+# ---------------------------------------------------------------------------
+MODEL_ROUTER_ENABLED = os.getenv("MODEL_ROUTER_ENABLED", "true").lower() == "true"
+# name=provider:tier, in order of preference within a tier
+MODEL_ROUTER_MODELS = os.getenv(
+    "MODEL_ROUTER_MODELS",
+    "gemini-2.5-flash-lite=gemini:lite,gemini-3-flash-preview=gemini:standard,"
+    "gemini-3-pro-preview=gemini:pro,local-stand-in=local:pro",
+)
+MODEL_ROUTER_PROVIDERS = os.getenv("MODEL_ROUTER_PROVIDERS", "gemini")
+MODEL_ROUTER_AGENT_TIERS = os.getenv("MODEL_ROUTER_AGENT_TIERS", "")  # e.g. "market_strategy=pro"
+MODEL_ROUTER_WINDOW = int(os.getenv("MODEL_ROUTER_WINDOW", "50"))
+MODEL_ROUTER_MIN_SAMPLES = int(os.getenv("MODEL_ROUTER_MIN_SAMPLES", "5"))
+MODEL_ROUTER_MAX_ERROR_RATE = float(os.getenv("MODEL_ROUTER_MAX_ERROR_RATE", "0.3"))
+MODEL_ROUTER_MAX_P95_SECONDS = float(os.getenv("MODEL_ROUTER_MAX_P95_SECONDS", "90"))
+MODEL_ROUTER_COOLDOWN_SECONDS = float(os.getenv("MODEL_ROUTER_COOLDOWN_SECONDS", "120"))
+MODEL_ROUTER_LOCAL_LATENCY_SECONDS = float(os.getenv("MODEL_ROUTER_LOCAL_LATENCY_SECONDS", "0"))
+
+
+class Tier(IntEnum):
+    LITE = 0  # extraction and formatting
+    STANDARD = 1  # research and analysis
+    PRO = 2  # deep reasoning
+
+
+AGENT_TIERS: Dict[str, Tier] = {
+    "discovery_query": Tier.LITE,
+    "category_detector": Tier.LITE,
+    "report_summary": Tier.LITE,
+    "researcher": Tier.STANDARD,
+    "pm_agent": Tier.STANDARD,
+    "analyst_agent": Tier.STANDARD,
+    "market_sizing": Tier.STANDARD,
+    "market_strategy": Tier.STANDARD,
+    "trend_scout": Tier.STANDARD,
+    "funding_scan": Tier.STANDARD,
+    "market_analyst": Tier.STANDARD,
+    "idea_generator": Tier.STANDARD,
+}
+
+
+class ModelSpec(NamedTuple):
+    name: str
+    provider: str
+    tier: Tier
+
+
+def _parse_tier(raw: str) -> Tier:
+    return Tier[raw.strip().upper()]
+
+
+def _parse_models(raw: str) -> List[ModelSpec]:
+    out = []
+    for item in raw.split(","):
+        name, _, rest = item.partition("=")
+        provider, _, tier = rest.partition(":")
+        try:
+            out.append(ModelSpec(name.strip(), provider.strip(), _parse_tier(tier)))
+        except KeyError:
+            if item.strip():
+                logger.warning(f"Ignoring malformed MODEL_ROUTER_MODELS entry '{item}'")
+    return out
+
+
+def _parse_agent_tiers(raw: str) -> Dict[str, Tier]:
+    out = {}
+    for item in raw.split(","):
+        agent, _, tier = item.partition("=")
+        try:
+            out[agent.strip()] = _parse_tier(tier)
+        except KeyError:
+            if item.strip():
+                logger.warning(f"Ignoring malformed MODEL_ROUTER_AGENT_TIERS entry '{item}'")
+    return out
+
+
+_provider: ContextVar[Optional[str]] = ContextVar("llm_provider", default=None)
+
+
+@contextmanager
+def llm_provider(provider: Optional[str]):
+    """Route the enclosed Gemini calls (and tasks/threads started inside) to *provider* only.
+
+    None routes across every enabled provider.
+    """
+    token = _provider.set(provider)
+    try:
+        yield
+    finally:
+        _provider.reset(token)
+
+
+def current_llm_provider() -> Optional[str]:
+    return _provider.get()
+
+
+def _is_model_failure(e: Exception) -> bool:
+    """Whether another model might succeed where this one failed."""
+    if isinstance(e, errors.APIError):
+        return e.code in (404, 408, 429) or (e.code or 0) >= 500
+    # Bad arguments or a bug on our side fail the same on every model
+    return not isinstance(e, (ValueError, TypeError, KeyError, AttributeError))
+
+
+# ---------------------------------------------------------------------------
+# Local stand-in provider
+# ---------------------------------------------------------------------------
+
+class LocalProvider:
+    """Offline stand-in: placeholder JSON matching the request's response schema.
+
+    Strings are ``"<field> <n>"``, numbers sit mid-range (within any
+    bounds), lists hold ``list_items`` elements and enums take their first
+    value. *latency* seconds are spent per call and *failure_rate* of calls
+    raise a 503, to exercise routing without the API.
+    """
+
+    def __init__(self, latency: float = MODEL_ROUTER_LOCAL_LATENCY_SECONDS, failure_rate: float = 0.0, list_items: int = 3):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.list_items = list_items
+        self.calls = 0
+        self._rng = np.random.default_rng(0)
+
+    def _respond(self, model: str, config: Any) -> types.GenerateContentResponse:
+        self.calls += 1
+        if self.failure_rate and self._rng.random() < self.failure_rate:
+            raise errors.ServerError(503, {"error": {"message": f"{model} stand-in failure", "status": "UNAVAILABLE"}})
+        schema = config.get("response_schema") if isinstance(config, dict) else getattr(config, "response_schema", None)
+        text = json.dumps(self.sample(schema)) if schema is not None else ""
+        return types.GenerateContentResponse(
+            candidates=[types.Candidate(
+                content=types.Content(role="model", parts=[types.Part(text=text)]),
+                finish_reason=types.FinishReason.STOP,
+            )],
+            model_version=model,
+        )
+
+    def generate(self, *, model: str, contents: Any = None, config: Any = None) -> types.GenerateContentResponse:
+        if self.latency:
+            time.sleep(self.latency)
+        return self._respond(model, config)
+
+    async def agenerate(self, *, model: str, contents: Any = None, config: Any = None) -> types.GenerateContentResponse:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._respond(model, config)
+
+    def sample(self, schema: Any) -> Any:
+        """A value matching *schema*: a pydantic model class or a JSON schema dict."""
+        if isinstance(schema, type) and issubclass(schema, BaseModel):
+            schema = schema.model_json_schema()
+        if not isinstance(schema, dict):
+            return {}
+        return self._value(schema, schema.get("$defs", {}), "value")
+
+    def _value(self, node: Dict[str, Any], defs: Dict[str, Any], name: str) -> Any:
+        if "$ref" in node:
+            return self._value(defs.get(node["$ref"].rsplit("/", 1)[-1], {}), defs, name)
+        for key in ("anyOf", "oneOf", "allOf"):
+            if key in node:
+                options = [o for o in node[key] if o.get("type") != "null"] or node[key]
+                return self._value(options[0], defs, name)
+        if "enum" in node:
+            return node["enum"][0]
+        if "const" in node:
+            return node["const"]
+        kind = node.get("type", "object")
+        if kind == "object":
+            return {k: self._value(v, defs, k) for k, v in node.get("properties", {}).items()}
+        if kind == "array":
+            count = max(self.list_items, node.get("minItems", 0))
+            return [self._value(node.get("items", {}), defs, f"{name} {i + 1}") for i in range(count)]
+        if kind in ("integer", "number"):
+            low, high = node.get("minimum", 0), node.get("maximum", 100)
+            value = (low + high) / 2
+            return int(value) if kind == "integer" else value
+        if kind == "boolean":
+            return False
+        return name.replace("_", " ")
+
+
+# ---------------------------------------------------------------------------
+# Live stats
+# ---------------------------------------------------------------------------
+
+class ModelStats:
+    """Outcomes and latencies of a model's last *window* calls. Not thread-safe."""
+
+    def __init__(self, window: int):
+        self.latencies: deque = deque(maxlen=window)
+        self.outcomes: deque = deque(maxlen=window)
+        self.calls = 0
+        self.errors = 0
+        self.degraded_until = 0.0
+
+    def record(self, latency: Optional[float]) -> None:
+        """A call that took *latency* seconds, or failed (None)."""
+        self.calls += 1
+        self.outcomes.append(latency is not None)
+        if latency is None:
+            self.errors += 1
+        else:
+            self.latencies.append(latency)
+
+    def reset_window(self) -> None:
+        self.latencies.clear()
+        self.outcomes.clear()
+
+    @property
+    def error_rate(self) -> float:
+        return 1.0 - sum(self.outcomes) / len(self.outcomes) if self.outcomes else 0.0
+
+    def percentile(self, q: float) -> Optional[float]:
+        return float(np.percentile(self.latencies, q)) if self.latencies else None
+
+
+class Route:
+    """The ordered candidate models for one call; ``model`` is the first choice.
+
+    ``call`` / ``acall`` wrap a ``generate_content``-style callable (the
+    Gemini request) so the request is made on each candidate in turn until
+    one succeeds, recording every outcome.
+    """
+
+    def __init__(self, router: "ModelRouter", agent: str, candidates: List[ModelSpec]):
+        self.router = router
+        self.agent = agent
+        self.candidates = candidates
+
+    @property
+    def model(self) -> str:
+        return self.candidates[0].name
+
+    @property
+    def provider(self) -> str:
+        return self.candidates[0].provider
+
+    def _give_up(self, i: int, spec: ModelSpec, e: Exception) -> bool:
+        if not _is_model_failure(e):
+            return True
+        self.router.record(spec.name, None)
+        if i + 1 == len(self.candidates):
+            return True
+        logger.warning(f"{self.agent}: {spec.name} failed ({e}); falling back to {self.candidates[i + 1].name}")
+        return False
+
+    def call(self, base: Callable[..., Any]) -> Callable[..., Any]:
+        def _call(**kwargs):
+            for i, spec in enumerate(self.candidates):
+                provider = self.router.providers.get(spec.provider)
+                start = time.monotonic()
+                try:
+                    response = (provider.generate if provider else base)(**{**kwargs, "model": spec.name})
+                except Exception as e:
+                    if self._give_up(i, spec, e):
+                        raise
+                    continue
+                self.router.record(spec.name, time.monotonic() - start)
+                return response
+
+        return _call
+
+    def acall(self, base: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        async def _call(**kwargs):
+            for i, spec in enumerate(self.candidates):
+                provider = self.router.providers.get(spec.provider)
+                start = time.monotonic()
+                try:
+                    response = await (provider.agenerate if provider else base)(**{**kwargs, "model": spec.name})
+                except Exception as e:
+                    if self._give_up(i, spec, e):
+                        raise
+                    continue
+                self.router.record(spec.name, time.monotonic() - start)
+                return response
+
+        return _call
+
+
+class ModelRouter:
+    """Picks models for agents by tier and live health; thread-safe.
+
+    *providers* maps provider names to stand-in implementations
+    (``generate`` / ``agenerate``); a provider without one — ``gemini`` —
+    is served by the caller's own request.
+    """
+
+    def __init__(
+        self,
+        models: Optional[List[ModelSpec]] = None,
+        agent_tiers: Optional[Dict[str, Tier]] = None,
+        enabled_providers: Optional[List[str]] = None,
+        providers: Optional[Dict[str, Any]] = None,
+        enabled: bool = MODEL_ROUTER_ENABLED,
+        window: int = MODEL_ROUTER_WINDOW,
+        min_samples: int = MODEL_ROUTER_MIN_SAMPLES,
+        max_error_rate: float = MODEL_ROUTER_MAX_ERROR_RATE,
+        max_p95_seconds: float = MODEL_ROUTER_MAX_P95_SECONDS,
+        cooldown_seconds: float = MODEL_ROUTER_COOLDOWN_SECONDS,
+    ):
+        self.models = list(models if models is not None else _parse_models(MODEL_ROUTER_MODELS))
+        self.agent_tiers = {**AGENT_TIERS, **(agent_tiers or {})}
+        self.enabled_providers = [
+            p.strip() for p in (enabled_providers if enabled_providers is not None else MODEL_ROUTER_PROVIDERS.split(","))
+            if p.strip()
+        ]
+        self.providers = {"local": LocalProvider(), **(providers or {})}
+        self.enabled = enabled
+        self.min_samples = min_samples
+        self.max_error_rate = max_error_rate
+        self.max_p95_seconds = max_p95_seconds
+        self.cooldown_seconds = cooldown_seconds
+        self._stats = {m.name: ModelStats(window) for m in self.models}
+        self._window = window
+        self._lock = threading.Lock()
+
+    def tier(self, agent: str) -> Tier:
+        return self.agent_tiers.get(agent, Tier.STANDARD)
+
+    def check_provider(self, provider: Optional[str]) -> None:
+        """Raise ValueError unless *provider* is None or enabled."""
+        if provider is not None and provider not in self.enabled_providers:
+            raise ValueError(f"Unknown model provider '{provider}'; available: {', '.join(self.enabled_providers)}")
+
+    def uses_stand_ins(self) -> bool:
+        """Whether calls under the current provider may be answered by a stand-in (their results aren't real)."""
+        provider = current_llm_provider()
+        return any(p in self.providers for p in ([provider] if provider else self.enabled_providers))
+
+    def _spec(self, model: str) -> ModelSpec:
+        return next((m for m in self.models if m.name == model), ModelSpec(model, "gemini", Tier.STANDARD))
+
+    def candidates(self, agent: str) -> List[ModelSpec]:
+        """Models for *agent* under the current provider, best first."""
+        provider = current_llm_provider()
+        self.check_provider(provider)
+        providers = [provider] if provider else self.enabled_providers
+        tier = self.tier(agent) if self.enabled else Tier.STANDARD
+        eligible = [m for m in self.models if m.provider in providers and m.tier >= tier]
+        if not eligible:
+            raise ValueError(f"No {tier.name.lower()}-tier model for '{agent}' from {', '.join(providers)}")
+        if not self.enabled:
+            return [min(eligible, key=lambda m: m.tier)]
+        now = time.monotonic()
+        with self._lock:
+            def rank(m: ModelSpec):
+                stats = self._stats[m.name]
+                p95 = stats.percentile(95) if len(stats.latencies) >= self.min_samples else None
+                return (stats.degraded_until > now, m.tier - tier, p95 or 0.0)
+
+            return sorted(eligible, key=rank)
+
+    def route(self, agent: str, model: Optional[str] = None) -> Route:
+        """The route for *agent*'s next call; *model* pins it to that model alone."""
+        if model is not None:
+            return Route(self, agent, [self._spec(model)])
+        return Route(self, agent, self.candidates(agent))
+
+    def record(self, model: str, latency: Optional[float]) -> None:
+        """Record a call to *model* that took *latency* seconds, or failed (None)."""
+        with self._lock:
+            stats = self._stats.setdefault(model, ModelStats(self._window))
+            stats.record(latency)
+            if len(stats.outcomes) < self.min_samples:
+                return
+            p95 = stats.percentile(95) or 0.0
+            if stats.error_rate > self.max_error_rate or p95 > self.max_p95_seconds:
+                stats.degraded_until = time.monotonic() + self.cooldown_seconds
+                logger.warning(
+                    f"Model {model} degraded (error rate {stats.error_rate:.0%}, p95 {p95:.1f}s); "
+                    f"routing around it for {self.cooldown_seconds:.0f}s."
+                )
+                stats.reset_window()
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "providers": self.enabled_providers,
+                "models": {
+                    m.name: {
+                        "provider": m.provider,
+                        "tier": m.tier.name.lower(),
+                        "calls": self._stats[m.name].calls,
+                        "errors": self._stats[m.name].errors,
+                        "error_rate": round(self._stats[m.name].error_rate, 3),
+                        "p50_seconds": self._stats[m.name].percentile(50),
+                        "p95_seconds": self._stats[m.name].percentile(95),
+                        "degraded_for_seconds": round(max(0.0, self._stats[m.name].degraded_until - now), 1),
+                    }
+                    for m in self.models
+                },
+                "agents": {agent: tier.name.lower() for agent, tier in sorted(self.agent_tiers.items())},
+            }
+
+
+_router: Optional[ModelRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_model_router() -> ModelRouter:
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = ModelRouter(agent_tiers=_parse_agent_tiers(MODEL_ROUTER_AGENT_TIERS))
+    return _router
+
+
+def set_model_router(router: Optional[ModelRouter]) -> None:
+    """Use *router* (e.g. in tests); None rebuilds the configured one on next use."""
+    global _router
+    _router = router
@@ -0,0 +1,260 @@
+"""Precomputed competitor/review snapshots for the most requested niches.
+
+Most validations land in a small set of niches (habit trackers, budgeting
+apps, AI note-takers, ...), and each one used to rerun query generation,
+store searches, review scraping and grounded web discovery from scratch.
+
+A niche is a two-word content phrase ("habit tracker", "note taker")
+within a discovery branch. ``refresh_niche_snapshots`` — run periodically
+by the research scheduler — counts niches across recent validation
+history, runs discovery for the top ones and stores the result as a
+snapshot (JSON under NICHE_SNAPSHOT_DIR). ``find_snapshot`` lets discovery
+serve an idea from a fresh snapshot whose niche phrase makes up most of
+it ("habit tracker for nurses", not a habit tracker with five more
+specifics), and discovery falls back to the live path otherwise.
+"""
+
+import os
+import re
+import json
+import logging
+import threading
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+
+from services.db import list_recent_validations
+from services.review_batch import ReviewBatch
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# Configuration via env vars
+# ---------------------------------------------------------------------------
+NICHE_SNAPSHOTS_ENABLED = os.getenv("NICHE_SNAPSHOTS_ENABLED", "true").lower() == "true"
+NICHE_SNAPSHOT_DIR = os.getenv("NICHE_SNAPSHOT_DIR", os.path.join("data", "niche_snapshots"))
+NICHE_SNAPSHOT_MAX_AGE_HOURS = float(os.getenv("NICHE_SNAPSHOT_MAX_AGE_HOURS", "24"))
+NICHE_SNAPSHOT_REFRESH_HOURS = float(os.getenv("NICHE_SNAPSHOT_REFRESH_HOURS", "12"))
+NICHE_TOP_N = int(os.getenv("NICHE_TOP_N", "20"))
+NICHE_MIN_VALIDATIONS = int(os.getenv("NICHE_MIN_VALIDATIONS", "3"))
+NICHE_HISTORY_DAYS = int(os.getenv("NICHE_HISTORY_DAYS", "30"))
+# Share of an idea's content words the niche phrase must cover to serve it
+NICHE_MIN_COVERAGE = float(os.getenv("NICHE_MIN_COVERAGE", "0.6"))
+
+_WORD_RE = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+_STOPWORDS = set(
+    "a an the and or for to of in on with without by from at into that this these those my your our their "
+    "is are be can will would should could i we you they it its who which what where when how why "
+    "app apps application platform tool tools software service startup idea product website web mobile "
+    "based using use uses help helps helping people users user new simple easy smart better best "
+    "build make makes lets let allow allows like just also more most very all any each every "
+    "one two get gets via per their them something someone".split()
+)
+
+
+class Niche(BaseModel):
+    phrase: str
+    branch: str
+    validation_count: int
+
+
+class NicheSnapshot(BaseModel):
+    phrase: str
+    branch: str
+    category: str
+    locales: List[str]
+    competitors: List[Dict[str, Any]] = []
+    reviews: List[Dict[str, Any]] = []
+    validation_count: int = 0
+    created_at: str
+
+    @property
+    def key(self) -> str:
+        return snapshot_key(self.phrase, self.branch)
+
+    def age_hours(self, now: Optional[datetime] = None) -> float:
+        now = now or datetime.now(timezone.utc)
+        return (now - datetime.fromisoformat(self.created_at)).total_seconds() / 3600
+
+
+def snapshot_key(phrase: str, branch: str) -> str:
+    return f"{branch}__{phrase.replace(' ', '_')}"
+
+
+def _branch(category: str) -> str:
+    # Same mapping as discovery.discovery_branch (kept local to avoid an import cycle)
+    return category if category in ("hardware", "saas_web") else "app_store"
+
+
+def _stem(word: str) -> str:
+    return word[:-1] if len(word) > 3 and word.endswith("s") and not word.endswith("ss") else word
+
+
+def _content_words(idea: str) -> List[str]:
+    words = (_stem(w) for w in _WORD_RE.findall(idea.lower()))
+    return [w for w in words if w not in _STOPWORDS and not w.isdigit()]
+
+
+def niche_coverage(phrase: str, idea: str) -> float:
+    """Share of the idea's distinct content words that *phrase* accounts for (0 if it doesn't occur)."""
+    if phrase not in niche_phrases(idea):
+        return 0.0
+    terms = set(_content_words(idea))
+    return len(terms & set(phrase.split())) / len(terms)
+
+
+def niche_phrases(idea: str) -> List[str]:
+    """Adjacent content-word pairs of an idea ("AI note taker for students" → ["ai note", "note taker", ...])."""
+    words = [_stem(w) for w in _WORD_RE.findall(idea.lower())]
+    phrases = []
+    for a, b in zip(words, words[1:]):
+        if a in _STOPWORDS or b in _STOPWORDS or a.isdigit() or b.isdigit():
+            continue
+        phrases.append(f"{a} {b}")
+    return list(dict.fromkeys(phrases))
+
+
+def top_niches(validations: List[Dict[str, Any]], top_n: int = NICHE_TOP_N, min_count: int = NICHE_MIN_VALIDATIONS) -> List[Niche]:
+    """Most frequent (phrase, discovery branch) pairs, counted once per validation."""
+    counts: Counter = Counter()
+    for v in validations:
+        branch = _branch(v.get("category") or "mobile_app")
+        counts.update((p, branch) for p in niche_phrases(v.get("idea") or ""))
+    return [
+        Niche(phrase=phrase, branch=branch, validation_count=n)
+        for (phrase, branch), n in counts.most_common(top_n)
+        if n >= min_count
+    ]
+
+
+# ---------------------------------------------------------------------------
+# Storage
+# ---------------------------------------------------------------------------
+
+class _SnapshotStore:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshots: Dict[str, NicheSnapshot] = {}
+        self._loaded_from: Optional[str] = None
+
+    def _ensure_loaded(self, base_dir: str) -> None:
+        if self._loaded_from == base_dir:
+            return
+        self._snapshots = {}
+        self._loaded_from = base_dir
+        if not os.path.isdir(base_dir):
+            return
+        for name in os.listdir(base_dir):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(base_dir, name), encoding="utf-8") as f:
+                    snap = NicheSnapshot.model_validate(json.load(f))
+                self._snapshots[snap.key] = snap
+            except Exception as e:
+                logger.warning(f"Skipping unreadable niche snapshot {name}: {e}")
+
+    def all(self, base_dir: str) -> List[NicheSnapshot]:
+        with self._lock:
+            self._ensure_loaded(base_dir)
+            return list(self._snapshots.values())
+
+    def put(self, snap: NicheSnapshot, base_dir: str) -> None:
+        with self._lock:
+            self._ensure_loaded(base_dir)
+            self._snapshots[snap.key] = snap
+        try:
+            os.makedirs(base_dir, exist_ok=True)
+            tmp = os.path.join(base_dir, f".{snap.key}.json.tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(snap.model_dump_json())
+            os.replace(tmp, os.path.join(base_dir, f"{snap.key}.json"))
+        except Exception as e:
+            logger.warning(f"Failed to write niche snapshot {snap.key}: {e}")
+
+
+_store = _SnapshotStore()
+
+
+# ---------------------------------------------------------------------------
+# Lookup and refresh
+# ---------------------------------------------------------------------------
+
+def find_snapshot(
+    idea: str,
+    category: str,
+    locales: List[str],
+    base_dir: Optional[str] = None,
+    max_age_hours: Optional[float] = None,
+) -> Optional[NicheSnapshot]:
+    """Freshest matching snapshot for *idea*, or None to run live discovery.
+
+    A snapshot matches when its niche phrase covers at least
+    NICHE_MIN_COVERAGE of the idea's content words, it was built for the
+    same discovery branch and covers every requested locale. A specific
+    idea that merely contains the phrase runs live. Among matches, the
+    most requested niche wins.
+    """
+    if not NICHE_SNAPSHOTS_ENABLED:
+        return None
+    max_age = NICHE_SNAPSHOT_MAX_AGE_HOURS if max_age_hours is None else max_age_hours
+    branch = _branch(category)
+    now = datetime.now(timezone.utc)
+    matches = [
+        s for s in _store.all(base_dir or NICHE_SNAPSHOT_DIR)
+        if s.branch == branch and niche_coverage(s.phrase, idea) >= NICHE_MIN_COVERAGE
+        and set(locales) <= set(s.locales) and s.age_hours(now) <= max_age
+        and s.competitors
+    ]
+    if not matches:
+        return None
+    return max(matches, key=lambda s: (s.validation_count, s.created_at))
+
+
+def snapshot_result(snap: NicheSnapshot) -> tuple[ReviewBatch, List[Dict[str, Any]]]:
+    """Discovery-shaped ``(reviews, competitors_meta)`` from a snapshot."""
+    return ReviewBatch.from_dicts(snap.reviews), [dict(c) for c in snap.competitors]
+
+
+def refresh_niche_snapshots(base_dir: Optional[str] = None) -> List[str]:
+    """Rebuild snapshots for the top niches whose snapshot is missing or due.
+
+    Returns the keys of the snapshots written. Meant for the scheduler;
+    failures for one niche are logged and don't stop the others.
+    """
+    from services.discovery import discover_competitors_and_scrape
+    from services.scraper import DEFAULT_LOCALES
+
+    if not NICHE_SNAPSHOTS_ENABLED:
+        return []
+    base_dir = base_dir or NICHE_SNAPSHOT_DIR
+    since = (datetime.now(timezone.utc) - timedelta(days=NICHE_HISTORY_DAYS)).isoformat()
+    niches = top_niches(list_recent_validations(since))
+    existing = {s.key: s for s in _store.all(base_dir)}
+    written = []
+    for niche in niches:
+        key = snapshot_key(niche.phrase, niche.branch)
+        current = existing.get(key)
+        if current and current.age_hours() < NICHE_SNAPSHOT_REFRESH_HOURS:
+            continue
+        category = {"app_store": "mobile_app"}.get(niche.branch, niche.branch)
+        try:
+            reviews, competitors = discover_competitors_and_scrape(
+                niche.phrase, category, list(DEFAULT_LOCALES), use_snapshots=False,
+            )
+        except Exception as e:
+            logger.warning(f"Niche snapshot refresh failed for '{niche.phrase}': {e}")
+            continue
+        if not competitors:
+            logger.info(f"No competitors found for niche '{niche.phrase}'; keeping previous snapshot.")
+            continue
+        _store.put(NicheSnapshot(
+            phrase=niche.phrase, branch=niche.branch, category=category,
+            locales=list(DEFAULT_LOCALES), competitors=competitors, reviews=reviews.to_dicts(),
+            validation_count=niche.validation_count, created_at=datetime.now(timezone.utc).isoformat(),
+        ), base_dir)
+        written.append(key)
+    logger.info(f"Niche snapshots: {len(niches)} top niches, refreshed {len(written)}.")
+    return written
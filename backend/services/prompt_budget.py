@@ -0,0 +1,220 @@
+"""Token-budgeted prompt assembly.
+
+Agent prompts interpolate evidence — store reviews, community posts, the
+upstream agents' findings — whose size depends on what was scraped. An
+oversized prompt is slow (latency grows with input tokens) and can be
+rejected outright. ``fit_prompt`` gives every agent a token budget
+(``AGENT_TOKEN_BUDGETS``, overridable with
+``PROMPT_TOKEN_BUDGETS="researcher=8000,pm_agent=1500"``) and fills the
+prompt's evidence slots in priority order until the budget is spent:
+
+    prompt = fit_prompt(
+        "researcher",
+        lambda reviews, community: f"...{community}...{reviews}",
+        community=Evidence(community_lines, priority=0),
+        reviews=Evidence(review_lines, priority=1),
+    )
+
+Evidence is line-oriented — one record per line, most important first —
+so trimming drops whole records from the end. ``compact_line`` and
+``bullets`` produce that encoding; it is far smaller than the JSON it
+replaces, which repeats every key on every record.
+
+Tokens are estimated locally (``TokenEstimator``): a chars-per-token
+heuristic scaled by a correction factor learned from the API's
+``count_tokens``, which is checked for one prompt in every
+``PROMPT_CALIBRATE_EVERY`` on a background thread.
+"""
+
+import os
+import re
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Sequence, Union
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# Configuration via env vars
+# ---------------------------------------------------------------------------
+PROMPT_BUDGET_ENABLED = os.getenv("PROMPT_BUDGET_ENABLED", "true").lower() == "true"
+PROMPT_CALIBRATE_EVERY = int(os.getenv("PROMPT_CALIBRATE_EVERY", "50"))  # 0 = never call count_tokens
+PROMPT_MAX_LINE_CHARS = int(os.getenv("PROMPT_MAX_LINE_CHARS", "600"))
+
+# Whole-prompt token budgets (template + evidence), per agent.
+AGENT_TOKEN_BUDGETS: Dict[str, int] = {
+    "researcher": 16000,
+    "pm_agent": 3000,
+    "market_strategy": 4000,
+    "trend_scout": 10000,
+    "market_analyst": 4000,
+    "idea_generator": 5000,
+}
+
+
+def _parse_overrides(raw: str) -> Dict[str, int]:
+    out = {}
+    for item in raw.split(","):
+        agent, _, tokens = item.partition("=")
+        try:
+            out[agent.strip()] = int(tokens)
+        except ValueError:
+            if item.strip():
+                logger.warning(f"Ignoring malformed PROMPT_TOKEN_BUDGETS entry '{item}'")
+    return out
+
+
+AGENT_TOKEN_BUDGETS.update(_parse_overrides(os.getenv("PROMPT_TOKEN_BUDGETS", "")))
+
+
+# ---------------------------------------------------------------------------
+# Token estimation
+# ---------------------------------------------------------------------------
+
+class TokenEstimator:
+    """Local token estimate, corrected against ``count_tokens`` samples.
+
+    ASCII text runs about four characters per token; other scripts (CJK,
+    accented Latin, emoji) closer to one or two. ``scale`` — the running
+    ratio of real to estimated tokens — absorbs the difference between that
+    heuristic and the model's tokenizer.
+    """
+
+    ASCII_CHARS_PER_TOKEN = 4.0
+    OTHER_CHARS_PER_TOKEN = 1.5
+
+    def __init__(self, calibrate_every: int = PROMPT_CALIBRATE_EVERY, smoothing: float = 0.2):
+        self.scale = 1.0
+        self.samples = 0
+        self._calibrate_every = calibrate_every
+        self._smoothing = smoothing
+        self._seen = 0
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="token-calibration")
+
+    def _raw(self, text: str) -> float:
+        other = sum(1 for c in text if ord(c) > 127) if not text.isascii() else 0
+        return (len(text) - other) / self.ASCII_CHARS_PER_TOKEN + other / self.OTHER_CHARS_PER_TOKEN
+
+    def estimate(self, text: str) -> int:
+        return int(self._raw(text) * self.scale) + 1 if text else 0
+
+    def observe(self, text: str, actual_tokens: int) -> None:
+        """Fold one measured token count into the correction factor."""
+        raw = self._raw(text)
+        if raw <= 0 or actual_tokens <= 0:
+            return
+        ratio = min(max(actual_tokens / raw, 0.25), 4.0)
+        with self._lock:
+            if self.samples:
+                self.scale += self._smoothing * (ratio - self.scale)
+            else:
+                self.scale = ratio
+            self.samples += 1
+
+    def sample(self, contents, model: str) -> None:
+        """Every ``calibrate_every``-th prompt, measure it with ``count_tokens`` in the background."""
+        if self._calibrate_every <= 0 or not isinstance(contents, str):
+            return
+        with self._lock:
+            self._seen += 1
+            due = self._seen % self._calibrate_every == 0
+        if due:
+            self._pool.submit(self._calibrate, contents, model)
+
+    def _calibrate(self, text: str, model: str) -> None:
+        from services.gemini_client import get_gemini_client
+
+        try:
+            response = get_gemini_client().models.count_tokens(model=model, contents=text)
+            self.observe(text, response.total_tokens or 0)
+            logger.debug(f"Token estimator scale now {self.scale:.3f} after {self.samples} samples")
+        except Exception as e:
+            logger.debug(f"count_tokens calibration skipped: {e}")
+
+
+_estimator = TokenEstimator()
+
+
+def get_token_estimator() -> TokenEstimator:
+    return _estimator
+
+
+# ---------------------------------------------------------------------------
+# Compact encodings
+# ---------------------------------------------------------------------------
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def compact_line(text: str, limit: int = PROMPT_MAX_LINE_CHARS) -> str:
+    """*text* on a single line with collapsed whitespace, cut to *limit* characters."""
+    text = _WHITESPACE.sub(" ", text or "").strip()
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + "…"
+
+
+def bullets(items: Iterable[str], indent: str = "  ") -> List[str]:
+    """One ``• item`` line per item."""
+    return [f"{indent}• {compact_line(str(item))}" for item in items if str(item).strip()]
+
+
+# ---------------------------------------------------------------------------
+# Assembly
+# ---------------------------------------------------------------------------
+
+class Evidence:
+    """Lines of evidence for one prompt slot; lower *priority* is filled first."""
+
+    def __init__(self, lines: Union[str, Sequence[str]], priority: int = 0):
+        self.lines = [l for l in (lines.splitlines() if isinstance(lines, str) else lines) if l.strip()]
+        self.priority = priority
+
+
+def agent_token_budget(agent: str) -> int:
+    return AGENT_TOKEN_BUDGETS.get(agent, 0)
+
+
+def fit_prompt(agent: str, render: Callable[..., str], **evidence: Evidence) -> str:
+    """Render the prompt with as much of each evidence slot as fits *agent*'s budget.
+
+    *render* is called with each slot's lines joined by newlines. Slots are
+    filled in priority order, each line in order, until the budget is
+    spent; an agent without a budget (or ``PROMPT_BUDGET_ENABLED=false``)
+    gets all of its evidence.
+    """
+    return render(**fit_evidence(agent, render, **evidence))
+
+
+def fit_evidence(agent: str, render: Callable[..., str], **evidence: Evidence) -> Dict[str, str]:
+    """The evidence ``fit_prompt`` would render, slot by slot (e.g. to place it elsewhere)."""
+    budget = agent_token_budget(agent)
+    if not PROMPT_BUDGET_ENABLED or budget <= 0:
+        return {name: "\n".join(e.lines) for name, e in evidence.items()}
+
+    estimator = get_token_estimator()
+    remaining = budget - estimator.estimate(render(**{name: "" for name in evidence}))
+    kept: Dict[str, List[str]] = {name: [] for name in evidence}
+    for name, e in sorted(evidence.items(), key=lambda item: item[1].priority):
+        for line in e.lines:
+            cost = estimator.estimate(line) + 1  # + the newline
+            if cost > remaining:
+                break
+            kept[name].append(line)
+            remaining -= cost
+
+    # Slot headers only appear once a slot has content: trim from the lowest priority until it fits
+    by_priority = sorted(evidence, key=lambda name: evidence[name].priority, reverse=True)
+    while True:
+        fitted = {name: "\n".join(lines) for name, lines in kept.items()}
+        if estimator.estimate(render(**fitted)) <= budget:
+            break
+        trimmable = next((name for name in by_priority if kept[name]), None)
+        if trimmable is None:
+            break
+        kept[trimmable].pop()
+
+    dropped = {name: len(e.lines) - len(kept[name]) for name, e in evidence.items() if len(kept[name]) < len(e.lines)}
+    if dropped:
+        logger.info(f"Prompt for {agent} trimmed to its {budget}-token budget; lines dropped: {dropped}")
+    return fitted
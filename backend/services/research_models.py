@@ -61,6 +61,19 @@ class TrendScoutOutput(BaseModel):
     raw_signals: List[str] = Field(description="Top 10 raw quotes or data points from Reddit, HN, Twitter, ProductHunt, news sites — include [source] tag.")
 
 
+class FundingScanOutput(BaseModel):
+    """Output from the Funding Scan agent — needs only the domain and keywords."""
+    funding_signals: List[str] = Field(description="Top 5 funding/VC signals: recent raises, YC batches, notable investments in this space.")
+    market_sizes: List[str] = Field(description="Up to 5 market size figures or growth projections for niches in this space, each with source and year.")
+
+
+class TrendValidationOutput(BaseModel):
+    """Market Analyst response: the Trend Scout's findings checked against market evidence."""
+    validated_trends: List[str] = Field(description="Top 8-10 trends cross-referenced with funding data and market growth signals. Each should cite evidence.")
+    market_gaps: List[str] = Field(description="Top 5 underserved areas where demand exceeds supply of solutions.")
+    competition_landscape: str = Field(description="2-3 sentence overview of how crowded or open the space is.")
+
+
 class MarketAnalystOutput(BaseModel):
     """Output from the Market Analyst agent."""
     validated_trends: List[str] = Field(description="Top 8-10 trends cross-referenced with funding data and market growth signals. Each should cite evidence.")
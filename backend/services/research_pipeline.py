@@ -1,36 +1,52 @@
-"""Research pipeline: 3-agent chain that discovers trends and generates business ideas.
+"""Research pipeline: agent graph that discovers trends and generates business ideas.
 
-Agent chain:
+Agents (run by services.agent_dag as soon as their inputs exist):
+  - Community scrape — posts for the keywords
+  - Funding Scan — recent funding and market sizes for the domain (runs
+    alongside the scrape and the Trend Scout)
   1. Trend Scout — scrapes/searches for trending topics, pain points, rising categories
-  2. Market Analyst — cross-references with funding data, validates market signals
+  2. Market Analyst — validates the scout's trends against the funding scan
   3. Idea Generator — synthesizes 5-10 concrete business ideas with scores
+  - Report — executive summary and final report
 
 Uses the same Gemini patterns as ai_analyzer.py:
   - google-genai SDK
   - response_mime_type="application/json" + response_schema
-  - Google Search grounding for live data
+  - Google Search grounding for live data (through services.grounding_cache,
+    which reuses fresh search results for the same niche)
+  - each agent is an ``AgentCall``, awaited on ``client.aio`` by
+    ``run_research_pipeline_async``; scheduled runs send them through
+    Gemini batch jobs (services.gemini_batch)
 """
 
-import os
 import json
 import uuid
+import asyncio
 import logging
 import threading
 from datetime import datetime, timezone
-
-from google import genai
-from google.genai import types
+from typing import Optional
 
 from services.research_models import (
     TrendScoutOutput,
+    FundingScanOutput,
+    TrendValidationOutput,
     MarketAnalystOutput,
     IdeaGeneratorOutput,
     ReportSummaryOutput,
     ResearchReport,
 )
+from services.agent_calls import AgentCall
+from services.agent_dag import AgentDAG
+from services.prompt_budget import Evidence, bullets, fit_prompt
+from services.gemini_client import get_async_gemini_client
+from services.gemini_batch import GeminiBatcher, get_gemini_batcher
+from services.llm_scheduler import Priority, llm_priority
+from services.job_checkpoints import JobCheckpoints, dump_output, restore_outputs, register_resumer
 from services.research_db import (
     create_research_job,
     update_research_job,
+    get_research_job,
     save_research_report,
 )
 from services.community_scraper import CommunityScraperService
@@ -61,6 +77,27 @@ _DOMAIN_TO_CATEGORY = {
     "general": "mobile_app",
 }
 
+# Output type of each research agent, for restoring them from job checkpoints
+_RESEARCH_AGENT_OUTPUTS = {
+    "community": tuple,
+    "funding_scan": FundingScanOutput,
+    "trend_scout": TrendScoutOutput,
+    "market_analyst": MarketAnalystOutput,
+    "idea_generator": IdeaGeneratorOutput,
+    "report": ResearchReport,
+}
+
+# Resumed research jobs (the loop only keeps weak references to tasks)
+_resumed_tasks: set[asyncio.Task] = set()
+
+# Job progress reported when each agent starts: agent → (current_step, progress_pct)
+_RESEARCH_STEPS = {
+    "trend_scout": ("trend_scout", 20),
+    "market_analyst": ("market_analyst", 40),
+    "idea_generator": ("idea_generator", 60),
+    "report": ("compiling_report", 80),
+}
+
 
 def run_research_pipeline(
     domain: str,
@@ -69,92 +106,82 @@ def run_research_pipeline(
     topic_id: str = "",
     user_id: str = "",
 ) -> ResearchReport:
-    """Execute the full 3-agent research pipeline."""
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key:
-        raise ValueError("GEMINI_API_KEY not set.")
+    """Execute the full research agent graph (blocking; for callers outside an event loop)."""
+    return asyncio.run(run_research_pipeline_async(domain, keywords, interests, topic_id, user_id))
 
-    client = genai.Client(api_key=api_key)
 
-    job = create_research_job(user_id, topic_id)
-    job_id = job.get("id", str(uuid.uuid4()))
+async def run_research_pipeline_async(
+    domain: str,
+    keywords: list[str],
+    interests: list[str],
+    topic_id: str = "",
+    user_id: str = "",
+    batcher: Optional[GeminiBatcher] = None,
+    resume_job_id: Optional[str] = None,
+) -> ResearchReport:
+    """Execute the full research agent graph on the running event loop.
+
+    Agents call Gemini through the async client; the community scrape and
+    the Supabase writes, which use blocking libraries, run in worker
+    threads. With *batcher*, agent requests go into Gemini batch jobs
+    (for scheduled runs, where latency doesn't matter).
+
+    Each agent's output is checkpointed as it finishes; *resume_job_id*
+    resumes an orphaned job, re-running only the agents without one.
+    """
+    aclient = get_async_gemini_client()
+
+    if resume_job_id:
+        job_id = resume_job_id
+        checkpoints = JobCheckpoints("research", job_id)
+        saved = await asyncio.to_thread(checkpoints.load)
+    else:
+        job = await asyncio.to_thread(create_research_job, user_id, topic_id)
+        job_id = job.get("id", str(uuid.uuid4()))
+        checkpoints = JobCheckpoints("research", job_id)
+        saved = {}
+        await asyncio.to_thread(checkpoints.begin, {
+            "domain": domain, "keywords": keywords, "interests": interests,
+            "topic_id": topic_id, "user_id": user_id, "batch": batcher is not None,
+        })
     research_cancel_events[job_id] = threading.Event()
+    heartbeat = asyncio.create_task(checkpoints.heartbeat())
+    interrupted = False
 
-    try:
-        # Step 1: Community Scraping
-        _check_research_cancelled(job_id)
-        update_research_job(job_id, {"status": "running", "current_step": "community_scraping", "progress_pct": 0})
-        category = _DOMAIN_TO_CATEGORY.get(domain, "mobile_app")
-        community_text = ""
-        community_succeeded = False
-        try:
-            scraper = CommunityScraperService(category)
-            community_result = scraper.scrape_all(
-                competitor_names=[],
-                idea_keywords=" ".join(keywords),
-            )
-            community_text = json.dumps([p.model_dump() for p in community_result.posts[:50]])
-            community_succeeded = community_result.total_posts > 0
-            logger.info(f"Research community scraping: {community_result.total_posts} posts")
-        except Exception as e:
-            logger.warning(f"Community scraping failed (continuing): {e}")
+    def _update(data: dict):
+        return asyncio.to_thread(update_research_job, job_id, data)
 
-        # Step 2: Trend Scout Agent
+    try:
         _check_research_cancelled(job_id)
-        update_research_job(job_id, {"current_step": "trend_scout", "status": "running", "progress_pct": 20})
-        logger.info("Research Agent 1 (Trend Scout) starting...")
-        scout_result = _run_trend_scout(client, domain, keywords, interests, community_text)
+        await _update({"status": "running", "current_step": "community_scraping", "progress_pct": 0})
 
-        # Step 3: Market Analyst Agent
-        _check_research_cancelled(job_id)
-        update_research_job(job_id, {"current_step": "market_analyst", "progress_pct": 40})
-        logger.info("Research Agent 2 (Market Analyst) starting...")
-        analyst_result = _run_market_analyst(client, domain, keywords, scout_result)
+        async def _agent_started(name: str):
+            _check_research_cancelled(job_id)
+            logger.info(f"Research agent {name} starting...")
+            if name in _RESEARCH_STEPS:
+                step, pct = _RESEARCH_STEPS[name]
+                await _update({"current_step": step, "status": "running", "progress_pct": pct})
 
-        # Step 4: Idea Generator Agent
-        _check_research_cancelled(job_id)
-        update_research_job(job_id, {"current_step": "idea_generator", "progress_pct": 60})
-        logger.info("Research Agent 3 (Idea Generator) starting...")
-        ideas_result = _run_idea_generator(client, domain, keywords, interests, scout_result, analyst_result)
+        async def _agent_finished(name: str, value):
+            await asyncio.to_thread(checkpoints.save, name, dump_output(value))
 
-        # Step 5: Compile Report
-        _check_research_cancelled(job_id)
-        update_research_job(job_id, {"current_step": "compiling_report", "progress_pct": 80})
-        report = _compile_report(client, domain, keywords, scout_result, analyst_result, ideas_result, topic_id, community_succeeded)
+        dag = research_agent_dag(
+            aclient, domain, keywords, interests, topic_id, asynchronous=True,
+            generate=batcher.generate if batcher else None,
+        )
+        values = await dag.arun(
+            {}, before=_agent_started, after=_agent_finished,
+            completed=restore_outputs(saved, _RESEARCH_AGENT_OUTPUTS),
+        )
+        report = values["report"]
 
         report_dict = report.model_dump()
         report_dict["user_id"] = user_id
-        saved = save_research_report(report_dict)
+        saved = await asyncio.to_thread(save_research_report, report_dict)
         report_id = saved.get("data", {}).get("id", report.id)
+        await asyncio.to_thread(_notify_report, user_id, domain, topic_id, report_id, report)
 
-        # Notify: research complete
-        send_notification(
-            user_id=user_id,
-            type="research_complete",
-            title="Research Report Ready",
-            body=f"New report for {domain} topic",
-            metadata={"topic_id": topic_id, "report_id": report_id},
-        )
-
-        # Notify: high-score ideas (threshold 75)
-        for idea in report.ideas:
-            score = getattr(idea, "opportunity_score", 0)
-            name = getattr(idea, "name", "Untitled")
-            if score >= 75:
-                send_notification(
-                    user_id=user_id,
-                    type="high_score_alert",
-                    title=f"High-Score Idea: {name[:40]}",
-                    body=f"Scored {score}/100 — tap to validate",
-                    metadata={
-                        "topic_id": topic_id,
-                        "report_id": report_id,
-                        "idea_name": name,
-                        "score": score,
-                    },
-                )
-
-        update_research_job(job_id, {
+        await _update({
             "status": "completed",
             "current_step": "done",
             "progress_pct": 100,
@@ -165,9 +192,13 @@ def run_research_pipeline(
         logger.info(f"Research pipeline completed. Report {report_id} with {len(report.ideas)} ideas.")
         return report
 
+    except asyncio.CancelledError:
+        # The server is shutting down: keep the checkpoints so the job can resume
+        interrupted = True
+        raise
     except _ResearchCancelled:
         logger.info(f"Research pipeline cancelled for job {job_id}")
-        update_research_job(job_id, {
+        await _update({
             "status": "cancelled",
             "completed_at": datetime.now(timezone.utc).isoformat(),
         })
@@ -178,7 +209,7 @@ def run_research_pipeline(
         )
     except Exception as e:
         logger.error(f"Research pipeline failed: {e}", exc_info=True)
-        update_research_job(job_id, {
+        await _update({
             "status": "failed",
             "error": str(e),
             "completed_at": datetime.now(timezone.utc).isoformat(),
@@ -186,29 +217,170 @@ def run_research_pipeline(
         raise
     finally:
         research_cancel_events.pop(job_id, None)
+        heartbeat.cancel()
+        if not interrupted:
+            await asyncio.to_thread(checkpoints.finish)
+
+
+async def _resume_research_job(job_id: str, params: dict) -> None:
+    """Restart an orphaned research job from its checkpoints, as a background task."""
+    job = await asyncio.to_thread(get_research_job, job_id)
+    if job and job.get("status") not in ("pending", "running"):
+        await asyncio.to_thread(JobCheckpoints("research", job_id).finish)  # cancelled meanwhile
+        return
+
+    async def _run():
+        try:
+            # Resumed as it was started: batch jobs were scheduled runs
+            with llm_priority(Priority.SCHEDULED if params.get("batch") else Priority.INTERACTIVE):
+                await run_research_pipeline_async(
+                    params["domain"], params.get("keywords", []), params.get("interests", []),
+                    params.get("topic_id", ""), params.get("user_id", ""),
+                    batcher=get_gemini_batcher() if params.get("batch") else None,
+                    resume_job_id=job_id,
+                )
+        except Exception as e:
+            logger.error(f"Resumed research job {job_id} failed: {e}")
+
+    task = asyncio.create_task(_run())
+    _resumed_tasks.add(task)
+    task.add_done_callback(_resumed_tasks.discard)
+
+
+register_resumer(
+    "research", _resume_research_job,
+    abandon=lambda job_id, error: update_research_job(job_id, {
+        "status": "failed", "error": error, "completed_at": datetime.now(timezone.utc).isoformat(),
+    }),
+)
+
+
+def _notify_report(user_id: str, domain: str, topic_id: str, report_id: str, report: ResearchReport) -> None:
+    # Notify: research complete
+    send_notification(
+        user_id=user_id,
+        type="research_complete",
+        title="Research Report Ready",
+        body=f"New report for {domain} topic",
+        metadata={"topic_id": topic_id, "report_id": report_id},
+    )
+
+    # Notify: high-score ideas (threshold 75)
+    for idea in report.ideas:
+        score = getattr(idea, "opportunity_score", 0)
+        name = getattr(idea, "name", "Untitled")
+        if score >= 75:
+            send_notification(
+                user_id=user_id,
+                type="high_score_alert",
+                title=f"High-Score Idea: {name[:40]}",
+                body=f"Scored {score}/100 — tap to validate",
+                metadata={
+                    "topic_id": topic_id,
+                    "report_id": report_id,
+                    "idea_name": name,
+                    "score": score,
+                },
+            )
+
+
+def research_agent_dag(
+    client,
+    domain: str,
+    keywords: list[str],
+    interests: list[str],
+    topic_id: str = "",
+    asynchronous: bool = False,
+    generate=None,
+) -> AgentDAG:
+    """The research agents as a graph; every input is bound, so it starts with no values.
+
+    With *asynchronous*, *client* is ``client.aio`` and the agents are
+    coroutines for ``AgentDAG.start_async`` / ``arun``; *generate*
+    optionally replaces their ``generate_content`` (see ``AgentCall.arun``).
+    """
+    category = _DOMAIN_TO_CATEGORY.get(domain, "mobile_app")
+    if asynchronous:
+        run = lambda call: call.arun(client, generate=generate)  # noqa: E731
+        scrape = lambda: asyncio.to_thread(_scrape_community, category, keywords)  # noqa: E731
+    else:
+        run = lambda call: call.run(client)  # noqa: E731
+        scrape = lambda: _scrape_community(category, keywords)  # noqa: E731
+
+    dag = AgentDAG()
+    dag.add("community", scrape)
+    dag.add("funding_scan", lambda: run(_funding_scan_call(domain, keywords)))
+    dag.add(
+        "trend_scout",
+        lambda community: run(_trend_scout_call(domain, keywords, interests, community[0])),
+        inputs=("community",),
+    )
+    dag.add(
+        "market_analyst",
+        lambda trend_scout, funding_scan: run(_market_analyst_call(domain, keywords, trend_scout, funding_scan)),
+        inputs=("trend_scout", "funding_scan"),
+    )
+    dag.add(
+        "idea_generator",
+        lambda trend_scout, market_analyst: run(_idea_generator_call(
+            domain, keywords, interests, trend_scout, market_analyst)),
+        inputs=("trend_scout", "market_analyst"),
+    )
+    dag.add(
+        "report",
+        lambda community, trend_scout, market_analyst, idea_generator: run(_compile_report_call(
+            domain, keywords, trend_scout, market_analyst, idea_generator, topic_id, community[1])),
+        inputs=("community", "trend_scout", "market_analyst", "idea_generator"),
+    )
+    return dag
+
+
+def _scrape_community(category: str, keywords: list[str]) -> tuple[str, bool]:
+    """Community posts for the keywords as prompt JSON, and whether any were found."""
+    try:
+        scraper = CommunityScraperService(category)
+        community_result = scraper.scrape_all(
+            competitor_names=[],
+            idea_keywords=" ".join(keywords),
+        )
+        logger.info(f"Research community scraping: {community_result.total_posts} posts")
+        return "\n".join(community_result.to_prompt_lines()), community_result.total_posts > 0
+    except Exception as e:
+        logger.warning(f"Community scraping failed (continuing): {e}")
+        return "", False
 
 
-def _run_trend_scout(
-    client: genai.Client,
+def _trend_scout_call(
     domain: str,
     keywords: list[str],
     interests: list[str],
     community_data: str = "",
-) -> TrendScoutOutput:
+) -> AgentCall[TrendScoutOutput]:
     """Agent 1: Discovers trending topics, pain points, and rising categories."""
     keywords_str = ", ".join(keywords) if keywords else "general technology"
     interests_str = ", ".join(interests) if interests else "no specific focus"
 
+    prompt = fit_prompt(
+        "trend_scout",
+        lambda community: _trend_scout_prompt(domain, keywords_str, interests_str, community),
+        community=Evidence(community_data),
+    )
+
+    return AgentCall("trend_scout", prompt, TrendScoutOutput, temperature=0.3,
+                     grounded_subject=" ".join([domain, *keywords, *interests]))
+
+
+def _trend_scout_prompt(domain: str, keywords_str: str, interests_str: str, community_data: str) -> str:
     community_section = ""
     if community_data:
         community_section = f"""
 ── SCRAPED COMMUNITY DATA ──
-Real posts scraped from Reddit, HackerNews, Twitter, Product Hunt:
+Real posts scraped from Reddit, HackerNews, Twitter, Product Hunt, one per line as [source ▲score] text:
 {community_data}
 Use these as PRIMARY evidence. Supplement with Google Search.
 """
 
-    prompt = f"""You are an expert Trend Scout researching the "{domain}" space.
+    return f"""You are an expert Trend Scout researching the "{domain}" space.
 
 Keywords to focus on: {keywords_str}
 Interests/focus areas: {interests_str}
@@ -254,101 +426,128 @@ Use Google Search to actively research ALL of the following sources:
 
 Return structured findings as JSON."""
 
-    response = client.models.generate_content(
-        model="gemini-3-flash-preview",
-        contents=prompt,
-        config=types.GenerateContentConfig(
-            temperature=0.3,
-            response_mime_type="application/json",
-            response_schema=TrendScoutOutput,
-            tools=[types.Tool(google_search=types.GoogleSearch())],
-        ),
-    )
-    return TrendScoutOutput.model_validate_json(response.text)
-
 
-def _run_market_analyst(
-    client: genai.Client,
+def _funding_scan_call(
     domain: str,
     keywords: list[str],
-    scout_result: TrendScoutOutput,
-) -> MarketAnalystOutput:
-    """Agent 2: Validates trends with funding data and market evidence."""
+) -> AgentCall[FundingScanOutput]:
+    """Funding rounds and market sizes for the domain; independent of the Trend Scout."""
     keywords_str = ", ".join(keywords) if keywords else "general"
 
-    prompt = f"""You are a Market Analyst validating trends in the "{domain}" space.
+    prompt = f"""You are a Market Analyst collecting market evidence for the "{domain}" space.
 Keywords: {keywords_str}
 
-The Trend Scout found these signals:
-- Trending topics: {json.dumps(scout_result.trending_topics)}
-- Pain points: {json.dumps(scout_result.pain_points)}
-- Rising categories: {json.dumps(scout_result.rising_categories)}
-- Raw signals: {json.dumps(scout_result.raw_signals)}
-
-Use Google Search to validate and enrich these findings:
+Use Google Search to find:
 
 1. FUNDING DATA — Search Crunchbase, TechCrunch for:
-   - Recent funding rounds in these trending areas (2024-2026)
+   - Recent funding rounds in this space and these keywords (2024-2026)
    - YC batch companies in these niches
    - Notable VC investments signaling market validation
 
-2. MARKET SIZE — For each promising trend, search for:
-   - Market size data and growth projections
+2. MARKET SIZE — Search for:
+   - Market size data and growth projections for the main niches
    - Industry reports with TAM/SAM figures
 
-3. COMPETITION — For each trend, assess:
+Cite the source and year for every figure.
+
+Return structured findings as JSON."""
+
+    return AgentCall("funding_scan", prompt, FundingScanOutput, temperature=0.2,
+                     grounded_subject=" ".join([domain, *keywords]))
+
+
+def _market_analyst_call(
+    domain: str,
+    keywords: list[str],
+    scout_result: TrendScoutOutput,
+    funding_result: FundingScanOutput,
+) -> AgentCall[TrendValidationOutput]:
+    """Agent 2: Validates trends with funding data and market evidence."""
+    keywords_str = ", ".join(keywords) if keywords else "general"
+
+    prompt = fit_prompt("market_analyst", lambda topics, pains, rising, raw, funding, sizes: f"""You are a Market Analyst validating trends in the "{domain}" space.
+Keywords: {keywords_str}
+
+The Trend Scout found these signals:
+- Trending topics:
+{topics}
+- Pain points:
+{pains}
+- Rising categories:
+{rising}
+- Raw signals:
+{raw}
+
+Market evidence already gathered for this space:
+- Funding signals:
+{funding}
+- Market sizes:
+{sizes}
+
+Use this evidence, and Google Search where a trend needs more, to validate and enrich the findings:
+
+1. FUNDING & MARKET SIZE — Which trends are backed by the funding and market size evidence above?
+
+2. COMPETITION — For each trend, assess:
    - How many funded startups exist?
    - Are incumbents strong or weak?
    - Where are the gaps?
 
-4. DEMAND VALIDATION — Cross-reference trends with:
+3. DEMAND VALIDATION — Cross-reference trends with:
    - Google Trends data
    - App store download trends
    - G2/Capterra category growth
 
 Validate which trends are REAL (backed by evidence) vs NOISE (speculation).
 
-Return structured analysis as JSON."""
+Return structured analysis as JSON.""",
+        topics=Evidence(bullets(scout_result.trending_topics), priority=0),
+        funding=Evidence(bullets(funding_result.funding_signals), priority=0),
+        sizes=Evidence(bullets(funding_result.market_sizes), priority=0),
+        pains=Evidence(bullets(scout_result.pain_points), priority=1),
+        rising=Evidence(bullets(scout_result.rising_categories), priority=1),
+        raw=Evidence(bullets(scout_result.raw_signals), priority=2),
+    )
 
-    response = client.models.generate_content(
-        model="gemini-3-flash-preview",
-        contents=prompt,
-        config=types.GenerateContentConfig(
-            temperature=0.2,
-            response_mime_type="application/json",
-            response_schema=MarketAnalystOutput,
-            tools=[types.Tool(google_search=types.GoogleSearch())],
-        ),
+    return AgentCall(
+        "market_analyst", prompt, TrendValidationOutput, temperature=0.2,
+        grounded_subject=" ".join([domain, *keywords]),
+        finish=lambda validation: MarketAnalystOutput(
+            funding_signals=funding_result.funding_signals, **validation.model_dump()),
     )
-    return MarketAnalystOutput.model_validate_json(response.text)
 
 
-def _run_idea_generator(
-    client: genai.Client,
+def _idea_generator_call(
     domain: str,
     keywords: list[str],
     interests: list[str],
     scout_result: TrendScoutOutput,
     analyst_result: MarketAnalystOutput,
-) -> IdeaGeneratorOutput:
+) -> AgentCall[IdeaGeneratorOutput]:
     """Agent 3: Generates 5-10 concrete business ideas from validated trends."""
     keywords_str = ", ".join(keywords) if keywords else "general"
     interests_str = ", ".join(interests) if interests else "no specific focus"
 
-    prompt = f"""You are a Startup Idea Generator creating actionable business ideas in the "{domain}" space.
+    prompt = fit_prompt("idea_generator", lambda topics, pains, rising, validated, funding, gaps: f"""You are a Startup Idea Generator creating actionable business ideas in the "{domain}" space.
 
 User's keywords: {keywords_str}
 User's interests: {interests_str}
 
 TREND SCOUT FINDINGS:
-- Trending topics: {json.dumps(scout_result.trending_topics)}
-- Pain points: {json.dumps(scout_result.pain_points)}
-- Rising categories: {json.dumps(scout_result.rising_categories)}
+- Trending topics:
+{topics}
+- Pain points:
+{pains}
+- Rising categories:
+{rising}
 
 MARKET ANALYST VALIDATION:
-- Validated trends: {json.dumps(analyst_result.validated_trends)}
-- Funding signals: {json.dumps(analyst_result.funding_signals)}
-- Market gaps: {json.dumps(analyst_result.market_gaps)}
+- Validated trends:
+{validated}
+- Funding signals:
+{funding}
+- Market gaps:
+{gaps}
 - Competition landscape: {analyst_result.competition_landscape}
 
 Generate 5-10 concrete business/app ideas. For EACH idea, provide:
@@ -375,23 +574,20 @@ MIX of idea types: include at least 2 pain_point, 2 rising_demand, and 1 follow_
 Order by opportunity_score descending.
 Be creative but grounded in the evidence above. No generic ideas.
 
-Return structured ideas as JSON."""
-
-    response = client.models.generate_content(
-        model="gemini-3-flash-preview",
-        contents=prompt,
-        config=types.GenerateContentConfig(
-            temperature=0.5,
-            response_mime_type="application/json",
-            response_schema=IdeaGeneratorOutput,
-            tools=[types.Tool(google_search=types.GoogleSearch())],
-        ),
+Return structured ideas as JSON.""",
+        validated=Evidence(bullets(analyst_result.validated_trends), priority=0),
+        gaps=Evidence(bullets(analyst_result.market_gaps), priority=0),
+        pains=Evidence(bullets(scout_result.pain_points), priority=1),
+        topics=Evidence(bullets(scout_result.trending_topics), priority=2),
+        funding=Evidence(bullets(analyst_result.funding_signals), priority=2),
+        rising=Evidence(bullets(scout_result.rising_categories), priority=3),
     )
-    return IdeaGeneratorOutput.model_validate_json(response.text)
+
+    return AgentCall("idea_generator", prompt, IdeaGeneratorOutput, temperature=0.5,
+                     grounded_subject=" ".join([domain, *keywords, *interests]))
 
 
-def _compile_report(
-    client: genai.Client,
+def _compile_report_call(
     domain: str,
     keywords: list[str],
     scout_result: TrendScoutOutput,
@@ -399,7 +595,7 @@ def _compile_report(
     ideas_result: IdeaGeneratorOutput,
     topic_id: str,
     community_succeeded: bool = False,
-) -> ResearchReport:
+) -> AgentCall[ReportSummaryOutput]:
     """Compile a research report with executive summary and market overview."""
     prompt = f"""Write a concise research report summary for the "{domain}" space (keywords: {", ".join(keywords)}).
 
@@ -416,27 +612,19 @@ Return JSON with:
 - "executive_summary": 3-4 sentences summarizing the key opportunity landscape
 - "market_overview": 3-4 sentences on macro trends, funding environment, and competitive dynamics"""
 
-    response = client.models.generate_content(
-        model="gemini-3-flash-preview",
-        contents=prompt,
-        config=types.GenerateContentConfig(
-            temperature=0.3,
-            response_mime_type="application/json",
-            response_schema=ReportSummaryOutput,
-        ),
-    )
-    summary_data = ReportSummaryOutput.model_validate_json(response.text)
-
     data_sources = ["Google Search Grounding", "Gemini AI"]
     if community_succeeded:
         data_sources.extend(["Reddit", "HackerNews", "Twitter/X", "Product Hunt"])
 
-    return ResearchReport(
-        id=str(uuid.uuid4()),
-        topic_id=topic_id,
-        executive_summary=summary_data.executive_summary,
-        market_overview=summary_data.market_overview,
-        ideas=ideas_result.ideas,
-        data_sources=data_sources,
-        generated_at=datetime.now(timezone.utc),
+    return AgentCall(
+        "report_summary", prompt, ReportSummaryOutput, temperature=0.3,
+        finish=lambda summary_data: ResearchReport(
+            id=str(uuid.uuid4()),
+            topic_id=topic_id,
+            executive_summary=summary_data.executive_summary,
+            market_overview=summary_data.market_overview,
+            ideas=ideas_result.ideas,
+            data_sources=data_sources,
+            generated_at=datetime.now(timezone.utc),
+        ),
     )
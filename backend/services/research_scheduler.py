@@ -13,16 +13,29 @@ import asyncio
 import logging
 import os
 from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from zoneinfo import ZoneInfo
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 
 from services.research_db import list_research_topics, get_research_topic
-from services.research_pipeline import run_research_pipeline
+from services.research_pipeline import run_research_pipeline_async
+from services.gemini_batch import get_gemini_batcher
+from services.llm_scheduler import Priority, llm_priority
 from services.db import send_notification
+from services.niche_snapshots import (
+    refresh_niche_snapshots, NICHE_SNAPSHOTS_ENABLED, NICHE_SNAPSHOT_REFRESH_HOURS,
+)
+from services.scoring import rescore_if_weights_changed, SCORING_RESCORE_ON_CHANGE
+from services.job_checkpoints import resume_orphaned_jobs, JOB_CHECKPOINTS_ENABLED, JOB_RESUME_CHECK_SECONDS
 
 _executor = ThreadPoolExecutor(max_workers=2)
 
+# Scheduled runs (in-process or /cron-trigger) send agent requests as Gemini
+# batch jobs: cheaper and outside the online rate limits, but slower.
+RESEARCH_BATCH_MODE = os.getenv("RESEARCH_BATCH_MODE", "true").lower() == "true"
+
 logger = logging.getLogger(__name__)
 
 _scheduler: AsyncIOScheduler | None = None
@@ -53,6 +66,12 @@ def start_scheduler() -> None:
     for topic in topics:
         if topic.get("is_active") and topic.get("schedule_cron"):
             _add_topic_job(topic)
+    if NICHE_SNAPSHOTS_ENABLED:
+        _add_niche_snapshot_job()
+    if SCORING_RESCORE_ON_CHANGE:
+        _add_rescore_job()
+    if JOB_CHECKPOINTS_ENABLED:
+        _add_resume_job()
     scheduler.start()
     logger.info(f"Research scheduler started with {len(scheduler.get_jobs())} jobs.")
 
@@ -168,16 +187,76 @@ async def _execute_research_job(topic_id: str) -> None:
         body=f"{topic.get('domain', 'general')} topic research starting now",
         metadata={"topic_id": topic_id},
     )
-    loop = asyncio.get_running_loop()
     try:
-        await loop.run_in_executor(
-            _executor,
-            lambda: run_research_pipeline(
+        with llm_priority(Priority.SCHEDULED):
+            await run_research_pipeline_async(
                 domain=topic.get("domain", "general"),
                 keywords=topic.get("keywords", []),
                 interests=topic.get("interests", []),
                 topic_id=topic_id,
-            ),
-        )
+                batcher=get_gemini_batcher() if RESEARCH_BATCH_MODE else None,
+            )
     except Exception as e:
         logger.error(f"Scheduled research job failed for topic {topic_id}: {e}")
+
+
+def _add_niche_snapshot_job() -> None:
+    """Keep niche snapshots warm; first run shortly after startup."""
+    scheduler = get_scheduler()
+    scheduler.add_job(
+        _execute_niche_snapshot_job,
+        trigger=IntervalTrigger(hours=NICHE_SNAPSHOT_REFRESH_HOURS, timezone="UTC"),
+        id="niche_snapshots",
+        next_run_time=datetime.now(timezone.utc) + timedelta(minutes=5),
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True,
+        misfire_grace_time=3600,
+    )
+
+
+async def _execute_niche_snapshot_job() -> None:
+    loop = asyncio.get_running_loop()
+    try:
+        await loop.run_in_executor(_executor, refresh_niche_snapshots)
+    except Exception as e:
+        logger.error(f"Niche snapshot refresh failed: {e}")
+
+
+def _add_rescore_job() -> None:
+    """Re-score validation history once, shortly after startup, if the score weights changed."""
+    get_scheduler().add_job(
+        _execute_rescore_job,
+        trigger="date",
+        run_date=datetime.now(timezone.utc) + timedelta(minutes=1),
+        id="rescore_validations",
+        replace_existing=True,
+        misfire_grace_time=3600,
+    )
+
+
+async def _execute_rescore_job() -> None:
+    loop = asyncio.get_running_loop()
+    try:
+        await loop.run_in_executor(_executor, rescore_if_weights_changed)
+    except Exception as e:
+        logger.error(f"Validation re-scoring failed: {e}")
+
+
+def _add_resume_job() -> None:
+    """Look for jobs orphaned by a dead process and resume them from their checkpoints."""
+    get_scheduler().add_job(
+        _execute_resume_job,
+        trigger=IntervalTrigger(seconds=JOB_RESUME_CHECK_SECONDS, timezone="UTC"),
+        id="resume_orphaned_jobs",
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True,
+    )
+
+
+async def _execute_resume_job() -> None:
+    try:
+        await resume_orphaned_jobs()
+    except Exception as e:
+        logger.error(f"Resuming orphaned jobs failed: {e}")
@@ -0,0 +1,328 @@
+"""Columnar archive of every scraped review and community post.
+
+Each scraped batch is appended to a Parquet dataset partitioned by scrape
+date and source (hive layout: ``date=2026-03-20/source=android/…``), so
+pipelines can pull historical evidence without re-scraping and offline
+analysis can read the files directly — no API process needed:
+
+    python -m services.review_archive ratings --source android
+    python -m services.review_archive volume --kind post --since 2026-03-01
+    python -m services.review_archive terms --kind review --limit 30
+
+Reads go through ``pyarrow.dataset`` with a memory-mapped local filesystem,
+partition filters and column projection, so an analytics query only touches
+the columns and partitions it needs.
+
+Writes happen on a single background thread and never raise into the
+caller; a failed archive write is logged and the scrape result is returned
+as usual.
+"""
+
+import os
+import json
+import uuid
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Optional, Union
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+from pyarrow.fs import LocalFileSystem
+
+from services.review_batch import ReviewBatch
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# Configuration via env vars
+# ---------------------------------------------------------------------------
+REVIEW_ARCHIVE_ENABLED = os.getenv("REVIEW_ARCHIVE_ENABLED", "true").lower() == "true"
+REVIEW_ARCHIVE_DIR = os.getenv("REVIEW_ARCHIVE_DIR", os.path.join("data", "review_archive"))
+
+_SCHEMA = pa.schema([
+    ("kind", pa.string()),          # review | post
+    ("id", pa.string()),
+    ("app_id", pa.string()),        # store app ID for reviews, "" for posts
+    ("title", pa.string()),
+    ("content", pa.string()),
+    ("score", pa.int32()),          # star rating (reviews) or upvotes (posts)
+    ("locale", pa.string()),
+    ("author", pa.string()),
+    ("url", pa.string()),
+    ("posted_at", pa.string()),
+    ("scraped_at", pa.timestamp("us", tz="UTC")),
+    ("date", pa.string()),          # partition: scrape date YYYY-MM-DD
+    ("source", pa.string()),        # partition: android | ios | reddit | hackernews | ...
+])
+
+_PARTITIONING = ds.partitioning(
+    pa.schema([("date", pa.string()), ("source", pa.string())]), flavor="hive",
+)
+
+_STOPWORDS = sorted(set(
+    "the and for you with this that was are but not have has had app apps its it's just can "
+    "all get got would could will one use using used very really from they them their there "
+    "what when which your about more some like also than then out been being were only even "
+    "after again because into time does did don't doesn't can't it’s i'm i've too any much".split()
+))
+
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="review-archive")
+
+
+# ---------------------------------------------------------------------------
+# Writes
+# ---------------------------------------------------------------------------
+
+def _to_table(kind: str, rows: List[Dict[str, Any]], now: datetime) -> pa.Table:
+    def col(key: str, default: Any = "") -> list:
+        return [r.get(key, default) if r.get(key) is not None else default for r in rows]
+
+    scores = [r.get("score") for r in rows]
+    return pa.table({
+        "kind": [kind] * len(rows),
+        "id": [str(v) for v in col("id")],
+        "app_id": [str(v) for v in col("app_id")],
+        "title": col("title"),
+        "content": col("content"),
+        "score": pa.array([int(s) if s is not None else None for s in scores], type=pa.int32()),
+        "locale": col("locale"),
+        "author": col("author"),
+        "url": col("url"),
+        "posted_at": [str(v) for v in col("date")],
+        "scraped_at": pa.array([now] * len(rows), type=pa.timestamp("us", tz="UTC")),
+        "date": [now.date().isoformat()] * len(rows),
+        "source": [str(v) for v in col("source")],
+    }, schema=_SCHEMA)
+
+
+def _batch_table(batch: ReviewBatch, now: datetime) -> pa.Table:
+    """Arrow table straight from a ReviewBatch's columns (no per-row dicts)."""
+    n = len(batch)
+    blank = pa.nulls(n, pa.string()).fill_null("")
+    return pa.table({
+        "kind": ["review"] * n,
+        "id": pa.array(batch.ids, type=pa.string()),
+        "app_id": pa.array(batch.app_ids, type=pa.string()),
+        "title": blank,
+        "content": pa.array(batch.contents, type=pa.string()),
+        "score": pa.array(batch.scores, mask=batch.scores < 0).cast(pa.int32()),
+        "locale": pa.array(batch.locales, type=pa.string()),
+        "author": blank,
+        "url": blank,
+        "posted_at": pa.array(batch.dates, type=pa.string()),
+        "scraped_at": pa.array([now] * n, type=pa.timestamp("us", tz="UTC")),
+        "date": [now.date().isoformat()] * n,
+        "source": pa.array(batch.platforms, type=pa.string()),
+    }, schema=_SCHEMA)
+
+
+def _write(table: pa.Table, base_dir: str) -> None:
+    try:
+        ds.write_dataset(
+            table,
+            base_dir,
+            format="parquet",
+            partitioning=_PARTITIONING,
+            basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+        )
+    except Exception as e:
+        logger.warning(f"Review archive write failed: {e}")
+
+
+def _append(kind: str, rows: Union[ReviewBatch, List[Dict[str, Any]]], base_dir: Optional[str], wait: bool) -> None:
+    if not REVIEW_ARCHIVE_ENABLED or not len(rows):
+        return
+    try:
+        now = datetime.now(timezone.utc)
+        table = _batch_table(rows, now) if isinstance(rows, ReviewBatch) else _to_table(kind, rows, now)
+    except Exception as e:
+        logger.warning(f"Review archive could not encode {len(rows)} {kind}s: {e}")
+        return
+    future = _writer.submit(_write, table, base_dir or REVIEW_ARCHIVE_DIR)
+    if wait:
+        future.result()
+
+
+def archive_reviews(reviews: Union[ReviewBatch, List[Dict[str, Any]]], base_dir: Optional[str] = None, wait: bool = False) -> None:
+    """Append scraped store reviews to the archive (partition source = platform)."""
+    _append("review", ReviewBatch.coerce(reviews), base_dir, wait)
+
+
+def archive_posts(posts: List[Dict[str, Any]], base_dir: Optional[str] = None, wait: bool = False) -> None:
+    """Append scraped community posts (``ScrapedPost.model_dump()`` dicts) to the archive."""
+    rows = [{**p, "source": getattr(p.get("source"), "value", p.get("source") or "unknown")} for p in posts]
+    _append("post", rows, base_dir, wait)
+
+
+# ---------------------------------------------------------------------------
+# Reads
+# ---------------------------------------------------------------------------
+
+def _dataset(base_dir: Optional[str]) -> Optional[ds.Dataset]:
+    base_dir = base_dir or REVIEW_ARCHIVE_DIR
+    if not os.path.isdir(base_dir):
+        return None
+    return ds.dataset(
+        base_dir,
+        format="parquet",
+        partitioning=_PARTITIONING,
+        filesystem=LocalFileSystem(use_mmap=True),
+    )
+
+
+def _filter(
+    kind: Optional[str] = None,
+    source: Optional[str] = None,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    app_ids: Optional[List[str]] = None,
+) -> Optional[ds.Expression]:
+    parts = []
+    if kind:
+        parts.append(ds.field("kind") == kind)
+    if source:
+        parts.append(ds.field("source") == source)
+    if since:
+        parts.append(ds.field("date") >= since.isoformat())
+    if until:
+        parts.append(ds.field("date") <= until.isoformat())
+    if app_ids:
+        parts.append(ds.field("app_id").isin(app_ids))
+    expr = None
+    for p in parts:
+        expr = p if expr is None else expr & p
+    return expr
+
+
+def _read(columns: List[str], base_dir: Optional[str] = None, **filters) -> Optional[pa.Table]:
+    dataset = _dataset(base_dir)
+    if dataset is None:
+        return None
+    return dataset.to_table(columns=columns, filter=_filter(**filters))
+
+
+def rating_histogram(
+    source: Optional[str] = None,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    app_ids: Optional[List[str]] = None,
+    base_dir: Optional[str] = None,
+) -> Dict[int, int]:
+    """Count archived store reviews per star rating (1-5)."""
+    histogram = {star: 0 for star in range(1, 6)}
+    table = _read(["score"], base_dir, kind="review", source=source, since=since, until=until, app_ids=app_ids)
+    if table is None or not table.num_rows:
+        return histogram
+    for entry in pc.value_counts(pc.drop_null(table.column("score"))).to_pylist():
+        if entry["values"] in histogram:
+            histogram[entry["values"]] = entry["counts"]
+    return histogram
+
+
+def volume_over_time(
+    kind: Optional[str] = None,
+    source: Optional[str] = None,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    base_dir: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """Rows archived per scrape date and source, oldest first."""
+    table = _read(["date", "source"], base_dir, kind=kind, source=source, since=since, until=until)
+    if table is None or not table.num_rows:
+        return []
+    grouped = table.group_by(["date", "source"]).aggregate([([], "count_all")])
+    grouped = grouped.sort_by([("date", "ascending"), ("source", "ascending")])
+    return [
+        {"date": row["date"], "source": row["source"], "count": row["count_all"]}
+        for row in grouped.to_pylist()
+    ]
+
+
+def top_terms(
+    kind: Optional[str] = None,
+    source: Optional[str] = None,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    limit: int = 20,
+    base_dir: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """Most frequent non-stopword terms in archived content (tokenized in Arrow)."""
+    table = _read(["content"], base_dir, kind=kind, source=source, since=since, until=until)
+    if table is None or not table.num_rows:
+        return []
+    words = pc.list_flatten(pc.split_pattern_regex(pc.utf8_lower(table.column("content")), r"[^\p{L}\p{N}']+"))
+    words = words.filter(pc.and_(
+        pc.greater_equal(pc.utf8_length(words), 3),
+        pc.invert(pc.is_in(words, value_set=pa.array(_STOPWORDS))),
+    ))
+    if not len(words):
+        return []
+    counts = pc.value_counts(words)
+    ranked = pa.table({"term": counts.field("values"), "count": counts.field("counts")})
+    ranked = ranked.sort_by([("count", "descending"), ("term", "ascending")]).slice(0, limit)
+    return ranked.to_pylist()
+
+
+def load_archived_reviews(
+    app_ids: List[str],
+    since: Optional[date] = None,
+    limit: int = 500,
+    base_dir: Optional[str] = None,
+) -> ReviewBatch:
+    """Return archived reviews for *app_ids* as a ReviewBatch, newest scrape first."""
+    if not app_ids:
+        return ReviewBatch()
+    table = _read(
+        ["id", "app_id", "content", "score", "posted_at", "source", "locale", "scraped_at"],
+        base_dir, kind="review", since=since, app_ids=[str(a) for a in app_ids],
+    )
+    if table is None or not table.num_rows:
+        return ReviewBatch()
+    ordered = table.sort_by([("scraped_at", "descending")])
+    cols = {name: ordered.column(name).to_pylist()
+            for name in ("id", "app_id", "content", "score", "posted_at", "source", "locale")}
+    keep, seen = [], set()
+    for i, key in enumerate(zip(cols["source"], cols["id"])):
+        if key in seen:
+            continue
+        seen.add(key)
+        keep.append(i)
+        if len(keep) >= limit:
+            break
+    batch = ReviewBatch(
+        ids=cols["id"], contents=cols["content"], scores=cols["score"], dates=cols["posted_at"],
+        app_ids=cols["app_id"], platforms=cols["source"], locales=cols["locale"],
+    )
+    return batch.take(keep)
+
+
+# ---------------------------------------------------------------------------
+# Offline CLI
+# ---------------------------------------------------------------------------
+
+def _main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Query the scraped review/post archive.")
+    parser.add_argument("query", choices=["ratings", "volume", "terms"])
+    parser.add_argument("--kind", choices=["review", "post"])
+    parser.add_argument("--source")
+    parser.add_argument("--since", type=date.fromisoformat)
+    parser.add_argument("--until", type=date.fromisoformat)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--dir", default=None, help=f"Archive directory (default: {REVIEW_ARCHIVE_DIR})")
+    args = parser.parse_args(argv)
+
+    if args.query == "ratings":
+        out: Any = rating_histogram(args.source, args.since, args.until, base_dir=args.dir)
+    elif args.query == "volume":
+        out = volume_over_time(args.kind, args.source, args.since, args.until, base_dir=args.dir)
+    else:
+        out = top_terms(args.kind, args.source, args.since, args.until, args.limit, base_dir=args.dir)
+    print(json.dumps(out, indent=2))
+
+
+if __name__ == "__main__":
+    _main()
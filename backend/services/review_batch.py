@@ -0,0 +1,252 @@
+"""Columnar in-memory representation of scraped store reviews.
+
+Reviews used to travel from the scrapers to the prompt builders as lists of
+small dicts that were copied, sliced and rebuilt several times per job.
+``ReviewBatch`` keeps the same data as parallel columns instead:
+
+- ``ids``, ``contents``, ``dates`` — object arrays referencing the original
+  strings (no copies)
+- ``scores`` — a compact int16 array (-1 = unknown)
+- ``app_ids``, ``platforms``, ``locales``, ``langs`` — categorical columns:
+  small integer codes plus one interned string per distinct value
+
+Filtering, slicing and sampling are numpy index operations on the columns,
+and ``to_prompt_lines()`` encodes straight into the researcher prompt's
+compact one-review-per-line format without materializing intermediate dicts.
+"""
+
+import sys
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+
+from services.prompt_budget import compact_line
+
+_MISSING_SCORE = -1
+
+Index = Union[slice, Sequence[int], np.ndarray]
+
+
+class _Categorical:
+    """Small-cardinality string column stored as uint16 codes + interned names."""
+    __slots__ = ("codes", "names")
+
+    def __init__(self, codes: np.ndarray, names: List[str]):
+        self.codes = codes
+        self.names = names
+
+    @classmethod
+    def from_values(cls, values: Iterable[Any], n: int) -> "_Categorical":
+        lookup: Dict[str, int] = {}
+        names: List[str] = []
+        codes = np.empty(n, dtype=np.uint16)
+        for i, v in enumerate(values):
+            v = "" if v is None else str(v)
+            code = lookup.get(v)
+            if code is None:
+                code = lookup[v] = len(names)
+                names.append(sys.intern(v))
+            codes[i] = code
+        return cls(codes, names)
+
+    def take(self, idx: Index) -> "_Categorical":
+        return _Categorical(self.codes[idx], self.names)
+
+    def values(self) -> np.ndarray:
+        return np.array(self.names, dtype=object)[self.codes] if self.names else np.empty(0, dtype=object)
+
+    @classmethod
+    def concat(cls, parts: List["_Categorical"]) -> "_Categorical":
+        return cls.from_values((v for p in parts for v in p.values()), sum(len(p.codes) for p in parts))
+
+
+class ReviewBatch:
+    """Parallel-array batch of store reviews. Immutable: operations return new batches."""
+    __slots__ = ("ids", "contents", "scores", "dates", "_app_ids", "_platforms", "_locales", "_langs")
+
+    def __init__(
+        self,
+        ids: Sequence[str] = (),
+        contents: Sequence[str] = (),
+        scores: Optional[Sequence[Any]] = None,
+        dates: Optional[Sequence[str]] = None,
+        app_ids: Optional[Iterable[str]] = None,
+        platforms: Optional[Iterable[str]] = None,
+        locales: Optional[Iterable[str]] = None,
+        langs: Optional[Iterable[str]] = None,
+    ):
+        n = len(ids)
+        self.ids = _object_array(ids)
+        self.contents = _object_array(contents)
+        self.scores = np.fromiter(
+            (_MISSING_SCORE if s is None else int(s) for s in scores), dtype=np.int16, count=n,
+        ) if scores is not None else np.full(n, _MISSING_SCORE, dtype=np.int16)
+        self.dates = _object_array(dates) if dates is not None else np.full(n, "", dtype=object)
+        self._app_ids = _Categorical.from_values(app_ids if app_ids is not None else [""] * n, n)
+        self._platforms = _Categorical.from_values(platforms if platforms is not None else [""] * n, n)
+        self._locales = _Categorical.from_values(locales if locales is not None else [""] * n, n)
+        self._langs = _Categorical.from_values(langs if langs is not None else [""] * n, n)
+        if not (len(self.contents) == len(self.scores) == len(self.dates) == n):
+            raise ValueError("ReviewBatch columns must all have the same length")
+
+    # ── Construction ────────────────────────────────────────────────
+
+    @classmethod
+    def from_dicts(cls, rows: List[Dict[str, Any]], locales: Optional[Sequence[str]] = None) -> "ReviewBatch":
+        """Build a batch from scraper-shaped review dicts.
+
+        *locales*, when given, tags each row instead of reading its ``locale`` key.
+        """
+        return cls(
+            ids=[str(r.get("id", "")) for r in rows],
+            contents=[r.get("content") or "" for r in rows],
+            scores=[r.get("score") for r in rows],
+            dates=[str(r.get("date") or "") for r in rows],
+            app_ids=(r.get("app_id") for r in rows),
+            platforms=(r.get("platform") for r in rows),
+            locales=locales if locales is not None else (r.get("locale") for r in rows),
+            langs=(r.get("lang") for r in rows),
+        )
+
+    @classmethod
+    def coerce(cls, reviews: Union["ReviewBatch", List[Dict[str, Any]], None]) -> "ReviewBatch":
+        """Accept either a batch or a list of review dicts."""
+        if isinstance(reviews, cls):
+            return reviews
+        return cls.from_dicts(list(reviews or []))
+
+    @classmethod
+    def concat(cls, batches: Sequence["ReviewBatch"]) -> "ReviewBatch":
+        batches = [b for b in batches if len(b)]
+        if not batches:
+            return cls()
+        if len(batches) == 1:
+            return batches[0]
+        out = cls._blank()
+        out.ids = np.concatenate([b.ids for b in batches])
+        out.contents = np.concatenate([b.contents for b in batches])
+        out.scores = np.concatenate([b.scores for b in batches])
+        out.dates = np.concatenate([b.dates for b in batches])
+        out._app_ids = _Categorical.concat([b._app_ids for b in batches])
+        out._platforms = _Categorical.concat([b._platforms for b in batches])
+        out._locales = _Categorical.concat([b._locales for b in batches])
+        out._langs = _Categorical.concat([b._langs for b in batches])
+        return out
+
+    @classmethod
+    def _blank(cls) -> "ReviewBatch":
+        return cls.__new__(cls)
+
+    # ── Column access ───────────────────────────────────────────────
+
+    @property
+    def app_ids(self) -> np.ndarray:
+        return self._app_ids.values()
+
+    @property
+    def platforms(self) -> np.ndarray:
+        return self._platforms.values()
+
+    @property
+    def locales(self) -> np.ndarray:
+        return self._locales.values()
+
+    @property
+    def langs(self) -> np.ndarray:
+        return self._langs.values()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __repr__(self) -> str:
+        return f"ReviewBatch({len(self)} reviews, platforms={self._platforms.names})"
+
+    # ── Vectorized selection ────────────────────────────────────────
+
+    def take(self, idx: Index) -> "ReviewBatch":
+        """Rows at *idx* (slice, index array or boolean mask), in that order."""
+        out = self._blank()
+        out.ids = self.ids[idx]
+        out.contents = self.contents[idx]
+        out.scores = self.scores[idx]
+        out.dates = self.dates[idx]
+        out._app_ids = self._app_ids.take(idx)
+        out._platforms = self._platforms.take(idx)
+        out._locales = self._locales.take(idx)
+        out._langs = self._langs.take(idx)
+        return out
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            return self.row(int(key))
+        return self.take(key)
+
+    def filter(self, mask: np.ndarray) -> "ReviewBatch":
+        """Rows where boolean *mask* is True."""
+        return self.take(np.asarray(mask, dtype=bool))
+
+    def sample(self, n: int, seed: int = 0, stratify_by_score: bool = False) -> "ReviewBatch":
+        """Up to *n* rows chosen without replacement, keeping original order.
+
+        Seeded so the same batch always yields the same sample (and the same
+        prompt). With *stratify_by_score*, each star rating keeps roughly
+        its share of the batch, with at least one row per rating present.
+        """
+        total = len(self)
+        if n >= total:
+            return self
+        rng = np.random.default_rng(seed)
+        if not stratify_by_score:
+            return self.take(np.sort(rng.choice(total, size=n, replace=False)))
+        values, inverse, counts = np.unique(self.scores, return_inverse=True, return_counts=True)
+        quota = np.maximum(1, np.floor(counts * n / total)).astype(np.int64)
+        while quota.sum() > n:
+            quota[np.argmax(quota)] -= 1
+        # Random rank within each score group; keep ranks below the group's quota
+        order = rng.permutation(total)
+        grouped = order[np.argsort(inverse[order], kind="stable")]
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        rank = np.empty(total, dtype=np.int64)
+        rank[grouped] = np.arange(total) - np.repeat(starts, counts)
+        return self.filter(rank < quota[inverse])
+
+    def with_columns(self, contents: Optional[Sequence[str]] = None, langs: Optional[Iterable[str]] = None) -> "ReviewBatch":
+        """Copy of the batch with *contents* and/or *langs* replaced."""
+        out = self.take(slice(None))
+        if contents is not None:
+            out.contents = _object_array(contents)
+        if langs is not None:
+            out._langs = _Categorical.from_values(langs, len(self))
+        return out
+
+    # ── Encoding ────────────────────────────────────────────────────
+
+    def to_prompt_lines(self) -> List[str]:
+        """Encode as prompt evidence, one ``4★ review text`` line per review (``?★`` = no rating)."""
+        return [
+            f"{'?' if s == _MISSING_SCORE else s}★ {compact_line(c)}"
+            for s, c in zip(self.scores.tolist(), self.contents.tolist())
+        ]
+
+    def row(self, i: int) -> Dict[str, Any]:
+        score = int(self.scores[i])
+        return {
+            "id": self.ids[i],
+            "app_id": self._app_ids.names[self._app_ids.codes[i]],
+            "content": self.contents[i],
+            "score": None if score == _MISSING_SCORE else score,
+            "date": self.dates[i],
+            "platform": self._platforms.names[self._platforms.codes[i]],
+            "locale": self._locales.names[self._locales.codes[i]],
+            "lang": self._langs.names[self._langs.codes[i]],
+        }
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """Scraper-shaped dicts (for APIs and code that still expects them)."""
+        return [self.row(i) for i in range(len(self))]
+
+
+def _object_array(values: Sequence[Any]) -> np.ndarray:
+    arr = np.empty(len(values), dtype=object)
+    arr[:] = list(values) if not isinstance(values, np.ndarray) else values
+    return arr
@@ -0,0 +1,306 @@
+"""Review preprocessing stage.
+
+Sits between the store scrapers and the prompt builders. Normalizes review
+text, drops empty / emoji-only / too-short reviews, filters by detected
+language, scores templated and promotional spam heuristically, and removes
+exact and near duplicates.
+
+All per-review features are computed column-wise: the batch is joined into a
+single string once, regexes run over that string, and counts are folded back
+to reviews with numpy (``bincount`` over code points and tokens) instead of
+looping over dicts in Python.
+"""
+
+import os
+import re
+import hashlib
+import logging
+from typing import Any, Dict, List, Sequence, Tuple, Union
+
+import numpy as np
+from pydantic import BaseModel
+
+from services.review_batch import ReviewBatch
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# Configuration via env vars
+# ---------------------------------------------------------------------------
+REVIEW_MIN_TOKENS = int(os.getenv("REVIEW_MIN_TOKENS", "3"))
+REVIEW_MAX_CHARS = int(os.getenv("REVIEW_MAX_CHARS", "1000"))
+REVIEW_SPAM_THRESHOLD = float(os.getenv("REVIEW_SPAM_THRESHOLD", "0.5"))
+REVIEW_NEAR_DUP_JACCARD = float(os.getenv("REVIEW_NEAR_DUP_JACCARD", "0.8"))
+# Reviews that reach the agents' prompts, sampled across competitors, locales and ratings
+REVIEW_PROMPT_SAMPLE_SIZE = int(os.getenv("REVIEW_PROMPT_SAMPLE_SIZE", "200"))
+
+# Separator between reviews in the joined column. SOH is neither whitespace
+# nor a word character (and, unlike NUL, numpy string arrays keep it), and it
+# is stripped from inputs, so it survives every regex pass below untouched.
+_SEP = "\x01"
+
+_WS_RE = re.compile(r"[^\S\x01]+")
+_URL_RE = re.compile(
+    r"(?:https?://|www\.)[^\s\x01]+|\b[^\s\x01]+\.(?:com|net|org|io|ly)\b(?:/[^\s\x01]*)?",
+    re.IGNORECASE,
+)
+_NON_WORD_RE = re.compile(r"[^\w\x01]+|_")
+_REPEAT_RE = re.compile(r"([^\s\x01])\1{4,}")
+_PROMO_RE = re.compile(
+    r"promo code|use (?:my )?code|referral|free (?:coins|gems|money|gift)|gift ?card|"
+    r"earn \$|make money|click (?:here|the link)|download now|whatsapp|telegram|"
+    r"dm me|check out my|visit my|\$\$+",
+    re.IGNORECASE,
+)
+
+# Small stopword profiles — enough to tell the common Latin-script store
+# languages apart without a model or a network call.
+_STOPWORDS: Dict[str, frozenset] = {
+    "en": frozenset("the and is it to of this that for you with but not app was are have my i".split()),
+    "es": frozenset("el la de que y es en los las por una para con muy pero no lo".split()),
+    "fr": frozenset("le la les de et est une des pour pas que je il très tres mais du".split()),
+    "de": frozenset("der die das und ist nicht ich ein eine zu mit sehr aber auch es".split()),
+    "pt": frozenset("o a de que e do da em um uma para com muito mas não nao os".split()),
+    "it": frozenset("il la di che e non un una per con molto ma sono lo gli".split()),
+}
+_LATIN_LANGS = tuple(_STOPWORDS)
+
+# Non-Latin scripts resolved by code point range: (label, lo, hi).
+_SCRIPT_RANGES: Tuple[Tuple[str, int, int], ...] = (
+    ("ru", 0x0400, 0x04FF),
+    ("ar", 0x0600, 0x06FF),
+    ("hi", 0x0900, 0x097F),
+    ("th", 0x0E00, 0x0E7F),
+    ("ja", 0x3040, 0x30FF),
+    ("zh", 0x4E00, 0x9FFF),
+    ("ko", 0xAC00, 0xD7AF),
+)
+
+_MINHASH_K = 32
+_rng = np.random.default_rng(0x5EED)
+_MINHASH_A = _rng.integers(1, 2**63, size=_MINHASH_K, dtype=np.uint64) | np.uint64(1)
+_MINHASH_B = _rng.integers(0, 2**63, size=_MINHASH_K, dtype=np.uint64)
+
+_EMOJI_RANGES: Tuple[Tuple[int, int], ...] = (
+    (0x1F000, 0x1FAFF),
+    (0x2600, 0x27BF),
+    (0xFE00, 0xFE0F),
+    (0x200D, 0x200D),
+)
+
+
+class PreprocessingStats(BaseModel):
+    """Counts reported by the preprocessing stage."""
+    input_count: int = 0
+    kept_count: int = 0
+    dropped: Dict[str, int] = {}  # reason → count
+
+    @property
+    def dropped_count(self) -> int:
+        return self.input_count - self.kept_count
+
+    def summary(self) -> str:
+        if not self.dropped_count:
+            return f"kept all {self.input_count} reviews"
+        reasons = ", ".join(f"{k}={v}" for k, v in sorted(self.dropped.items()) if v)
+        return f"kept {self.kept_count}/{self.input_count} reviews (dropped {self.dropped_count}: {reasons})"
+
+
+# ---------------------------------------------------------------------------
+# Column helpers
+# ---------------------------------------------------------------------------
+
+def _in_ranges(cp: np.ndarray, ranges) -> np.ndarray:
+    mask = np.zeros(cp.shape, dtype=bool)
+    for lo, hi in ranges:
+        mask |= (cp >= lo) & (cp <= hi)
+    return mask
+
+
+def _per_doc(mask: np.ndarray, doc: np.ndarray, n: int) -> np.ndarray:
+    """Count True entries of *mask* per document index."""
+    return np.bincount(doc[mask], minlength=n)[:n]
+
+
+def _regex_hits(pattern: re.Pattern, joined: str, sep_offsets: np.ndarray, n: int) -> np.ndarray:
+    """Count regex matches per review over the joined column."""
+    starts = np.fromiter((m.start() for m in pattern.finditer(joined)), dtype=np.int64)
+    if not starts.size:
+        return np.zeros(n, dtype=np.int64)
+    return np.bincount(np.searchsorted(sep_offsets, starts, side="right"), minlength=n)[:n]
+
+
+def _minhash(word_ids: np.ndarray, doc_idx: np.ndarray, vocab: np.ndarray, n: int) -> np.ndarray:
+    """MinHash signature (n × _MINHASH_K) per review over its token set.
+
+    Each vocabulary word is hashed once; the K permutations are cheap
+    multiply-add mixes of that base hash, reduced per review with
+    ``np.minimum.at``.
+    """
+    base = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(w.encode(), digest_size=8).digest(), "little") for w in vocab),
+        dtype=np.uint64,
+        count=len(vocab),
+    )
+    with np.errstate(over="ignore"):
+        mixed = (base[:, None] * _MINHASH_A[None, :] + _MINHASH_B[None, :]) >> np.uint64(32)
+    sig = np.full((n, _MINHASH_K), np.iinfo(np.uint64).max, dtype=np.uint64)
+    np.minimum.at(sig, doc_idx, mixed[word_ids])
+    return sig
+
+
+def _near_duplicates(sig: np.ndarray, eligible: np.ndarray, threshold: float, block: int = 256) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (has_earlier_near_dup, cluster_size) for each review.
+
+    Estimates pairwise Jaccard similarity from MinHash signatures in row
+    blocks so memory stays at ``block × n × K`` regardless of batch size.
+    Only *eligible* reviews take part; a review is a near duplicate when an
+    earlier eligible review reaches *threshold* similarity.
+    """
+    n = sig.shape[0]
+    has_earlier = np.zeros(n, dtype=bool)
+    cluster = np.ones(n, dtype=np.int64)
+    cols = np.arange(n)
+    for start in range(0, n, block):
+        rows = np.arange(start, min(start + block, n))
+        similarity = (sig[rows, None, :] == sig[None, :, :]).mean(axis=2)
+        near = (similarity >= threshold) & eligible[None, :] & eligible[rows, None] & (cols[None, :] != rows[:, None])
+        cluster[rows] += near.sum(axis=1)
+        has_earlier[rows] = (near & (cols[None, :] < rows[:, None])).any(axis=1)
+    return has_earlier, cluster
+
+
+# ---------------------------------------------------------------------------
+# Public entry point
+# ---------------------------------------------------------------------------
+
+def preprocess_reviews(
+    reviews: Union[ReviewBatch, List[Dict[str, Any]]],
+    languages: Sequence[str] = ("en",),
+    min_tokens: int = REVIEW_MIN_TOKENS,
+    max_chars: int = REVIEW_MAX_CHARS,
+    spam_threshold: float = REVIEW_SPAM_THRESHOLD,
+    near_dup_jaccard: float = REVIEW_NEAR_DUP_JACCARD,
+) -> Tuple[ReviewBatch, PreprocessingStats]:
+    """Clean a batch of scraped reviews before they reach a prompt.
+
+    Accepts a ``ReviewBatch`` (or review dicts) and returns (kept_batch,
+    stats). Kept rows carry whitespace-collapsed, length-capped content and
+    a detected ``lang``; input order is preserved. Reviews whose language
+    cannot be determined (short, no stopwords) are kept.
+    """
+    batch = ReviewBatch.coerce(reviews)
+    n = len(batch)
+    if not n:
+        return batch, PreprocessingStats()
+
+    # ── Text columns ────────────────────────────────────────────────
+    joined = _SEP.join(str(t).replace(_SEP, " ") for t in batch.contents.tolist())
+    joined = _WS_RE.sub(" ", joined)
+    cleaned = [t.strip()[:max_chars] for t in joined.split(_SEP)]
+    joined = _SEP.join(cleaned)
+
+    cp = np.frombuffer(joined.encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+    is_sep = cp == ord(_SEP)
+    sep_offsets = np.flatnonzero(is_sep)
+    cp_doc = np.cumsum(is_sep)
+    body = ~is_sep
+
+    lowered = joined.lower()
+    normalized_joined = _NON_WORD_RE.sub(" ", _URL_RE.sub(" ", lowered))
+    normalized = np.array([t.strip() for t in normalized_joined.split(_SEP)], dtype=object)
+
+    tokens = np.array(normalized_joined.replace(_SEP, f" {_SEP} ").split(), dtype=object)
+    tok_sep = tokens == _SEP
+    doc_idx = np.cumsum(tok_sep)[~tok_sep]
+    words = tokens[~tok_sep].astype(str)
+    n_tokens = np.bincount(doc_idx, minlength=n)[:n]
+
+    # ── Character classes ────────────────────────────────────────────
+    lower_cp = cp | 0x20
+    ascii_letter = body & (lower_cp >= 0x61) & (lower_cp <= 0x7A)
+    latin = ascii_letter | (body & (cp >= 0xC0) & (cp <= 0x24F) & (cp != 0xD7) & (cp != 0xF7))
+    n_latin = _per_doc(latin, cp_doc, n)
+    n_upper = _per_doc(body & (cp >= 0x41) & (cp <= 0x5A), cp_doc, n)
+    n_emoji = _per_doc(body & _in_ranges(cp, _EMOJI_RANGES), cp_doc, n)
+    script_counts = np.stack(
+        [_per_doc(body & (cp >= lo) & (cp <= hi), cp_doc, n) for _, lo, hi in _SCRIPT_RANGES], axis=1
+    )
+    n_letters = n_latin + script_counts.sum(axis=1)
+    # Chinese/Japanese are written without spaces: count ~2 characters per word.
+    cjk = [i for i, (label, _, _) in enumerate(_SCRIPT_RANGES) if label in ("zh", "ja")]
+    n_words = np.maximum(n_tokens, script_counts[:, cjk].sum(axis=1) // 2)
+
+    # ── Language detection ───────────────────────────────────────────
+    stop_hits = np.stack(
+        [np.bincount(doc_idx, weights=np.isin(words, list(_STOPWORDS[lang])), minlength=n)[:n] for lang in _LATIN_LANGS],
+        axis=1,
+    )
+    lang = np.full(n, "und", dtype=object)
+    has_stop = stop_hits.max(axis=1) > 0
+    lang[has_stop] = np.array(_LATIN_LANGS, dtype=object)[stop_hits.argmax(axis=1)[has_stop]]
+    script_best = script_counts.argmax(axis=1)
+    non_latin = script_counts.max(axis=1) > n_latin
+    lang[non_latin] = np.array([label for label, _, _ in _SCRIPT_RANGES], dtype=object)[script_best[non_latin]]
+
+    # ── Spam heuristics ──────────────────────────────────────────────
+    vocab, word_ids = np.unique(words, return_inverse=True)
+    pair_keys = np.unique(doc_idx.astype(np.int64) * max(len(vocab), 1) + word_ids)
+    n_unique = np.bincount(pair_keys // max(len(vocab), 1), minlength=n)[:n]
+
+    url_hits = _regex_hits(_URL_RE, joined, sep_offsets, n)
+    promo_hits = _regex_hits(_PROMO_RE, joined, sep_offsets, n)
+    repeat_hits = _regex_hits(_REPEAT_RE, joined, sep_offsets, n)
+
+    signatures = _minhash(word_ids, doc_idx, vocab, n)
+    near_eligible = n_tokens >= 5
+    _, cluster = _near_duplicates(signatures, near_eligible, near_dup_jaccard)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        upper_ratio = np.where(n_latin > 0, n_upper / np.maximum(n_latin, 1), 0.0)
+        unique_ratio = np.where(n_tokens > 0, n_unique / np.maximum(n_tokens, 1), 1.0)
+
+    spam_score = (
+        0.4 * (url_hits > 0)
+        + np.where(promo_hits >= 2, 0.5, np.where(promo_hits == 1, 0.35, 0.0))
+        + 0.2 * ((upper_ratio > 0.7) & (n_latin >= 12))
+        + 0.15 * (repeat_hits > 0)
+        + 0.25 * ((n_tokens >= 8) & (unique_ratio < 0.4))
+        + 0.4 * ((cluster >= 3) & (n_tokens >= 6))
+    )
+
+    # ── Decisions (first matching reason wins) ───────────────────────
+    reasons = np.full(n, "", dtype=object)
+
+    def _flag(mask: np.ndarray, reason: str) -> None:
+        reasons[mask & (reasons == "")] = reason
+
+    _flag((n_letters == 0) & (n_emoji == 0), "empty")
+    _flag((n_letters == 0) & (n_emoji > 0), "emoji_only")
+    _flag(n_words < min_tokens, "too_short")
+    allowed = set(languages) | {"und"}
+    _flag(~np.isin(lang, list(allowed)), "language")
+    _flag(spam_score >= spam_threshold, "spam")
+
+    alive = reasons == ""
+    alive_idx = np.flatnonzero(alive)
+    _, first = np.unique(normalized[alive_idx].astype(str), return_index=True)
+    exact_dup = alive.copy()
+    exact_dup[alive_idx[first]] = False
+    _flag(exact_dup, "duplicate")
+
+    alive = reasons == ""
+    has_earlier_near, _ = _near_duplicates(signatures, near_eligible & alive, near_dup_jaccard)
+    _flag(has_earlier_near, "near_duplicate")
+
+    keep = np.flatnonzero(reasons == "")
+    kept = batch.with_columns(contents=cleaned, langs=lang).take(keep)
+
+    labels, counts = np.unique(reasons[reasons != ""].astype(str), return_counts=True)
+    stats = PreprocessingStats(
+        input_count=n,
+        kept_count=len(kept),
+        dropped={str(k): int(v) for k, v in zip(labels, counts)},
+    )
+    logger.info(f"Review preprocessing: {stats.summary()}")
+    return kept, stats
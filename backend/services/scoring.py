@@ -0,0 +1,207 @@
+"""Opportunity score from the per-dimension score breakdown.
+
+The Market Strategy agent scores an idea on seven dimensions (0-100
+each); the opportunity score is their weighted sum. ``ScoringEngine``
+holds one weight set per category — ``DEFAULT_WEIGHTS`` unless
+``SCORING_WEIGHTS`` overrides it — as a matrix, and scores any number of
+breakdowns at once: the rows of each category are one matrix-vector
+product against that category's weights.
+
+Older results may lack dimensions added later (``community_demand``,
+``startup_saturation``); those are scored on the dimensions they have,
+with the weights renormalized over them.
+
+Changing the weights would leave past validations scored under the old
+ones, so ``rescore_validations`` recomputes every stored
+``opportunity_score`` from its ``score_breakdown``, page by page, and
+writes back the ones that changed, one bulk update per page.
+``rescore_if_weights_changed`` runs it once per weight version (the last
+one is kept in Supabase, so new instances don't repeat it); the scheduler
+calls it at startup.
+
+``SCORING_WEIGHTS`` is JSON mapping ``default`` or a category to partial
+weight sets, e.g. ``{"hardware": {"mvp_feasibility": 0.2, "market_gap": 0.15}}``;
+a category's set starts from the default one.
+"""
+
+import os
+import json
+import hashlib
+import logging
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# Configuration via env vars
+# ---------------------------------------------------------------------------
+SCORING_WEIGHTS = os.getenv("SCORING_WEIGHTS", "")
+SCORING_RESCORE_ON_CHANGE = os.getenv("SCORING_RESCORE_ON_CHANGE", "true").lower() == "true"
+SCORING_RESCORE_PAGE_SIZE = int(os.getenv("SCORING_RESCORE_PAGE_SIZE", "1000"))
+
+SCORE_DIMENSIONS = (
+    "pain_severity", "market_gap", "mvp_feasibility", "competition_density",
+    "monetization_potential", "community_demand", "startup_saturation",
+)
+
+DEFAULT_WEIGHTS: Dict[str, float] = {
+    "pain_severity": 0.25,
+    "market_gap": 0.20,
+    "mvp_feasibility": 0.15,
+    "competition_density": 0.15,
+    "monetization_potential": 0.10,
+    "community_demand": 0.10,
+    "startup_saturation": 0.05,
+}
+
+
+class ScoringEngine:
+    """Per-category weight sets and (bulk) weighted scoring."""
+
+    def __init__(self, weights: Optional[Mapping[str, Mapping[str, float]]] = None):
+        weights = dict(weights or {})
+        sets = {"default": self._checked("default", {**DEFAULT_WEIGHTS, **weights.pop("default", {})})}
+        for category, overrides in weights.items():
+            sets[category] = self._checked(category, {**sets["default"], **overrides})
+        self.categories: List[str] = list(sets)
+        self._index = {c: i for i, c in enumerate(self.categories)}
+        self.matrix = np.array([[sets[c][d] for d in SCORE_DIMENSIONS] for c in self.categories], dtype=np.float64)
+        canonical = json.dumps({c: sets[c] for c in sorted(sets)}, sort_keys=True)
+        self.version = hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:12]
+
+    @staticmethod
+    def _checked(name: str, weights: Dict[str, float]) -> Dict[str, float]:
+        unknown = set(weights) - set(SCORE_DIMENSIONS)
+        if unknown:
+            raise ValueError(f"Unknown score dimensions in '{name}' weights: {', '.join(sorted(unknown))}")
+        if any(w < 0 for w in weights.values()) or not any(weights.values()):
+            raise ValueError(f"'{name}' weights must be non-negative and not all zero.")
+        return {d: float(weights[d]) for d in SCORE_DIMENSIONS}
+
+    def weights(self, category: Optional[str]) -> Dict[str, float]:
+        row = self.matrix[self._index.get(category or "", 0)]
+        return dict(zip(SCORE_DIMENSIONS, row.tolist()))
+
+    @staticmethod
+    def breakdown_matrix(breakdowns: Sequence[Any]) -> np.ndarray:
+        """One row per breakdown (dict or model), NaN where a dimension is missing."""
+        matrix = np.full((len(breakdowns), len(SCORE_DIMENSIONS)), np.nan)
+        for i, breakdown in enumerate(breakdowns):
+            if hasattr(breakdown, "model_dump"):
+                breakdown = breakdown.model_dump()
+            if not isinstance(breakdown, Mapping):
+                continue
+            for j, dimension in enumerate(SCORE_DIMENSIONS):
+                value = breakdown.get(dimension)
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    matrix[i, j] = value
+        return matrix
+
+    def score_many(self, breakdowns: Sequence[Any], categories: Sequence[Optional[str]]) -> np.ndarray:
+        """Opportunity scores (0-100, rounded) of *breakdowns* under their categories' weights.
+
+        Returned as floats: NaN marks a breakdown with none of the dimensions.
+        """
+        values = self.breakdown_matrix(breakdowns)
+        present = ~np.isnan(values)
+        values = np.where(present, values, 0.0)
+        rows = np.array([self._index.get(c or "", 0) for c in categories], dtype=np.intp)
+        weighted = np.zeros(len(rows))
+        total_weight = np.zeros(len(rows))
+        for i in np.unique(rows):
+            members = rows == i
+            weighted[members] = values[members] @ self.matrix[i]
+            total_weight[members] = present[members] @ self.matrix[i]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            scores = np.where(total_weight > 0, weighted / total_weight * self.matrix[rows].sum(axis=1), np.nan)
+        # Half up, after dropping float noise so bulk and single scores round alike
+        return np.clip(np.floor(np.round(scores, 9) + 0.5), 0, 100)
+
+    def score(self, breakdown: Any, category: Optional[str] = None) -> int:
+        score = self.score_many([breakdown], [category])[0]
+        return 0 if np.isnan(score) else int(score)
+
+
+_engine: Optional[ScoringEngine] = None
+
+
+def get_scoring_engine() -> ScoringEngine:
+    global _engine
+    if _engine is None:
+        if SCORING_WEIGHTS:
+            try:
+                _engine = ScoringEngine(json.loads(SCORING_WEIGHTS))
+            except (ValueError, TypeError, AttributeError) as e:
+                logger.error(f"Invalid SCORING_WEIGHTS, using the default weights: {e}")
+        if _engine is None:
+            _engine = ScoringEngine()
+    return _engine
+
+
+def set_scoring_engine(engine: Optional[ScoringEngine]) -> None:
+    """Use *engine* (e.g. in tests); None rebuilds the configured one on next use."""
+    global _engine
+    _engine = engine
+
+
+# ---------------------------------------------------------------------------
+# Bulk re-scoring of stored validations
+# ---------------------------------------------------------------------------
+
+class RescoreReport(NamedTuple):
+    version: str
+    scanned: int
+    changed: int
+    unscorable: int
+    failed: int
+
+
+def rescore_validations(
+    engine: Optional[ScoringEngine] = None,
+    page_size: int = SCORING_RESCORE_PAGE_SIZE,
+    dry_run: bool = False,
+) -> RescoreReport:
+    """Recompute every stored opportunity score under *engine*'s weights.
+
+    Only rows whose score changes are written. The version is recorded
+    only once every write succeeded, so a partial run is retried; with
+    *dry_run*, nothing is written and the version is not recorded.
+    """
+    from services.db import iter_validation_scores, set_scoring_weights_version, update_validation_scores
+
+    engine = engine or get_scoring_engine()
+    scanned = changed = unscorable = failed = 0
+    for page in iter_validation_scores(page_size):
+        scores = engine.score_many([r.get("score_breakdown") for r in page], [r.get("category") for r in page])
+        updates = []
+        for row, score in zip(page, scores):
+            if np.isnan(score):
+                unscorable += 1
+            elif int(score) != row.get("opportunity_score"):
+                updates.append((row["id"], int(score)))
+        scanned += len(page)
+        changed += len(updates)
+        if updates and not dry_run:
+            failed += len(updates) - update_validation_scores(updates)
+    if not dry_run:
+        if failed:
+            logger.warning(f"{failed} score updates failed; weights {engine.version} not recorded, will retry.")
+        else:
+            set_scoring_weights_version(engine.version)
+    logger.info(
+        f"Re-scored {scanned} validations under weights {engine.version}: "
+        f"{changed} changed, {unscorable} without a breakdown{' (dry run)' if dry_run else ''}."
+    )
+    return RescoreReport(engine.version, scanned, changed, unscorable, failed)
+
+
+def rescore_if_weights_changed(engine: Optional[ScoringEngine] = None) -> Optional[RescoreReport]:
+    """``rescore_validations`` unless history was already re-scored under these weights."""
+    from services.db import get_scoring_weights_version
+
+    engine = engine or get_scoring_engine()
+    if get_scoring_weights_version() == engine.version:
+        return None
+    return rescore_validations(engine)
@@ -1,26 +1,91 @@
+import os
+import re
 import logging
-from typing import List, Dict, Any
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import zip_longest
+from typing import List, Dict, Any, Tuple
 from google_play_scraper import reviews, Sort
 import requests
 import json
+from services.review_archive import archive_reviews
+from services.review_batch import ReviewBatch
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+DEFAULT_LOCALES = ["en-US"]
+# Each locale multiplies the scrape fan-out on the shared host slots
+SCRAPER_MAX_LOCALES = int(os.getenv("SCRAPER_MAX_LOCALES", "5"))
+
+_LOCALE_RE = re.compile(r"^[A-Za-z]{2,3}(?:[-_][A-Za-z]{2})?$")
+
+# Default store country for bare language codes ("de" → de, "ja" → jp, ...)
+_LANG_DEFAULT_COUNTRY = {"en": "us", "ja": "jp", "ko": "kr", "zh": "cn", "pt": "br", "hi": "in", "ar": "sa"}
+
+# Per-host concurrency limits, shared by every job in the process so a
+# multi-locale fan-out can't hammer a store from many threads at once.
+_HOST_SLOTS = {
+    "play.google.com": threading.BoundedSemaphore(int(os.getenv("SCRAPER_PLAY_CONCURRENCY", "4"))),
+    "itunes.apple.com": threading.BoundedSemaphore(int(os.getenv("SCRAPER_ITUNES_CONCURRENCY", "4"))),
+}
+
+
+def host_slot(host: str) -> threading.BoundedSemaphore:
+    """Semaphore bounding concurrent requests to a store host (use as a context manager)."""
+    return _HOST_SLOTS[host]
+
+
+def parse_locale(locale: str) -> Tuple[str, str]:
+    """Split a locale like 'es-MX' or 'pt_BR' into (lang, country) store params.
+
+    A bare language ('de') maps to its most common store country.
+    """
+    parts = locale.replace("_", "-").split("-")
+    lang = parts[0].lower() or "en"
+    country = parts[1].lower() if len(parts) > 1 and parts[1] else _LANG_DEFAULT_COUNTRY.get(lang, lang)
+    return lang, country
+
+
+def validate_locales(locales: List[str] | None) -> List[str] | None:
+    """Requested target markets as unique ``lang-CC`` locales.
+
+    Raises ValueError for a malformed locale or more than SCRAPER_MAX_LOCALES.
+    """
+    if locales is None:
+        return None
+    normalized = []
+    for locale in locales:
+        if not isinstance(locale, str) or not _LOCALE_RE.match(locale.strip()):
+            raise ValueError(f"Invalid locale: {locale!r}. Use a language or language-country code, e.g. 'de' or 'de-DE'.")
+        lang, country = parse_locale(locale.strip())
+        normalized.append(f"{lang}-{country.upper()}")
+    normalized = list(dict.fromkeys(normalized))
+    if len(normalized) > SCRAPER_MAX_LOCALES:
+        raise ValueError(f"At most {SCRAPER_MAX_LOCALES} locales can be scraped per validation.")
+    return normalized or None
+
+
+def locale_languages(locales: List[str] | None) -> List[str]:
+    """Unique review languages implied by a list of target locales."""
+    return list(dict.fromkeys(parse_locale(l)[0] for l in (locales or DEFAULT_LOCALES)))
+
 def scrape_play_store_reviews(app_id: str, count: int = 500, lang: str = 'en', country: str = 'us') -> List[Dict[str, Any]]:
     """Scrape reviews from Google Play Store."""
     try:
-        logger.info(f"Scraping up to {count} reviews for Play Store app {app_id}...")
-        result, _ = reviews(
-            app_id,
-            lang=lang,
-            country=country,
-            sort=Sort.NEWEST,
-            count=count
-        )
+        logger.info(f"Scraping up to {count} reviews for Play Store app {app_id} ({lang}-{country})...")
+        with host_slot("play.google.com"):
+            result, _ = reviews(
+                app_id,
+                lang=lang,
+                country=country,
+                sort=Sort.NEWEST,
+                count=count
+            )
         parsed = [
             {
                 "id": str(r["reviewId"]),
+                "app_id": app_id,
                 "content": r["content"],
                 "score": r["score"],
                 "date": str(r["at"]),
@@ -37,12 +102,13 @@ def scrape_play_store_reviews(app_id: str, count: int = 500, lang: str = 'en', c
 def scrape_app_store_reviews(app_name: str, app_id: int, count: int = 500, country: str = 'us') -> List[Dict[str, Any]]:
     """Scrape reviews from Apple App Store using public RSS Feed."""
     try:
-        logger.info(f"Scraping up to {count} reviews for App Store app {app_name} ({app_id}) via RSS...")
+        logger.info(f"Scraping up to {count} reviews for App Store app {app_name} ({app_id}, {country}) via RSS...")
         
         # Apple's public RSS feed for customer reviews
         url = f"https://itunes.apple.com/{country}/rss/customerreviews/page=1/id={app_id}/sortby=mostrecent/json"
         
-        response = requests.get(url, timeout=10)
+        with host_slot("itunes.apple.com"):
+            response = requests.get(url, timeout=10)
         data = response.json()
         
         parsed = []
@@ -59,6 +125,7 @@ def scrape_app_store_reviews(app_name: str, app_id: int, count: int = 500, count
             
             parsed.append({
                 "id": review_id,
+                "app_id": str(app_id),
                 "content": content,
                 "score": score,
                 "date": "", # RSS feed often doesn't give a strict timestamp without deep parsing
@@ -73,3 +140,55 @@ def scrape_app_store_reviews(app_name: str, app_id: int, count: int = 500, count
     except Exception as e:
         logger.error(f"Error scraping App Store app {app_id}: {e}")
         return []
+
+
+def scrape_reviews_across_locales(
+    play_app_ids: List[str],
+    ios_apps: List[Tuple[str, int]],
+    locales: List[str] | None = None,
+    count_per_locale: int = 100,
+) -> ReviewBatch:
+    """Scrape every (app, locale) pair concurrently and merge the results.
+
+    *ios_apps* holds (bundle_id, track_id) pairs. Requests run in parallel,
+    bounded by the per-host slots above, so N locales cost roughly the wall
+    time of one. Each review is tagged with its ``locale``; reviews seen in
+    an earlier locale (same platform + id) are dropped. The merged batch
+    interleaves locales so downstream sampling sees every market.
+    """
+    locales = locales or DEFAULT_LOCALES
+    jobs = []
+    for locale in locales:
+        lang, country = parse_locale(locale)
+        for app_id in play_app_ids:
+            jobs.append((locale, scrape_play_store_reviews, (app_id, count_per_locale, lang, country)))
+        for app_name, app_id in ios_apps:
+            jobs.append((locale, scrape_app_store_reviews, (app_name, app_id, count_per_locale, country)))
+    if not jobs:
+        return ReviewBatch()
+
+    with ThreadPoolExecutor(max_workers=min(len(jobs), 16)) as pool:
+        futures = [(locale, pool.submit(fn, *args)) for locale, fn, args in jobs]
+        per_locale: Dict[str, List[Dict[str, Any]]] = {locale: [] for locale in locales}
+        seen = set()
+        for locale, future in futures:
+            bucket = per_locale[locale]
+            for r in future.result():
+                key = (r["platform"], r["id"])
+                if key in seen:
+                    continue
+                seen.add(key)
+                bucket.append(r)
+
+    tagged = [
+        (r, locale)
+        for group in zip_longest(*([(r, l) for r in rows] for l, rows in per_locale.items()))
+        for r, locale in filter(None, group)
+    ]
+    merged = ReviewBatch.from_dicts([r for r, _ in tagged], locales=[l for _, l in tagged])
+    archive_reviews(merged)
+    logger.info(
+        f"Scraped {len(merged)} reviews across {len(locales)} locale(s): "
+        + ", ".join(f"{l}={len(v)}" for l, v in per_locale.items())
+    )
+    return merged
@@ -0,0 +1,419 @@
+"""Cache of recent validation results, with near matches offered to the user.
+
+People re-submit ideas they (or others) validated recently, and each time
+the full pipeline (discovery, scraping, six agents) ran again. This cache
+keeps recent ``IdeaValidationResult`` s keyed by an embedding of the idea,
+partitioned by category and target markets, and finds the nearest stored
+result once their cosine similarity reaches ``VALIDATION_CACHE_THRESHOLD``.
+
+The embedding measures how many words two ideas share, not what they
+mean: "meal planner for kids" and "meal planner for dogs" are close, and a
+real paraphrase may not be. So only an ``exact`` hit — the same content
+words, whatever their order, inflection or filler words — answers a
+submission by itself. Any other hit is only offered: the validation runs
+fresh, and the user may pick the earlier result instead
+(``get_cached_validation``). The cache is shared by all users, so near
+matches are only offered, and only handed out, to the user whose
+validation produced them.
+
+- embedding: a signed hashing vectorizer (``VALIDATION_CACHE_DIMENSIONS``
+  buckets) over the idea's stemmed words, word pairs and character
+  trigrams — local, deterministic and fast, no model to train or serve;
+- index: per partition, the L2-normalized vectors of the stored ideas as
+  one numpy matrix (grown by doubling); a lookup is a single
+  matrix-vector product;
+- storage: SQLite (``VALIDATION_CACHE_PATH``), loaded into the index on
+  first use; entries expire after ``VALIDATION_CACHE_TTL_HOURS`` and at
+  most ``VALIDATION_CACHE_MAX_ENTRIES`` are kept.
+
+Hits older than ``VALIDATION_CACHE_REFRESH_HOURS`` are still served, and
+the API refreshes them in the background (``VALIDATION_CACHE_BACKGROUND_REFRESH``).
+Cache errors never fail a validation; they are logged and treated as misses.
+"""
+
+import os
+import re
+import json
+import time
+import zlib
+import sqlite3
+import logging
+import threading
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# Configuration via env vars
+# ---------------------------------------------------------------------------
+VALIDATION_CACHE_ENABLED = os.getenv("VALIDATION_CACHE_ENABLED", "true").lower() == "true"
+VALIDATION_CACHE_PATH = os.getenv("VALIDATION_CACHE_PATH", os.path.join("data", "validation_cache.db"))
+VALIDATION_CACHE_THRESHOLD = float(os.getenv("VALIDATION_CACHE_THRESHOLD", "0.8"))
+VALIDATION_CACHE_TTL_HOURS = float(os.getenv("VALIDATION_CACHE_TTL_HOURS", "168"))
+VALIDATION_CACHE_REFRESH_HOURS = float(os.getenv("VALIDATION_CACHE_REFRESH_HOURS", "24"))
+VALIDATION_CACHE_BACKGROUND_REFRESH = os.getenv("VALIDATION_CACHE_BACKGROUND_REFRESH", "true").lower() == "true"
+VALIDATION_CACHE_MAX_ENTRIES = int(os.getenv("VALIDATION_CACHE_MAX_ENTRIES", "5000"))
+VALIDATION_CACHE_DIMENSIONS = int(os.getenv("VALIDATION_CACHE_DIMENSIONS", "2048"))
+
+# ---------------------------------------------------------------------------
+# Embedding
+# ---------------------------------------------------------------------------
+
+_WORD = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an the and or but for of to in on at by with from into about that this these those which who whom "
+    "is are be been being it its i we you they my our your their me us them so as than then very just "
+    "can could would should will help helps helping let lets make makes using use uses used new idea".split()
+)
+_SUFFIXES = ("ings", "ing", "ers", "er", "ies", "es", "ed", "s")
+
+_WORD_WEIGHT, _PAIR_WEIGHT, _TRIGRAM_WEIGHT = 1.0, 0.5, 0.2
+
+
+def _stem(word: str) -> str:
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)] + ("y" if suffix == "ies" else "")
+    return word
+
+
+def idea_terms(idea: str) -> List[str]:
+    """The idea's content words, lowercased and stemmed."""
+    return [_stem(w) for w in _WORD.findall(idea.lower()) if w not in _STOPWORDS]
+
+
+def embed_idea(idea: str, dimensions: int = VALIDATION_CACHE_DIMENSIONS) -> np.ndarray:
+    """L2-normalized signed feature-hashing vector of *idea* (all zeros if it has no content words)."""
+    vector = np.zeros(dimensions, dtype=np.float32)
+    words = idea_terms(idea)
+    features = [(w, _WORD_WEIGHT) for w in words]
+    features += [(f"{a} {b}", _PAIR_WEIGHT) for a, b in zip(words, words[1:])]
+    features += [(f"#{w[i:i + 3]}", _TRIGRAM_WEIGHT) for w in (f"^{w}$" for w in words) for i in range(len(w) - 2)]
+    for feature, weight in features:
+        h = zlib.crc32(feature.encode("utf-8"))
+        vector[h % dimensions] += weight if h & 0x80000000 else -weight
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def partition_key(category: str, locales: Optional[Sequence[str]] = None) -> str:
+    """Results are only reused within one category and set of target markets."""
+    return f"{category}|{','.join(sorted(locales or ['en-US']))}"
+
+
+# ---------------------------------------------------------------------------
+# Cache
+# ---------------------------------------------------------------------------
+
+class CachedValidation(NamedTuple):
+    entry_id: int
+    idea: str
+    result: Dict[str, Any]
+    similarity: float
+    created_at: float
+    exact: bool = False  # same content words as the looked-up idea
+    user_id: str = ""  # who ran the validation
+
+    @property
+    def age_hours(self) -> float:
+        return (time.time() - self.created_at) / 3600
+
+
+class _Partition:
+    """Stored ideas of one partition; vectors live in a matrix that grows by doubling."""
+
+    def __init__(self, dimensions: int):
+        self.ids: List[int] = []
+        self.ideas: List[str] = []
+        self.created: List[float] = []
+        self.owners: List[str] = []
+        self._rows = np.zeros((0, dimensions), dtype=np.float32)
+
+    @property
+    def matrix(self) -> np.ndarray:
+        return self._rows[:len(self.ids)]
+
+    def add(self, entry_id: int, idea: str, created_at: float, vector: np.ndarray, owner: str = "") -> None:
+        n = len(self.ids)
+        if n == self._rows.shape[0]:
+            grown = np.zeros((max(16, 2 * n), self._rows.shape[1]), dtype=np.float32)
+            grown[:n] = self._rows
+            self._rows = grown
+        self._rows[n] = vector
+        self.ids.append(entry_id)
+        self.ideas.append(idea)
+        self.created.append(created_at)
+        self.owners.append(owner)
+
+    def drop(self, keep: np.ndarray) -> None:
+        kept = self.matrix[keep]
+        self.ids = [i for i, k in zip(self.ids, keep) if k]
+        self.ideas = [i for i, k in zip(self.ideas, keep) if k]
+        self.created = [c for c, k in zip(self.created, keep) if k]
+        self.owners = [o for o, k in zip(self.owners, keep) if k]
+        self._rows = np.zeros((max(16, 2 * len(kept)), self._rows.shape[1]), dtype=np.float32)
+        self._rows[:len(kept)] = kept
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS validation_cache (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    partition  TEXT NOT NULL,
+    idea       TEXT NOT NULL,
+    vector     BLOB NOT NULL,
+    result     TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    user_id    TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_validation_cache_created ON validation_cache(created_at);
+"""
+
+
+class SemanticValidationCache:
+    """Nearest-neighbour lookup of recent validation results (thread-safe)."""
+
+    def __init__(
+        self,
+        path: Optional[str],
+        dimensions: int = VALIDATION_CACHE_DIMENSIONS,
+        ttl_hours: float = VALIDATION_CACHE_TTL_HOURS,
+        max_entries: int = VALIDATION_CACHE_MAX_ENTRIES,
+    ):
+        self.path = path
+        self.dimensions = dimensions
+        self.ttl_hours = ttl_hours
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._partitions: Dict[str, _Partition] = {}
+        self._results: Dict[int, str] = {}  # results of entries stored without a database
+        self._loaded = False
+
+    def _db(self) -> Optional[sqlite3.Connection]:
+        if not self.path:
+            return None
+        if self._conn is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.executescript(_SCHEMA)
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(validation_cache)")}
+            if "user_id" not in columns:  # created before entries had an owner
+                self._conn.execute("ALTER TABLE validation_cache ADD COLUMN user_id TEXT NOT NULL DEFAULT ''")
+        return self._conn
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        db = self._db()
+        if db is None:
+            return
+        self._prune(db)
+        rows = db.execute(
+            "SELECT id, partition, idea, vector, created_at, user_id FROM validation_cache ORDER BY created_at",
+        ).fetchall()
+        for entry_id, partition, idea, blob, created_at, owner in rows:
+            vector = np.frombuffer(blob, dtype=np.float32)
+            if vector.shape[0] != self.dimensions:
+                vector = embed_idea(idea, self.dimensions)  # dimensions changed since it was stored
+            self._partition(partition).add(entry_id, idea, created_at, vector, owner)
+        logger.info(f"Validation cache loaded {len(rows)} entries.")
+
+    def _prune(self, db: sqlite3.Connection) -> None:
+        with db:
+            db.execute("DELETE FROM validation_cache WHERE created_at < ?", (time.time() - self.ttl_hours * 3600,))
+            db.execute(
+                """DELETE FROM validation_cache WHERE id IN (
+                       SELECT id FROM validation_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?)""",
+                (self.max_entries,),
+            )
+
+    def _partition(self, key: str) -> _Partition:
+        if key not in self._partitions:
+            self._partitions[key] = _Partition(self.dimensions)
+        return self._partitions[key]
+
+    def lookup(
+        self, idea: str, category: str, locales: Optional[Sequence[str]] = None,
+        threshold: float = VALIDATION_CACHE_THRESHOLD, user_id: Optional[str] = None,
+    ) -> Optional[CachedValidation]:
+        """The most similar unexpired result for *idea* at or above *threshold*, if any.
+
+        Exact hits come from anyone's validations; with *user_id*, near
+        matches only come from that user's.
+        """
+        vector = embed_idea(idea, self.dimensions)
+        if not vector.any():
+            return None
+        terms = set(idea_terms(idea))
+        with self._lock:
+            self._load()
+            partition = self._partitions.get(partition_key(category, locales))
+            if partition is None or not partition.ids:
+                return None
+            similarities = partition.matrix @ vector
+            similarities[np.asarray(partition.created) < time.time() - self.ttl_hours * 3600] = -1.0
+            candidates = np.flatnonzero(similarities >= threshold)
+            for best in candidates[np.argsort(-similarities[candidates], kind="stable")].tolist():
+                exact = terms == set(idea_terms(partition.ideas[best]))
+                if exact or user_id is None or partition.owners[best] == user_id:
+                    break
+            else:
+                return None
+            similarity = float(similarities[best])
+            entry_id, cached_idea, created_at = partition.ids[best], partition.ideas[best], partition.created[best]
+            owner = partition.owners[best]
+            payload = self._results.get(entry_id)
+            db = self._db()
+            if payload is None and db is not None:
+                row = db.execute("SELECT result FROM validation_cache WHERE id = ?", (entry_id,)).fetchone()
+                payload = row[0] if row else None
+        if payload is None:
+            return None
+        return CachedValidation(entry_id, cached_idea, json.loads(payload), similarity, created_at, exact, owner)
+
+    def get(self, entry_id: int, user_id: str) -> Optional[CachedValidation]:
+        """The unexpired entry *entry_id*, if it is still cached and *user_id* ran it."""
+        with self._lock:
+            self._load()
+            for partition in self._partitions.values():
+                if entry_id in partition.ids:
+                    i = partition.ids.index(entry_id)
+                    cached_idea, created_at, owner = partition.ideas[i], partition.created[i], partition.owners[i]
+                    break
+            else:
+                return None
+            if owner != user_id:
+                return None
+            if created_at < time.time() - self.ttl_hours * 3600:
+                return None
+            payload = self._results.get(entry_id)
+            db = self._db()
+            if payload is None and db is not None:
+                row = db.execute("SELECT result FROM validation_cache WHERE id = ?", (entry_id,)).fetchone()
+                payload = row[0] if row else None
+        if payload is None:
+            return None
+        return CachedValidation(entry_id, cached_idea, json.loads(payload), 1.0, created_at, True, owner)
+
+    def store(
+        self, idea: str, category: str, locales: Optional[Sequence[str]], result: Dict[str, Any], user_id: str = "",
+    ) -> int:
+        """Remember *result* for *idea*, validated by *user_id*; returns the entry id."""
+        vector = embed_idea(idea, self.dimensions)
+        payload = json.dumps(result, ensure_ascii=False, default=str)
+        key = partition_key(category, locales)
+        now = time.time()
+        with self._lock:
+            self._load()
+            db = self._db()
+            if db is None:
+                entry_id = max(self._results, default=0) + 1
+                self._results[entry_id] = payload
+            else:
+                with db:
+                    cursor = db.execute(
+                        "INSERT INTO validation_cache (partition, idea, vector, result, created_at, user_id) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        (key, idea, vector.tobytes(), payload, now, user_id),
+                    )
+                entry_id = cursor.lastrowid
+            partition = self._partition(key)
+            # A newer result for the same idea supersedes the old one
+            keep = (partition.matrix @ vector) < 0.999
+            superseded = [partition.ids[i] for i in np.flatnonzero(~keep)]
+            if superseded:
+                partition.drop(keep)
+                for old in superseded:
+                    self._results.pop(old, None)
+                if db is not None:
+                    with db:
+                        db.executemany("DELETE FROM validation_cache WHERE id = ?", [(old,) for old in superseded])
+            partition.add(entry_id, idea, now, vector, user_id)
+            if sum(len(p.ids) for p in self._partitions.values()) > self.max_entries:
+                self._evict(db)
+        return entry_id
+
+    def _evict(self, db: Optional[sqlite3.Connection]) -> None:
+        """Drop expired entries and the oldest beyond ``max_entries`` from the index and the database."""
+        cutoff = time.time() - self.ttl_hours * 3600
+        newest_first = sorted(
+            ((created, entry_id) for p in self._partitions.values() for entry_id, created in zip(p.ids, p.created)),
+            reverse=True,
+        )
+        dropped = {entry_id for n, (created, entry_id) in enumerate(newest_first) if n >= self.max_entries or created < cutoff}
+        if not dropped:
+            return
+        for partition in self._partitions.values():
+            keep = np.array([entry_id not in dropped for entry_id in partition.ids], dtype=bool)
+            if not keep.all():
+                partition.drop(keep)
+        for entry_id in dropped:
+            self._results.pop(entry_id, None)
+        if db is not None:
+            with db:
+                db.executemany("DELETE FROM validation_cache WHERE id = ?", [(entry_id,) for entry_id in dropped])
+
+
+_cache: Optional[SemanticValidationCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_validation_cache() -> SemanticValidationCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SemanticValidationCache(VALIDATION_CACHE_PATH)
+        return _cache
+
+
+def set_validation_cache(cache: Optional[SemanticValidationCache]) -> None:
+    """Use *cache* (e.g. an in-memory one in tests); None rebuilds the default on next use."""
+    global _cache
+    with _cache_lock:
+        _cache = cache
+
+
+def find_cached_validation(
+    idea: str, category: str, locales: Optional[Sequence[str]] = None, user_id: Optional[str] = None,
+) -> Optional[CachedValidation]:
+    """``lookup`` on the shared cache; a miss when disabled or on error."""
+    if not VALIDATION_CACHE_ENABLED:
+        return None
+    try:
+        hit = get_validation_cache().lookup(idea, category, locales, user_id=user_id)
+    except Exception as e:
+        logger.warning(f"Validation cache lookup failed: {e}")
+        return None
+    if hit:
+        logger.info(
+            f"Validation cache {'hit' if hit.exact else 'near match'} ({hit.similarity:.2f}, "
+            f"{hit.age_hours:.1f}h old) for '{idea[:50]}': '{hit.idea[:50]}'"
+        )
+    return hit
+
+
+def get_cached_validation(entry_id: int, user_id: str) -> Optional[CachedValidation]:
+    """``get`` on the shared cache (a near match the user chose); None when gone, not theirs or on error."""
+    if not VALIDATION_CACHE_ENABLED:
+        return None
+    try:
+        return get_validation_cache().get(entry_id, user_id)
+    except Exception as e:
+        logger.warning(f"Validation cache read failed: {e}")
+        return None
+
+
+def remember_validation(
+    idea: str, category: str, locales: Optional[Sequence[str]], result: Dict[str, Any], user_id: str = "",
+) -> None:
+    """``store`` on the shared cache; errors are logged."""
+    if not VALIDATION_CACHE_ENABLED:
+        return
+    try:
+        get_validation_cache().store(idea, category, locales, result, user_id)
+    except Exception as e:
+        logger.warning(f"Validation cache write failed: {e}")
@@ -0,0 +1,109 @@
+"""Tests for the agent dependency-graph executor and the graphs built on it."""
+
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from services.agent_dag import AgentDAG
+from services.ai_analyzer import (
+    validation_agent_dag, merge_market_intelligence,
+    ResearcherOutput, PMOutput, MarketSizingOutput, MarketStrategyOutput, OpportunityScoreBreakdown,
+)
+
+
+class TestAgentDAG:
+    def test_values_flow_along_edges(self):
+        dag = AgentDAG()
+        dag.add("double", lambda x: x * 2, inputs=("x",))
+        dag.add("plus_one", lambda double: double + 1, inputs=("double",))
+        values = dag.run({"x": 5})
+        assert values["double"] == 10 and values["plus_one"] == 11
+
+    def test_independent_agents_overlap(self):
+        barrier = threading.Barrier(2, timeout=2)
+        dag = AgentDAG()
+        # Each waits for the other: only finishes if both run at once
+        dag.add("a", lambda: (barrier.wait(), "a")[1])
+        dag.add("b", lambda: (barrier.wait(), "b")[1])
+        dag.add("both", lambda a, b: a + b, inputs=("a", "b"))
+        assert dag.run({})["both"] == "ab"
+
+    def test_late_inputs_start_waiting_agents(self):
+        started = []
+        dag = AgentDAG()
+        dag.add("early", lambda idea: started.append("early") or idea, inputs=("idea",))
+        dag.add("late", lambda idea, evidence: started.append("late") or evidence, inputs=("idea", "evidence"))
+        run = dag.start({"idea": "i"})
+        time.sleep(0.05)
+        assert started == ["early"]
+        run.provide("evidence", "e")
+        assert run.result(timeout=2)["late"] == "e"
+
+    def test_error_stops_downstream_and_is_raised(self):
+        downstream = MagicMock()
+        dag = AgentDAG()
+        dag.add("boom", lambda: (_ for _ in ()).throw(ValueError("bad")))
+        dag.add("after", downstream, inputs=("boom",))
+        with pytest.raises(ValueError, match="bad"):
+            dag.run({})
+        downstream.assert_not_called()
+
+    def test_before_hook_can_abort(self):
+        ran = []
+        dag = AgentDAG()
+        dag.add("first", lambda: ran.append("first"))
+        dag.add("second", lambda first: ran.append("second"), inputs=("first",))
+
+        def before(name):
+            if name == "second":
+                raise RuntimeError("cancelled")
+
+        with pytest.raises(RuntimeError, match="cancelled"):
+            dag.run({}, before=before)
+        assert ran == ["first"]
+
+    def test_cancel_and_missing_inputs(self):
+        dag = AgentDAG()
+        dag.add("needs", lambda evidence: evidence, inputs=("evidence",))
+        run = dag.start({})
+        with pytest.raises(RuntimeError, match="evidence"):
+            run.result(timeout=1)
+        run.cancel()
+        with pytest.raises(RuntimeError, match="cancelled"):
+            run.result(timeout=1)
+
+
+def _breakdown():
+    return OpportunityScoreBreakdown(pain_severity=80, market_gap=70, mvp_feasibility=60, competition_density=50,
+                                     monetization_potential=40, community_demand=30, startup_saturation=20)
+
+
+class TestValidationGraph:
+    def test_market_sizing_runs_before_evidence_arrives(self):
+        sizing = MarketSizingOutput(tam="$1B", sam="$100M", som="$5M", revenue_model_options=["Freemium"],
+                                    funding_landscape="Warm.")
+        strategy = MarketStrategyOutput(score_breakdown=_breakdown(), pricing_suggestion="$5/mo",
+                                        target_platform_recommendation="iOS", market_breakdown="B2C",
+                                        go_to_market_strategy="TikTok")
+        sized = threading.Event()
+        with patch("services.ai_analyzer.run_market_sizing_agent", side_effect=lambda *a: sized.set() or sizing), \
+             patch("services.ai_analyzer.run_researcher_agent",
+                   return_value=ResearcherOutput(what_users_love=["a"], what_users_hate=["b"], community_signals=[])), \
+             patch("services.ai_analyzer.run_pm_agent", return_value=PMOutput(mvp_roadmap=["x"])), \
+             patch("services.ai_analyzer.run_market_strategy_agent", return_value=strategy) as run_strategy:
+            run = validation_agent_dag(MagicMock()).start({"idea": "habit tracker", "category": "mobile_app"})
+            assert sized.wait(2)
+            run.provide("reviews_text", "[]")
+            run.provide("community_data", "")
+            values = run.result(timeout=2)
+
+        assert run_strategy.call_args.args[4] is sizing
+        merged = merge_market_intelligence(values["market_sizing"], values["market_strategy"])
+        assert merged.tam == "$1B" and merged.go_to_market_strategy == "TikTok"
+        assert merged.score_breakdown.pain_severity == 80
@@ -0,0 +1,99 @@
+"""Tests for the cached store search / lookup layer."""
+
+import pytest
+from unittest.mock import patch, MagicMock
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from services import app_metadata
+from services.app_metadata import search_play_store, search_app_store, lookup_app_store, clear_cache
+
+
+def _itunes_app(track_id, rating=4.0):
+    return {"trackId": track_id, "bundleId": f"com.ios.{track_id}", "trackName": f"App {track_id}",
+            "averageUserRating": rating, "artworkUrl512": ""}
+
+
+def _response(results):
+    res = MagicMock()
+    res.json.return_value = {"results": results}
+    return res
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache():
+    clear_cache()
+    yield
+    clear_cache()
+
+
+class TestPlayStoreSearch:
+    def test_repeat_query_hits_cache(self):
+        hits = [{"appId": "com.a", "title": "A", "score": 4.5, "icon": "i"}]
+        with patch("services.app_metadata.play_search", return_value=hits) as search:
+            first = search_play_store("Habit  Tracker")
+            second = search_play_store("habit tracker")
+        assert search.call_count == 1
+        assert first == second == [{"app_id": "com.a", "title": "A", "score": 4.5, "icon": "i", "developer": ""}]
+
+    def test_empty_result_is_negatively_cached(self):
+        with patch("services.app_metadata.play_search", return_value=[]) as search:
+            assert search_play_store("nothing here") == []
+            assert search_play_store("nothing here") == []
+        assert search.call_count == 1
+
+    def test_errors_are_not_cached(self):
+        with patch("services.app_metadata.play_search", side_effect=RuntimeError("503")) as search:
+            assert search_play_store("flaky") == []
+            assert search_play_store("flaky") == []
+        assert search.call_count == 2
+
+    def test_negative_entry_expires(self, monkeypatch):
+        monkeypatch.setattr(app_metadata, "APP_SEARCH_NEGATIVE_TTL", -1)
+        with patch("services.app_metadata.play_search", return_value=[]) as search:
+            search_play_store("nothing here")
+            search_play_store("nothing here")
+        assert search.call_count == 2
+
+
+class TestAppStore:
+    def test_search_then_cached(self):
+        with patch("services.app_metadata.requests.get", return_value=_response([_itunes_app(1), _itunes_app(2)])) as get:
+            first = search_app_store("habit tracker")
+            second = search_app_store("habit tracker")
+        assert get.call_count == 1
+        assert [a["app_id"] for a in first] == ["1", "2"]
+        assert first == second
+        assert first[0]["bundle_id"] == "com.ios.1"
+
+    def test_expired_metadata_refreshed_with_one_batched_lookup(self, monkeypatch):
+        with patch("services.app_metadata.requests.get", return_value=_response([_itunes_app(1), _itunes_app(2)])):
+            search_app_store("habit tracker")
+        monkeypatch.setattr(app_metadata, "APP_METADATA_TTL", -1)
+        app_metadata._apps.update({k: (0, v) for k, (_, v) in app_metadata._apps.items()})
+        with patch("services.app_metadata.requests.get",
+                   return_value=_response([_itunes_app(1, 3.0), _itunes_app(2, 2.5)])) as get:
+            apps = search_app_store("habit tracker")
+        get.assert_called_once()
+        assert get.call_args.args[0] == app_metadata.ITUNES_LOOKUP_URL
+        assert get.call_args.kwargs["params"]["id"] == "1,2"
+        assert [a["score"] for a in apps] == [3.0, 2.5]
+
+    def test_lookup_only_fetches_missing(self):
+        with patch("services.app_metadata.requests.get", return_value=_response([_itunes_app(1)])):
+            lookup_app_store([1])
+        with patch("services.app_metadata.requests.get", return_value=_response([_itunes_app(2)])) as get:
+            found = lookup_app_store([1, 2])
+        assert get.call_args.kwargs["params"]["id"] == "2"
+        assert set(found) == {"1", "2"}
+
+    def test_batched_lookup_stays_within_the_cache_cap(self, monkeypatch):
+        monkeypatch.setattr(app_metadata, "APP_METADATA_CACHE_MAX", 10)
+        with patch("services.app_metadata.requests.get", return_value=_response([_itunes_app(i) for i in range(8)])):
+            lookup_app_store(list(range(8)))
+        with patch("services.app_metadata.requests.get", return_value=_response([_itunes_app(i) for i in range(8, 14)])):
+            found = lookup_app_store(list(range(8, 14)))
+        assert len(found) == 6
+        assert len(app_metadata._apps) == 10
@@ -0,0 +1,163 @@
+"""Tests for the async agent graph, async response cache and AgentCall."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from google.genai import types
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from services import llm_cache
+from services.agent_calls import AgentCall, PartialListItems
+from services.agent_dag import AgentDAG
+from services.ai_analyzer import CategoryDetectionOutput, ResearcherOutput, detect_category_async
+from services.llm_cache import LLMResponseCache, generate_cached_async
+
+
+def _response(text='{"category": "fintech", "subcategory": "Budgeting", "rationale": "Money."}'):
+    return types.GenerateContentResponse(candidates=[types.Candidate(
+        content=types.Content(role="model", parts=[types.Part(text=text)]),
+    )])
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    c = LLMResponseCache(str(tmp_path / "llm.sqlite3"), memory_bytes=1024 * 1024)
+    monkeypatch.setattr(llm_cache, "_cache", c)
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_ENABLED", True)
+    return c
+
+
+@pytest.mark.asyncio
+class TestAsyncAgentDAG:
+    async def test_independent_agents_overlap(self):
+        both_started = asyncio.Barrier(2)
+
+        async def agent(tag):
+            await asyncio.wait_for(both_started.wait(), 2)
+            return tag
+
+        dag = AgentDAG()
+        dag.add("a", lambda: agent("a"))
+        dag.add("b", lambda: agent("b"))
+
+        async def join(a, b):
+            return a + b
+
+        dag.add("both", join, inputs=("a", "b"))
+        assert (await dag.arun({}))["both"] == "ab"
+
+    async def test_late_inputs_and_async_hooks(self):
+        finished = []
+
+        async def echo(evidence):
+            return evidence
+
+        async def after(name, value):
+            finished.append(name)
+
+        dag = AgentDAG()
+        dag.add("researcher", echo, inputs=("evidence",))
+        run = dag.start_async({}, after=after)
+        await asyncio.sleep(0)
+        assert finished == []
+        run.provide("evidence", "e")
+        assert (await run.result(timeout=2))["researcher"] == "e"
+        assert finished == ["researcher"]
+
+    async def test_error_cancels_running_agents(self):
+        slow_cancelled = asyncio.Event()
+
+        async def slow():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                slow_cancelled.set()
+                raise
+
+        async def boom():
+            raise ValueError("bad")
+
+        dag = AgentDAG()
+        dag.add("slow", slow)
+        dag.add("boom", boom)
+        with pytest.raises(ValueError, match="bad"):
+            await dag.start_async({}).result(timeout=2)
+        await asyncio.wait_for(slow_cancelled.wait(), 1)
+
+
+@pytest.mark.asyncio
+class TestGenerateCachedAsync:
+    async def test_concurrent_identical_calls_hit_the_api_once(self, cache):
+        aclient = MagicMock()
+
+        async def generate(**kwargs):
+            await asyncio.sleep(0.05)
+            return _response()
+
+        aclient.models.generate_content = AsyncMock(side_effect=generate)
+        outs = await asyncio.gather(*(
+            generate_cached_async(aclient, agent="category_detector", contents="idea") for _ in range(3)
+        ))
+        assert aclient.models.generate_content.await_count == 1
+        assert {o.text for o in outs} == {_response().text}
+
+        # Later calls come from the cache
+        await generate_cached_async(aclient, agent="category_detector", contents="idea")
+        assert aclient.models.generate_content.await_count == 1
+
+
+@pytest.mark.asyncio
+class TestAgentCallAsync:
+    async def test_arun_parses_and_finishes(self, cache):
+        aclient = MagicMock()
+        aclient.models.generate_content = AsyncMock(return_value=_response())
+        call = AgentCall("category_detector", "idea", CategoryDetectionOutput, temperature=0.1,
+                         finish=lambda out: out.category)
+        assert await call.arun(aclient) == "fintech"
+        assert aclient.models.generate_content.call_args.kwargs["config"].response_schema is CategoryDetectionOutput
+
+    async def test_detect_category_async_skips_the_api_for_user_category(self):
+        aclient = MagicMock()
+        aclient.models.generate_content = AsyncMock()
+        out = await detect_category_async(aclient, "idea", "hardware")
+        assert out.category == "hardware"
+        aclient.models.generate_content.assert_not_called()
+
+
+class TestPartialListItems:
+    def test_items_of_watched_top_level_lists(self):
+        doc = ('{"love": ["x"], "hate": ["a \\"quoted\\"", "b, c"], "nested": {"hate": ["no"]}, '
+               '"mvp": [{"n": "1", "tags": ["z"]}, "k"]}')
+        scanner = PartialListItems(["hate", "mvp"])
+        items = []
+        for i in range(0, len(doc), 3):  # arbitrary chunk boundaries
+            items += scanner.feed(doc[i:i + 3])
+        assert items == [("hate", 'a "quoted"'), ("hate", "b, c"), ("mvp", {"n": "1", "tags": ["z"]}), ("mvp", "k")]
+
+
+@pytest.mark.asyncio
+class TestStreamedAgentCall:
+    async def test_partials_arrive_before_the_final_model(self, cache):
+        text = '{"what_users_love": ["fast"], "what_users_hate": ["ads", "sync bugs"], "community_signals": []}'
+
+        async def stream(**kwargs):
+            for i in range(0, len(text), 7):
+                yield _response(text[i:i + 7])
+
+        aclient = MagicMock()
+        aclient.models.generate_content_stream = AsyncMock(side_effect=lambda **kw: stream(**kw))
+        partials = []
+        call = AgentCall("pm_agent", "prompt", ResearcherOutput, temperature=0.2)
+        out = await call.arun(aclient, on_partial=lambda field, item: partials.append((field, item)))
+
+        assert partials == [("what_users_love", "fast"), ("what_users_hate", "ads"), ("what_users_hate", "sync bugs")]
+        assert out.what_users_hate == ["ads", "sync bugs"]
+
+        # The assembled response was cached: a repeat is served without streaming
+        partials.clear()
+        assert (await call.arun(aclient, on_partial=lambda *a: partials.append(a))) == out
+        assert aclient.models.generate_content_stream.await_count == 1 and partials == []
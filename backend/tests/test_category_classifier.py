@@ -0,0 +1,98 @@
+"""Tests for the local category classifier and its use in detect_category."""
+
+import random
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from services import category_classifier
+from services.category_classifier import CategoryClassifier, evaluate, retrain, set_category_classifier, train
+from services.ai_analyzer import detect_category
+
+_WORDS = {
+    "mobile_app": ["app", "iphone", "android", "habit", "photo", "social", "game", "fitness", "dating"],
+    "hardware": ["device", "wearable", "sensor", "robot", "iot", "ring", "printer", "drone", "thermostat"],
+    "fintech": ["budget", "payments", "invest", "crypto", "bank", "loan", "savings", "credit", "insurance"],
+    "saas_web": ["dashboard", "b2b", "api", "crm", "analytics", "teams", "workflow", "developer", "platform"],
+}
+_SUBCATEGORIES = {"mobile_app": "cross_platform", "hardware": "wearables", "fintech": "payments", "saas_web": "B2B SaaS"}
+
+
+def _history(per_category=60, seed=1):
+    rnd = random.Random(seed)
+    return [
+        {
+            "idea": " ".join(rnd.sample(words, 3)) + " for " + rnd.choice(["students", "parents", "startups"]),
+            "category": category,
+            "subcategory": _SUBCATEGORIES[category],
+        }
+        for category, words in _WORDS.items() for _ in range(per_category)
+    ]
+
+
+@pytest.fixture(scope="module")
+def model():
+    return train(_history())
+
+
+@pytest.fixture(autouse=True)
+def _no_served_model():
+    yield
+    set_category_classifier(None)
+
+
+class TestClassifier:
+    def test_confident_prediction_with_subcategory(self, model):
+        out = model.classify("crypto savings and budget tracker")
+        assert out.category == "fintech" and out.subcategory == "payments"
+
+    def test_unfamiliar_idea_falls_back(self, model):
+        assert model.classify("something entirely different") is None
+
+    def test_prediction_is_sub_millisecond(self, model):
+        model.predict("warm up")
+        start = time.perf_counter()
+        for _ in range(100):
+            model.predict("a wearable ring sensor for runners")
+        assert (time.perf_counter() - start) / 100 < 0.001
+
+    def test_save_and_load_round_trip(self, model, tmp_path):
+        path = str(tmp_path / "clf.json")
+        model.save(path)
+        loaded = CategoryClassifier.load(path)
+        idea = "drone with a thermostat sensor"
+        assert loaded.predict(idea)[0] == model.predict(idea)[0]
+        assert loaded.predict(idea)[1] == pytest.approx(model.predict(idea)[1], abs=1e-3)
+        assert CategoryClassifier.load(str(tmp_path / "missing.json")) is None
+
+
+class TestDetectCategory:
+    def test_confident_local_answer_skips_gemini(self, model):
+        set_category_classifier(model)
+        client = MagicMock()
+        assert detect_category(client, "android fitness habit app").category == "mobile_app"
+        client.models.generate_content.assert_not_called()
+
+    def test_retrain_needs_enough_history(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(category_classifier, "CATEGORY_CLASSIFIER_MIN_EXAMPLES", 50)
+        path = str(tmp_path / "clf.json")
+        with patch("services.category_classifier._history", return_value=_history(per_category=5)):
+            assert retrain(path) is None
+        with patch("services.category_classifier._history", return_value=_history()):
+            assert retrain(path) is not None
+        assert os.path.exists(path)
+        assert category_classifier.get_category_classifier().examples == 240
+
+
+def test_evaluate_reports_accuracy_coverage_and_latency():
+    report = evaluate(_history(), holdout=0.25)
+    assert report["test_examples"] == 60
+    assert report["local"]["accuracy"] > 0.9
+    assert report["local"]["latency_ms_p95"] < 1.0
+    assert [t["threshold"] for t in report["local"]["by_threshold"]][:2] == [0.5, 0.7]
+    assert "llm" not in report
@@ -0,0 +1,90 @@
+"""Tests for the pipelined (speculative) community scrape."""
+
+import pytest
+from unittest.mock import patch
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from services.community_scraper import (
+    CommunityScraperService, CommunitySource, ScrapedPost, SOURCE_QUERY_LIMITS,
+)
+
+
+class _Recorder:
+    """Stand-in scrapers that record the queries each source was asked for."""
+
+    def __init__(self, service, fail=()):
+        self.calls = {}
+        self.fail = set(fail)
+        for source, name in [
+            (CommunitySource.REDDIT, "_scrape_reddit"), (CommunitySource.HACKERNEWS, "_scrape_hackernews"),
+            (CommunitySource.TWITTER, "_scrape_twitter"), (CommunitySource.PRODUCTHUNT, "_scrape_producthunt"),
+            (CommunitySource.G2, "_scrape_g2"), (CommunitySource.DEVTO, "_scrape_devto"),
+            (CommunitySource.LEMMY, "_scrape_lemmy"), (CommunitySource.GOOGLENEWS, "_scrape_google_news"),
+            (CommunitySource.LOBSTERS, "_scrape_lobsters"),
+        ]:
+            setattr(service, name, self._make(source))
+
+    def _make(self, source):
+        def scrape(queries, competitor_names):
+            if source in self.fail:
+                raise RuntimeError("blocked")
+            targets = competitor_names[:3] if source == CommunitySource.G2 else queries
+            self.calls.setdefault(source, []).extend(targets)
+            return [ScrapedPost(source=source, content=f"about {q}", url=f"https://{source.value}/{q}") for q in targets]
+        return scrape
+
+
+@pytest.fixture(autouse=True)
+def _no_archive():
+    with patch("services.community_scraper.archive_posts"):
+        yield
+
+
+def _service():
+    return CommunityScraperService("saas_web")
+
+
+class TestPipelinedScrape:
+    def test_covers_same_queries_as_scrape_all(self):
+        names = ["Notion", "Trello", "Asana"]
+        idea = "team task board for agencies"
+
+        sequential = _service()
+        seq_rec = _Recorder(sequential)
+        seq = sequential.scrape_all(names, idea)
+
+        pipelined = _service()
+        pipe_rec = _Recorder(pipelined)
+        pipe = pipelined.start_pipelined(idea).finish(names)
+
+        assert pipe_rec.calls == seq_rec.calls
+        assert [p.url for p in pipe.posts] == [p.url for p in seq.posts]
+        assert pipe.sources_succeeded == seq.sources_succeeded
+
+    def test_idea_queries_start_before_competitors_known(self):
+        service = _service()
+        rec = _Recorder(service)
+        handle = service.start_pipelined("team task board for agencies")
+        handle._idea_pass.result()
+        assert rec.calls[CommunitySource.REDDIT] == ["team task board"]
+        result = handle.finish(["Notion"])
+        assert rec.calls[CommunitySource.REDDIT] == ["team task board", "Notion"]
+        assert len(rec.calls[CommunitySource.HACKERNEWS]) <= SOURCE_QUERY_LIMITS[CommunitySource.HACKERNEWS]
+        assert "g2" in result.sources_succeeded
+
+    def test_no_competitors_only_idea_pass(self):
+        service = _service()
+        rec = _Recorder(service)
+        result = service.start_pipelined("team task board").finish([])
+        assert rec.calls[CommunitySource.REDDIT] == ["team task board"]
+        assert result.total_posts > 0
+
+    def test_source_failing_in_every_pass_is_reported_failed(self):
+        service = _service()
+        rec = _Recorder(service, fail={CommunitySource.LOBSTERS})
+        result = service.start_pipelined("team task board").finish(["Notion"])
+        assert "lobsters" in result.sources_failed
+        assert "lobsters" not in result.sources_succeeded
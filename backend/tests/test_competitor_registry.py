@@ -0,0 +1,120 @@
+"""Tests for competitor entity resolution."""
+
+from datetime import datetime, timedelta, timezone
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from services.competitor_registry import (
+    CompetitorRegistry, normalize_name, url_identity, bundle_domain, entity_meta,
+)
+
+
+def _play(app_id, title, developer=""):
+    return {"app_id": app_id, "title": title, "score": 4.5, "icon": "", "platform": "android",
+            "source": "play_store", "developer": developer}
+
+
+def _ios(track, bundle, title, developer=""):
+    return {"app_id": track, "title": title, "score": 4.0, "icon": "", "platform": "ios",
+            "source": "app_store", "bundle_id": bundle, "developer": developer}
+
+
+def _web(url, title, source="web"):
+    return {"app_id": url, "title": title, "score": 0.0, "icon": "", "platform": "web", "source": source}
+
+
+class TestNormalization:
+    def test_normalize_name(self):
+        assert normalize_name("Todoist: To-Do List & Planner") == "todoist"
+        assert normalize_name("Todoist - Tasks | Official") == "todoist"
+        assert normalize_name("Héllo Habit App") == "hellohabit"
+
+    def test_url_identity(self):
+        assert url_identity("https://www.acme.io/pricing") == ("domain", "acme.io")
+        assert url_identity("https://app.acme.co.uk") == ("domain", "acme.co.uk")
+        assert url_identity("https://www.producthunt.com/posts/acme") == ("link", "product_hunt")
+        assert url_identity("https://www.ycombinator.com/companies/acme") == ("link", "ycombinator")
+
+    def test_bundle_domain(self):
+        assert bundle_domain("com.acme.todo") == "acme.com"
+        assert bundle_domain("io.ab.x") == ""
+
+
+class TestResolve:
+    def test_merges_store_and_web_listings(self):
+        registry = CompetitorRegistry(persist=False)
+        resolved = registry.resolve([
+            _play("com.doist.todoist", "Todoist: To-Do List & Planner"),
+            _ios("572688855", "com.doist.todoist", "Todoist: To Do List & Planner"),
+            _web("https://www.producthunt.com/posts/todoist", "Todoist", "product_hunt"),
+            _web("https://doist.com", "Doist"),
+            _web("https://www.ticktick.com", "TickTick"),
+        ])
+        assert len(resolved) == 2
+        todoist, listings = resolved[0]
+        assert len(listings) == 4
+        assert todoist.android_ids == ["com.doist.todoist"]
+        assert todoist.ios_apps == {"572688855": "com.doist.todoist"}
+        assert set(todoist.links) == {"product_hunt", "website"}
+        meta = entity_meta(todoist, listings)
+        assert meta["platforms"] == ["android", "ios", "web"]
+        assert meta["entity_id"] == todoist.id
+
+    def test_reuses_known_entity_across_runs(self):
+        registry = CompetitorRegistry(persist=False)
+        first, _ = registry.resolve([_play("com.acme.habits", "Acme Habits")])[0]
+        second, _ = registry.resolve([_web("https://acme.com", "Acme Habits")])[0]
+        assert second.id == first.id
+        assert second.android_ids == ["com.acme.habits"]
+        assert registry.lookup("domain", "acme.com").id == first.id
+
+    def test_listing_bridging_two_entities_merges_them(self):
+        registry = CompetitorRegistry(persist=False)
+        a, _ = registry.resolve([_play("com.acme.habits", "Streaks")])[0]
+        b, _ = registry.resolve([_web("https://www.producthunt.com/posts/habitly", "Habitly")])[0]
+        assert a.id != b.id
+        merged, _ = registry.resolve([_ios("99", "com.acme.habits", "Habitly")])[0]
+        assert merged.id == a.id
+        assert registry.get(b.id) is None
+        assert registry.lookup("name", "habitly").id == a.id
+
+    def test_review_freshness(self):
+        registry = CompetitorRegistry(persist=False)
+        entity, _ = registry.resolve([_play("com.acme.habits", "Acme")])[0]
+        now = datetime.now(timezone.utc)
+        assert not entity.reviews_fresh(["en-US"], now)
+        registry.mark_reviews_fetched([entity], ["en-US"])
+        assert entity.reviews_fresh(["en-US"], now)
+        assert not entity.reviews_fresh(["en-US", "de-DE"], now)
+        assert not entity.reviews_fresh(["en-US"], now + timedelta(days=2))
+
+    def test_apps_sharing_a_publisher_domain_stay_distinct(self):
+        registry = CompetitorRegistry(persist=False)
+        resolved = registry.resolve([
+            _play("com.google.android.keep", "Google Keep - Notes and Lists", "Google LLC"),
+            _play("com.google.android.apps.tasks", "Google Tasks", "Google LLC"),
+            _web("https://www.google.com", "Google"),  # matches both on the publisher domain
+        ])
+        assert [len(listings) for _, listings in resolved] == [1, 1, 1]
+        assert registry.resolve([_ios("1", "com.google.tasks.ios", "Google Tasks", "Google")])[0][0].id == resolved[1][0].id
+
+    def test_same_name_from_different_developers_stays_distinct(self):
+        registry = CompetitorRegistry(persist=False)
+        resolved = registry.resolve([
+            _play("com.alpha.habits", "Habit Tracker", "Alpha Apps"),
+            _play("com.beta.habits", "Habit Tracker", "Beta Studio"),
+            _ios("42", "io.gamma.habits", "Habit Tracker"),
+            _web("https://www.producthunt.com/posts/habit-tracker", "Habit Tracker", "product_hunt"),
+        ])
+        assert [len(listings) for _, listings in resolved] == [1, 1, 1, 1]
+        assert registry.resolve([_play("com.beta.habits", "Habit Tracker", "Beta Studio")])[0][0].id == resolved[1][0].id
+
+    def test_same_name_from_the_same_developer_merges_across_stores(self):
+        registry = CompetitorRegistry(persist=False)
+        resolved = registry.resolve([
+            _play("com.doist.todoist", "Todoist", "Doist Inc."),
+            _ios("572688855", "com.todoist.ios", "Todoist: To-Do List", "Doist Inc"),
+        ])
+        assert len(resolved) == 1
@@ -0,0 +1,106 @@
+"""Tests for per-job Gemini context caching."""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from google.genai import types
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from services import context_cache
+from services.context_cache import JobContext
+from services.ai_analyzer import (
+    ResearcherOutput, open_validation_context, run_researcher_agent_async, _market_strategy_call,
+    PMOutput, MarketSizingOutput,
+)
+
+_REVIEWS = "\n".join(f"{i % 5 + 1}★ review number {i} about syncing and crashes" for i in range(400))
+_COMMUNITY = "[reddit r/apps ▲12] Is there an app that syncs notes offline?"
+_SIZING = MarketSizingOutput(tam="$1B", sam="$100M", som="$5M", revenue_model_options=[], funding_landscape="")
+
+
+def _aclient():
+    aclient = MagicMock()
+    aclient.caches.create = AsyncMock(return_value=types.CachedContent(name="cachedContents/abc"))
+    aclient.caches.delete = AsyncMock()
+    aclient.models.generate_content = AsyncMock(return_value=types.GenerateContentResponse(
+        candidates=[types.Candidate(content=types.Content(parts=[types.Part(
+            text='{"what_users_love": ["a"], "what_users_hate": ["b"], "community_signals": ["c"]}',
+        )]))],
+    ))
+    return aclient
+
+
+@pytest.fixture(autouse=True)
+def _no_response_cache():
+    with patch("services.llm_cache.LLM_CACHE_ENABLED", False), \
+            patch("services.grounding_cache._cached_sources", return_value=None), \
+            patch("services.grounding_cache._record_sources"):
+        yield
+
+
+@pytest.mark.asyncio
+class TestJobContext:
+    async def test_small_context_is_not_cached(self):
+        aclient = _aclient()
+        context = await JobContext("job-1").open(aclient, "instructions", {"DATA": "one line"})
+        assert not context.active
+        aclient.caches.create.assert_not_called()
+
+    async def test_large_context_cached_once_and_deleted_at_close(self):
+        aclient = _aclient()
+        context = await JobContext("job-1").open(aclient, "instructions", {"DATA": _REVIEWS, "EMPTY": ""})
+        assert context.active and context.has("DATA") and not context.has("EMPTY")
+        config = aclient.caches.create.await_args.kwargs["config"]
+        assert config.system_instruction == "instructions"
+        assert "── DATA ──" in config.contents[0].parts[0].text
+        assert config.tools  # grounded agents search through the cache
+        await context.close()
+        aclient.caches.delete.assert_awaited_once_with(name="cachedContents/abc")
+        assert not context.active
+
+    async def test_create_failure_falls_back_to_inline_evidence(self):
+        aclient = _aclient()
+        aclient.caches.create = AsyncMock(side_effect=RuntimeError("unsupported"))
+        context = await JobContext("job-1").open(aclient, "instructions", {"DATA": _REVIEWS})
+        assert not context.active
+
+    async def test_disabled(self, monkeypatch):
+        monkeypatch.setattr(context_cache, "CONTEXT_CACHE_ENABLED", False)
+        context = await JobContext("job-1").open(_aclient(), "instructions", {"DATA": _REVIEWS})
+        assert not context.active
+
+
+@pytest.mark.asyncio
+class TestAgentsOnContext:
+    async def test_researcher_references_the_cache_instead_of_resending_evidence(self):
+        aclient = _aclient()
+        context = await open_validation_context(aclient, JobContext("job-1"), "offline notes", "mobile_app", _REVIEWS, _COMMUNITY)
+        assert context.active
+
+        out = await run_researcher_agent_async(aclient, "offline notes", _REVIEWS, "mobile_app", _COMMUNITY, context=context)
+        assert out.what_users_hate == ["b"]
+        kwargs = aclient.models.generate_content.await_args.kwargs
+        assert kwargs["config"].cached_content == "cachedContents/abc"
+        assert kwargs["config"].tools is None
+        assert "review number 7 " not in kwargs["contents"]
+        assert "in the shared job context" in kwargs["contents"]
+
+    async def test_researcher_without_context_inlines_evidence(self):
+        aclient = _aclient()
+        await run_researcher_agent_async(aclient, "offline notes", "5★ great", "mobile_app", _COMMUNITY)
+        kwargs = aclient.models.generate_content.await_args.kwargs
+        assert kwargs["config"].cached_content is None
+        assert "5★ great" in kwargs["contents"]
+
+    async def test_strategy_reads_raw_evidence_from_context(self):
+        context = await open_validation_context(_aclient(), JobContext("job-1"), "offline notes", "mobile_app", _REVIEWS, _COMMUNITY)
+        researcher = ResearcherOutput(what_users_love=["fast sync"], what_users_hate=["crashes"], community_signals=["demand"])
+        call = _market_strategy_call(
+            "offline notes", researcher, PMOutput(mvp_roadmap=["offline mode"]), _SIZING, "mobile_app", context,
+        )
+        assert call.context is context
+        assert "crashes" in call.contents
+        assert "fast sync" not in call.contents and "[COMMUNITY POSTS — in the shared job context]" in call.contents
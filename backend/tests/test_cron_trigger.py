@@ -49,10 +49,9 @@ def _make_job(minutes_ago, now_utc=None):
 
 
 def _fake_loop():
-    """Return a mock event loop whose run_in_executor is a no-op."""
+    """Return a mock event loop whose create_task discards the pipeline coroutine."""
     loop = MagicMock()
-    loop.run_in_executor = MagicMock(return_value=asyncio.Future())
-    loop.run_in_executor.return_value.set_result(None)
+    loop.create_task = MagicMock(side_effect=lambda coro: (coro.close(), MagicMock())[1])
     return loop
 
 
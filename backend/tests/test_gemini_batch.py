@@ -0,0 +1,118 @@
+"""Tests for batching agent requests into Gemini batch jobs."""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from google.genai import types
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from services.gemini_batch import GeminiBatcher
+
+
+def _fake_aclient(states=("JOB_STATE_SUCCEEDED",), fail_key=None):
+    """An async client whose batch jobs answer each request with its own prompt."""
+    aclient = MagicMock()
+    submitted = {}
+
+    async def create(model, src, config):
+        submitted["model"], submitted["src"] = model, src
+        return SimpleNamespace(name="batches/1", state=types.JobState.JOB_STATE_PENDING, dest=None)
+
+    polls = iter(states)
+
+    async def get(name):
+        state = types.JobState(next(polls))
+        responses = [
+            types.InlinedResponse(
+                metadata=r.metadata,
+                error=types.JobError(message="blocked") if r.metadata["key"] == fail_key else None,
+                response=None if r.metadata["key"] == fail_key else types.GenerateContentResponse(
+                    candidates=[types.Candidate(content=types.Content(parts=[types.Part(text=r.contents)]))],
+                ),
+            )
+            for r in reversed(submitted["src"])  # out of order: results are matched by key
+        ]
+        return SimpleNamespace(name=name, state=state, dest=SimpleNamespace(inlined_responses=responses))
+
+    aclient.batches.create = AsyncMock(side_effect=create)
+    aclient.batches.get = AsyncMock(side_effect=get)
+    return aclient, submitted
+
+
+def _batcher():
+    return GeminiBatcher(collect_seconds=0.01, poll_seconds=0.0, max_wait_seconds=60)
+
+
+@pytest.mark.asyncio
+class TestGeminiBatcher:
+    async def test_concurrent_requests_share_one_job(self):
+        aclient, submitted = _fake_aclient(states=("JOB_STATE_RUNNING", "JOB_STATE_SUCCEEDED"))
+        batcher = _batcher()
+        with patch("services.gemini_batch.get_async_gemini_client", return_value=aclient):
+            responses = await asyncio.gather(
+                *(batcher.generate(model="m", contents=f"prompt {i}") for i in range(3))
+            )
+        assert [r.text for r in responses] == ["prompt 0", "prompt 1", "prompt 2"]
+        aclient.batches.create.assert_awaited_once()
+        assert submitted["model"] == "m" and len(submitted["src"]) == 3
+        assert aclient.batches.get.await_count == 2
+        aclient.models.generate_content.assert_not_called()
+
+    async def test_failed_item_raises_for_its_caller_only(self):
+        aclient, _ = _fake_aclient(fail_key="2")
+        batcher = _batcher()
+        with patch("services.gemini_batch.get_async_gemini_client", return_value=aclient):
+            ok, failed = await asyncio.gather(
+                batcher.generate(model="m", contents="a"),
+                batcher.generate(model="m", contents="b"),
+                return_exceptions=True,
+            )
+        assert ok.text == "a"
+        assert isinstance(failed, RuntimeError) and "blocked" in str(failed)
+
+    async def test_expired_job_fails_every_request(self):
+        aclient, _ = _fake_aclient(states=("JOB_STATE_EXPIRED",))
+        batcher = _batcher()
+        with patch("services.gemini_batch.get_async_gemini_client", return_value=aclient):
+            with pytest.raises(RuntimeError, match="EXPIRED"):
+                await batcher.generate(model="m", contents="a")
+
+    async def test_falls_back_to_online_calls_when_job_is_not_created(self):
+        aclient = MagicMock()
+        aclient.batches.create = AsyncMock(side_effect=RuntimeError("quota"))
+        aclient.models.generate_content = AsyncMock(return_value="online")
+        batcher = _batcher()
+        with patch("services.gemini_batch.get_async_gemini_client", return_value=aclient):
+            assert await batcher.generate(model="m", contents="a", config="cfg") == "online"
+        aclient.models.generate_content.assert_awaited_once_with(model="m", contents="a", config="cfg")
+
+    async def test_agent_call_sends_cache_misses_through_generate(self):
+        from services.agent_calls import AgentCall
+        from pydantic import BaseModel
+
+        class Out(BaseModel):
+            answer: str
+
+        aclient, submitted = _fake_aclient()
+        aclient.batches.get = AsyncMock(return_value=SimpleNamespace(
+            name="batches/1", state=types.JobState.JOB_STATE_SUCCEEDED,
+            dest=SimpleNamespace(inlined_responses=[types.InlinedResponse(
+                metadata={"key": "1"},
+                response=types.GenerateContentResponse(candidates=[types.Candidate(
+                    content=types.Content(parts=[types.Part(text='{"answer": "42"}')]),
+                )]),
+            )]),
+        ))
+        batcher = _batcher()
+        call = AgentCall("batch_test_agent", "question?", Out, temperature=0.2)
+        with patch("services.gemini_batch.get_async_gemini_client", return_value=aclient), \
+                patch("services.llm_cache.LLM_CACHE_ENABLED", False):
+            out = await call.arun(aclient, generate=batcher.generate)
+        assert out.answer == "42"
+        assert submitted["src"][0].contents == "question?"
+        aclient.models.generate_content.assert_not_called()
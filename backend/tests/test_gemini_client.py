@@ -0,0 +1,54 @@
+"""Tests for the shared Gemini client."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from services import gemini_client
+from services.gemini_client import get_gemini_client, init_gemini_client, set_gemini_client, reset_gemini_client
+
+
+@pytest.fixture(autouse=True)
+def _fresh_client():
+    reset_gemini_client()
+    yield
+    reset_gemini_client()
+
+
+class TestGeminiClient:
+    def test_client_is_built_once_and_shared(self, monkeypatch):
+        monkeypatch.setenv("GEMINI_API_KEY", "test")
+        with patch("services.gemini_client.genai.Client") as client_cls:
+            first = get_gemini_client()
+            second = get_gemini_client()
+        assert first is second
+        client_cls.assert_called_once()
+        options = client_cls.call_args.kwargs["http_options"]
+        assert options.client_args["http2"] is gemini_client.GEMINI_HTTP2
+        assert options.async_client_args["limits"].keepalive_expiry == gemini_client.GEMINI_KEEPALIVE_SECONDS
+
+    def test_missing_key_raises_and_startup_tolerates_it(self, monkeypatch):
+        monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+        with pytest.raises(ValueError):
+            get_gemini_client()
+        init_gemini_client()  # logs, doesn't raise
+
+    def test_fake_client_is_used_and_not_closed(self):
+        fake = MagicMock()
+        set_gemini_client(fake)
+        assert get_gemini_client() is fake
+        reset_gemini_client()
+        fake.close.assert_not_called()
+
+    def test_reset_closes_owned_client(self, monkeypatch):
+        monkeypatch.setenv("GEMINI_API_KEY", "test")
+        with patch("services.gemini_client.genai.Client") as client_cls:
+            get_gemini_client()
+            reset_gemini_client()
+            get_gemini_client()
+        client_cls.return_value.close.assert_called_once()
+        assert client_cls.call_count == 2
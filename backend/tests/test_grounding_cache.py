@@ -0,0 +1,103 @@
+"""Tests for the grounded-search citation cache."""
+
+from unittest.mock import MagicMock
+
+import pytest
+from google.genai import types
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from services import grounding_cache, llm_cache
+from services.grounding_cache import GroundingCache, extract_grounding, generate_grounded
+
+
+def _grounded_response(n_sources=5):
+    meta = types.GroundingMetadata(
+        web_search_queries=["habit tracker market size 2025", "habit tracker funding"],
+        grounding_chunks=[
+            types.GroundingChunk(web=types.GroundingChunkWeb(uri=f"https://src{i}.example", title=f"Source {i}", domain=f"src{i}.example"))
+            for i in range(n_sources)
+        ],
+        grounding_supports=[
+            types.GroundingSupport(segment=types.Segment(text="The market is worth $11B."), grounding_chunk_indices=[0, 1]),
+        ],
+    )
+    return types.GenerateContentResponse(candidates=[types.Candidate(grounding_metadata=meta)])
+
+
+def _config():
+    return types.GenerateContentConfig(temperature=0.2, tools=[types.Tool(google_search=types.GoogleSearch())])
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    c = GroundingCache(str(tmp_path / "grounding.sqlite3"))
+    monkeypatch.setattr(grounding_cache, "_cache", c)
+    monkeypatch.setattr(grounding_cache, "GROUNDING_CACHE_ENABLED", True)
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_ENABLED", False)
+    return c
+
+
+class TestExtract:
+    def test_extracts_queries_sources_and_snippets(self):
+        g = extract_grounding(_grounded_response(3))
+        assert g["queries"] == ["habit tracker market size 2025", "habit tracker funding"]
+        assert [s["uri"] for s in g["sources"]] == ["https://src0.example", "https://src1.example", "https://src2.example"]
+        assert g["sources"][1]["snippets"] == ["The market is worth $11B."]
+        assert g["sources"][2]["snippets"] == []
+
+    def test_no_metadata(self):
+        assert extract_grounding(MagicMock(candidates=[])) == {"queries": [], "sources": []}
+
+
+class TestCache:
+    def test_lookup_by_niche_and_agent(self, cache):
+        g = extract_grounding(_grounded_response())
+        cache.record("researcher", "Habit tracker for nurses", g["queries"], g["sources"])
+        hit = cache.lookup("researcher", "Habit tracker for teams")
+        assert len(hit["sources"]) == 5
+        assert "habit tracker funding" in hit["queries"]
+        assert cache.lookup("market_intelligence", "habit tracker")["sources"] == []
+        assert cache.lookup("researcher", "Budget planner for couples")["sources"] == []
+
+    def test_specific_subject_does_not_take_a_niches_sources(self, cache):
+        g = extract_grounding(_grounded_response())
+        cache.record("researcher", "Habit tracker for nurses", g["queries"], g["sources"])
+        specific = "Habit tracker for night-shift nurses with rota-aware sleep reminders"
+        assert cache.lookup("researcher", specific)["sources"] == []
+        more = extract_grounding(_grounded_response(8))
+        cache.record("researcher", specific, more["queries"], more["sources"])
+        assert len(cache.lookup("researcher", specific)["sources"]) == 8
+        assert len(cache.lookup("researcher", "habit tracker")["sources"]) == 5
+
+    def test_expired_entries_are_ignored_and_pruned(self, cache):
+        g = extract_grounding(_grounded_response())
+        cache.record("researcher", "habit tracker", g["queries"], g["sources"])
+        assert cache.lookup("researcher", "habit tracker", max_age_hours=-1)["sources"] == []
+        assert cache.prune(max_age_hours=-1) == 1
+        assert cache.lookup("researcher", "habit tracker")["sources"] == []
+
+
+class TestGenerateGrounded:
+    def test_first_call_grounded_then_served_from_cache(self, cache):
+        client = MagicMock()
+        client.models.generate_content.return_value = _grounded_response()
+
+        generate_grounded(client, agent="researcher", subject="habit tracker app", contents="PROMPT", config=_config())
+        first = client.models.generate_content.call_args.kwargs
+        assert first["config"].tools
+
+        generate_grounded(client, agent="researcher", subject="habit tracker for teams", contents="PROMPT", config=_config())
+        second = client.models.generate_content.call_args.kwargs
+        assert second["config"].tools is None
+        assert second["contents"].startswith("PROMPT\n\n── RECENT GOOGLE SEARCH RESULTS ──")
+        assert "https://src0.example" not in second["contents"] and "src0.example" in second["contents"]
+
+    def test_too_few_sources_stays_grounded(self, cache):
+        client = MagicMock()
+        client.models.generate_content.return_value = _grounded_response(n_sources=1)
+        for _ in range(2):
+            generate_grounded(client, agent="trend_scout", subject="fintech budgeting", contents="P", config=_config())
+        assert client.models.generate_content.call_args.kwargs["config"].tools
@@ -0,0 +1,168 @@
+"""Tests for job step checkpoints and resuming orphaned jobs."""
+
+import asyncio
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from services import job_checkpoints
+from services.agent_dag import AgentDAG
+from services.ai_analyzer import PMOutput
+from services.job_checkpoints import (
+    JobCheckpoints, _SqliteBackend, dump_output, restore_outputs, resume_orphaned_jobs, set_checkpoint_backend,
+)
+from services.research_models import ResearchReport
+from services.research_pipeline import run_research_pipeline_async
+
+
+@pytest.fixture
+def backend(tmp_path):
+    backend = _SqliteBackend(str(tmp_path / "checkpoints.sqlite3"))
+    set_checkpoint_backend(backend)
+    yield backend
+    set_checkpoint_backend(None)
+
+
+@pytest.fixture
+def resumers(monkeypatch):
+    monkeypatch.setattr(job_checkpoints, "_resumers", {})
+    monkeypatch.setattr(job_checkpoints, "_abandoners", {})
+
+
+def _orphan(backend, job_id="job-1"):
+    backend.begin("validation", job_id, {"idea": "x"}, time.time() - 3600)
+
+
+class TestCheckpoints:
+    def test_round_trip_and_finish(self, backend):
+        checkpoints = JobCheckpoints("validation", "job-1")
+        checkpoints.begin({"idea": "x"})
+        checkpoints.save("category", {"category": "fintech"})
+        checkpoints.save("pm", dump_output(PMOutput(mvp_roadmap=["a"])))
+        assert JobCheckpoints("validation", "job-1").load()["category"] == {"category": "fintech"}
+        assert JobCheckpoints("research", "job-1").load() == {}
+        checkpoints.finish()
+        assert checkpoints.load() == {} and backend.stale("validation", time.time() + 1) == []
+
+    def test_restore_outputs(self):
+        saved = {"pm": dump_output(PMOutput(mvp_roadmap=["a"])), "community": dump_output(("posts", True)), "bad": {}}
+        restored = restore_outputs(saved, {"pm": PMOutput, "community": tuple, "bad": PMOutput, "missing": PMOutput})
+        assert restored == {"pm": PMOutput(mvp_roadmap=["a"]), "community": ("posts", True)}
+
+    def test_errors_are_logged_not_raised(self):
+        broken = MagicMock()
+        broken.save.side_effect = broken.load.side_effect = RuntimeError("db down")
+        set_checkpoint_backend(broken)
+        try:
+            JobCheckpoints("validation", "job-1").save("category", {})
+            assert JobCheckpoints("validation", "job-1").load() == {}
+        finally:
+            set_checkpoint_backend(None)
+
+
+@pytest.mark.asyncio
+class TestResume:
+    async def test_orphan_claimed_once_and_handed_to_resumer(self, backend, resumers):
+        resumer = MagicMock(side_effect=lambda job_id, params: asyncio.sleep(0))
+        job_checkpoints.register_resumer("validation", resumer)
+        _orphan(backend)
+        JobCheckpoints("validation", "live").begin({})  # heartbeat is fresh
+
+        assert await resume_orphaned_jobs() == ["job-1"]
+        resumer.assert_called_once_with("job-1", {"idea": "x"})
+        assert await resume_orphaned_jobs() == []  # claimed: its heartbeat is fresh again
+
+    async def test_gives_up_after_max_attempts(self, backend, resumers, monkeypatch):
+        monkeypatch.setattr(job_checkpoints, "JOB_RESUME_MAX_ATTEMPTS", 1)
+        resumer, abandon = MagicMock(side_effect=lambda job_id, params: asyncio.sleep(0)), MagicMock()
+        job_checkpoints.register_resumer("validation", resumer, abandon=abandon)
+        _orphan(backend)
+        await resume_orphaned_jobs()
+        backend._execute("UPDATE job_runs SET heartbeat_at = 0")  # it died again
+
+        assert await resume_orphaned_jobs() == []
+        assert resumer.call_count == 1
+        abandon.assert_called_once()
+        assert backend.stale("validation", time.time()) == []
+
+    async def test_only_one_instance_wins_the_claim(self, backend):
+        _orphan(backend)
+        run = backend.stale("validation", time.time())[0]
+        assert backend.claim(run, time.time())
+        assert not backend.claim(run, time.time())
+
+
+class TestCompletedAgents:
+    def test_sync_run_skips_completed_agents(self):
+        first = MagicMock()
+        dag = AgentDAG()
+        dag.add("first", first, inputs=("x",))
+        dag.add("second", lambda first: first + 1, inputs=("first",))
+        assert dag.run({"x": 1}, completed={"first": 41})["second"] == 42
+        first.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_async_run_skips_completed_agents(self):
+        calls = []
+
+        async def agent(name, value):
+            calls.append(name)
+            return value
+
+        dag = AgentDAG()
+        dag.add("first", lambda: agent("first", 1))
+        dag.add("second", lambda first: agent("second", first + 1), inputs=("first",))
+        assert (await dag.arun({}, completed={"first": 10}))["second"] == 11
+        assert calls == ["second"]
+        assert (await dag.arun({}, completed={"first": 1, "second": 2}))["second"] == 2
+
+    def test_unknown_completed_agent(self):
+        with pytest.raises(ValueError):
+            AgentDAG().start({}, completed={"nope": 1})
+
+
+@pytest.mark.asyncio
+class TestResearchResume:
+    async def test_interrupted_job_resumes_after_its_last_checkpoint(self, backend):
+        scraped = MagicMock(return_value=("posts", True))
+        reports = []
+
+        async def community():
+            return scraped()
+
+        async def report(community):
+            reports.append(community)
+            if len(reports) == 1:
+                await asyncio.sleep(10)  # the process dies here
+            return ResearchReport(id="r1", topic_id="t1")
+
+        def dag(*args, **kwargs):
+            graph = AgentDAG()
+            graph.add("community", community)
+            graph.add("report", report, inputs=("community",))
+            return graph
+
+        with patch("services.research_pipeline.research_agent_dag", side_effect=dag), \
+                patch("services.research_pipeline.get_async_gemini_client"), \
+                patch("services.research_pipeline.create_research_job", return_value={"id": "job-1"}), \
+                patch("services.research_pipeline.update_research_job"), \
+                patch("services.research_pipeline.save_research_report", return_value={"data": {"id": "r1"}}), \
+                patch("services.research_pipeline._notify_report"):
+            first = asyncio.create_task(run_research_pipeline_async("saas", ["crm"], [], "t1", "u1"))
+            while not reports:
+                await asyncio.sleep(0.01)
+            first.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await first
+            assert JobCheckpoints("research", "job-1").load() == {"community": ["posts", True]}
+
+            result = await run_research_pipeline_async("saas", ["crm"], [], "t1", "u1", resume_job_id="job-1")
+
+        assert result.id == "r1"
+        assert scraped.call_count == 1 and reports == [("posts", True), ("posts", True)]
+        assert JobCheckpoints("research", "job-1").load() == {}  # finished
@@ -0,0 +1,64 @@
+"""Tests for the incremental JSON array parser used by streamed discovery."""
+
+from unittest.mock import MagicMock
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from services.json_stream import JsonArrayStream, iter_json_objects
+from services.discovery import _discover_saas_competitors
+
+RESPONSE = (
+    'Here are the competitors I found [1]:\n```json\n[\n'
+    '  {"title": "Acme", "url": "https://acme.io", "description": "Does {things} \\"well\\""},\n'
+    '  {"title": "Beta [beta]", "url": "https://beta.dev", "tags": ["a", "b"]},\n'
+    '  {"title": "Gamma", "url": "https://gam'
+)
+
+
+def _chunks(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class TestJsonArrayStream:
+    def test_objects_surface_as_they_close(self):
+        parser = JsonArrayStream()
+        first = parser.feed(RESPONSE[:RESPONSE.index("},") + 1])
+        assert [o["title"] for o in first] == ["Acme"]
+        assert first[0]["description"] == 'Does {things} "well"'
+
+    def test_truncated_tail_keeps_complete_objects(self):
+        for size in (1, 7, 64, len(RESPONSE)):
+            titles = [o["title"] for o in iter_json_objects(_chunks(RESPONSE, size))]
+            assert titles == ["Acme", "Beta [beta]"]
+
+    def test_malformed_element_is_skipped(self):
+        text = '[{"title": "A"}, {"title": B}, {"title": "C"}]'
+        assert [o["title"] for o in iter_json_objects([text])] == ["A", "C"]
+
+    def test_stops_at_end_of_array(self):
+        text = '[{"title": "A"}] and later [{"title": "ignored"}]'
+        assert [o["title"] for o in iter_json_objects(_chunks(text, 3))] == ["A"]
+
+    def test_empty_array_and_no_array(self):
+        assert list(iter_json_objects(["Nothing found: []"])) == []
+        assert list(iter_json_objects(["No JSON here."])) == []
+
+    def test_stream_error_keeps_earlier_objects(self):
+        def chunks():
+            yield '[{"title": "A"},'
+            raise ConnectionError("stream dropped")
+        assert [o["title"] for o in iter_json_objects(chunks())] == ["A"]
+
+
+class TestStreamedDiscovery:
+    def test_saas_discovery_streams_competitors(self):
+        client = MagicMock()
+        client.models.generate_content_stream.return_value = [MagicMock(text=c) for c in _chunks(RESPONSE, 20)]
+        seen = []
+        reviews, metas = _discover_saas_competitors(client, "idea", on_competitor=seen.append)
+        assert len(reviews) == 0
+        assert [m["title"] for m in metas] == ["Acme", "Beta [beta]"]
+        assert seen == metas
+        assert metas[0]["platform"] == "web"
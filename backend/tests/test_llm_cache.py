@@ -0,0 +1,162 @@
+"""Tests for the Gemini response cache."""
+
+import asyncio
+import threading
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from google.genai import types
+from pydantic import BaseModel
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from services import llm_cache
+from services.llm_cache import LLMResponseCache, cache_key, generate_cached, generate_cached_async
+
+
+class _Out(BaseModel):
+    category: str
+
+
+def _response(text='{"category": "mobile_app"}'):
+    return types.GenerateContentResponse(candidates=[types.Candidate(
+        content=types.Content(role="model", parts=[types.Part(text=text)]),
+    )])
+
+
+def _config(**kw):
+    return types.GenerateContentConfig(response_mime_type="application/json", response_schema=_Out, temperature=0.1, **kw)
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    c = LLMResponseCache(str(tmp_path / "llm.sqlite3"), memory_bytes=1024 * 1024)
+    monkeypatch.setattr(llm_cache, "_cache", c)
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_ENABLED", True)
+    return c
+
+
+class TestKeys:
+    def test_key_covers_model_prompt_schema_and_config(self):
+        base = cache_key("m", "prompt", _config())
+        assert base == cache_key("m", "prompt", _config())
+        assert base != cache_key("m2", "prompt", _config())
+        assert base != cache_key("m", "prompt!", _config())
+        assert base != cache_key("m", "prompt", _config(top_k=3))
+        assert base != cache_key("m", "prompt", types.GenerateContentConfig(response_schema=_Out, temperature=0.1))
+
+    def test_dict_and_typed_configs_share_a_key(self):
+        as_dict = {"response_mime_type": "application/json", "response_schema": _Out, "temperature": 0.1}
+        assert cache_key("m", "p", as_dict) == cache_key("m", "p", _config())
+
+
+class TestGenerateCached:
+    def test_second_call_is_served_from_cache(self, cache):
+        client = MagicMock()
+        client.models.generate_content.return_value = _response()
+        for _ in range(2):
+            out = generate_cached(client, agent="category_detector", contents="idea", config=_config())
+            assert out.text == '{"category": "mobile_app"}'
+        client.models.generate_content.assert_called_once()
+
+    def test_disk_tier_survives_a_new_process(self, cache, monkeypatch):
+        client = MagicMock()
+        client.models.generate_content.return_value = _response()
+        generate_cached(client, agent="category_detector", contents="idea", config=_config())
+        monkeypatch.setattr(llm_cache, "_cache", LLMResponseCache(cache.path, memory_bytes=1024 * 1024))
+        generate_cached(client, agent="category_detector", contents="idea", config=_config())
+        client.models.generate_content.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_async_disk_tier_runs_off_the_event_loop(self, cache, monkeypatch):
+        aclient = MagicMock()
+        aclient.models.generate_content = AsyncMock(return_value=_response())
+        await generate_cached_async(aclient, agent="category_detector", contents="idea", config=_config())
+        fresh = LLMResponseCache(cache.path, memory_bytes=1024 * 1024)
+        monkeypatch.setattr(llm_cache, "_cache", fresh)
+        threads = []
+        for name in ("get_disk", "put_disk"):
+            method = getattr(fresh, name)
+            monkeypatch.setattr(fresh, name, lambda *a, _m=method: threads.append(threading.get_ident()) or _m(*a))
+        await generate_cached_async(aclient, agent="category_detector", contents="idea", config=_config())
+        aclient.models.generate_content.assert_awaited_once()
+        assert threads and threading.get_ident() not in threads
+
+    def test_zero_ttl_opts_out_and_errors_are_not_cached(self, cache):
+        client = MagicMock()
+        client.models.generate_content.return_value = _response()
+        for _ in range(2):
+            generate_cached(client, agent="pm_agent", contents="p", config=_config(), ttl_hours=0)
+        assert client.models.generate_content.call_count == 2
+
+        client.models.generate_content.side_effect = [RuntimeError("503"), _response()]
+        with pytest.raises(RuntimeError):
+            generate_cached(client, agent="pm_agent", contents="q", config=_config())
+        assert generate_cached(client, agent="pm_agent", contents="q", config=_config()).text
+
+    def test_expired_entries_are_refetched(self, cache):
+        client = MagicMock()
+        client.models.generate_content.return_value = _response()
+        generate_cached(client, agent="researcher", contents="p", config=_config(), ttl_hours=1 / 3600 / 100)
+        time.sleep(0.05)
+        generate_cached(client, agent="researcher", contents="p", config=_config())
+        assert client.models.generate_content.call_count == 2
+
+    def test_concurrent_identical_requests_make_one_call(self, cache):
+        release = threading.Event()
+        calls = []
+
+        def slow_call(**kwargs):
+            calls.append(kwargs)
+            release.wait(2)
+            return _response()
+
+        client = MagicMock()
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(
+                generate_cached(client, agent="discovery_query", contents="same", config=_config(), call=slow_call)))
+            for _ in range(5)
+        ]
+        for t in threads:
+            t.start()
+        time.sleep(0.1)
+        release.set()
+        for t in threads:
+            t.join(2)
+        assert len(calls) == 1
+        assert len(results) == 5 and all(r.text for r in results)
+
+    @pytest.mark.asyncio
+    async def test_cancelled_leader_does_not_cancel_followers(self, cache):
+        started = asyncio.Event()
+        calls = []
+
+        async def call():
+            calls.append(1)
+            if len(calls) == 1:
+                started.set()
+                await asyncio.sleep(10)
+            return "ok"
+
+        leader = asyncio.create_task(cache.singleflight_async("k", call))
+        await started.wait()
+        follower = asyncio.create_task(cache.singleflight_async("k", call))
+        await asyncio.sleep(0)
+        leader.cancel()
+        assert await asyncio.wait_for(follower, 2) == "ok"
+        assert leader.cancelled() and len(calls) == 2
+
+
+class TestLRU:
+    def test_memory_tier_evicts_least_recently_used(self, tmp_path):
+        c = LLMResponseCache(None, memory_bytes=25)
+        c.put("a", "x", "m", "a" * 10, 1)
+        c.put("b", "x", "m", "b" * 10, 1)
+        assert c.get("a")            # touch a; b is now the oldest
+        c.put("c", "x", "m", "c" * 10, 1)
+        assert c.get("b") is None
+        assert c.get("a") and c.get("c")
@@ -0,0 +1,128 @@
+"""Tests for the Gemini rate limiter, priority classes and retry."""
+
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from google.genai import errors
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from services.llm_scheduler import LLM_DEFAULT_TPM, LLMScheduler, Priority, TokenBucket, llm_priority, _parse_limits
+
+
+def _error(code):
+    cls = errors.ClientError if code < 500 else errors.ServerError
+    return cls(code, {"error": {"message": "boom", "status": "X"}})
+
+
+def _scheduler(**kwargs):
+    kwargs.setdefault("backoff_base", 0.001)
+    kwargs.setdefault("backoff_max", 0.01)
+    return LLMScheduler(limits={}, **kwargs)
+
+
+class TestTokenBucket:
+    def test_refills_per_second(self):
+        bucket = TokenBucket(60, now=0.0)  # one per second
+        assert bucket.wait_time(1, 0.0) == 0.0
+        bucket.take(60)
+        assert bucket.wait_time(1, 0.0) == pytest.approx(1.0)
+        assert bucket.wait_time(1, 0.5) == pytest.approx(0.5)
+        assert bucket.wait_time(1000, 60.0) == 0.0  # capped at capacity
+
+    def test_adjust_can_go_into_debt(self):
+        bucket = TokenBucket(60, now=0.0)
+        bucket.adjust(90)
+        assert bucket.wait_time(1, 0.0) == pytest.approx(31.0)
+
+    def test_parse_limits(self):
+        assert _parse_limits("a=10/2000, b=5,bad") == {"a": (10.0, 2000.0), "b": (5.0, LLM_DEFAULT_TPM)}
+
+
+class TestRetry:
+    def test_retries_rate_limit_and_server_errors(self):
+        call = MagicMock(side_effect=[_error(429), _error(503), "ok"])
+        scheduler = _scheduler()
+        assert scheduler.run(call, model="m", contents="hi") == "ok"
+        assert call.call_count == 3
+        stats = scheduler.stats()["m"]["interactive"]
+        assert stats["retries"] == 2 and stats["rate_limited"] == 1 and stats["failed"] == 0
+
+    def test_client_errors_are_not_retried(self):
+        call = MagicMock(side_effect=_error(400))
+        with pytest.raises(errors.ClientError):
+            _scheduler().run(call, model="m", contents="hi")
+        assert call.call_count == 1
+
+    def test_gives_up_after_max_retries(self):
+        call = MagicMock(side_effect=_error(500))
+        scheduler = _scheduler(max_retries=2)
+        with pytest.raises(errors.ServerError):
+            scheduler.run(call, model="m", contents="hi")
+        assert call.call_count == 3
+        assert scheduler.stats()["m"]["interactive"]["failed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_async_retry(self):
+        call = AsyncMock(side_effect=[_error(429), "ok"])
+        assert await _scheduler().arun(call, model="m", contents="hi") == "ok"
+
+
+class TestAdmission:
+    def test_requests_wait_for_the_bucket_and_are_counted(self):
+        scheduler = LLMScheduler(limits={"m": (600, 10**6)})  # 10 per second
+        scheduler._limiter("m").requests.level = 0
+        start = time.monotonic()
+        scheduler.run(lambda **kw: "ok", model="m", contents="hi")
+        assert time.monotonic() - start >= 0.05
+        stats = scheduler.stats()["m"]["interactive"]
+        assert stats["queued"] == 1 and stats["queue_seconds_max"] > 0
+
+    def test_token_estimate_settled_against_usage(self):
+        scheduler = LLMScheduler(limits={"m": (1000, 6000)})
+        response = SimpleNamespace(usage_metadata=SimpleNamespace(prompt_token_count=1000))
+        scheduler.run(lambda **kw: response, model="m", contents="a" * 40)
+        assert scheduler._limiter("m").tokens.level == pytest.approx(5000, abs=5)
+
+    def test_scheduled_work_yields_to_interactive(self):
+        scheduler = LLMScheduler(limits={"m": (60, 10**6)})  # one per second
+        limiter = scheduler._limiter("m")
+        limiter.requests.level = 0
+        order = []
+
+        def _run(priority, name):
+            with llm_priority(priority):
+                scheduler.run(lambda **kw: order.append(name), model="m", contents="")
+
+        scheduled = threading.Thread(target=_run, args=(Priority.SCHEDULED, "scheduled"))
+        interactive = threading.Thread(target=_run, args=(Priority.INTERACTIVE, "interactive"))
+        interactive.start()
+        time.sleep(0.05)  # interactive is queued first...
+        scheduled.start()  # ...and a scheduled request arriving later must not overtake it
+        limiter.requests.level = 1.0  # one slot frees up
+        interactive.join(timeout=5)
+        scheduled.join(timeout=5)
+        assert order == ["interactive", "scheduled"]
+
+    def test_priority_follows_tasks_and_threads(self):
+        scheduler = _scheduler()
+
+        async def _main():
+            with llm_priority(Priority.SCHEDULED):
+                await asyncio.to_thread(scheduler.run, lambda **kw: "ok", model="m", contents="")
+
+        asyncio.run(_main())
+        assert "scheduled" in scheduler.stats()["m"]
+
+    def test_disabled_scheduler_calls_through(self):
+        call = MagicMock(side_effect=_error(429))
+        with patch("services.llm_scheduler.LLM_SCHEDULER_ENABLED", False):
+            with pytest.raises(errors.ClientError):
+                _scheduler().run(call, model="m", contents="hi")
+        assert call.call_count == 1
@@ -0,0 +1,137 @@
+"""Tests for per-agent model tiers, latency/error-aware routing and the local stand-in provider."""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from google.genai import errors
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from services.agent_calls import AgentCall
+from services.ai_analyzer import CategoryDetectionOutput, MarketStrategyOutput
+from services.context_cache import JobContext
+from services.model_router import (
+    LocalProvider, ModelRouter, ModelSpec, Tier, llm_provider, set_model_router,
+)
+from services.research_models import IdeaGeneratorOutput
+
+_MODELS = [
+    ModelSpec("lite", "gemini", Tier.LITE),
+    ModelSpec("flash", "gemini", Tier.STANDARD),
+    ModelSpec("flash-2", "gemini", Tier.STANDARD),
+    ModelSpec("pro", "gemini", Tier.PRO),
+    ModelSpec("stand-in", "local", Tier.PRO),
+]
+
+
+def _router(**kwargs):
+    return ModelRouter(_MODELS, enabled_providers=kwargs.pop("enabled_providers", ["gemini", "local"]), **kwargs)
+
+
+def _unavailable():
+    return errors.ServerError(503, {"error": {"message": "overloaded", "status": "UNAVAILABLE"}})
+
+
+class TestLocalProvider:
+    @pytest.mark.parametrize("schema", [CategoryDetectionOutput, MarketStrategyOutput, IdeaGeneratorOutput])
+    def test_responses_match_the_schema(self, schema):
+        response = LocalProvider().generate(model="stand-in", contents="x", config={"response_schema": schema})
+        schema.model_validate_json(response.text)
+
+    def test_failure_rate(self):
+        with pytest.raises(errors.ServerError):
+            LocalProvider(failure_rate=1.0).generate(model="stand-in", config={})
+
+
+class TestRouting:
+    def test_agents_get_their_tier_or_above(self):
+        router = _router(enabled_providers=["gemini"])
+        assert [m.name for m in router.candidates("discovery_query")] == ["lite", "flash", "flash-2", "pro"]
+        assert [m.name for m in router.candidates("market_strategy")] == ["flash", "flash-2", "pro"]
+        assert router.route("unknown_agent").model == "flash"
+
+    def test_faster_model_of_a_tier_is_preferred(self):
+        router = _router(min_samples=3)
+        for _ in range(3):
+            router.record("flash", 9.0)
+            router.record("flash-2", 2.0)
+        assert router.route("researcher").model == "flash-2"
+
+    def test_degraded_model_goes_last_until_its_cooldown_ends(self):
+        router = _router(enabled_providers=["gemini"], min_samples=4, max_error_rate=0.5)
+        for latency in (1.0, None, None, None):
+            router.record("flash", latency)
+        assert [m.name for m in router.candidates("researcher")] == ["flash-2", "pro", "flash"]
+        assert router.stats()["models"]["flash"]["degraded_for_seconds"] > 0
+
+        router._stats["flash"].degraded_until = 0
+        assert router.route("researcher").model == "flash"
+
+    def test_provider_pin(self):
+        router = _router()
+        with llm_provider("local"):
+            assert [m.name for m in router.candidates("discovery_query")] == ["stand-in"]
+            assert router.uses_stand_ins()
+        with llm_provider("openai"), pytest.raises(ValueError):
+            router.candidates("researcher")
+
+    def test_disabled_router_uses_one_standard_model(self):
+        router = _router(enabled=False, enabled_providers=["gemini"])
+        assert [m.name for m in router.candidates("discovery_query")] == ["flash"]
+
+
+class TestFallback:
+    def test_falls_back_on_model_failures_and_records_them(self):
+        router = _router(enabled_providers=["gemini"])
+
+        def base(model, contents):
+            if model == "flash":
+                raise _unavailable()
+            return model
+
+        assert router.route("researcher").call(base)(model="flash", contents="x") == "flash-2"
+        stats = router.stats()["models"]
+        assert (stats["flash"]["errors"], stats["flash-2"]["calls"]) == (1, 1)
+
+    def test_request_errors_do_not_fall_back(self):
+        router = _router(enabled_providers=["gemini"])
+        bad_request = errors.ClientError(400, {"error": {"message": "bad", "status": "INVALID_ARGUMENT"}})
+        base = MagicMock(side_effect=bad_request)
+        with pytest.raises(errors.ClientError):
+            router.route("researcher").call(base)(model="flash", contents="x")
+        assert base.call_count == 1 and router.stats()["models"]["flash"]["errors"] == 0
+
+    @pytest.mark.asyncio
+    async def test_gemini_outage_falls_back_to_the_stand_in(self):
+        router = _router()
+        base = AsyncMock(side_effect=_unavailable())
+        response = await router.route("market_strategy").acall(base)(model="flash", contents="x", config={
+            "response_schema": MarketStrategyOutput,
+        })
+        assert base.await_count == 3  # flash, flash-2, pro
+        MarketStrategyOutput.model_validate_json(response.text)
+
+
+@pytest.mark.asyncio
+class TestAgentCallRouting:
+    def setup_method(self):
+        set_model_router(_router())
+
+    def teardown_method(self):
+        set_model_router(None)
+
+    async def test_local_provider_answers_without_the_api(self):
+        aclient = MagicMock()
+        with patch("services.llm_cache.LLM_CACHE_ENABLED", False), llm_provider("local"):
+            result = await AgentCall("category_detector", "idea", CategoryDetectionOutput, temperature=0.1).arun(aclient)
+        assert result.category == "mobile_app"
+        aclient.models.generate_content.assert_not_called()
+
+    async def test_job_context_pins_its_model(self):
+        context = JobContext("job-1", model="flash-2")
+        context.name = "cachedContents/abc"
+        assert AgentCall("pm_agent", "p", CategoryDetectionOutput, 0.2, context=context).model == "flash-2"
+        with llm_provider("local"):
+            assert AgentCall("pm_agent", "p", CategoryDetectionOutput, 0.2, context=context).context is None
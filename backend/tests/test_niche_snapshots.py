@@ -0,0 +1,95 @@
+"""Tests for precomputed niche snapshots."""
+
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from services import niche_snapshots
+from services.niche_snapshots import (
+    NicheSnapshot, niche_coverage, niche_phrases, top_niches, find_snapshot, refresh_niche_snapshots, snapshot_result,
+)
+from services.review_batch import ReviewBatch
+
+HISTORY = [
+    {"idea": "A habit tracker app for remote workers", "category": "mobile_app"},
+    {"idea": "Habit trackers that use streaks and friends", "category": "mobile_app"},
+    {"idea": "AI habit tracker with voice check-ins", "category": "mobile_app"},
+    {"idea": "Budget planner for couples", "category": "fintech"},
+    {"idea": "Team habit tracker dashboard", "category": "saas_web"},
+]
+
+
+def _snapshot(phrase="habit tracker", branch="app_store", hours_old=1.0, locales=("en-US",)):
+    created = datetime.now(timezone.utc) - timedelta(hours=hours_old)
+    return NicheSnapshot(
+        phrase=phrase, branch=branch, category="mobile_app", locales=list(locales),
+        competitors=[{"app_id": "com.habits", "title": "Habits", "platform": "android"}],
+        reviews=[{"id": "r1", "content": "Streaks reset randomly", "score": 2, "platform": "android", "app_id": "com.habits"}],
+        validation_count=3, created_at=created.isoformat(),
+    )
+
+
+class TestNiches:
+    def test_niche_phrases_skip_filler_and_stem(self):
+        assert niche_phrases("A habit trackers app for remote workers") == ["habit tracker", "remote worker"]
+
+    def test_top_niches_counts_per_branch(self):
+        niches = top_niches(HISTORY, top_n=5, min_count=2)
+        assert [(n.phrase, n.branch, n.validation_count) for n in niches] == [("habit tracker", "app_store", 3)]
+
+
+class TestFindSnapshot:
+    def test_fresh_matching_snapshot_is_served(self, tmp_path):
+        niche_snapshots._store.put(_snapshot(), str(tmp_path))
+        snap = find_snapshot("Habit tracker for nurses", "fintech", ["en-US"], base_dir=str(tmp_path))
+        assert snap is not None
+        reviews, metas = snapshot_result(snap)
+        assert isinstance(reviews, ReviewBatch) and reviews[0]["id"] == "r1"
+        assert metas[0]["title"] == "Habits"
+
+    def test_stale_other_branch_or_locale_is_not_served(self, tmp_path):
+        base = str(tmp_path)
+        niche_snapshots._store.put(_snapshot(hours_old=48), base)
+        assert find_snapshot("habit tracker", "mobile_app", ["en-US"], base_dir=base) is None
+        niche_snapshots._store.put(_snapshot(), base)
+        assert find_snapshot("habit tracker", "hardware", ["en-US"], base_dir=base) is None
+        assert find_snapshot("habit tracker", "mobile_app", ["de-DE"], base_dir=base) is None
+        assert find_snapshot("budget planner", "mobile_app", ["en-US"], base_dir=base) is None
+
+    def test_specific_idea_containing_the_phrase_is_not_served(self, tmp_path):
+        niche_snapshots._store.put(_snapshot(), str(tmp_path))
+        idea = "Habit tracker for night-shift nurses with rota-aware sleep reminders"
+        assert niche_coverage("habit tracker", idea) < niche_snapshots.NICHE_MIN_COVERAGE
+        assert find_snapshot(idea, "mobile_app", ["en-US"], base_dir=str(tmp_path)) is None
+
+    def test_snapshots_survive_reload(self, tmp_path):
+        niche_snapshots._store.put(_snapshot(), str(tmp_path))
+        niche_snapshots._store._loaded_from = None
+        assert find_snapshot("habit tracker", "mobile_app", ["en-US"], base_dir=str(tmp_path)) is not None
+
+
+class TestRefresh:
+    def test_refresh_builds_missing_and_skips_fresh(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(niche_snapshots, "NICHE_MIN_VALIDATIONS", 2)
+        history = HISTORY + [{"idea": "Budget planner with receipts", "category": "fintech"}]
+        calls = []
+
+        def fake_discover(idea, category, locales, use_snapshots=True):
+            calls.append((idea, category, use_snapshots))
+            return ReviewBatch.from_dicts([{"id": "x", "content": "ok", "score": 4}]), [{"title": idea}]
+
+        with patch("services.niche_snapshots.list_recent_validations", return_value=history), \
+             patch("services.discovery.discover_competitors_and_scrape", side_effect=fake_discover), \
+             patch.object(niche_snapshots, "top_niches", wraps=lambda v: top_niches(v, min_count=2)):
+            written = refresh_niche_snapshots(base_dir=str(tmp_path))
+            again = refresh_niche_snapshots(base_dir=str(tmp_path))
+
+        assert sorted(written) == ["app_store__budget_planner", "app_store__habit_tracker"]
+        assert again == []
+        assert all(use is False for _, _, use in calls)
+        assert len(calls) == 2
@@ -0,0 +1,99 @@
+"""Tests for token-budgeted prompt assembly and the compact evidence encodings."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from services import prompt_budget
+from services.prompt_budget import Evidence, TokenEstimator, bullets, compact_line, fit_prompt
+from services.review_batch import ReviewBatch
+from services.community_scraper import CommunityScrapingResult, ScrapedPost, CommunitySource
+
+
+@pytest.fixture
+def estimator(monkeypatch):
+    e = TokenEstimator(calibrate_every=0)
+    monkeypatch.setattr(prompt_budget, "_estimator", e)
+    monkeypatch.setattr(prompt_budget, "PROMPT_BUDGET_ENABLED", True)
+    return e
+
+
+class TestTokenEstimator:
+    def test_ascii_and_other_scripts(self):
+        e = TokenEstimator(calibrate_every=0)
+        assert e.estimate("") == 0
+        assert e.estimate("a" * 400) == 101
+        assert e.estimate("字" * 30) > e.estimate("a" * 30)
+
+    def test_observe_calibrates_scale(self):
+        e = TokenEstimator(calibrate_every=0)
+        text = "a" * 400  # raw estimate 100
+        e.observe(text, 150)
+        assert e.scale == pytest.approx(1.5)
+        e.observe(text, 100)
+        assert 1.0 < e.scale < 1.5
+
+    def test_sample_checks_count_tokens_periodically(self):
+        e = TokenEstimator(calibrate_every=2)
+        client = MagicMock()
+        client.models.count_tokens.return_value = MagicMock(total_tokens=200)
+        with patch("services.gemini_client.get_gemini_client", return_value=client):
+            e.sample("a" * 400, "m")
+            e.sample("a" * 400, "m")
+            e._pool.submit(lambda: None).result(timeout=2)  # drain the calibration queue
+        assert client.models.count_tokens.call_count == 1
+        assert e.scale == pytest.approx(2.0)
+
+
+class TestFitPrompt:
+    def test_everything_fits_under_budget(self, estimator, monkeypatch):
+        monkeypatch.setitem(prompt_budget.AGENT_TOKEN_BUDGETS, "a", 1000)
+        prompt = fit_prompt("a", lambda ev: f"Evidence:\n{ev}", ev=Evidence("one\ntwo"))
+        assert prompt == "Evidence:\none\ntwo"
+
+    def test_higher_priority_slots_fill_first(self, estimator, monkeypatch):
+        monkeypatch.setitem(prompt_budget.AGENT_TOKEN_BUDGETS, "a", 60)
+        line = "x" * 40  # ~11 tokens each
+        prompt = fit_prompt(
+            "a", lambda low, high: f"{high}\n--\n{low}",
+            low=Evidence([f"L{i}{line}" for i in range(5)], priority=1),
+            high=Evidence([f"H{i}{line}" for i in range(3)], priority=0),
+        )
+        assert estimator.estimate(prompt) <= 60
+        assert prompt.count("H") == 3
+        assert 0 < prompt.count("L") < 5
+        assert "L0" in prompt  # lines kept in order
+
+    def test_agent_without_budget_keeps_everything(self, estimator):
+        lines = [f"line {i}" for i in range(1000)]
+        assert fit_prompt("unbudgeted", lambda ev: ev, ev=Evidence(lines)).count("\n") == 999
+
+
+class TestCompactEncodings:
+    def test_compact_line_and_bullets(self):
+        assert compact_line("  a\n\n b\tc ") == "a b c"
+        assert compact_line("abcdef", limit=4) == "abc…"
+        assert bullets(["one", " ", "two"]) == ["  • one", "  • two"]
+
+    def test_review_lines(self):
+        batch = ReviewBatch.from_dicts([
+            {"id": "1", "content": "Great\napp", "score": 5},
+            {"id": "2", "content": "Crashes", "score": None},
+        ])
+        assert batch.to_prompt_lines() == ["5★ Great app", "?★ Crashes"]
+
+    def test_community_lines(self):
+        result = CommunityScrapingResult(posts=[
+            ScrapedPost(source=CommunitySource.REDDIT, title="Need a tracker", content="Anyone know one?",
+                        subreddit="apps", score=42),
+            ScrapedPost(source=CommunitySource.HACKERNEWS, content="Ask HN: trackers"),
+        ])
+        assert result.to_prompt_lines() == [
+            "[reddit r/apps ▲42] Need a tracker — Anyone know one?",
+            "[hackernews] Ask HN: trackers",
+        ]
+        assert len(result.to_prompt_lines(limit=1)) == 1
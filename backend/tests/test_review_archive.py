@@ -0,0 +1,80 @@
+"""Tests for the Parquet review/post archive and its analytics queries."""
+
+from datetime import date, datetime, timezone
+import pytest
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from services.review_archive import (
+    archive_reviews,
+    archive_posts,
+    rating_histogram,
+    volume_over_time,
+    top_terms,
+    load_archived_reviews,
+)
+
+
+def _reviews():
+    return [
+        {"id": "r1", "app_id": "com.a", "content": "Sync keeps crashing on login", "score": 1, "date": "2026-03-01", "platform": "android", "locale": "en-US"},
+        {"id": "r2", "app_id": "com.a", "content": "Great widgets, sync is slow", "score": 4, "date": "2026-03-02", "platform": "android", "locale": "en-US"},
+        {"id": "r3", "app_id": "123", "content": "Crashing after update", "score": 1, "date": "", "platform": "ios", "locale": "de-DE"},
+    ]
+
+
+@pytest.fixture
+def archive_dir(tmp_path):
+    base = str(tmp_path / "archive")
+    archive_reviews(_reviews(), base_dir=base, wait=True)
+    archive_posts([
+        {"source": "reddit", "title": "Sync app?", "content": "Looking for a sync app that works offline", "score": 12},
+    ], base_dir=base, wait=True)
+    return base
+
+
+class TestArchiveWrites:
+    def test_hive_partitions_by_date_and_source(self, archive_dir):
+        today = datetime.now(timezone.utc).date().isoformat()
+        parts = sorted(os.listdir(os.path.join(archive_dir, f"date={today}")))
+        assert parts == ["source=android", "source=ios", "source=reddit"]
+
+    def test_empty_batch_writes_nothing(self, tmp_path):
+        base = str(tmp_path / "empty")
+        archive_reviews([], base_dir=base, wait=True)
+        assert not os.path.exists(base)
+
+
+class TestArchiveQueries:
+    def test_missing_archive_returns_empty(self, tmp_path):
+        base = str(tmp_path / "nope")
+        assert rating_histogram(base_dir=base) == {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
+        assert volume_over_time(base_dir=base) == []
+        assert top_terms(base_dir=base) == []
+
+    def test_rating_histogram(self, archive_dir):
+        assert rating_histogram(base_dir=archive_dir) == {1: 2, 2: 0, 3: 0, 4: 1, 5: 0}
+        assert rating_histogram(source="ios", base_dir=archive_dir) == {1: 1, 2: 0, 3: 0, 4: 0, 5: 0}
+
+    def test_rating_histogram_excludes_posts(self, archive_dir):
+        assert sum(rating_histogram(base_dir=archive_dir).values()) == 3
+
+    def test_volume_over_time(self, archive_dir):
+        today = datetime.now(timezone.utc).date().isoformat()
+        assert volume_over_time(base_dir=archive_dir) == [
+            {"date": today, "source": "android", "count": 2},
+            {"date": today, "source": "ios", "count": 1},
+            {"date": today, "source": "reddit", "count": 1},
+        ]
+        assert volume_over_time(since=date(2100, 1, 1), base_dir=archive_dir) == []
+
+    def test_top_terms(self, archive_dir):
+        terms = top_terms(kind="review", base_dir=archive_dir, limit=2)
+        assert terms == [{"term": "crashing", "count": 2}, {"term": "sync", "count": 2}]
+
+    def test_load_archived_reviews(self, archive_dir):
+        reviews = load_archived_reviews(["com.a"], base_dir=archive_dir)
+        assert sorted(r["id"] for r in reviews) == ["r1", "r2"]
+        assert all(r["platform"] == "android" for r in reviews)
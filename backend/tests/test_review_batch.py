@@ -0,0 +1,66 @@
+"""Tests for the columnar ReviewBatch."""
+
+import numpy as np
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from services.review_batch import ReviewBatch
+
+
+def _rows():
+    return [
+        {"id": "1", "app_id": "com.a", "content": "Crashes on \"sync\" — 😡", "score": 1, "date": "2026-03-01", "platform": "android"},
+        {"id": "2", "app_id": "com.a", "content": "Great widgets", "score": 5, "date": "", "platform": "android"},
+        {"id": "3", "app_id": "42", "content": "Too pricey\nfor what it does", "score": None, "date": "", "platform": "ios"},
+        {"id": "4", "app_id": "42", "content": "Sync is slow", "score": 2, "date": "", "platform": "ios"},
+    ]
+
+
+class TestReviewBatch:
+    def test_round_trip_dicts(self):
+        batch = ReviewBatch.from_dicts(_rows())
+        assert len(batch) == 4
+        assert batch[2]["score"] is None
+        assert [r["id"] for r in batch.to_dicts()] == ["1", "2", "3", "4"]
+        assert batch.to_dicts()[3]["platform"] == "ios"
+
+    def test_platforms_are_interned(self):
+        batch = ReviewBatch.from_dicts(_rows())
+        assert batch._platforms.names == ["android", "ios"]
+        assert batch.platforms.tolist() == ["android", "android", "ios", "ios"]
+
+    def test_slice_and_filter(self):
+        batch = ReviewBatch.from_dicts(_rows())
+        assert batch[:2].ids.tolist() == ["1", "2"]
+        low = batch.filter((batch.scores >= 0) & (batch.scores <= 2))
+        assert low.ids.tolist() == ["1", "4"]
+        assert low.platforms.tolist() == ["android", "ios"]
+
+    def test_sample_is_deterministic_and_ordered(self):
+        batch = ReviewBatch.from_dicts([{"id": str(i), "content": "x", "score": i % 5 + 1} for i in range(100)])
+        a, b = batch.sample(10, seed=3), batch.sample(10, seed=3)
+        assert a.ids.tolist() == b.ids.tolist()
+        assert len(a) == 10
+        assert a.ids.astype(int).tolist() == sorted(a.ids.astype(int).tolist())
+
+    def test_stratified_sample_keeps_every_rating(self):
+        rows = [{"id": str(i), "content": "x", "score": 5} for i in range(95)]
+        rows += [{"id": f"low{i}", "content": "x", "score": 1} for i in range(5)]
+        sample = ReviewBatch.from_dicts(rows).sample(10, stratify_by_score=True)
+        assert len(sample) == 10
+        assert set(np.unique(sample.scores).tolist()) == {1, 5}
+
+    def test_sample_spans_every_app(self):
+        rows = [{"id": f"{app}{i}", "app_id": app, "content": "x", "score": 3} for app in ("a", "b", "c") for i in range(100)]
+        sample = ReviewBatch.from_dicts(rows).sample(30, stratify_by_score=True)
+        assert sorted(set(sample.app_ids.tolist())) == ["a", "b", "c"]
+
+    def test_concat_and_coerce(self):
+        a = ReviewBatch.from_dicts(_rows()[:2], locales=["en-US"] * 2)
+        b = ReviewBatch.from_dicts(_rows()[2:], locales=["de-DE"] * 2)
+        merged = ReviewBatch.concat([a, b])
+        assert merged.locales.tolist() == ["en-US", "en-US", "de-DE", "de-DE"]
+        assert ReviewBatch.coerce(merged) is merged
+        assert len(ReviewBatch.coerce(None)) == 0
@@ -0,0 +1,97 @@
+"""Tests for the review preprocessing stage."""
+
+import pytest
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from services.review_preprocessor import preprocess_reviews
+
+
+def _review(rid, content, score=4, platform="android"):
+    return {"id": rid, "content": content, "score": score, "date": "", "platform": platform}
+
+
+class TestPreprocessReviews:
+    def test_empty_input(self):
+        kept, stats = preprocess_reviews([])
+        assert len(kept) == 0
+        assert stats.input_count == 0
+        assert stats.dropped_count == 0
+
+    def test_keeps_clean_reviews_in_order(self):
+        reviews = [
+            _review("1", "Crashes every time I open the sync screen"),
+            _review("2", "Love the widgets but the subscription is too expensive"),
+        ]
+        kept, stats = preprocess_reviews(reviews)
+        assert [r["id"] for r in kept] == ["1", "2"]
+        assert stats.dropped_count == 0
+        assert all(r["lang"] == "en" for r in kept)
+
+    def test_normalizes_whitespace_and_caps_length(self):
+        reviews = [_review("1", "  Too   many\n\nads in   this app  " + "x" * 50)]
+        kept, _ = preprocess_reviews(reviews, max_chars=30)
+        assert kept[0]["content"] == "Too many ads in this app xxxxx"
+
+    def test_drops_exact_duplicates_after_normalization(self):
+        reviews = [
+            _review("1", "The app keeps logging me out every day"),
+            _review("2", "the app keeps logging me out every day!!"),
+        ]
+        kept, stats = preprocess_reviews(reviews)
+        assert [r["id"] for r in kept] == ["1"]
+        assert stats.dropped == {"duplicate": 1}
+
+    def test_drops_near_duplicates(self):
+        reviews = [
+            _review("1", "This app is great and I use it every day for my habits"),
+            _review("2", "this app is great and i use it every day for my habits too"),
+        ]
+        kept, stats = preprocess_reviews(reviews)
+        assert [r["id"] for r in kept] == ["1"]
+        assert stats.dropped == {"near_duplicate": 1}
+
+    def test_drops_empty_emoji_only_and_short(self):
+        reviews = [
+            _review("1", ""),
+            _review("2", "😍😍😍"),
+            _review("3", "Ok"),
+            _review("4", "Syncing with my watch stopped working after the update"),
+        ]
+        kept, stats = preprocess_reviews(reviews)
+        assert [r["id"] for r in kept] == ["4"]
+        assert stats.dropped == {"empty": 1, "emoji_only": 1, "too_short": 1}
+
+    def test_language_filter_respects_allowed_languages(self):
+        reviews = [
+            _review("1", "La aplicación es muy buena pero no tiene modo oscuro"),
+            _review("2", "这个应用非常好用，我每天都用它来记录习惯"),
+            _review("3", "The dark mode is missing and the fonts are tiny"),
+        ]
+        kept, stats = preprocess_reviews(reviews)
+        assert [r["id"] for r in kept] == ["3"]
+        assert stats.dropped == {"language": 2}
+
+        kept, _ = preprocess_reviews(reviews, languages=("en", "es", "zh"))
+        assert [(r["id"], r["lang"]) for r in kept] == [("1", "es"), ("2", "zh"), ("3", "en")]
+
+    def test_drops_promotional_spam(self):
+        reviews = [
+            _review("1", "Use promo code XYZ for free coins, visit www.spam-site.com now"),
+            _review("2", "Battery drain is terrible since the last version"),
+        ]
+        kept, stats = preprocess_reviews(reviews)
+        assert [r["id"] for r in kept] == ["2"]
+        assert stats.dropped == {"spam": 1}
+
+    def test_does_not_mutate_input(self):
+        reviews = [_review("1", "  Great   app for tracking my daily runs  ")]
+        preprocess_reviews(reviews)
+        assert reviews[0]["content"] == "  Great   app for tracking my daily runs  "
+        assert "lang" not in reviews[0]
+
+    def test_summary_lists_reasons(self):
+        _, stats = preprocess_reviews([_review("1", ""), _review("2", "Works well on my old tablet too")])
+        assert stats.summary() == "kept 1/2 reviews (dropped 1: empty=1)"
@@ -0,0 +1,126 @@
+"""Tests for the opportunity scoring engine and bulk re-scoring."""
+
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from services.ai_analyzer import OpportunityScoreBreakdown
+from services.db import update_validation_scores
+from services.scoring import (
+    DEFAULT_WEIGHTS, SCORE_DIMENSIONS, ScoringEngine, rescore_if_weights_changed, rescore_validations,
+)
+
+_BREAKDOWN = {
+    "pain_severity": 80, "market_gap": 70, "mvp_feasibility": 60, "competition_density": 40,
+    "monetization_potential": 55, "community_demand": 90, "startup_saturation": 30,
+}
+
+
+def _legacy_score(breakdown):
+    return max(0, min(100, round(sum(breakdown[k] * w for k, w in DEFAULT_WEIGHTS.items()))))
+
+
+class TestScoringEngine:
+    def test_default_weights_match_the_original_formula(self):
+        engine = ScoringEngine()
+        assert engine.score(_BREAKDOWN, "mobile_app") == _legacy_score(_BREAKDOWN) == 65
+        assert engine.score(OpportunityScoreBreakdown(**_BREAKDOWN)) == 65
+
+    def test_bulk_scores_match_single_scores(self):
+        rng = np.random.default_rng(7)
+        breakdowns = [dict(zip(SCORE_DIMENSIONS, map(int, rng.integers(0, 101, len(SCORE_DIMENSIONS))))) for _ in range(500)]
+        categories = [["mobile_app", "hardware", "fintech", "saas_web"][i % 4] for i in range(500)]
+        engine = ScoringEngine({"hardware": {"mvp_feasibility": 0.3, "pain_severity": 0.1}})
+        bulk = engine.score_many(breakdowns, categories)
+        assert [int(s) for s in bulk] == [engine.score(b, c) for b, c in zip(breakdowns, categories)]
+        default = [i for i, c in enumerate(categories) if c != "hardware"]
+        assert all(abs(int(bulk[i]) - _legacy_score(breakdowns[i])) <= 1 for i in default)  # ties round half up
+
+    def test_category_weights_start_from_the_default_set(self):
+        engine = ScoringEngine({"default": {"startup_saturation": 0.0, "pain_severity": 0.3}, "hardware": {"market_gap": 0.1}})
+        hardware = engine.weights("hardware")
+        assert hardware["market_gap"] == 0.1 and hardware["pain_severity"] == 0.3
+        assert engine.weights("unknown")["startup_saturation"] == 0.0
+        assert engine.version != ScoringEngine().version
+
+    def test_invalid_weights(self):
+        with pytest.raises(ValueError):
+            ScoringEngine({"default": {"virality": 0.2}})
+        with pytest.raises(ValueError):
+            ScoringEngine({"fintech": {d: 0 for d in SCORE_DIMENSIONS}})
+
+    def test_missing_dimensions_renormalize_and_empty_breakdowns_are_unscorable(self):
+        older = {k: v for k, v in _BREAKDOWN.items() if k not in ("community_demand", "startup_saturation")}
+        scores = ScoringEngine().score_many([older, {}, None], ["mobile_app"] * 3)
+        expected = sum(older[k] * DEFAULT_WEIGHTS[k] for k in older) / sum(DEFAULT_WEIGHTS[k] for k in older)
+        assert scores[0] == round(expected)
+        assert np.isnan(scores[1]) and np.isnan(scores[2])
+
+
+class TestRescore:
+    def _history(self):
+        return [[
+            {"id": 1, "category": "mobile_app", "score_breakdown": _BREAKDOWN, "opportunity_score": 65},
+            {"id": 2, "category": "hardware", "score_breakdown": _BREAKDOWN, "opportunity_score": 65},
+            {"id": 3, "category": "fintech", "score_breakdown": {}, "opportunity_score": 50},
+        ]]
+
+    @pytest.fixture
+    def recorded(self):
+        state = {}
+        with patch("services.db.get_scoring_weights_version", side_effect=lambda: state.get("version")), \
+                patch("services.db.set_scoring_weights_version", side_effect=lambda v: state.update(version=v)):
+            yield state
+
+    def test_writes_only_changed_scores_and_records_version(self, recorded):
+        engine = ScoringEngine({"hardware": {"community_demand": 0.0}})
+        with patch("services.db.iter_validation_scores", return_value=self._history()), \
+                patch("services.db.update_validation_scores", return_value=1) as update:
+            report = rescore_validations(engine)
+        update.assert_called_once_with([(2, engine.score(_BREAKDOWN, "hardware"))])
+        assert (report.scanned, report.changed, report.unscorable, report.failed) == (3, 1, 1, 0)
+        assert recorded["version"] == engine.version
+
+    def test_failed_updates_leave_the_version_unrecorded(self, recorded):
+        with patch("services.db.iter_validation_scores", return_value=self._history()), \
+                patch("services.db.update_validation_scores", return_value=0):
+            report = rescore_validations(ScoringEngine({"hardware": {"community_demand": 0.0}}))
+        assert report.failed == 1 and "version" not in recorded
+
+    def test_dry_run_writes_nothing(self, recorded):
+        with patch("services.db.iter_validation_scores", return_value=self._history()), \
+                patch("services.db.update_validation_scores") as update:
+            report = rescore_validations(ScoringEngine({"hardware": {"community_demand": 0.0}}), dry_run=True)
+        update.assert_not_called()
+        assert report.changed == 1 and "version" not in recorded
+
+    def test_runs_once_per_weight_version(self, recorded):
+        engine = ScoringEngine()
+        with patch("services.db.iter_validation_scores", side_effect=lambda size: iter(self._history())) as pages, \
+                patch("services.db.update_validation_scores", side_effect=len):
+            assert rescore_if_weights_changed(engine) is not None
+            assert rescore_if_weights_changed(engine) is None
+            assert rescore_if_weights_changed(ScoringEngine({"saas_web": {"market_gap": 0.3}})) is not None
+        assert pages.call_count == 2
+
+
+class TestBulkScoreUpdate:
+    def test_one_call_per_page(self):
+        supabase = MagicMock()
+        supabase.rpc.return_value.execute.return_value.data = 2
+        with patch("services.db.get_supabase", return_value=supabase):
+            assert update_validation_scores([(1, 70), (2, 55)]) == 2
+        supabase.rpc.assert_called_once_with("set_opportunity_scores", {"scores": [
+            {"id": 1, "score": 70}, {"id": 2, "score": 55},
+        ]})
+
+    def test_failed_call_updates_nothing(self):
+        supabase = MagicMock()
+        supabase.rpc.return_value.execute.side_effect = RuntimeError("timeout")
+        with patch("services.db.get_supabase", return_value=supabase):
+            assert update_validation_scores([(1, 70)]) == 0
@@ -0,0 +1,91 @@
+"""Tests for multi-locale review fan-out in the store scraper."""
+
+import threading
+import time
+import pytest
+from unittest.mock import patch
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from services.scraper import parse_locale, locale_languages, scrape_reviews_across_locales, validate_locales
+
+
+def _fake_play(app_id, count, lang, country):
+    return [
+        {"id": f"{app_id}-{i}", "content": f"{lang} review {i}", "score": 4, "date": "", "platform": "android"}
+        for i in range(3)
+    ]
+
+
+def _fake_ios(app_name, app_id, count, country):
+    return [
+        {"id": f"{country}-{app_id}-{i}", "content": f"{country} review {i}", "score": 3, "date": "", "platform": "ios"}
+        for i in range(2)
+    ]
+
+
+class TestParseLocale:
+    def test_language_and_country(self):
+        assert parse_locale("es-MX") == ("es", "mx")
+
+    def test_underscore_separator(self):
+        assert parse_locale("pt_BR") == ("pt", "br")
+
+    def test_bare_language_uses_default_country(self):
+        assert parse_locale("ja") == ("ja", "jp")
+        assert parse_locale("de") == ("de", "de")
+
+    def test_locale_languages_dedupes(self):
+        assert locale_languages(["en-US", "en-GB", "de-DE"]) == ["en", "de"]
+
+    def test_locale_languages_default(self):
+        assert locale_languages(None) == ["en"]
+
+    def test_validate_normalizes_and_dedupes(self):
+        assert validate_locales(["de", "es_mx", "de-DE"]) == ["de-DE", "es-MX"]
+        assert validate_locales(None) is None
+
+    @pytest.mark.parametrize("locales", [["en-US", "not a locale"], ["en-USA"], [""], [f"e{c}" for c in "abcdefgh"]])
+    def test_validate_rejects_malformed_or_too_many(self, locales):
+        with pytest.raises(ValueError):
+            validate_locales(locales)
+
+
+class TestScrapeReviewsAcrossLocales:
+    @pytest.fixture(autouse=True)
+    def _no_archive(self):
+        with patch("services.scraper.archive_reviews"):
+            yield
+
+    def test_no_apps_returns_empty(self):
+        assert len(scrape_reviews_across_locales([], [], ["en-US"])) == 0
+
+    def test_tags_locale_and_interleaves(self):
+        with patch("services.scraper.scrape_play_store_reviews", side_effect=_fake_play), \
+             patch("services.scraper.scrape_app_store_reviews", side_effect=_fake_ios):
+            merged = scrape_reviews_across_locales(["com.a"], [("com.b", 42)], ["en-US", "de-DE"])
+        assert [r["locale"] for r in merged[:2]] == ["en-US", "de-DE"]
+        assert {r["locale"] for r in merged} == {"en-US", "de-DE"}
+        # Play review IDs repeat across locales and are deduplicated; iOS IDs are per-country.
+        assert sum(r["platform"] == "android" for r in merged) == 3
+        assert sum(r["platform"] == "ios" for r in merged) == 4
+
+    def test_locales_fetched_concurrently(self):
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def slow_play(app_id, count, lang, country):
+            with lock:
+                active.append(1)
+                peak.append(len(active))
+            time.sleep(0.05)
+            with lock:
+                active.pop()
+            return []
+
+        with patch("services.scraper.scrape_play_store_reviews", side_effect=slow_play):
+            scrape_reviews_across_locales(["com.a"], [], ["en-US", "de-DE", "fr-FR"])
+        assert max(peak) > 1
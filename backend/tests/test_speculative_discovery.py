@@ -0,0 +1,62 @@
+"""Tests for speculative discovery started alongside category detection."""
+
+import threading
+from unittest.mock import patch, MagicMock
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from services import discovery
+from services.discovery import SpeculativeDiscovery, discovery_branch, discover_competitors_and_scrape
+from services.model_router import current_llm_provider, llm_provider
+from services.review_batch import ReviewBatch
+
+
+class TestDiscoveryBranch:
+    def test_mobile_and_fintech_share_app_store_branch(self):
+        assert discovery_branch("mobile_app") == discovery_branch("fintech") == "app_store"
+        assert discovery_branch("hardware") == "hardware"
+        assert discovery_branch("saas_web") == "saas_web"
+
+
+class TestSpeculativeDiscovery:
+    def test_matching_category_reuses_result(self):
+        fake = MagicMock(return_value=(ReviewBatch(), [{"title": "A"}]))
+        with patch.object(discovery, "discover_competitors_and_scrape", fake):
+            spec = SpeculativeDiscovery("idea", "mobile_app", ["en-US"])
+            assert spec.matches("fintech")
+            assert spec.result()[1] == [{"title": "A"}]
+        assert fake.call_args.args == ("idea", "mobile_app", ["en-US"])
+
+    def test_run_keeps_the_callers_provider_pin(self):
+        def discover(idea, category, locales, cancel_event=None):
+            return ReviewBatch(), [{"provider": current_llm_provider()}]
+
+        with patch.object(discovery, "discover_competitors_and_scrape", side_effect=discover), llm_provider("local"):
+            spec = SpeculativeDiscovery("idea", "mobile_app")
+        assert spec.result()[1] == [{"provider": "local"}]
+
+    def test_wrong_prediction_cancels_run(self):
+        started, seen = threading.Event(), {}
+
+        def slow(idea, category, locales, cancel_event=None):
+            started.set()
+            seen["cancelled"] = cancel_event.wait(2)
+            return ReviewBatch(), []
+
+        with patch.object(discovery, "discover_competitors_and_scrape", side_effect=slow):
+            spec = SpeculativeDiscovery("idea", "mobile_app")
+            started.wait(2)
+            assert not spec.matches("hardware")
+            spec.cancel()
+            spec._future.result(timeout=2)
+        assert seen["cancelled"] is True
+
+    def test_cancel_event_stops_before_llm_call(self):
+        cancel = threading.Event()
+        cancel.set()
+        with patch("services.discovery.get_gemini_client") as client:
+            reviews, metas = discover_competitors_and_scrape("idea", "mobile_app", cancel_event=cancel)
+        assert len(reviews) == 0 and metas == []
+        client.return_value.models.generate_content.assert_not_called()
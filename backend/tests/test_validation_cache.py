@@ -0,0 +1,160 @@
+"""Tests for the semantic validation result cache."""
+
+import time
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from services import validation_cache
+from services.validation_cache import (
+    SemanticValidationCache, embed_idea, find_cached_validation, get_cached_validation, remember_validation,
+    set_validation_cache,
+)
+
+_IDEA = "habit tracker app for college students"
+_PARAPHRASE = "An app to help students in college track their habits"
+_RESULT = {"opportunity_score": 72, "category": "mobile_app"}
+
+
+class TestEmbedding:
+    def test_paraphrase_is_close_and_unrelated_idea_is_far(self):
+        idea = embed_idea(_IDEA)
+        assert float(idea @ embed_idea(_PARAPHRASE)) >= 0.8
+        assert float(idea @ embed_idea("Marketplace for renting industrial drones to farmers")) < 0.5
+        assert float(np.linalg.norm(idea)) == pytest.approx(1.0, abs=1e-5)
+
+    def test_idea_without_content_words(self):
+        assert not embed_idea("the and of").any()
+
+
+class TestSemanticValidationCache:
+    def test_near_match_is_not_exact_and_unrelated_idea_misses(self):
+        cache = SemanticValidationCache(None)
+        cache.store(_IDEA, "mobile_app", None, _RESULT)
+        assert cache.lookup(_PARAPHRASE, "mobile_app").exact  # the same content words
+        hit = cache.lookup("habit tracker app for college students with streaks", "mobile_app")
+        assert hit and hit.result == _RESULT and hit.idea == _IDEA and not hit.exact
+        assert cache.lookup("Smart insoles that coach runners on their stride", "mobile_app") is None
+
+    def test_same_words_in_another_order_are_exact(self):
+        cache = SemanticValidationCache(None)
+        cache.store(_IDEA, "mobile_app", None, _RESULT)
+        assert cache.lookup("College students' app for tracking habits", "mobile_app").exact
+
+    @pytest.mark.parametrize("stored, submitted", [
+        ("An app that helps parents plan healthy weekly meals for their kids with grocery lists",
+         "An app that helps parents plan healthy weekly meals for their dogs with grocery lists"),
+        ("habit tracker", "habit tracker for teams"),
+        ("budgeting app for freelancers", "budgeting app for restaurants"),
+    ])
+    def test_ideas_differing_in_audience_or_one_term_are_never_exact(self, stored, submitted):
+        cache = SemanticValidationCache(None)
+        cache.store(stored, "mobile_app", None, _RESULT)
+        hit = cache.lookup(submitted, "mobile_app")
+        assert hit is None or not hit.exact
+
+    def test_partitioned_by_category_and_markets(self):
+        cache = SemanticValidationCache(None)
+        cache.store(_IDEA, "mobile_app", ["en-US", "de-DE"], _RESULT)
+        assert cache.lookup(_IDEA, "saas_web", ["en-US", "de-DE"]) is None
+        assert cache.lookup(_IDEA, "mobile_app") is None
+        assert cache.lookup(_IDEA, "mobile_app", ["de-DE", "en-US"]) is not None
+
+    def test_expired_entries_miss(self):
+        cache = SemanticValidationCache(None, ttl_hours=1)
+        with patch("services.validation_cache.time.time", return_value=time.time() - 7200):
+            cache.store(_IDEA, "mobile_app", None, _RESULT)
+        assert cache.lookup(_IDEA, "mobile_app") is None
+
+    def test_new_result_supersedes_the_same_idea(self, tmp_path):
+        cache = SemanticValidationCache(str(tmp_path / "cache.db"))
+        cache.store(_IDEA, "mobile_app", None, _RESULT)
+        newer = cache.store(_IDEA, "mobile_app", None, {"opportunity_score": 80})
+        hit = cache.lookup(_IDEA, "mobile_app")
+        assert hit.entry_id == newer and hit.result["opportunity_score"] == 80
+        reloaded = SemanticValidationCache(str(tmp_path / "cache.db"))
+        assert reloaded.lookup(_IDEA, "mobile_app").entry_id == newer
+
+    def test_owner_persists_across_instances(self, tmp_path):
+        path = str(tmp_path / "cache.db")
+        entry_id = SemanticValidationCache(path).store(_IDEA, "mobile_app", None, _RESULT, "alice")
+        reloaded = SemanticValidationCache(path)
+        assert reloaded.get(entry_id, "alice").user_id == "alice"
+        assert reloaded.get(entry_id, "bob") is None
+
+    def test_persists_across_instances(self, tmp_path):
+        path = str(tmp_path / "cache.db")
+        SemanticValidationCache(path).store(_IDEA, "mobile_app", None, _RESULT)
+        hit = SemanticValidationCache(path).lookup(_PARAPHRASE, "mobile_app")
+        assert hit and hit.result == _RESULT and hit.age_hours < 1
+
+    def test_keeps_at_most_max_entries(self, tmp_path):
+        cache = SemanticValidationCache(str(tmp_path / "cache.db"), max_entries=2)
+        cache.store("budgeting app for freelancers", "fintech", None, _RESULT)
+        cache.store("invoice scanner for plumbers", "fintech", None, _RESULT)
+        cache.store("crypto tax calculator for gamers", "fintech", None, _RESULT)
+        assert cache.lookup("budgeting app for freelancers", "fintech") is None
+        assert cache.lookup("crypto tax calculator for gamers", "fintech") is not None
+        assert cache.lookup("invoice scanner for plumbers", "fintech") is not None
+        reloaded = SemanticValidationCache(str(tmp_path / "cache.db"), max_entries=2)
+        assert reloaded.lookup("budgeting app for freelancers", "fintech") is None
+        assert reloaded.lookup("invoice scanner for plumbers", "fintech") is not None
+
+    def test_in_memory_cache_is_capped_too(self):
+        cache = SemanticValidationCache(None, max_entries=2)
+        for idea in ("budgeting app for freelancers", "invoice scanner for plumbers", "crypto tax calculator for gamers"):
+            cache.store(idea, "fintech", None, _RESULT)
+        assert cache.lookup("budgeting app for freelancers", "fintech") is None
+        assert len(cache._results) == 2
+
+
+class TestSharedCache:
+    def setup_method(self):
+        set_validation_cache(SemanticValidationCache(None))
+
+    def teardown_method(self):
+        set_validation_cache(None)
+
+    def test_remember_then_find(self):
+        remember_validation(_IDEA, "mobile_app", None, _RESULT)
+        assert find_cached_validation(_PARAPHRASE, "mobile_app").result == _RESULT
+
+    def test_offered_entry_can_be_fetched_by_id(self):
+        remember_validation(_IDEA, "mobile_app", None, _RESULT, "alice")
+        offered = find_cached_validation(_PARAPHRASE, "mobile_app", user_id="alice")
+        taken = get_cached_validation(offered.entry_id, "alice")
+        assert taken.idea == _IDEA and taken.result == _RESULT
+        assert get_cached_validation(offered.entry_id + 1, "alice") is None
+
+    def test_near_matches_stay_with_their_owner(self):
+        remember_validation(_IDEA, "mobile_app", None, _RESULT, "alice")
+        near = "habit tracker app for college students with streaks"
+        assert find_cached_validation(near, "mobile_app", user_id="bob") is None
+        assert find_cached_validation(near, "mobile_app", user_id="alice").user_id == "alice"
+        assert find_cached_validation(_PARAPHRASE, "mobile_app", user_id="bob").exact
+        entry_id = find_cached_validation(near, "mobile_app", user_id="alice").entry_id
+        assert get_cached_validation(entry_id, "bob") is None
+
+    def test_a_users_own_near_match_is_offered_over_a_closer_one(self):
+        remember_validation("habit tracker app for college students with streaks and friends", "mobile_app", None, _RESULT, "alice")
+        remember_validation("habit tracker app for college students with streaks badges and reminders", "mobile_app", None, _RESULT, "bob")
+        idea = "habit tracker app for college students with streaks and badges"
+        assert find_cached_validation(idea, "mobile_app").user_id == "bob"
+        assert find_cached_validation(idea, "mobile_app", user_id="alice").user_id == "alice"
+
+    def test_disabled(self, monkeypatch):
+        monkeypatch.setattr(validation_cache, "VALIDATION_CACHE_ENABLED", False)
+        remember_validation(_IDEA, "mobile_app", None, _RESULT)
+        monkeypatch.setattr(validation_cache, "VALIDATION_CACHE_ENABLED", True)
+        assert find_cached_validation(_IDEA, "mobile_app") is None
+
+    def test_errors_are_misses(self):
+        with patch.object(SemanticValidationCache, "lookup", side_effect=RuntimeError("disk")), \
+                patch.object(SemanticValidationCache, "store", side_effect=RuntimeError("disk")):
+            remember_validation(_IDEA, "mobile_app", None, _RESULT)
+            assert find_cached_validation(_IDEA, "mobile_app") is None
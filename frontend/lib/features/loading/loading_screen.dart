@@ -60,6 +60,7 @@ class _LoadingScreenState extends State<LoadingScreen>
   bool _wasBackgrounded = false;
   String _errorMessage = '';
   String? _jobId;
+  Map<String, dynamic>? _similar; // an earlier validation of a similar idea, offered by the backend
   Timer? _pollTimer;
   bool _isPolling = false;
   int _completedSyncAttempts = 0;
@@ -272,6 +273,25 @@ class _LoadingScreenState extends State<LoadingScreen>
         }
       });
       _animateTo((stepIdx + 0.5) / _totalSteps);
+    } else if (event.event == 'partial') {
+      // Streamed agent insight (a pain point, an MVP feature): show it live
+      final stepIdx = ((event.data['step'] as int?) ?? 0) - 1;
+      final item = event.data['item'];
+      final text = item is String
+          ? item
+          : (item is Map ? item['name'] as String? : null);
+      if (text != null && stepIdx >= 0 && stepIdx < _stepMessages.length) {
+        setState(() => _stepMessages[stepIdx] = text);
+      }
+    } else if (event.event == 'similar') {
+      // A similar idea was validated recently: offer its result, keep running
+      setState(() => _similar = event.data);
+    } else if (event.event == 'cached') {
+      // The same idea was validated recently: its result follows
+      final idea = event.data['idea'] as String? ?? '';
+      if (_stepMessages.isNotEmpty) {
+        setState(() => _stepMessages[0] = 'Matched a recent validation of “$idea”');
+      }
     } else if (event.event == 'result') {
       _hasResult = true;
       setState(() {
@@ -400,6 +420,60 @@ class _LoadingScreenState extends State<LoadingScreen>
     return null;
   }
 
+  Future<void> _useSimilarResult() async {
+    final entryId = _similar?['entry_id'] as int?;
+    if (entryId == null) return;
+    final result = await ApiService.useCachedValidation(entryId);
+    if (!mounted) return;
+    if (result == null) {
+      // No longer cached: keep waiting for the fresh validation
+      setState(() => _similar = null);
+      return;
+    }
+    _hasResult = true;
+    _pollTimer?.cancel();
+    _sub?.cancel();
+    final jobId = _jobId;
+    if (jobId != null) ApiService.cancelValidationJob(jobId);
+    _saveAndNavigate(result);
+  }
+
+  Widget _buildSimilarOffer() {
+    final colors = RetroColors.of(context);
+    final idea = _similar?['idea'] as String? ?? '';
+    final score = _similar?['opportunity_score'];
+    return Container(
+      padding: const EdgeInsets.all(12),
+      decoration: BoxDecoration(
+        color: RetroTheme.mint,
+        borderRadius: BorderRadius.circular(6),
+        border: Border.all(color: colors.border, width: 2),
+        boxShadow: RetroTheme.shadowSmOf(context),
+      ),
+      child: Column(
+        crossAxisAlignment: CrossAxisAlignment.stretch,
+        children: [
+          Text(
+            'A similar idea was validated recently: “$idea”${score != null ? ' · $score/100' : ''}',
+            style: const TextStyle(
+              fontSize: 12,
+              fontWeight: FontWeight.w700,
+              color: RetroTheme.onAccent,
+              height: 1.4,
+            ),
+          ),
+          const SizedBox(height: 8),
+          RetroButton(
+            text: 'Use that result',
+            color: RetroTheme.yellow,
+            size: RetroButtonSize.small,
+            onPressed: _useSimilarResult,
+          ),
+        ],
+      ),
+    );
+  }
+
   Future<void> _saveAndNavigate(Map<String, dynamic> data) async {
     // Brief delay so the progress bar animation reaches 100% visually
     await Future.delayed(const Duration(milliseconds: 400));
@@ -490,6 +564,10 @@ class _LoadingScreenState extends State<LoadingScreen>
                     _buildProgressBar(),
                     const SizedBox(height: 28),
                     _buildStepsList(),
+                    if (_similar != null) ...[
+                      const SizedBox(height: 16),
+                      _buildSimilarOffer(),
+                    ],
                     const SizedBox(height: 16),
                     // ── Multitask hint ──
                     Row(
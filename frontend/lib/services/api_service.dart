@@ -154,6 +154,19 @@ class ApiService {
     return null;
   }
 
+  /// Take the earlier validation a `similar` stream event offered.
+  static Future<Map<String, dynamic>?> useCachedValidation(int entryId) async {
+    try {
+      final resp = await http
+          .post(Uri.parse('$_baseUrl/validate/cached/$entryId'), headers: _authHeaders)
+          .timeout(const Duration(seconds: 10));
+      if (resp.statusCode == 200) {
+        return jsonDecode(resp.body) as Map<String, dynamic>;
+      }
+    } catch (_) {}
+    return null;
+  }
+
   /// Cancel a running validation job.
   static Future<void> cancelValidationJob(String jobId) async {
     try {